@@ -0,0 +1,149 @@
+"""
+Przybliżona ocena przepływów: aproksymacja Nyströma modelu One-Class SVM.
+
+Dokładny wynik to sum(alpha_i * k(x, sv_i)) po wszystkich wektorach nośnych,
+więc koszt rośnie z rozmiarem zbioru treningowego. Aproksymacja zastępuje je
+stałą liczbą punktów orientacyjnych L (k-means na wektorach nośnych) i wag w:
+
+    f(x) ~ sum(w_j * k(x, L_j)) + b
+
+Wagi są dopasowywane metodą najmniejszych kwadratów (z regularyzacją) do
+wyników dokładnego modelu, więc nie są potrzebne dane treningowe. Ocena
+używa tego samego jądra co RBFScorer, tylko z m zamiast n_SV punktami.
+"""
+import time
+from pathlib import Path
+
+import numpy as np
+from scipy.cluster.vq import kmeans2
+
+from .svm_scorer import DEFAULT_CHUNK_SIZE, RBFScorer
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+APPROX_ARTIFACT_PATH = BASE_DIR / 'analytic_pipline' / 'one_class_svm_model_nystroem.npz'
+
+DEFAULT_COMPONENTS = 512
+SCORING_MODES = ('exact', 'approximate')
+
+# Skale szumu wokół wektorów nośnych w zbiorze dopasowania (przestrzeń po skalowaniu)
+_NOISE_SCALES = (0.05, 0.2, 0.5, 1.0)
+
+
+def sample_scaled_points(artifact, samples, seed=0):
+    """
+    Punkty w przestrzeni po skalowaniu do dopasowania i oceny aproksymacji:
+    wektory nośne z szumem o różnej skali (okolice granicy decyzyjnej) oraz
+    przepływy losowane z kwantyli cech (w większości anomalie).
+    """
+    rng = np.random.default_rng(seed)
+    sv = np.asarray(artifact.support_vectors)
+    near = samples - samples // 4
+    noise = rng.normal(0, 1, (near, sv.shape[1])) * rng.choice(_NOISE_SCALES, (near, 1))
+    points = [sv[rng.integers(0, len(sv), near)] + noise]
+    if artifact.quantiles is not None:
+        quantiles = artifact.quantiles
+        rows = rng.integers(0, len(quantiles), (samples - near, artifact.n_features))
+        points.append(artifact.transform(quantiles[rows, np.arange(artifact.n_features)]))
+    return np.vstack(points)
+
+
+def fit_nystroem(artifact, n_components=DEFAULT_COMPONENTS, samples=20000, seed=0, ridge=1e-6,
+                 chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Dopasowuje aproksymację Nyströma do dokładnego modelu.
+
+    Args:
+        artifact: ModelArtifact z dokładnym modelem
+        n_components: Liczba punktów orientacyjnych (koszt oceny jednego przepływu)
+        samples: Liczba punktów dopasowania (oprócz samych wektorów nośnych)
+        seed: Seed losowania punktów i k-means
+        ridge: Regularyzacja układu równań normalnych
+
+    Returns:
+        dict: Tablice 'landmarks', 'weights', 'intercept', 'gamma'
+    """
+    sv = np.asarray(artifact.support_vectors, dtype=np.float64)
+    n_components = min(n_components, len(sv))
+    landmarks, _ = kmeans2(sv, n_components, minit='++', seed=seed)
+
+    points = np.vstack([sv, sample_scaled_points(artifact, samples, seed=seed + 1)])
+    exact = RBFScorer(artifact, chunk_size=chunk_size)
+    target = exact.decision_function(points, scaled=True) - artifact.intercept
+
+    # Równania normalne dla cech k(x, L), liczone blokami
+    features = RBFScorer(artifact, chunk_size=chunk_size, support_vectors=landmarks,
+                         dual_coef=np.zeros(n_components))
+    gram = np.zeros((n_components, n_components))
+    rhs = np.zeros(n_components)
+    for start in range(0, len(points), chunk_size):
+        block = features.kernel(points[start:start + chunk_size])
+        gram += block.T @ block
+        rhs += block.T @ target[start:start + chunk_size]
+    gram[np.diag_indices_from(gram)] += ridge * max(np.trace(gram) / n_components, 1.0)
+    weights = np.linalg.solve(gram, rhs)
+
+    return {
+        'landmarks': landmarks,
+        'weights': weights,
+        'intercept': np.array([artifact.intercept]),
+        'gamma': np.array([artifact.gamma]),
+    }
+
+
+def approx_scorer(artifact, arrays, chunk_size=DEFAULT_CHUNK_SIZE, dtype='float64'):
+    """Scorer oceniający przepływy punktami orientacyjnymi zamiast wektorami nośnymi."""
+    if not np.isclose(float(arrays['gamma'][0]), artifact.gamma):
+        raise ValueError("Aproksymacja została dopasowana do innego modelu (inne gamma)")
+    return RBFScorer(artifact, chunk_size=chunk_size, dtype=dtype,
+                     support_vectors=arrays['landmarks'], dual_coef=arrays['weights'],
+                     intercept=float(arrays['intercept'][0]))
+
+
+def evaluate_approximation(exact_scorer, approximate_scorer, X, scaled=False):
+    """
+    Porównuje scorer przybliżony z dokładnym. Klasą pozytywną jest atak (etykieta -1).
+
+    Returns:
+        dict: precision, recall, agreement, mean_abs_error, czasy i przyspieszenie
+    """
+    started = time.perf_counter()
+    exact = exact_scorer.decision_function(X, scaled=scaled)
+    exact_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    approx = approximate_scorer.decision_function(X, scaled=scaled)
+    approx_seconds = time.perf_counter() - started
+
+    exact_attack = RBFScorer.labels(exact) == -1
+    approx_attack = RBFScorer.labels(approx) == -1
+    true_positive = int(np.sum(exact_attack & approx_attack))
+    predicted = int(approx_attack.sum())
+    actual = int(exact_attack.sum())
+    return {
+        'samples': len(exact),
+        'attacks': actual,
+        'precision': true_positive / predicted if predicted else 1.0,
+        'recall': true_positive / actual if actual else 1.0,
+        'agreement': float(np.mean(exact_attack == approx_attack)),
+        'mean_abs_error': float(np.mean(np.abs(approx - exact))),
+        'exact_seconds': exact_seconds,
+        'approx_seconds': approx_seconds,
+        'speedup': exact_seconds / approx_seconds if approx_seconds else float('inf'),
+    }
+
+
+def save_approximation(path, arrays, metrics=None):
+    """Zapisuje aproksymację (i opcjonalnie jej metryki) do pliku .npz."""
+    extra = {f"metric_{name}": np.array(value) for name, value in (metrics or {}).items()}
+    np.savez(path, **arrays, **extra)
+
+
+def load_approximation(path=APPROX_ARTIFACT_PATH):
+    """
+    Returns:
+        tuple: (tablice aproksymacji, zapisane metryki)
+    """
+    with np.load(path) as data:
+        arrays = {name: data[name] for name in ('landmarks', 'weights', 'intercept', 'gamma')}
+        metrics = {name[len('metric_'):]: data[name].item()
+                   for name in data.files if name.startswith('metric_')}
+    return arrays, metrics
@@ -1,5 +1,13 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class AnalyticPiplineConfig(AppConfig):
     name = 'analytic_pipline'
+
+    def ready(self):
+        # Serwery i run_analysis_workers ładują model same; tu tylko na życzenie,
+        # żeby migrate/test/scan_pcaps nie płaciły za model, którego nie używają
+        if getattr(settings, 'ANALYTICS_PRELOAD_MODEL', False):
+            from .model_artifact import preload_model_artifact
+            preload_model_artifact()
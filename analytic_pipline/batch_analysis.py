@@ -0,0 +1,276 @@
+"""
+Analiza offline katalogów plików .pcap (manage.py analyze_pcaps).
+
+Pliki są rozdzielane na pulę procesów: każdy worker liczy cechy przepływów
+(extract_flows) i ocenia je współdzielonym modelem .npz, a do procesu
+głównego odsyła tylko wiersze potrzebne dalej - ataki (zapis do bazy) albo
+wszystkie wyniki (tryb dry-run). Proces główny zapisuje alerty partiami
+jednym bulk_create i odnotowuje każdy plik w katalogu PcapFile, więc po
+przerwaniu analiza wznawia się od plików jeszcze nieprzeanalizowanych.
+"""
+import glob
+import multiprocessing
+import os
+import time
+import traceback
+
+import numpy as np
+import pandas as pd
+from django.db import connections
+
+from .flow_features import META_COLUMNS
+from .models import PcapFile
+
+# Kolumny wyników w trybie dry-run
+SCORE_COLUMNS = ['pcap_file'] + META_COLUMNS + ['score', 'label']
+# Lista plików bez przepływów obok pliku CSV (nie mają w nim wierszy)
+EMPTY_LIST_SUFFIX = '.empty'
+
+_PATH_QUERY_CHUNK = 500
+
+
+def collect_pcaps(target, pattern='*.pcap', recursive=False):
+    """
+    Lista plików do analizy: katalog (filtrowany wzorcem) albo wzorzec glob.
+
+    Returns:
+        list: Posortowane ścieżki bezwzględne
+    """
+    if os.path.isdir(target):
+        target = os.path.join(target, '**', pattern) if recursive else os.path.join(target, pattern)
+    paths = (os.path.abspath(path) for path in glob.glob(target, recursive=recursive))
+    return sorted(path for path in paths if os.path.isfile(path))
+
+
+def analyzed_paths(paths):
+    """
+    Pliki już przeanalizowane według katalogu PcapFile, o niezmienionym
+    rozmiarze i czasie modyfikacji.
+    """
+    done = set()
+    for i in range(0, len(paths), _PATH_QUERY_CHUNK):
+        rows = (PcapFile.objects.filter(path__in=paths[i:i + _PATH_QUERY_CHUNK],
+                                        status=PcapFile.Status.ANALYZED)
+                .values_list('path', 'size_bytes', 'mtime_ns'))
+        for path, size, mtime_ns in rows:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if (st.st_size, st.st_mtime_ns) == (size, mtime_ns):
+                done.add(path)
+    return done
+
+
+def _init_worker():
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+def score_pcap(path, attacks_only=True):
+    """
+    Liczy cechy i ocenia przepływy jednego pliku (wywoływane w workerze).
+
+    Returns:
+        dict: path, flows, attacks, rows (DataFrame ataków lub wszystkich
+            przepływów z kolumnami score/label), error
+    """
+    from .traffic_predictor import extract_flows, score_flow_df
+
+    result = {'path': path, 'flows': 0, 'attacks': 0, 'rows': None, 'error': None}
+    try:
+        df = extract_flows(path)
+        if df is None or df.empty:
+            return result
+        scored = score_flow_df(df)
+        if scored is None:
+            result['error'] = 'Model not loaded'
+            return result
+        labels, scores = np.asarray(scored[0]), np.asarray(scored[1])
+        attacks = labels == -1
+        result['flows'] = len(df)
+        result['attacks'] = int(attacks.sum())
+        selected = attacks if attacks_only else np.ones(len(df), dtype=bool)
+        result['rows'] = df[selected].assign(score=scores[selected], label=labels[selected])
+    except Exception:
+        result['error'] = traceback.format_exc()
+    return result
+
+
+def _score_pcap_all(path):
+    return score_pcap(path, attacks_only=False)
+
+
+def iter_scored(paths, workers=1, func=score_pcap):
+    """
+    Ocenia pliki w puli procesów; wyniki w kolejności zakończenia.
+
+    Args:
+        paths: Ścieżki plików .pcap
+        workers: Liczba procesów (1 = bieżący proces)
+        func: Funkcja oceniająca jeden plik (musi dać się zserializować pickle)
+    """
+    if workers <= 1 or len(paths) <= 1:
+        for path in paths:
+            yield func(path)
+        return
+    # Połączenia z bazą nie mogą być współdzielone z procesami potomnymi
+    connections.close_all()
+    with multiprocessing.Pool(workers, initializer=_init_worker) as pool:
+        yield from pool.imap_unordered(func, paths, chunksize=4)
+
+
+class AlertSink:
+    """
+    Zbiera ataki z kolejnych plików i zapisuje je partiami (save_attacks_to_db),
+    a po zapisie odnotowuje pliki w katalogu PcapFile.
+
+    Args:
+        batch_rows: Liczba wierszy ataków, po której partia jest zapisywana
+    """
+
+    def __init__(self, batch_rows=5000):
+        self.batch_rows = batch_rows
+        self.saved_alerts = 0
+        self._frames = []
+        self._rows = 0
+        self._files = []
+
+    def add(self, result):
+        if result['rows'] is not None and len(result['rows']):
+            self._frames.append(result['rows'])
+            self._rows += len(result['rows'])
+        self._files.append(result)
+        if self._rows >= self.batch_rows:
+            self.flush()
+
+    def flush(self):
+        from .pcap_catalog import record_analysis
+        from .traffic_predictor import save_attacks_to_db
+
+        if self._frames:
+            rows = pd.concat(self._frames, ignore_index=True)
+            self.saved_alerts += len(save_attacks_to_db(rows, rows['score'].to_numpy()))
+        for result in self._files:
+            summary = None if result['error'] else {'flows': result['flows'],
+                                                    'attacks': result['attacks']}
+            record_analysis(result['path'], summary, result['error'])
+        self._frames, self._rows, self._files = [], 0, []
+
+
+class ScoreFileSink:
+    """
+    Tryb dry-run: wyniki wszystkich przepływów trafiają do pliku .csv
+    (dopisywanego po każdym pliku) albo .parquet (zapisywanego na końcu).
+    Pliki bez przepływów są dopisywane do listy <output>.empty, więc
+    wznowienie ich nie powtarza. Baza danych nie jest modyfikowana.
+    """
+
+    def __init__(self, output):
+        self.output = output
+        self.parquet = output.endswith('.parquet')
+        self.saved_alerts = 0
+        self._frames = []
+        self._header = not os.path.exists(output) or os.path.getsize(output) == 0
+        self._empty_list = output + EMPTY_LIST_SUFFIX
+
+    def done_paths(self):
+        """Pliki zapisane już w istniejącym pliku CSV lub na liście plików bez przepływów."""
+        if self.parquet:
+            return set()
+        done = set()
+        if not self._header:
+            done.update(pd.read_csv(self.output, usecols=['pcap_file'])['pcap_file'])
+        if os.path.exists(self._empty_list):
+            with open(self._empty_list) as f:
+                done.update(line.rstrip('\n') for line in f if line.strip())
+        return done
+
+    def add(self, result):
+        rows = result['rows']
+        if rows is None or not len(rows):
+            # Błąd (np. brak modelu) nie jest zapisywany - plik zostanie oceniony ponownie
+            if result['error'] is None and not self.parquet:
+                with open(self._empty_list, 'a') as f:
+                    f.write(result['path'] + '\n')
+            return
+        rows = rows.assign(pcap_file=result['path'])[SCORE_COLUMNS]
+        if self.parquet:
+            self._frames.append(rows)
+            return
+        rows.to_csv(self.output, mode='a', header=self._header, index=False)
+        self._header = False
+
+    def flush(self):
+        if self.parquet and self._frames:
+            pd.concat(self._frames, ignore_index=True).to_parquet(self.output, index=False)
+            self._frames = []
+
+
+class Progress:
+    """Licznik postępu: pliki, przepływy, ataki i przepustowość."""
+
+    def __init__(self, total):
+        self.total = total
+        self.files = 0
+        self.flows = 0
+        self.attacks = 0
+        self.errors = 0
+        self.started = time.perf_counter()
+
+    def add(self, result):
+        self.files += 1
+        self.flows += result['flows']
+        self.attacks += result['attacks']
+        self.errors += result['error'] is not None
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def line(self):
+        elapsed = max(self.elapsed, 1e-9)
+        return (f"[{self.files}/{self.total}] {self.flows} przepływów, {self.attacks} ataków, "
+                f"{self.errors} błędów | {self.files / elapsed:.1f} files/s "
+                f"{self.flows / elapsed:.0f} flows/s")
+
+
+def analyze_pcaps(paths, workers=1, dry_run_output=None, resume=True, batch_rows=5000,
+                  on_progress=None):
+    """
+    Analizuje pliki i zapisuje alerty (albo wyniki do pliku w trybie dry-run).
+
+    Args:
+        paths: Ścieżki plików .pcap
+        workers: Liczba procesów puli
+        dry_run_output: Plik .csv/.parquet na wyniki zamiast zapisu do bazy
+        resume: Pomiń pliki już przeanalizowane (katalog PcapFile lub istniejący CSV)
+        batch_rows: Rozmiar partii zapisu alertów
+        on_progress: Funkcja wołana z Progress po każdym pliku
+
+    Returns:
+        tuple: (Progress, liczba pominiętych plików, liczba zapisanych alertów)
+    """
+    if dry_run_output:
+        sink = ScoreFileSink(dry_run_output)
+        done = sink.done_paths() if resume else set()
+        func = _score_pcap_all
+    else:
+        sink = AlertSink(batch_rows)
+        done = analyzed_paths(paths) if resume else set()
+        func = score_pcap
+    todo = [path for path in paths if path not in done]
+
+    progress = Progress(len(todo))
+    try:
+        for result in iter_scored(todo, workers, func):
+            sink.add(result)
+            progress.add(result)
+            if on_progress is not None:
+                on_progress(progress)
+    finally:
+        # Także po przerwaniu - zapisane pliki nie będą analizowane ponownie
+        sink.flush()
+    return progress, len(paths) - len(todo), sink.saved_alerts
@@ -0,0 +1,304 @@
+"""
+Wbudowany ekstraktor cech przepływów (zamiennik CICFlowMeter -> CSV -> pandas).
+
+Pakiety są zamieniane na tablicę NumPy (PACKET_DTYPE), grupowane po
+dwukierunkowej czwórce (ip, port) i liczone wektorowo: statystyki długości,
+IAT i idle potrzebne modelowi (FEATURE_MAP). Bez plików tymczasowych, wątków
+i parsowania CSV.
+
+Tryb ``compat=True`` (domyślny) odtwarza zachowanie cicflowmeter 0.5.0, na
+którym działa pipeline: pierwszy pakiet przepływu liczony jest dwukrotnie,
+a statystyki idle zawsze wynoszą 0. ``compat=False`` liczy cechy "czysto":
+bez duplikatu i z okresami idle dłuższymi niż ACTIVE_TIMEOUT.
+"""
+import socket
+import struct
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from scapy.utils import RawPcapReader
+
+# Mapowanie cech z CICFlowMeter na używane w modelu
+FEATURE_MAP = {
+    'bwd_pkt_len_std':   ' Bwd Packet Length Std',
+    'bwd_pkt_len_max':   'Bwd Packet Length Max',
+    'bwd_pkt_len_mean':  ' Bwd Packet Length Mean',
+    'bwd_seg_size_avg':  ' Avg Bwd Segment Size',
+    'pkt_len_std':       ' Packet Length Std',
+    'pkt_len_max':       ' Max Packet Length',
+    'pkt_len_var':       ' Packet Length Variance',
+    'pkt_size_avg':      ' Average Packet Size',
+    'pkt_len_mean':      ' Packet Length Mean',
+    'fwd_iat_std':       ' Fwd IAT Std',
+    'idle_max':         ' Idle Max',
+    'flow_iat_max':     ' Flow IAT Max',
+    'idle_mean':        'Idle Mean',
+    'fwd_iat_max':      ' Fwd IAT Max',
+    'idle_min':         ' Idle Min',
+    'flow_iat_std':     ' Flow IAT Std'
+}
+FEATURE_COLUMNS = list(FEATURE_MAP.keys())
+
+# Stałe czasowe jak w cicflowmeter.constants
+EXPIRED_UPDATE = 240
+ACTIVE_TIMEOUT = 5
+
+IPPROTO_TCP = 6
+IPPROTO_UDP = 17
+
+PACKET_DTYPE = np.dtype([
+    ('ts', 'f8'),
+    ('src_ip', 'u4'),
+    ('dst_ip', 'u4'),
+    ('src_port', 'u2'),
+    ('dst_port', 'u2'),
+    ('proto', 'u1'),
+    ('flags', 'u1'),
+    ('length', 'u4'),
+])
+
+META_COLUMNS = ['src_ip', 'dst_ip', 'src_port', 'dst_port', 'protocol', 'timestamp',
+                'flow_duration', 'tot_fwd_pkts', 'tot_bwd_pkts',
+                'totlen_fwd_pkts', 'totlen_bwd_pkts']
+
+_ETHERTYPE_IPV4 = 0x0800
+_ETHERTYPE_VLAN = 0x8100
+_IPV4_ADDRS = struct.Struct('!II')
+_PORTS = struct.Struct('!HH')
+
+
+def parse_frame(data, ts):
+    """
+    Wyciąga z ramki Ethernet pola potrzebne do cech przepływu.
+
+    Returns:
+        tuple | None: Wiersz zgodny z PACKET_DTYPE lub None dla ramek innych niż IPv4
+    """
+    if len(data) < 34:
+        return None
+    offset = 12
+    ethertype = (data[offset] << 8) | data[offset + 1]
+    if ethertype == _ETHERTYPE_VLAN:
+        offset += 4
+        ethertype = (data[offset] << 8) | data[offset + 1]
+    if ethertype != _ETHERTYPE_IPV4:
+        return None
+    ip = offset + 2
+    ihl = (data[ip] & 0x0f) * 4
+    proto = data[ip + 9]
+    src_ip, dst_ip = _IPV4_ADDRS.unpack_from(data, ip + 12)
+    l4 = ip + ihl
+    src_port = dst_port = flags = 0
+    if proto in (IPPROTO_TCP, IPPROTO_UDP) and len(data) >= l4 + 4:
+        src_port, dst_port = _PORTS.unpack_from(data, l4)
+        if proto == IPPROTO_TCP and len(data) > l4 + 13:
+            flags = data[l4 + 13]
+    return (ts, src_ip, dst_ip, src_port, dst_port, proto, flags, len(data))
+
+
+def packets_to_table(packets):
+    """
+    Zamienia pakiety na tablicę PACKET_DTYPE.
+
+    Args:
+        packets: Pakiety Scapy, RawFrame (bytes z atrybutem time) lub krotki (ts, bytes)
+    """
+    rows = []
+    for pkt in packets:
+        if isinstance(pkt, tuple):
+            ts, data = pkt
+        else:
+            ts, data = pkt.time, bytes(pkt)
+        row = parse_frame(data, float(ts))
+        if row is not None:
+            rows.append(row)
+    return np.array(rows, dtype=PACKET_DTYPE)
+
+
+def read_pcap_table(pcap_path):
+    """
+    Czyta plik .pcap do tablicy PACKET_DTYPE (bez budowania warstw Scapy).
+
+    Klasyczne .pcap są czytane przez mmap (pcap_reader), pozostałe formaty
+    (pcapng) przez RawPcapReader.
+    """
+    from .pcap_reader import read_pcap_packets
+
+    try:
+        return read_pcap_packets(pcap_path)
+    except ValueError:
+        pass
+    rows = []
+    with RawPcapReader(pcap_path) as reader:
+        for data, meta in reader:
+            if hasattr(meta, 'tsresol'):
+                ts = ((meta.tshigh << 32) | meta.tslow) / meta.tsresol
+            else:
+                ts = meta.sec + meta.usec / (1e9 if reader.nano else 1e6)
+            row = parse_frame(data, ts)
+            if row is not None:
+                rows.append(row)
+    return np.array(rows, dtype=PACKET_DTYPE)
+
+
+def _group_stats(values, groups, n_groups, min_count):
+    """
+    Statystyki (max, min, mean, std populacyjne) wartości pogrupowanych w
+    ciągłe bloki. Grupy z liczbą wartości <= min_count dostają zera, tak jak
+    get_statistics w cicflowmeter (które wymaga co najmniej dwóch wartości).
+    """
+    counts = np.bincount(groups, minlength=n_groups)
+    valid = counts > min_count
+    safe = np.maximum(counts, 1)
+    mean = np.bincount(groups, weights=values, minlength=n_groups) / safe
+    sq = np.bincount(groups, weights=(values - mean[groups]) ** 2, minlength=n_groups)
+    std = np.sqrt(sq / safe)
+    vmax = np.zeros(n_groups)
+    vmin = np.zeros(n_groups)
+    if len(values):
+        present = np.flatnonzero(counts)
+        starts = np.concatenate(([0], np.cumsum(counts[present])[:-1]))
+        vmax[present] = np.maximum.reduceat(values, starts)
+        vmin[present] = np.minimum.reduceat(values, starts)
+    zero = ~valid
+    for arr in (vmax, vmin, mean, std):
+        arr[zero] = 0.0
+    return vmax, vmin, mean, std
+
+
+def _int_to_ip(values):
+    return [socket.inet_ntoa(int(v).to_bytes(4, 'big')) for v in values]
+
+
+def extract_flow_features(table, compat=True):
+    """
+    Liczy cechy przepływów z tablicy pakietów.
+
+    Args:
+        table: Tablica PACKET_DTYPE (kolejność jak w pliku)
+        compat: Odtwarzaj zachowanie cicflowmeter 0.5.0
+
+    Returns:
+        DataFrame: Jeden wiersz na przepływ - META_COLUMNS + FEATURE_COLUMNS
+    """
+    table = table[np.isin(table['proto'], (IPPROTO_TCP, IPPROTO_UDP))]
+    n = len(table)
+    if n == 0:
+        return pd.DataFrame(columns=META_COLUMNS + FEATURE_COLUMNS)
+
+    # Klucz dwukierunkowy: posortowana para (ip << 16 | port)
+    a = (table['src_ip'].astype(np.uint64) << np.uint64(16)) | table['src_port']
+    b = (table['dst_ip'].astype(np.uint64) << np.uint64(16)) | table['dst_port']
+    lo = np.minimum(a, b)
+    hi = np.maximum(a, b)
+    order = np.lexsort((np.arange(n), hi, lo))
+    lo, hi, ts = lo[order], hi[order], table['ts'][order]
+
+    new_flow = np.ones(n, dtype=bool)
+    new_flow[1:] = (lo[1:] != lo[:-1]) | (hi[1:] != hi[:-1]) | (np.diff(ts) > EXPIRED_UPDATE)
+    starts = np.flatnonzero(new_flow)
+
+    if compat:
+        # cicflowmeter dodaje pierwszy pakiet przepływu dwukrotnie
+        order = np.insert(order, starts, order[starts])
+        starts = starts + np.arange(len(starts))
+        new_flow = np.zeros(len(order), dtype=bool)
+        new_flow[starts] = True
+
+    pkts = table[order]
+    total = len(pkts)
+    n_flows = len(starts)
+    counts = np.diff(np.append(starts, total))
+    flow_id = np.repeat(np.arange(n_flows), counts)
+    ts = pkts['ts']
+    length = pkts['length'].astype(np.float64)
+
+    # Kierunek "forward" wyznacza pierwszy pakiet przepływu
+    fwd = (pkts['src_ip'] == pkts['src_ip'][starts][flow_id]) & \
+          (pkts['src_port'] == pkts['src_port'][starts][flow_id])
+    bwd = ~fwd
+
+    # Długości pakietów
+    pkt_len_mean = np.add.reduceat(length, starts) / counts
+    pkt_len_var = np.add.reduceat((length - pkt_len_mean[flow_id]) ** 2, starts) / counts
+    pkt_len_max = np.maximum.reduceat(length, starts)
+
+    n_bwd = np.add.reduceat(bwd.astype(np.int64), starts)
+    n_fwd = counts - n_bwd
+    bwd_len = length * bwd
+    bwd_total = np.add.reduceat(bwd_len, starts)
+    bwd_mean = np.divide(bwd_total, n_bwd, out=np.zeros(n_flows), where=n_bwd > 0)
+    bwd_var = np.divide(np.add.reduceat(bwd * (length - bwd_mean[flow_id]) ** 2, starts), n_bwd,
+                        out=np.zeros(n_flows), where=n_bwd > 0)
+    bwd_max = np.maximum.reduceat(bwd_len, starts)
+
+    # IAT całego przepływu
+    inner = ~new_flow[1:]
+    flow_iat = np.diff(ts)[inner]
+    flow_iat_groups = flow_id[1:][inner]
+    flow_iat_max, _, _, flow_iat_std = _group_stats(flow_iat, flow_iat_groups, n_flows, 1)
+
+    # IAT w kierunku forward
+    fwd_idx = np.flatnonzero(fwd)
+    fwd_groups = flow_id[fwd_idx]
+    same = fwd_groups[1:] == fwd_groups[:-1]
+    fwd_iat = np.diff(ts[fwd_idx])[same]
+    fwd_iat_max, _, _, fwd_iat_std = _group_stats(fwd_iat, fwd_groups[1:][same], n_flows, 1)
+
+    # Okresy bezczynności
+    if compat:
+        idle_max = idle_min = idle_mean = np.zeros(n_flows)
+    else:
+        idle = flow_iat > ACTIVE_TIMEOUT
+        idle_max, idle_min, idle_mean, _ = _group_stats(
+            flow_iat[idle], flow_iat_groups[idle], n_flows, 0)
+
+    first = pkts[starts]
+    bwd_std = np.sqrt(bwd_var)
+    return pd.DataFrame({
+        'src_ip': _int_to_ip(first['src_ip']),
+        'dst_ip': _int_to_ip(first['dst_ip']),
+        'src_port': first['src_port'].astype(np.int64),
+        'dst_port': first['dst_port'].astype(np.int64),
+        'protocol': first['proto'].astype(np.int64),
+        'timestamp': [datetime.fromtimestamp(t).strftime('%Y-%m-%d %H:%M:%S') for t in first['ts']],
+        'flow_duration': np.maximum.reduceat(ts, starts) - first['ts'],
+        'tot_fwd_pkts': n_fwd,
+        'tot_bwd_pkts': n_bwd,
+        'totlen_fwd_pkts': np.add.reduceat(length * fwd, starts),
+        'totlen_bwd_pkts': bwd_total,
+        'bwd_pkt_len_std': bwd_std,
+        'bwd_pkt_len_max': bwd_max,
+        'bwd_pkt_len_mean': bwd_mean,
+        'bwd_seg_size_avg': bwd_mean,
+        'pkt_len_std': np.sqrt(pkt_len_var),
+        'pkt_len_max': pkt_len_max,
+        'pkt_len_var': pkt_len_var,
+        'pkt_size_avg': pkt_len_mean,
+        'pkt_len_mean': pkt_len_mean,
+        'fwd_iat_std': fwd_iat_std,
+        'idle_max': idle_max,
+        'flow_iat_max': flow_iat_max,
+        'idle_mean': idle_mean,
+        'fwd_iat_max': fwd_iat_max,
+        'idle_min': idle_min,
+        'flow_iat_std': flow_iat_std,
+    })
+
+
+def packets_to_flow_df(packets, compat=True):
+    """Cechy przepływów prosto z pakietów w pamięci."""
+    return extract_flow_features(packets_to_table(packets), compat=compat)
+
+
+def pcap_to_flow_df(pcap_path, compat=True):
+    """Cechy przepływów z pliku .pcap - wbudowany odpowiednik packets_to_cic_df."""
+    return extract_flow_features(read_pcap_table(pcap_path), compat=compat)
+
+
+def feature_matrix(df):
+    """Macierz cech modelu (kolejność FEATURE_COLUMNS, inf/NaN -> 0)."""
+    X = df[FEATURE_COLUMNS].to_numpy(dtype=np.float64, copy=True)
+    X[~np.isfinite(X)] = 0.0
+    return X
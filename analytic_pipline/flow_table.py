@@ -0,0 +1,288 @@
+"""
+Tablica przepływów na żywo: cechy liczone przyrostowo, pakiet po pakiecie.
+
+Każdy pakiet aktualizuje stan swojego przepływu w O(1) - statystyki długości,
+IAT i idle są liczone algorytmem Welforda (liczba, średnia, suma kwadratów
+odchyleń, min, max), więc pakiety nie są przechowywane. Przepływ jest
+zamykany po RST, po FIN w obu kierunkach (z krótkim oczekiwaniem na końcowy
+ACK) albo po czasie bezczynności, i dopiero wtedy emituje wiersz z cechami
+FEATURE_MAP - ten sam co extract_flow_features dla tych samych pakietów.
+
+Przepływy są trzymane w OrderedDict w kolejności ostatniej aktywności, więc
+wygaszanie przegląda tylko przepływy, które faktycznie wygasły.
+"""
+import math
+from collections import OrderedDict
+from datetime import datetime
+
+import pandas as pd
+
+from .flow_features import (
+    ACTIVE_TIMEOUT, EXPIRED_UPDATE, FEATURE_COLUMNS, IPPROTO_TCP, IPPROTO_UDP, META_COLUMNS,
+    _int_to_ip, parse_frame,
+)
+
+# Czas oczekiwania na końcowy ACK po FIN w obu kierunkach (sekundy)
+FIN_LINGER = 1.0
+
+TCP_FIN = 0x01
+TCP_RST = 0x04
+
+CLOSE_REASONS = ('fin', 'rst', 'idle', 'flush')
+
+
+class RunningStats:
+    """Statystyki strumienia wartości (Welford): mean, wariancja populacyjna, min, max."""
+
+    __slots__ = ('count', 'mean', 'm2', 'min', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def var(self):
+        return self.m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.var)
+
+
+class _Flow:
+    """Stan jednego przepływu; kierunek forward wyznacza pierwszy pakiet."""
+
+    __slots__ = ('key', 'src_ip', 'dst_ip', 'src_port', 'dst_port', 'proto', 'first_ts',
+                 'last_ts', 'max_ts', 'last_fwd_ts', 'fwd_pkts', 'bwd_pkts', 'fwd_bytes',
+                 'bwd_bytes', 'lengths', 'bwd_lengths', 'flow_iat', 'fwd_iat', 'idle',
+                 'fin_fwd', 'fin_bwd', 'compat')
+
+    def __init__(self, key, row, compat):
+        ts, src_ip, dst_ip, src_port, dst_port, proto = row[:6]
+        self.key = key
+        self.src_ip, self.dst_ip = src_ip, dst_ip
+        self.src_port, self.dst_port = src_port, dst_port
+        self.proto = proto
+        self.first_ts = self.max_ts = ts
+        self.last_ts = self.last_fwd_ts = None
+        self.fwd_pkts = self.bwd_pkts = 0
+        self.fwd_bytes = self.bwd_bytes = 0
+        self.lengths = RunningStats()
+        self.bwd_lengths = RunningStats()
+        self.flow_iat = RunningStats()
+        self.fwd_iat = RunningStats()
+        self.idle = RunningStats()
+        self.fin_fwd = self.fin_bwd = False
+        self.compat = compat
+
+    @property
+    def finished(self):
+        return self.fin_fwd and self.fin_bwd
+
+    def add(self, ts, src_ip, src_port, flags, length):
+        forward = src_ip == self.src_ip and src_port == self.src_port
+        if self.last_ts is not None:
+            iat = ts - self.last_ts
+            self.flow_iat.add(iat)
+            if not self.compat and iat > ACTIVE_TIMEOUT:
+                self.idle.add(iat)
+        self.last_ts = ts
+        if ts > self.max_ts:
+            self.max_ts = ts
+        self.lengths.add(length)
+        if forward:
+            self.fwd_pkts += 1
+            self.fwd_bytes += length
+            if self.last_fwd_ts is not None:
+                self.fwd_iat.add(ts - self.last_fwd_ts)
+            self.last_fwd_ts = ts
+            self.fin_fwd |= bool(flags & TCP_FIN)
+        else:
+            self.bwd_pkts += 1
+            self.bwd_bytes += length
+            self.bwd_lengths.add(length)
+            self.fin_bwd |= bool(flags & TCP_FIN)
+
+    def row(self):
+        """Wiersz META_COLUMNS + FEATURE_COLUMNS (jak w extract_flow_features)."""
+        lengths, bwd = self.lengths, self.bwd_lengths
+        # get_statistics z cicflowmeter wymaga co najmniej dwóch wartości
+        flow_iat = self.flow_iat if self.flow_iat.count > 1 else None
+        fwd_iat = self.fwd_iat if self.fwd_iat.count > 1 else None
+        idle = self.idle if self.idle.count else None
+        bwd_mean = bwd.mean if bwd.count else 0.0
+        src_ip, dst_ip = _int_to_ip((self.src_ip, self.dst_ip))
+        return {
+            'src_ip': src_ip,
+            'dst_ip': dst_ip,
+            'src_port': int(self.src_port),
+            'dst_port': int(self.dst_port),
+            'protocol': int(self.proto),
+            'timestamp': datetime.fromtimestamp(self.first_ts).strftime('%Y-%m-%d %H:%M:%S'),
+            'flow_duration': self.max_ts - self.first_ts,
+            'tot_fwd_pkts': self.fwd_pkts,
+            'tot_bwd_pkts': self.bwd_pkts,
+            'totlen_fwd_pkts': float(self.fwd_bytes),
+            'totlen_bwd_pkts': float(self.bwd_bytes),
+            'bwd_pkt_len_std': bwd.std,
+            'bwd_pkt_len_max': bwd.max if bwd.count else 0.0,
+            'bwd_pkt_len_mean': bwd_mean,
+            'bwd_seg_size_avg': bwd_mean,
+            'pkt_len_std': lengths.std,
+            'pkt_len_max': lengths.max,
+            'pkt_len_var': lengths.var,
+            'pkt_size_avg': lengths.mean,
+            'pkt_len_mean': lengths.mean,
+            'fwd_iat_std': fwd_iat.std if fwd_iat else 0.0,
+            'idle_max': idle.max if idle else 0.0,
+            'flow_iat_max': flow_iat.max if flow_iat else 0.0,
+            'idle_mean': idle.mean if idle else 0.0,
+            'fwd_iat_max': fwd_iat.max if fwd_iat else 0.0,
+            'idle_min': idle.min if idle else 0.0,
+            'flow_iat_std': flow_iat.std if flow_iat else 0.0,
+        }
+
+
+class FlowTable:
+    """
+    Przyrostowa tablica przepływów kluczowana dwukierunkową piątką
+    (protokół, ip, port). Zamknięte przepływy są zbierane do wywołania
+    expire() / flush(), które zwracają ich wiersze cech.
+
+    Args:
+        idle_timeout: Przepływ bez pakietów dłużej niż tyle sekund jest zamykany
+            (przerwa dłuższa niż idle_timeout rozpoczyna nowy przepływ)
+        fin_linger: Czas oczekiwania na końcowe pakiety po FIN w obu kierunkach
+        compat: Cechy jak w cicflowmeter 0.5.0 (zob. flow_features)
+    """
+
+    def __init__(self, idle_timeout=EXPIRED_UPDATE, fin_linger=FIN_LINGER, compat=True):
+        if idle_timeout <= 0:
+            raise ValueError(f"idle_timeout musi być dodatni: {idle_timeout}")
+        self.idle_timeout = idle_timeout
+        self.fin_linger = fin_linger
+        self.compat = compat
+        self._flows = OrderedDict()
+        self._closing = OrderedDict()
+        self._closed = []
+        self.last_seen = None
+        self.packets = 0
+        self.closed_by = dict.fromkeys(CLOSE_REASONS, 0)
+
+    def __len__(self):
+        return len(self._flows)
+
+    def _close(self, flow, reason):
+        self._flows.pop(flow.key, None)
+        self._closing.pop(flow.key, None)
+        self.closed_by[reason] += 1
+        self._closed.append(flow.row())
+
+    def add_packet(self, row):
+        """
+        Dodaje pakiet w postaci wiersza PACKET_DTYPE
+        (ts, src_ip, dst_ip, src_port, dst_port, proto, flags, length).
+        """
+        ts, src_ip, dst_ip, src_port, dst_port, proto, flags, length = row
+        if proto != IPPROTO_TCP and proto != IPPROTO_UDP:
+            return
+        self.packets += 1
+        if self.last_seen is None or ts > self.last_seen:
+            self.last_seen = ts
+
+        a = (src_ip << 16) | src_port
+        b = (dst_ip << 16) | dst_port
+        key = (proto, a, b) if a <= b else (proto, b, a)
+        flow = self._flows.get(key)
+        if flow is not None:
+            gap = ts - flow.last_ts
+            if gap > self.idle_timeout or (flow.finished and gap > self.fin_linger):
+                self._close(flow, 'fin' if flow.finished else 'idle')
+                flow = None
+        if flow is None:
+            flow = _Flow(key, row, self.compat)
+            self._flows[key] = flow
+            if self.compat:
+                # cicflowmeter dodaje pierwszy pakiet przepływu dwukrotnie
+                flow.add(ts, src_ip, src_port, flags, length)
+        else:
+            self._flows.move_to_end(key)
+
+        flow.add(ts, src_ip, src_port, flags, length)
+        if proto == IPPROTO_TCP:
+            if flags & TCP_RST:
+                self._close(flow, 'rst')
+            elif flow.finished:
+                self._closing[key] = flow
+                self._closing.move_to_end(key)
+
+    def add_frames(self, packets):
+        """Dodaje pakiety Scapy, RawFrame lub krotki (ts, bytes)."""
+        for pkt in packets:
+            if isinstance(pkt, tuple):
+                ts, data = pkt
+            else:
+                ts, data = pkt.time, bytes(pkt)
+            row = parse_frame(data, float(ts))
+            if row is not None:
+                self.add_packet(row)
+
+    def add_table(self, table):
+        """Dodaje pakiety z tablicy PACKET_DTYPE (np. read_pcap_table, iter_pcap_tables)."""
+        for row in table.tolist():
+            self.add_packet(row)
+
+    def expire(self, now=None):
+        """
+        Zamyka przepływy po FIN (po fin_linger) i bezczynne (po idle_timeout).
+
+        Args:
+            now: Bieżący czas (domyślnie znacznik ostatniego pakietu)
+
+        Returns:
+            list: Wiersze cech przepływów zamkniętych od poprzedniego wywołania
+        """
+        if now is None:
+            now = self.last_seen
+        if now is not None:
+            for flows, timeout, reason in ((self._closing, self.fin_linger, 'fin'),
+                                           (self._flows, self.idle_timeout, 'idle')):
+                while flows:
+                    flow = next(iter(flows.values()))
+                    if now - flow.last_ts <= timeout:
+                        break
+                    self._close(flow, reason)
+        closed, self._closed = self._closed, []
+        return closed
+
+    def flush(self):
+        """Zamyka wszystkie aktywne przepływy (np. przy zatrzymaniu generatora)."""
+        for flow in list(self._flows.values()):
+            self._close(flow, 'flush')
+        return self.expire()
+
+    def status(self):
+        return {
+            'active_flows': len(self._flows),
+            'closing_flows': len(self._closing),
+            'packets': self.packets,
+            'closed_flows': dict(self.closed_by),
+        }
+
+
+def closed_flows_to_df(rows):
+    """Jeden DataFrame dla całej partii zamkniętych przepływów."""
+    return pd.DataFrame(rows, columns=META_COLUMNS + FEATURE_COLUMNS)
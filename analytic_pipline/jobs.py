@@ -0,0 +1,173 @@
+"""
+Trwała kolejka zadań analizy plików .pcap (tabela AnalysisJob w SQLite).
+
+process_pcap tylko dodaje zadania. Pula procesów (manage.py run_analysis_workers)
+pobiera je atomowym UPDATE ... WHERE status='queued' i uruchamia predict_packets,
+więc przepustowość rośnie z liczbą rdzeni, a nie wątków serwera WWW. Wynik
+każdego zadania trafia też do katalogu plików (pcap_catalog).
+"""
+import logging
+import multiprocessing
+import os
+import socket
+import time
+import traceback
+from datetime import timedelta
+
+from django.db import close_old_connections, connections, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import AnalysisJob
+from .pcap_catalog import record_analysis
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_jobs(pcap_files):
+    """
+    Dodaje zadania analizy do kolejki.
+
+    Returns:
+        list: Utworzone zadania AnalysisJob
+    """
+    with transaction.atomic():
+        return AnalysisJob.objects.bulk_create([AnalysisJob(pcap_file=name) for name in pcap_files])
+
+
+def claim_job(worker_id):
+    """
+    Przejmuje najstarsze oczekujące zadanie.
+
+    Zadanie jest oznaczane jako RUNNING warunkowym UPDATE - jeśli inny worker
+    był szybszy, próbujemy następnego.
+
+    Returns:
+        AnalysisJob | None: Przejęte zadanie albo None przy pustej kolejce
+    """
+    while True:
+        job_id = (AnalysisJob.objects.filter(status=AnalysisJob.Status.QUEUED)
+                  .order_by('id').values_list('id', flat=True).first())
+        if job_id is None:
+            return None
+        claimed = AnalysisJob.objects.filter(id=job_id, status=AnalysisJob.Status.QUEUED).update(
+            status=AnalysisJob.Status.RUNNING,
+            started_at=timezone.now(),
+            worker=worker_id,
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return AnalysisJob.objects.get(id=job_id)
+
+
+def run_job(job):
+    """Uruchamia predykcję dla zadania i zapisuje wynik."""
+    from .traffic_predictor import predict_packets
+
+    try:
+        result = predict_packets(job.pcap_file)
+    except Exception:
+        logger.exception(f"Analysis job {job.id} ({job.pcap_file}) failed")
+        job.status = AnalysisJob.Status.FAILED
+        job.error = traceback.format_exc()
+    else:
+        if result is None:
+            job.status = AnalysisJob.Status.FAILED
+            job.error = 'Prediction failed (model not loaded)'
+        else:
+            job.status = AnalysisJob.Status.DONE
+            job.result = result
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'result', 'error', 'finished_at'])
+    try:
+        record_analysis(job.pcap_file, job.result if job.status == AnalysisJob.Status.DONE else None,
+                        job.error)
+    except Exception:
+        logger.exception(f"Cannot record analysis of {job.pcap_file}")
+    return job
+
+
+def requeue_stale_jobs(older_than):
+    """
+    Przywraca do kolejki zadania RUNNING porzucone przez martwe workery.
+
+    Args:
+        older_than: timedelta - jak długo zadanie może być w stanie RUNNING
+    """
+    return AnalysisJob.objects.filter(
+        status=AnalysisJob.Status.RUNNING,
+        started_at__lt=timezone.now() - older_than,
+    ).update(status=AnalysisJob.Status.QUEUED, worker=None)
+
+
+def run_worker(worker_id=None, poll_interval=1.0, once=False, stop_event=None):
+    """
+    Pętla workera: pobiera i wykonuje zadania do zatrzymania.
+
+    Args:
+        worker_id: Identyfikator workera zapisywany w zadaniu
+        poll_interval: Odstęp odpytywania pustej kolejki w sekundach
+        once: Zakończ, gdy kolejka będzie pusta
+        stop_event: Opcjonalne zdarzenie zatrzymujące pętlę
+
+    Returns:
+        int: Liczba wykonanych zadań
+    """
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    processed = 0
+    while stop_event is None or not stop_event.is_set():
+        close_old_connections()
+        job = claim_job(worker_id)
+        if job is None:
+            if once:
+                break
+            time.sleep(poll_interval)
+            continue
+        run_job(job)
+        processed += 1
+    return processed
+
+
+def _worker_process(index, poll_interval, once, stop_event):
+    import django
+    django.setup()
+    run_worker(f"{socket.gethostname()}:{os.getpid()}:{index}", poll_interval, once, stop_event)
+
+
+def run_worker_pool(workers=None, poll_interval=1.0, once=False, stale_after=600):
+    """
+    Uruchamia pulę procesów workerów i czeka na ich zakończenie.
+
+    Args:
+        workers: Liczba procesów (domyślnie liczba rdzeni)
+        poll_interval: Odstęp odpytywania pustej kolejki
+        once: Workery kończą pracę po opróżnieniu kolejki
+        stale_after: Po ilu sekundach zadanie RUNNING uznać za porzucone
+    """
+    workers = workers or os.cpu_count() or 1
+    requeue_stale_jobs(timedelta(seconds=stale_after))
+    # Połączenia z bazą nie mogą być współdzielone z procesami potomnymi
+    connections.close_all()
+
+    stop_event = multiprocessing.Event()
+    processes = [
+        multiprocessing.Process(target=_worker_process, args=(i, poll_interval, once, stop_event),
+                                name=f'analysis-worker-{i}', daemon=True)
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        stop_event.set()
+        for process in processes:
+            process.join()
+    return workers
+
+
+def queue_status():
+    """Liczba zadań w każdym stanie."""
+    counts = dict(AnalysisJob.objects.values_list('status').annotate(count=Count('id')).order_by())
+    return {status: counts.get(status, 0) for status in AnalysisJob.Status.values}
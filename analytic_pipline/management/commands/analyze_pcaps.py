@@ -0,0 +1,69 @@
+"""
+Analiza offline katalogu (albo wzorca glob) plików .pcap w puli procesów.
+
+    python manage.py analyze_pcaps pcap_files/ --workers 4
+    python manage.py analyze_pcaps 'captures/**/*.pcap' --dry-run scores.csv
+"""
+import importlib.util
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from analytic_pipline.batch_analysis import analyze_pcaps, collect_pcaps
+
+
+class Command(BaseCommand):
+    help = ('Ocenia przepływy z plików .pcap (katalog lub glob) w puli procesów i zapisuje '
+            'alerty partiami; --dry-run zapisuje wyniki do .csv/.parquet zamiast do bazy.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('target', nargs='?', default=None,
+                            help='Katalog lub wzorzec glob (domyślnie PCAP_FOLDER)')
+        parser.add_argument('--pattern', default='*.pcap', help='Wzorzec nazw plików w katalogu')
+        parser.add_argument('--recursive', action='store_true', help='Uwzględnij podkatalogi')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Liczba procesów (domyślnie ANALYTICS_WORKERS lub liczba rdzeni)')
+        parser.add_argument('--dry-run', metavar='OUTPUT', default=None,
+                            help='Zapisz wyniki do pliku .csv lub .parquet zamiast do bazy')
+        parser.add_argument('--no-resume', action='store_true',
+                            help='Analizuj także pliki już przeanalizowane')
+        parser.add_argument('--batch-rows', type=int, default=5000,
+                            help='Liczba alertów w jednym zapisie do bazy')
+        parser.add_argument('--progress-every', type=int, default=100,
+                            help='Co ile plików wypisywać postęp')
+
+    def handle(self, *args, **options):
+        output = options['dry_run']
+        if output and not output.endswith(('.csv', '.parquet')):
+            raise CommandError('--dry-run wymaga pliku .csv lub .parquet')
+        # DataFrame.to_parquet potrzebuje pyarrow dopiero przy zapisie - sprawdzamy przed analizą
+        if output and output.endswith('.parquet') and importlib.util.find_spec('pyarrow') is None:
+            raise CommandError('Zapis .parquet wymaga pakietu pyarrow - użyj pliku .csv')
+
+        target = options['target'] or settings.PCAP_FOLDER
+        paths = collect_pcaps(target, options['pattern'], options['recursive'])
+        if not paths:
+            raise CommandError(f'Brak plików .pcap: {target}')
+        workers = (options['workers'] or getattr(settings, 'ANALYTICS_WORKERS', 0)
+                   or os.cpu_count() or 1)
+        self.stdout.write(f"{len(paths)} plików, {workers} procesów"
+                          + (f", dry-run -> {output}" if output else ""))
+
+        every = max(options['progress_every'], 1)
+
+        def report(progress):
+            if progress.files % every == 0 or progress.files == progress.total:
+                self.stdout.write(progress.line())
+
+        progress, skipped, saved = analyze_pcaps(
+            paths, workers=workers, dry_run_output=output, resume=not options['no_resume'],
+            batch_rows=options['batch_rows'], on_progress=report)
+
+        if skipped:
+            self.stdout.write(f"Pominięto {skipped} plików przeanalizowanych wcześniej")
+        summary = (f"{progress.files} plików w {progress.elapsed:.1f} s, "
+                   f"{progress.flows} przepływów, {progress.attacks} ataków")
+        if not output:
+            summary += f", zapisano {saved} alertów"
+        self.stdout.write(self.style.SUCCESS(summary))
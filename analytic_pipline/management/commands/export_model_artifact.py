@@ -0,0 +1,45 @@
+"""
+Eksportuje one_class_svm_model.pkl do formatu .npz ładowanego przez mmap.
+
+    python manage.py export_model_artifact
+"""
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand
+
+from analytic_pipline.model_artifact import ARTIFACT_PATH, export_model, load_artifact
+from analytic_pipline.traffic_predictor import FEATURE_MAP, MODEL_PATH
+
+
+class Command(BaseCommand):
+    help = 'Zapisuje model One-Class SVM i skaler jako tablice NumPy (.npz) i sprawdza zgodność wyników.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', default=str(MODEL_PATH), help='Plik .pkl z krotką (model, scaler)')
+        parser.add_argument('--output', default=str(ARTIFACT_PATH), help='Plik wynikowy .npz')
+
+    def handle(self, *args, **options):
+        with open(options['model'], 'rb') as f:
+            model, scaler = pickle.load(f)
+        export_model(model, scaler, options['output'], feature_names=list(FEATURE_MAP.values()))
+
+        # Kontrola: wyniki artefaktu muszą odpowiadać modelowi sklearn (próbki z kwantyli cech)
+        started = time.perf_counter()
+        artifact = load_artifact(options['output'])
+        load_seconds = time.perf_counter() - started
+        if artifact.quantiles is not None:
+            rng = np.random.default_rng(0)
+            rows = rng.integers(0, len(artifact.quantiles), (500, artifact.n_features))
+            X = pd.DataFrame(artifact.quantiles[rows, np.arange(artifact.n_features)],
+                             columns=getattr(scaler, 'feature_names_in_', None))
+            expected = model.decision_function(scaler.transform(X))
+            diff = float(np.abs(artifact.decision_function(X.to_numpy()) - expected).max())
+            self.stdout.write(f"Maksymalna różnica wyników względem sklearn: {diff:.3e}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Zapisano {options['output']}: {artifact.n_support_vectors} wektorów nośnych, "
+            f"skaler {artifact.scaler_kind}, wczytanie {load_seconds * 1000:.1f} ms"
+        ))
@@ -0,0 +1,47 @@
+"""
+Dopasowuje aproksymację Nyströma do modelu .npz i raportuje jej jakość.
+
+    python manage.py fit_approx_scorer --components 512
+"""
+from django.core.management.base import BaseCommand
+
+from analytic_pipline.approx_scorer import (
+    APPROX_ARTIFACT_PATH, DEFAULT_COMPONENTS, approx_scorer, evaluate_approximation,
+    fit_nystroem, sample_scaled_points, save_approximation,
+)
+from analytic_pipline.model_artifact import ARTIFACT_PATH, load_artifact
+
+
+class Command(BaseCommand):
+    help = ('Dopasowuje przybliżony scorer (Nyström) do dokładnego One-Class SVM '
+            'i raportuje precision/recall względem niego.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--components', type=int, default=DEFAULT_COMPONENTS,
+                            help='Liczba punktów orientacyjnych')
+        parser.add_argument('--samples', type=int, default=20000, help='Liczba punktów dopasowania')
+        parser.add_argument('--eval-samples', type=int, default=20000, help='Liczba punktów oceny')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--model', default=str(ARTIFACT_PATH), help='Dokładny model .npz')
+        parser.add_argument('--output', default=str(APPROX_ARTIFACT_PATH), help='Plik wynikowy .npz')
+
+    def handle(self, *args, **options):
+        artifact = load_artifact(options['model'])
+        arrays = fit_nystroem(artifact, n_components=options['components'],
+                              samples=options['samples'], seed=options['seed'])
+
+        # Ocena na punktach niezależnych od zbioru dopasowania
+        points = sample_scaled_points(artifact, options['eval_samples'], seed=options['seed'] + 1000)
+        metrics = evaluate_approximation(artifact.scorer(), approx_scorer(artifact, arrays),
+                                         points, scaled=True)
+        metrics['components'] = len(arrays['landmarks'])
+        save_approximation(options['output'], arrays, metrics)
+
+        self.stdout.write(
+            f"Punkty oceny: {metrics['samples']} (ataki wg modelu dokładnego: {metrics['attacks']})\n"
+            f"precision {metrics['precision']:.4f}  recall {metrics['recall']:.4f}  "
+            f"zgodność {metrics['agreement']:.4f}  MAE wyniku {metrics['mean_abs_error']:.4f}\n"
+            f"{artifact.n_support_vectors} -> {metrics['components']} punktów, "
+            f"przyspieszenie x{metrics['speedup']:.1f}"
+        )
+        self.stdout.write(self.style.SUCCESS(f"Zapisano {options['output']}"))
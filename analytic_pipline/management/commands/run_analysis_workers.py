@@ -0,0 +1,41 @@
+"""
+Uruchamia pulę procesów obsługujących kolejkę zadań analizy (AnalysisJob).
+
+    python manage.py run_analysis_workers --workers 4
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from analytic_pipline.jobs import queue_status, run_worker, run_worker_pool
+from analytic_pipline.model_artifact import preload_model_artifact
+
+
+class Command(BaseCommand):
+    help = 'Uruchamia N procesów wykonujących zadania analizy plików .pcap z kolejki.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Liczba procesów (domyślnie ANALYTICS_WORKERS lub liczba rdzeni)')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Odstęp odpytywania pustej kolejki (s)')
+        parser.add_argument('--once', action='store_true',
+                            help='Zakończ po opróżnieniu kolejki')
+        parser.add_argument('--in-process', action='store_true',
+                            help='Jeden worker w bieżącym procesie (bez puli)')
+
+    def handle(self, *args, **options):
+        workers = options['workers'] or getattr(settings, 'ANALYTICS_WORKERS', None)
+        # Model mapowany przed forkiem workerów - strony są współdzielone między procesami
+        preload_model_artifact()
+        if options['in_process']:
+            processed = run_worker(poll_interval=options['poll_interval'], once=options['once'])
+            self.stdout.write(f"Wykonano {processed} zadań")
+        else:
+            workers = run_worker_pool(
+                workers=workers,
+                poll_interval=options['poll_interval'],
+                once=options['once'],
+                stale_after=getattr(settings, 'ANALYTICS_JOB_STALE_SECONDS', 600),
+            )
+            self.stdout.write(f"Zakończono {workers} workerów")
+        self.stdout.write(self.style.SUCCESS(f"Stan kolejki: {queue_status()}"))
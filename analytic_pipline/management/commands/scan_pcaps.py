@@ -0,0 +1,40 @@
+"""
+Synchronizuje katalog plików .pcap (PcapFile) z PCAP_FOLDER i kolejkuje
+analizę tylko plików nowych lub zmienionych.
+
+    python manage.py scan_pcaps --enqueue
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from analytic_pipline.pcap_catalog import catalog_status, enqueue_pending, pcap_folder, scan_folder
+
+
+class Command(BaseCommand):
+    help = ('Skanuje katalog .pcap, dopisuje nowe i zmienione pliki do katalogu '
+            'i opcjonalnie kolejkuje ich analizę (run_analysis_workers).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--folder', default=None, help='Katalog (domyślnie PCAP_FOLDER)')
+        parser.add_argument('--pattern', default='*.pcap', help='Wzorzec nazw plików')
+        parser.add_argument('--recursive', action='store_true', help='Skanuj podkatalogi')
+        parser.add_argument('--enqueue', action='store_true',
+                            help='Dodaj zadania analizy dla plików w stanie NEW')
+        parser.add_argument('--retry-failed', action='store_true',
+                            help='Kolejkuj ponownie pliki, których analiza się nie powiodła')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        summary = scan_folder(options['folder'], pattern=options['pattern'],
+                              recursive=options['recursive'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{options['folder'] or pcap_folder()}: nowe {summary['new']}, "
+            f"zmienione {summary['changed']}, bez zmian {summary['unchanged']} "
+            f"({elapsed * 1000:.0f} ms)"
+        )
+        if options['enqueue'] or options['retry_failed']:
+            jobs = enqueue_pending(retry_failed=options['retry_failed'])
+            self.stdout.write(f"Zakolejkowano {len(jobs)} zadań analizy")
+        self.stdout.write(self.style.SUCCESS(f"Stan katalogu: {catalog_status()}"))
@@ -0,0 +1,235 @@
+"""
+Ocena przepływów w mikro-partiach, niezależna od rotacji plików .pcap.
+
+Producenci (tablica przepływów w trybie live, ekstrakcja z pcap, generator)
+tylko dokładają wiersze cech do kolejki. Osobny wątek wysyła je do modelu
+jedną partią, gdy uzbiera się batch_size przepływów albo gdy najstarszy
+czeka max_delay_ms - co nastąpi pierwsze. Duży batch_size to większa
+przepustowość (jedno mnożenie macierzy, jeden bulk insert), mały
+max_delay_ms to krótszy czas do alertu.
+
+Dla każdego przepływu mierzony jest czas od jego zgłoszenia (albo podanego
+czasu obserwacji) do zakończenia oceny; status() raportuje p50/p99.
+"""
+import logging
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from .flow_table import closed_flows_to_df
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_MAX_DELAY_MS = 200
+
+
+class MicroBatchScorer:
+    """
+    Kolejka przepływów z wątkiem oceniającym.
+
+    Args:
+        score: Funkcja DataFrame -> wynik (np. predict_flow_df); wynik może
+            zawierać klucz 'attacks'
+        batch_size: Liczba przepływów, po której partia jest oceniana od razu
+        max_delay_ms: Maksymalny czas oczekiwania najstarszego przepływu w kolejce
+        max_pending: Pojemność kolejki w przepływach (po przepełnieniu
+            odrzucane są najstarsze zgłoszenia)
+        latency_window: Liczba ostatnich pomiarów opóźnienia do percentyli
+        on_result: Opcjonalna funkcja wołana z (wynik, DataFrame) po każdej partii
+    """
+
+    def __init__(self, score, batch_size=DEFAULT_BATCH_SIZE, max_delay_ms=DEFAULT_MAX_DELAY_MS,
+                 max_pending=100000, latency_window=10000, on_result=None):
+        if batch_size < 1:
+            raise ValueError(f"batch_size musi być dodatni: {batch_size}")
+        if max_delay_ms < 0:
+            raise ValueError(f"max_delay_ms nie może być ujemne: {max_delay_ms}")
+        self.score = score
+        self.batch_size = batch_size
+        self.max_delay_ms = max_delay_ms
+        self.max_pending = max_pending
+        self.on_result = on_result
+        self.batches = 0
+        self.scored_flows = 0
+        self.attacks = 0
+        self.failed_batches = 0
+        self.dropped_flows = 0
+        self.scoring_seconds = 0.0
+        self._latencies = deque(maxlen=latency_window)
+        self._queue = deque()
+        self._pending = 0
+        self._busy = False
+        self._force = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._closed = False
+            self._thread = threading.Thread(target=self._run, name='micro-batch-scorer', daemon=True)
+            self._thread.start()
+
+    def submit(self, flows, observed_at=None):
+        """
+        Dodaje przepływy do kolejki. Nigdy nie czeka na model.
+
+        Args:
+            flows: Wiersze cech (FlowTable.expire) albo DataFrame z cechami
+            observed_at: Czas obserwacji (time.time()) do pomiaru opóźnienia;
+                domyślnie chwila zgłoszenia
+
+        Returns:
+            int: Liczba przyjętych przepływów
+        """
+        count = len(flows)
+        if not count:
+            return 0
+        now = time.time()
+        with self._cond:
+            self._ensure_thread()
+            self._queue.append((flows, count, time.monotonic(), observed_at or now))
+            self._pending += count
+            while self._pending > self.max_pending and len(self._queue) > 1:
+                _, dropped, _, _ = self._queue.popleft()
+                self._pending -= dropped
+                self.dropped_flows += dropped
+            self._cond.notify_all()
+        return count
+
+    def _due(self):
+        """Czas (s) do oceny najstarszej partii; <= 0 oznacza, że trzeba oceniać."""
+        if self._force or self._closed or self._pending >= self.batch_size:
+            return 0.0
+        oldest = self._queue[0][2]
+        return oldest + self.max_delay_ms / 1000.0 - time.monotonic()
+
+    def _take_batch(self):
+        chunks = []
+        taken = 0
+        while self._queue and (not chunks or taken + self._queue[0][1] <= self.batch_size):
+            chunk = self._queue.popleft()
+            chunks.append(chunk)
+            taken += chunk[1]
+        self._pending -= taken
+        return chunks
+
+    @staticmethod
+    def _to_frame(chunks):
+        rows = []
+        frames = []
+        for flows, _, _, _ in chunks:
+            if isinstance(flows, pd.DataFrame):
+                frames.append(flows)
+            else:
+                rows.extend(flows)
+        if rows:
+            frames.append(closed_flows_to_df(rows))
+        return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if not self._queue:
+                        if self._closed:
+                            return
+                        self._cond.wait()
+                        continue
+                    wait = self._due()
+                    if wait <= 0:
+                        break
+                    self._cond.wait(wait)
+                chunks = self._take_batch()
+                self._busy = True
+            self._score(chunks)
+
+    def _score(self, chunks):
+        started = time.perf_counter()
+        result = None
+        df = None
+        try:
+            df = self._to_frame(chunks)
+            result = self.score(df)
+        except Exception as e:
+            logger.error(f"Micro-batch scoring failed: {e}")
+            result = False
+        elapsed = time.perf_counter() - started
+        finished = time.time()
+
+        with self._cond:
+            self._busy = False
+            self.scoring_seconds += elapsed
+            if result is False:
+                self.failed_batches += 1
+            else:
+                self.batches += 1
+                for _, count, _, observed_at in chunks:
+                    self.scored_flows += count
+                    self._latencies.extend([finished - observed_at] * count)
+                if isinstance(result, dict):
+                    self.attacks += result.get('attacks', 0)
+            self._cond.notify_all()
+
+        if result is not False and self.on_result is not None:
+            try:
+                self.on_result(result, df)
+            except Exception as e:
+                logger.error(f"Micro-batch result callback failed: {e}")
+
+    def drain(self, timeout=None):
+        """
+        Ocenia wszystkie oczekujące przepływy bez czekania na max_delay_ms.
+        Zwraca False po przekroczeniu timeout.
+        """
+        with self._cond:
+            self._force = True
+            self._cond.notify_all()
+            try:
+                return self._cond.wait_for(lambda: not self._queue and not self._busy, timeout)
+            finally:
+                self._force = False
+
+    def close(self, timeout=None):
+        """Ocenia zaległe przepływy i kończy wątek."""
+        self.drain(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def latency_percentiles(self):
+        """
+        Returns:
+            dict: p50/p99/max opóźnienia detekcji w milisekundach (None bez pomiarów)
+        """
+        with self._cond:
+            latencies = np.fromiter(self._latencies, dtype=np.float64)
+        if not len(latencies):
+            return {'p50_ms': None, 'p99_ms': None, 'max_ms': None}
+        p50, p99 = np.percentile(latencies, [50, 99]) * 1000.0
+        return {'p50_ms': float(p50), 'p99_ms': float(p99), 'max_ms': float(latencies.max() * 1000.0)}
+
+    def status(self):
+        with self._cond:
+            status = {
+                'pending_flows': self._pending,
+                'batch_size': self.batch_size,
+                'max_delay_ms': self.max_delay_ms,
+                'batches': self.batches,
+                'scored_flows': self.scored_flows,
+                'attacks': self.attacks,
+                'failed_batches': self.failed_batches,
+                'dropped_flows': self.dropped_flows,
+                'avg_batch_flows': self.scored_flows / self.batches if self.batches else 0.0,
+                'scoring_flows_per_second': (self.scored_flows / self.scoring_seconds
+                                             if self.scoring_seconds else 0.0),
+            }
+        status['latency'] = self.latency_percentiles()
+        return status
@@ -0,0 +1,37 @@
+# Generated by Django 6.0 on 2026-10-17 02:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytic_pipline', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PcapFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=1024, unique=True)),
+                ('filename', models.CharField(db_index=True, max_length=255)),
+                ('size_bytes', models.BigIntegerField()),
+                ('mtime_ns', models.BigIntegerField(help_text='st_mtime_ns at registration or last scan')),
+                ('packet_count', models.IntegerField(blank=True, null=True)),
+                ('first_packet_ts', models.FloatField(blank=True, null=True)),
+                ('last_packet_ts', models.FloatField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('new', 'New'), ('queued', 'Queued'), ('analyzed', 'Analyzed'), ('failed', 'Failed')], default='new', max_length=10)),
+                ('discovered_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('analyzed_at', models.DateTimeField(blank=True, null=True)),
+                ('flows', models.IntegerField(blank=True, null=True)),
+                ('attacks', models.IntegerField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['status', 'id'], name='pcapfile_status_id_idx')],
+            },
+        ),
+    ]
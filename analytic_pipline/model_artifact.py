@@ -0,0 +1,252 @@
+"""
+Kompaktowy format modelu One-Class SVM (.npz) i ładowanie przez mmap.
+
+Plik .npz (bez kompresji) zawiera same tablice NumPy: wektory nośne,
+współczynniki dualne, gamma, wyraz wolny i parametry skalera (kwantyle
+QuantileTransformer albo mean/scale StandardScaler). Tablice są mapowane
+bezpośrednio z członków archiwum ZIP (np.memmap tylko do odczytu), więc
+wiele procesów workerów współdzieli te same strony pamięci z page cache,
+a start nie wymaga unpicklingu obiektów sklearn.
+"""
+import logging
+import struct
+import threading
+import zipfile
+from pathlib import Path
+
+import numpy as np
+from scipy.special import ndtri
+
+from .svm_scorer import DEFAULT_CHUNK_SIZE, RBFScorer
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+ARTIFACT_PATH = BASE_DIR / 'analytic_pipline' / 'one_class_svm_model.npz'
+
+# Stałe QuantileTransformer (sklearn.preprocessing._data)
+BOUNDS_THRESHOLD = 1e-7
+_NORMAL_CLIP_MIN = ndtri(BOUNDS_THRESHOLD - np.spacing(1))
+_NORMAL_CLIP_MAX = ndtri(1 - (BOUNDS_THRESHOLD - np.spacing(1)))
+
+SCALER_KINDS = ('quantile_normal', 'quantile_uniform', 'standard', 'none')
+
+_ZIP_LOCAL_HEADER = struct.Struct('<4s5H3I2H')
+
+
+def export_model(model, scaler, path, feature_names=None):
+    """
+    Zapisuje OneClassSVM (jądro RBF) i skaler jako nieskompresowany .npz.
+
+    Args:
+        model: Wytrenowany sklearn.svm.OneClassSVM
+        scaler: QuantileTransformer, StandardScaler albo None
+        path: Ścieżka pliku wynikowego
+        feature_names: Nazwy cech (domyślnie scaler.feature_names_in_)
+    """
+    if getattr(model, 'kernel', None) != 'rbf':
+        raise ValueError(f"Obsługiwane jest tylko jądro RBF, model ma: {getattr(model, 'kernel', None)}")
+
+    arrays = {
+        'support_vectors': np.ascontiguousarray(model.support_vectors_, dtype=np.float64),
+        'dual_coef': np.ascontiguousarray(model.dual_coef_, dtype=np.float64).ravel(),
+        'intercept': np.asarray(model.intercept_, dtype=np.float64).reshape(1),
+        'gamma': np.array([model._gamma], dtype=np.float64),
+    }
+    if feature_names is None:
+        feature_names = getattr(scaler, 'feature_names_in_', None)
+    if feature_names is not None:
+        arrays['feature_names'] = np.asarray(feature_names, dtype=str)
+
+    if scaler is None:
+        kind = 'none'
+    elif hasattr(scaler, 'quantiles_'):
+        kind = f"quantile_{scaler.output_distribution}"
+        arrays['quantiles'] = np.ascontiguousarray(scaler.quantiles_, dtype=np.float64)
+        arrays['references'] = np.ascontiguousarray(scaler.references_, dtype=np.float64)
+    elif hasattr(scaler, 'mean_') or hasattr(scaler, 'scale_'):
+        kind = 'standard'
+        n_features = arrays['support_vectors'].shape[1]
+        mean = scaler.mean_ if getattr(scaler, 'with_mean', True) else None
+        scale = scaler.scale_ if getattr(scaler, 'with_std', True) else None
+        arrays['mean'] = np.zeros(n_features) if mean is None else np.asarray(mean, dtype=np.float64)
+        arrays['scale'] = np.ones(n_features) if scale is None else np.asarray(scale, dtype=np.float64)
+    else:
+        raise ValueError(f"Nieobsługiwany skaler: {type(scaler).__name__}")
+    arrays['scaler_kind'] = np.array(kind)
+
+    # np.savez zapisuje członków bez kompresji - warunek mapowania przez mmap
+    np.savez(path, **arrays)
+
+
+def _map_npz(path):
+    """
+    Mapuje tablice z nieskompresowanego .npz bez kopiowania.
+
+    Returns:
+        dict: nazwa -> np.memmap (tryb 'r'); tablice 0-wymiarowe są wczytywane
+    """
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, 'rb') as f:
+        for info in archive.infolist():
+            name = info.filename[:-4] if info.filename.endswith('.npy') else info.filename
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"Członek {info.filename} jest skompresowany - nie da się go mapować")
+            f.seek(info.header_offset)
+            header = _ZIP_LOCAL_HEADER.unpack(f.read(_ZIP_LOCAL_HEADER.size))
+            name_len, extra_len = header[-2], header[-1]
+            f.seek(info.header_offset + _ZIP_LOCAL_HEADER.size + name_len + extra_len)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran, dtype = np.lib.format.read_array_header_2_0(f)
+            if not shape or dtype.hasobject:
+                arrays[name] = np.lib.format.read_array(archive.open(info))
+                continue
+            arrays[name] = np.memmap(path, dtype=dtype, mode='r', offset=f.tell(), shape=shape,
+                                     order='F' if fortran else 'C')
+    return arrays
+
+
+class ModelArtifact:
+    """
+    Model One-Class SVM wczytany z pliku .npz.
+
+    Odtwarza scaler.transform + model.decision_function / predict z sklearn
+    na samych tablicach NumPy.
+    """
+
+    def __init__(self, arrays, path=None):
+        self.path = path
+        self.support_vectors = arrays['support_vectors']
+        self.dual_coef = arrays['dual_coef']
+        self.intercept = float(arrays['intercept'][0])
+        self.gamma = float(arrays['gamma'][0])
+        self.scaler_kind = str(arrays['scaler_kind'])
+        if self.scaler_kind not in SCALER_KINDS:
+            raise ValueError(f"Nieznany rodzaj skalera: {self.scaler_kind}")
+        self.quantiles = arrays.get('quantiles')
+        self.references = arrays.get('references')
+        self.mean = arrays.get('mean')
+        self.scale = arrays.get('scale')
+        names = arrays.get('feature_names')
+        self.feature_names = [str(n) for n in names] if names is not None else None
+        self._scorer = None
+
+    @property
+    def n_support_vectors(self):
+        return self.support_vectors.shape[0]
+
+    @property
+    def n_features(self):
+        return self.support_vectors.shape[1]
+
+    def transform(self, X):
+        """Skalowanie cech jak w zapisanym skalerze sklearn."""
+        X = np.array(X, dtype=np.float64)
+        if self.scaler_kind == 'standard':
+            return (X - self.mean) / self.scale
+        if self.scaler_kind == 'none':
+            return X
+        references = self.references
+        for j in range(X.shape[1]):
+            column = X[:, j]
+            quantiles = self.quantiles[:, j]
+            with np.errstate(invalid='ignore'):
+                if self.scaler_kind == 'quantile_normal':
+                    lower = column - BOUNDS_THRESHOLD < quantiles[0]
+                    upper = column + BOUNDS_THRESHOLD > quantiles[-1]
+                else:
+                    lower = column == quantiles[0]
+                    upper = column == quantiles[-1]
+            finite = ~np.isnan(column)
+            values = column[finite]
+            column[finite] = 0.5 * (
+                np.interp(values, quantiles, references)
+                - np.interp(-values, -quantiles[::-1], -references[::-1])
+            )
+            column[upper] = 1
+            column[lower] = 0
+            if self.scaler_kind == 'quantile_normal':
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    X[:, j] = np.clip(ndtri(column), _NORMAL_CLIP_MIN, _NORMAL_CLIP_MAX)
+        return X
+
+    def scorer(self, chunk_size=DEFAULT_CHUNK_SIZE, dtype='float64'):
+        """Tworzy RBFScorer z własnym rozmiarem bloku i typem obliczeń."""
+        return RBFScorer(self, chunk_size=chunk_size, dtype=dtype)
+
+    def decision_function(self, X, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Wynik decyzyjny: sum(alpha_i * exp(-gamma * ||x - sv_i||^2)) + b."""
+        if chunk_size != DEFAULT_CHUNK_SIZE:
+            return self.scorer(chunk_size).decision_function(X)
+        if self._scorer is None:
+            self._scorer = self.scorer()
+        return self._scorer.decision_function(X)
+
+    labels = staticmethod(RBFScorer.labels)
+
+    def predict(self, X):
+        return self.labels(self.decision_function(X))
+
+    def warm(self):
+        """Wczytuje strony zmapowanych tablic (page cache współdzielony przez procesy)."""
+        for array in (self.support_vectors, self.dual_coef, self.quantiles, self.references):
+            if array is not None:
+                np.add.reduce(array, axis=None)
+
+
+def load_artifact(path=ARTIFACT_PATH, mmap=True):
+    """
+    Wczytuje ModelArtifact z pliku .npz.
+
+    Args:
+        path: Ścieżka pliku .npz
+        mmap: Mapuj tablice zamiast kopiować je do pamięci procesu
+    """
+    path = Path(path)
+    if mmap:
+        arrays = _map_npz(path)
+    else:
+        with np.load(path) as data:
+            arrays = {name: data[name] for name in data.files}
+    return ModelArtifact(arrays, path=path)
+
+
+_artifact_cache = {'artifact': None, 'path': None}
+_artifact_lock = threading.Lock()
+
+
+def get_model_artifact(path=ARTIFACT_PATH):
+    """
+    Zwraca współdzielony w procesie ModelArtifact (wczytywany raz).
+
+    Returns:
+        ModelArtifact | None: None, gdy pliku nie ma lub jest uszkodzony
+    """
+    path = Path(path)
+    with _artifact_lock:
+        if _artifact_cache['artifact'] is not None and _artifact_cache['path'] == path:
+            return _artifact_cache['artifact']
+        if not path.exists():
+            logger.error(f"Model artifact not found: {path}")
+            return None
+        try:
+            artifact = load_artifact(path)
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Error loading model artifact: {e}")
+            return None
+        _artifact_cache['artifact'] = artifact
+        _artifact_cache['path'] = path
+        logger.info(f"Model artifact loaded: {artifact.n_support_vectors} support vectors "
+                    f"({artifact.scaler_kind} scaler)")
+        return artifact
+
+
+def preload_model_artifact(path=ARTIFACT_PATH):
+    """Ładuje model przy starcie aplikacji i wczytuje jego strony do page cache."""
+    artifact = get_model_artifact(path)
+    if artifact is not None:
+        artifact.warm()
+    return artifact
@@ -1,3 +1,100 @@
 from django.db import models
 from django.utils import timezone
 
+
+class AnalysisJob(models.Model):
+    """Zadanie analizy pliku .pcap w kolejce obsługiwanej przez pulę workerów."""
+
+    class Status(models.TextChoices):
+        QUEUED = 'queued', 'Queued'
+        RUNNING = 'running', 'Running'
+        DONE = 'done', 'Done'
+        FAILED = 'failed', 'Failed'
+
+    pcap_file = models.CharField(
+        max_length=255,
+        help_text='PCAP file name reported by traffic_generator'
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.QUEUED,
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    worker = models.CharField(max_length=64, blank=True, null=True)
+    attempts = models.IntegerField(default=0)
+    result = models.JSONField(blank=True, null=True)
+    error = models.TextField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [models.Index(fields=['status', 'id'], name='analysisjob_status_id_idx')]
+
+    def __str__(self):
+        return f"AnalysisJob {self.id}: {self.pcap_file} ({self.status})"
+
+    def as_dict(self):
+        return {
+            'id': self.id,
+            'pcap_file': self.pcap_file,
+            'status': self.status,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'attempts': self.attempts,
+            'result': self.result,
+            'error': self.error,
+        }
+
+
+class PcapFile(models.Model):
+    """Wpis katalogu plików .pcap: metadane pliku i stan jego analizy."""
+
+    class Status(models.TextChoices):
+        NEW = 'new', 'New'
+        QUEUED = 'queued', 'Queued'
+        ANALYZED = 'analyzed', 'Analyzed'
+        FAILED = 'failed', 'Failed'
+
+    path = models.CharField(max_length=1024, unique=True)
+    filename = models.CharField(max_length=255, db_index=True)
+    size_bytes = models.BigIntegerField()
+    mtime_ns = models.BigIntegerField(help_text='st_mtime_ns at registration or last scan')
+    packet_count = models.IntegerField(blank=True, null=True)
+    first_packet_ts = models.FloatField(blank=True, null=True)
+    last_packet_ts = models.FloatField(blank=True, null=True)
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.NEW,
+    )
+    discovered_at = models.DateTimeField(default=timezone.now)
+    analyzed_at = models.DateTimeField(blank=True, null=True)
+    flows = models.IntegerField(blank=True, null=True)
+    attacks = models.IntegerField(blank=True, null=True)
+    error = models.TextField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [models.Index(fields=['status', 'id'], name='pcapfile_status_id_idx')]
+
+    def __str__(self):
+        return f"PcapFile {self.filename} ({self.status})"
+
+    def as_dict(self):
+        return {
+            'id': self.id,
+            'path': self.path,
+            'filename': self.filename,
+            'size_bytes': self.size_bytes,
+            'packet_count': self.packet_count,
+            'first_packet_ts': self.first_packet_ts,
+            'last_packet_ts': self.last_packet_ts,
+            'status': self.status,
+            'analyzed_at': self.analyzed_at.isoformat() if self.analyzed_at else None,
+            'flows': self.flows,
+            'attacks': self.attacks,
+            'error': self.error,
+        }
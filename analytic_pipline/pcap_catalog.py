@@ -0,0 +1,221 @@
+"""
+Katalog plików .pcap (tabela PcapFile): co jest w PCAP_FOLDER i co już
+zostało przeanalizowane.
+
+Pliki trafiają do katalogu na dwa sposoby: generator rejestruje każdy
+zamknięty plik (register_pcap), a scan_folder porównuje zawartość katalogu
+z tabelą po rozmiarze i st_mtime_ns. Liczba pakietów i zakres czasu są
+liczone z nagłówków rekordów tylko dla plików nowych lub zmienionych, więc
+ponowny skan katalogu z tysiącami przeanalizowanych plików to jedno
+zapytanie i stat() na plik. enqueue_pending kolejkuje analizę wyłącznie
+plików w stanie NEW.
+"""
+import fnmatch
+import logging
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import PcapFile
+from .pcap_reader import PcapMap
+
+logger = logging.getLogger(__name__)
+
+_CHANGED_FIELDS = ['size_bytes', 'mtime_ns', 'packet_count', 'first_packet_ts', 'last_packet_ts',
+                   'status', 'analyzed_at', 'flows', 'attacks', 'error']
+
+
+def pcap_folder():
+    """Katalog plików .pcap z settings.PCAP_FOLDER."""
+    return Path(settings.PCAP_FOLDER).resolve()
+
+
+def resolve_pcap_path(name, allow_absolute=True):
+    """
+    Ścieżka pliku .pcap: nazwy względne są liczone od PCAP_FOLDER.
+
+    Args:
+        name: Nazwa pliku (np. z powiadomienia generatora) lub ścieżka
+        allow_absolute: Czy przyjmować ścieżki bezwzględne (tylko wywołania lokalne)
+
+    Raises:
+        ValueError: Ścieżka bezwzględna (gdy niedozwolona) lub wychodząca poza PCAP_FOLDER
+    """
+    path = Path(name)
+    if path.is_absolute():
+        if not allow_absolute:
+            raise ValueError(f"Oczekiwano nazwy pliku w PCAP_FOLDER: {name}")
+        return path.resolve()
+    folder = pcap_folder()
+    path = (folder / path).resolve()
+    if folder not in path.parents:
+        raise ValueError(f"Ścieżka poza PCAP_FOLDER: {name}")
+    return path
+
+
+def catalog_name(path):
+    """Nazwa pliku względem PCAP_FOLDER (ścieżka bezwzględna dla plików spoza niego)."""
+    path = Path(path)
+    try:
+        return str(path.relative_to(pcap_folder()))
+    except ValueError:
+        return str(path)
+
+
+def read_pcap_summary(path):
+    """
+    Liczba pakietów i zakres czasu z samych nagłówków rekordów (bez danych).
+
+    Returns:
+        tuple: (packet_count, first_ts, last_ts); (None, None, None) dla pliku,
+            który nie jest klasycznym .pcap
+    """
+    try:
+        with PcapMap(path) as pcap:
+            return pcap.summary()
+    except ValueError:
+        return None, None, None
+
+
+def _file_fields(path, st=None):
+    st = st or os.stat(path)
+    packet_count, first_ts, last_ts = read_pcap_summary(path)
+    return {
+        'filename': os.path.basename(path),
+        'size_bytes': st.st_size,
+        'mtime_ns': st.st_mtime_ns,
+        'packet_count': packet_count,
+        'first_packet_ts': first_ts,
+        'last_packet_ts': last_ts,
+    }
+
+
+def register_pcap(info, analyzed=False):
+    """
+    Rejestruje plik zamknięty przez RotatingPcapWriter.
+
+    Args:
+        info: Słownik z rotacji (filepath, packet_count, first/last_timestamp)
+        analyzed: Plik był już oceniony w procesie (tryb in_process/live)
+
+    Returns:
+        PcapFile | None
+    """
+    path = Path(info['filepath']).resolve()
+    try:
+        st = os.stat(path)
+    except OSError as e:
+        logger.error(f"Cannot register pcap {path}: {e}")
+        return None
+    entry, _ = PcapFile.objects.update_or_create(path=str(path), defaults={
+        'filename': path.name,
+        'size_bytes': st.st_size,
+        'mtime_ns': st.st_mtime_ns,
+        'packet_count': info.get('packet_count'),
+        'first_packet_ts': info.get('first_timestamp'),
+        'last_packet_ts': info.get('last_timestamp'),
+        'status': PcapFile.Status.ANALYZED if analyzed else PcapFile.Status.NEW,
+        'analyzed_at': timezone.now() if analyzed else None,
+    })
+    return entry
+
+
+def scan_folder(folder=None, pattern='*.pcap', recursive=False):
+    """
+    Synchronizuje katalog z tabelą PcapFile.
+
+    Nowe pliki są dodawane, a pliki o innym rozmiarze lub czasie modyfikacji
+    niż w katalogu wracają do stanu NEW. Niezmienione pliki nie są czytane.
+
+    Returns:
+        dict: Liczba plików nowych, zmienionych i niezmienionych
+    """
+    folder = Path(folder).resolve() if folder else pcap_folder()
+    found = {}
+    pending = [folder]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        pending.append(entry.path)
+                elif entry.is_file() and fnmatch.fnmatch(entry.name, pattern):
+                    found[entry.path] = entry.stat()
+
+    prefix = str(folder) + os.sep
+    known = {path: (pk, size, mtime_ns) for pk, path, size, mtime_ns in
+             PcapFile.objects.filter(path__startswith=prefix)
+             .values_list('id', 'path', 'size_bytes', 'mtime_ns')}
+
+    created = []
+    changed = []
+    for path, st in found.items():
+        current = known.get(path)
+        if current is None:
+            created.append(PcapFile(path=path, **_file_fields(path, st)))
+        elif (current[1], current[2]) != (st.st_size, st.st_mtime_ns):
+            changed.append(PcapFile(id=current[0], path=path, status=PcapFile.Status.NEW,
+                                    analyzed_at=None, flows=None, attacks=None, error=None,
+                                    **_file_fields(path, st)))
+
+    with transaction.atomic():
+        PcapFile.objects.bulk_create(created, batch_size=500)
+        PcapFile.objects.bulk_update(changed, _CHANGED_FIELDS, batch_size=500)
+    return {
+        'new': len(created),
+        'changed': len(changed),
+        'unchanged': len(found) - len(created) - len(changed),
+    }
+
+
+def enqueue_pending(limit=None, retry_failed=False):
+    """
+    Kolejkuje analizę plików NEW (opcjonalnie także FAILED) jako AnalysisJob.
+
+    Returns:
+        list: Utworzone zadania
+    """
+    from .jobs import enqueue_jobs
+
+    statuses = [PcapFile.Status.NEW] + ([PcapFile.Status.FAILED] if retry_failed else [])
+    with transaction.atomic():
+        entries = list(PcapFile.objects.filter(status__in=statuses)
+                       .order_by('id').values_list('id', 'path')[:limit])
+        if not entries:
+            return []
+        PcapFile.objects.filter(id__in=[pk for pk, _ in entries]).update(
+            status=PcapFile.Status.QUEUED)
+        return enqueue_jobs([catalog_name(path) for _, path in entries])
+
+
+def record_analysis(name, result=None, error=None):
+    """
+    Zapisuje wynik analizy pliku w katalogu (dodając plik, jeśli go nie było).
+    Rozmiar i czas modyfikacji są odświeżane, więc późniejsza zmiana pliku
+    zostanie wykryta przez scan_folder.
+    """
+    path = resolve_pcap_path(name)
+    try:
+        fields = _file_fields(path)
+    except OSError as e:
+        logger.error(f"Cannot record analysis of {path}: {e}")
+        return None
+    fields.update({
+        'status': PcapFile.Status.FAILED if result is None else PcapFile.Status.ANALYZED,
+        'analyzed_at': timezone.now(),
+        'flows': result.get('flows') if result else None,
+        'attacks': result.get('attacks') if result else None,
+        'error': error,
+    })
+    entry, _ = PcapFile.objects.update_or_create(path=str(path), defaults=fields)
+    return entry
+
+
+def catalog_status():
+    """Liczba plików w każdym stanie katalogu."""
+    counts = dict(PcapFile.objects.values_list('status').annotate(count=Count('id')).order_by())
+    return {status: counts.get(status, 0) for status in PcapFile.Status.values}
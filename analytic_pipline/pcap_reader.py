@@ -0,0 +1,227 @@
+"""
+Czytnik klasycznych plików .pcap przez mmap, bez obiektu na pakiet.
+
+Plik jest mapowany w pamięć, a pętla w Pythonie przechodzi tylko po
+16-bajtowych nagłówkach rekordów, zapisując ich przesunięcia w array('q').
+Pola potrzebne do cech przepływu (czas, adresy IPv4, porty TCP/UDP, flagi TCP,
+długość) są następnie zbierane z mapy wektorowo - indeksowaniem tablicy
+NumPy założonej na mmap bez kopiowania - partiami po chunk_records rekordów.
+Pamięć procesu zależy więc od rozmiaru partii, a nie pliku.
+
+Wynik ma postać PACKET_DTYPE i jest zgodny z parse_frame: ramki inne niż
+IPv4 (po opcjonalnym tagu VLAN) są pomijane, ICMP i inne protokoły mają
+porty i flagi równe 0, a długość to długość zapisanej ramki.
+"""
+import mmap
+import os
+import struct
+from array import array
+
+import numpy as np
+
+from .flow_features import IPPROTO_TCP, IPPROTO_UDP, PACKET_DTYPE
+
+GLOBAL_HEADER_LEN = 24
+RECORD_HEADER_LEN = 16
+DEFAULT_CHUNK_RECORDS = 1 << 18
+
+# magic -> (kolejność bajtów, dzielnik części ułamkowej znacznika czasu)
+PCAP_MAGIC = {
+    b'\xd4\xc3\xb2\xa1': ('<', 1e6),
+    b'\xa1\xb2\xc3\xd4': ('>', 1e6),
+    b'\x4d\x3c\xb2\xa1': ('<', 1e9),
+    b'\xa1\xb2\x3c\x4d': ('>', 1e9),
+}
+
+_ETHERTYPE_IPV4 = 0x0800
+_ETHERTYPE_VLAN = 0x8100
+_ETH_HEADER_LEN = 14
+_VLAN_TAG_LEN = 4
+_IPV4_MIN_HEADER_LEN = 20
+
+
+def _u16(buf, pos):
+    """Liczby 16-bitowe big-endian spod przesunięć pos."""
+    return (buf[pos].astype(np.uint16) << 8) | buf[pos + 1]
+
+
+def _u32(buf, pos, byte_order='>'):
+    """Liczby 32-bitowe spod (niewyrównanych) przesunięć pos."""
+    raw = buf[pos[:, None] + np.arange(4)]
+    return raw.view(byte_order + 'u4').ravel().astype(np.uint32)
+
+
+class PcapMap:
+    """
+    Klasyczny plik .pcap zmapowany w pamięć.
+
+    Raises:
+        ValueError: Plik nie jest klasycznym .pcap (np. pcapng)
+    """
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        self._file = open(self.path, 'rb')
+        try:
+            self.size = os.fstat(self._file.fileno()).st_size
+            header = self._file.read(GLOBAL_HEADER_LEN)
+            magic = PCAP_MAGIC.get(header[:4])
+            if len(header) < GLOBAL_HEADER_LEN or magic is None:
+                raise ValueError(f"Nie jest klasycznym plikiem .pcap: {self.path}")
+            self.byte_order, self.fraction = magic
+            self.linktype = struct.unpack_from(self.byte_order + 'I', header, 20)[0]
+            self._incl_len = struct.Struct(self.byte_order + 'I')
+            self._record = struct.Struct(self.byte_order + 'IIII')
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._mm is not None:
+            try:
+                self._mm.close()
+            except BufferError:
+                # Widoki rekordów są jeszcze używane - mapę zwolni GC
+                pass
+            self._mm = None
+        self._file.close()
+
+    def _walk(self, offset, limit):
+        """
+        Przesunięcia kolejnych (najwyżej limit) pełnych rekordów od offset.
+        Ucięty ostatni rekord kończy plik.
+
+        Returns:
+            tuple: (array('q') przesunięć nagłówków, przesunięcie następnego rekordu)
+        """
+        offsets = array('q')
+        append = offsets.append
+        unpack = self._incl_len.unpack_from
+        mm = self._mm
+        size = self.size
+        while limit and offset + RECORD_HEADER_LEN <= size:
+            end = offset + RECORD_HEADER_LEN + unpack(mm, offset + 8)[0]
+            if end > size:
+                break
+            append(offset)
+            offset = end
+            limit -= 1
+        return offsets, offset
+
+    def _timestamps(self, buf, offsets):
+        sec = _u32(buf, offsets, self.byte_order)
+        frac = _u32(buf, offsets + 4, self.byte_order)
+        return sec + frac / self.fraction
+
+    def records(self):
+        """
+        Rekordy pliku jako (ts, memoryview ramki) - widoki na mapę, bez kopiowania.
+        Widoki są ważne do zamknięcia pliku.
+        """
+        view = memoryview(self._mm)
+        unpack = self._record.unpack_from
+        offset = GLOBAL_HEADER_LEN
+        while offset + RECORD_HEADER_LEN <= self.size:
+            sec, frac, incl_len, _ = unpack(view, offset)
+            start = offset + RECORD_HEADER_LEN
+            if start + incl_len > self.size:
+                break
+            yield sec + frac / self.fraction, view[start:start + incl_len]
+            offset = start + incl_len
+
+    def tables(self, chunk_records=DEFAULT_CHUNK_RECORDS):
+        """Pakiety pliku jako kolejne tablice PACKET_DTYPE (po chunk_records rekordów)."""
+        offset = GLOBAL_HEADER_LEN
+        while True:
+            offsets, offset = self._walk(offset, chunk_records)
+            if not offsets:
+                return
+            buf = np.frombuffer(self._mm, dtype=np.uint8)
+            try:
+                table = self._parse(buf, np.frombuffer(offsets, dtype=np.int64))
+            finally:
+                del buf
+            yield table
+
+    def summary(self):
+        """
+        Liczba pakietów i zakres czasu z samych nagłówków rekordów.
+
+        Returns:
+            tuple: (packet_count, first_ts, last_ts)
+        """
+        count = 0
+        first = last = None
+        offset = GLOBAL_HEADER_LEN
+        while True:
+            offsets, offset = self._walk(offset, DEFAULT_CHUNK_RECORDS)
+            if not offsets:
+                return count, first, last
+            buf = np.frombuffer(self._mm, dtype=np.uint8)
+            try:
+                ends = np.array([offsets[0], offsets[-1]], dtype=np.int64)
+                ts = self._timestamps(buf, ends)
+            finally:
+                del buf
+            if first is None:
+                first = float(ts[0])
+            last = float(ts[1])
+            count += len(offsets)
+
+    def _parse(self, buf, offsets):
+        """Pola PACKET_DTYPE z ramek Ethernet/IPv4 rekordów spod offsets."""
+        ts = self._timestamps(buf, offsets)
+        caplen = _u32(buf, offsets + 8, self.byte_order).astype(np.int64)
+        data = offsets + RECORD_HEADER_LEN
+
+        keep = caplen >= _ETH_HEADER_LEN + _IPV4_MIN_HEADER_LEN
+        ts, caplen, data = ts[keep], caplen[keep], data[keep]
+        ethertype = _u16(buf, data + 12)
+        ip_rel = np.full(len(data), _ETH_HEADER_LEN, dtype=np.int64)
+        vlan = ethertype == _ETHERTYPE_VLAN
+        if vlan.any():
+            ethertype[vlan] = _u16(buf, data[vlan] + 12 + _VLAN_TAG_LEN)
+            ip_rel[vlan] += _VLAN_TAG_LEN
+
+        keep = (ethertype == _ETHERTYPE_IPV4) & (caplen >= ip_rel + _IPV4_MIN_HEADER_LEN)
+        ts, caplen, data, ip_rel = ts[keep], caplen[keep], data[keep], ip_rel[keep]
+        ip = data + ip_rel
+        proto = buf[ip + 9]
+        l4_rel = ip_rel + (buf[ip] & 0x0f).astype(np.int64) * 4
+
+        table = np.zeros(len(data), dtype=PACKET_DTYPE)
+        table['ts'] = ts
+        table['src_ip'] = _u32(buf, ip + 12)
+        table['dst_ip'] = _u32(buf, ip + 16)
+        table['proto'] = proto
+        table['length'] = caplen
+
+        ports = (((proto == IPPROTO_TCP) | (proto == IPPROTO_UDP))
+                 & (caplen >= l4_rel + 4))
+        l4 = data[ports] + l4_rel[ports]
+        table['src_port'][ports] = _u16(buf, l4)
+        table['dst_port'][ports] = _u16(buf, l4 + 2)
+        tcp = (proto == IPPROTO_TCP) & (caplen > l4_rel + 13)
+        table['flags'][tcp] = buf[data[tcp] + l4_rel[tcp] + 13]
+        return table
+
+
+def iter_pcap_tables(path, chunk_records=DEFAULT_CHUNK_RECORDS):
+    """Pakiety klasycznego .pcap partiami PACKET_DTYPE (np. dla FlowTable.add_table)."""
+    with PcapMap(path) as pcap:
+        yield from pcap.tables(chunk_records)
+
+
+def read_pcap_packets(path, chunk_records=DEFAULT_CHUNK_RECORDS):
+    """Wszystkie pakiety klasycznego .pcap w jednej tablicy PACKET_DTYPE."""
+    tables = list(iter_pcap_tables(path, chunk_records))
+    if not tables:
+        return np.zeros(0, dtype=PACKET_DTYPE)
+    return tables[0] if len(tables) == 1 else np.concatenate(tables)
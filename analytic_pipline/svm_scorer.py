@@ -0,0 +1,115 @@
+"""
+Wektorowy scorer One-Class SVM z jądrem RBF (czysty NumPy).
+
+Dla każdego bloku przepływów wykonywany jest jeden przebieg: skalowanie cech,
+jedno mnożenie macierzy z przeskalowanymi wektorami nośnymi, exp w miejscu i
+iloczyn ze współczynnikami dualnymi. Wynik decyzyjny liczony jest raz, a
+etykieta wynika z jego znaku (jak OneClassSVM.predict).
+
+    exp(-g * ||x - sv||^2) = exp(2g * x.sv - g * ||sv||^2 - g * ||x||^2)
+
+Bufor macierzy jądra (chunk_size x liczba wektorów nośnych) jest alokowany
+raz i używany ponownie, więc pamięć nie rośnie z liczbą przepływów.
+"""
+import threading
+
+import numpy as np
+
+DEFAULT_CHUNK_SIZE = 1024
+SCORER_DTYPES = {'float64': np.float64, 'float32': np.float32}
+
+
+class RBFScorer:
+    """
+    Args:
+        artifact: ModelArtifact z wektorami nośnymi i parametrami skalera
+        chunk_size: Liczba przepływów w bloku (ogranicza pamięć bufora jądra)
+        dtype: 'float64' (zgodny z sklearn) lub 'float32' (szybszy, mniej pamięci)
+        support_vectors, dual_coef, intercept: Opcjonalnie inne punkty bazowe i wagi
+            niż w artefakcie (np. punkty orientacyjne aproksymacji Nyströma)
+    """
+
+    def __init__(self, artifact, chunk_size=DEFAULT_CHUNK_SIZE, dtype='float64',
+                 support_vectors=None, dual_coef=None, intercept=None):
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size musi być dodatni: {chunk_size}")
+        if dtype not in SCORER_DTYPES:
+            raise ValueError(f"Nieobsługiwany typ: {dtype}")
+        self.artifact = artifact
+        self.chunk_size = chunk_size
+        self.dtype = SCORER_DTYPES[dtype]
+        gamma = artifact.gamma
+        if support_vectors is None:
+            support_vectors = artifact.support_vectors
+        if dual_coef is None:
+            dual_coef = artifact.dual_coef
+        self.intercept = artifact.intercept if intercept is None else float(intercept)
+        sv = np.asarray(support_vectors, dtype=np.float64)
+        # Stałe wyliczane raz: 2g * sv^T oraz -g * ||sv||^2
+        self._sv_t = np.ascontiguousarray((2.0 * gamma) * sv.T, dtype=self.dtype)
+        self._sv_bias = (-gamma * np.einsum('ij,ij->i', sv, sv)).astype(self.dtype)
+        self._dual_coef = np.asarray(dual_coef, dtype=self.dtype)
+        self._neg_gamma = -gamma
+        self._local = threading.local()
+
+    @property
+    def n_support_vectors(self):
+        return self._sv_t.shape[1]
+
+    def _buffer(self, rows):
+        # Bufor per wątek - scorer może być współdzielony przez wątki serwera
+        buf = getattr(self._local, 'buffer', None)
+        if buf is None or buf.shape[0] < rows:
+            buf = np.empty((min(self.chunk_size, max(rows, 1)), self.n_support_vectors),
+                           dtype=self.dtype)
+            self._local.buffer = buf
+        return buf[:rows]
+
+    def kernel(self, Xs):
+        """
+        Macierz jądra k(x, sv) dla bloku przeskalowanych przepływów
+        (widok bufora - ważny do następnego wywołania w tym wątku).
+        """
+        x_bias = (self._neg_gamma * np.einsum('ij,ij->i', Xs, Xs)).astype(self.dtype)
+        Xs = Xs.astype(self.dtype, copy=False)
+        kernel = self._buffer(len(Xs))
+        np.matmul(Xs, self._sv_t, out=kernel)
+        kernel += self._sv_bias
+        kernel += x_bias[:, None]
+        np.exp(kernel, out=kernel)
+        return kernel
+
+    def _score_block(self, Xs):
+        return self.kernel(Xs) @ self._dual_coef
+
+    def decision_function(self, X, scaled=False):
+        """
+        Wynik decyzyjny dla każdego przepływu (float64).
+
+        Args:
+            X: Macierz cech (n, liczba cech)
+            scaled: X jest już przeskalowane (pomija transformację skalera)
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self._sv_t.shape[0]:
+            raise ValueError(f"Oczekiwano macierzy (n, {self._sv_t.shape[0]}), otrzymano {X.shape}")
+        scores = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), self.chunk_size):
+            stop = start + self.chunk_size
+            block = X[start:stop]
+            scores[start:stop] = self._score_block(block if scaled else self.artifact.transform(block))
+        scores += self.intercept
+        return scores
+
+    @staticmethod
+    def labels(scores):
+        """Etykiety jak OneClassSVM.predict: 1 dla wyniku > 0, w przeciwnym razie -1."""
+        return np.where(np.asarray(scores) > 0, 1, -1)
+
+    def predict(self, X):
+        """
+        Returns:
+            tuple: (etykiety, wyniki decyzyjne) - wynik liczony tylko raz
+        """
+        scores = self.decision_function(X)
+        return self.labels(scores), scores
@@ -1,3 +1,964 @@
+import importlib.util
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import skipUnless
+
+import numpy as np
+import pandas as pd
 from django.test import TestCase
+from django.utils import timezone
+from cicflowmeter.flow_session import FlowSession
+from scapy.utils import rdpcap
+
+from traffic_generator.generator import TrafficGenerator
+from traffic_generator.pcap_writer import RotatingPcapWriter
+from traffic_generator.raw_packets import RawPacketBuilder
+from .flow_features import (
+    EXPIRED_UPDATE, FEATURE_COLUMNS, PACKET_DTYPE, extract_flow_features, packets_to_flow_df,
+    packets_to_table, parse_frame, pcap_to_flow_df, read_pcap_table,
+)
+
+START_TIME = 1_700_000_000.0
+FLOW_KEY = ['src_ip', 'dst_ip', 'src_port', 'dst_port']
+# scikit-learn jest potrzebny tylko do porównań z modelem .pkl
+SKLEARN_AVAILABLE = importlib.util.find_spec('sklearn') is not None
+MAC_A = '00:11:22:33:44:55'
+MAC_B = '66:77:88:99:aa:bb'
+
+
+def _generator(seed=1):
+    return TrafficGenerator(simulated_time=True, start_time=START_TIME, seed=seed,
+                            background_writer=False)
+
+
+class NativeFlowFeaturesTests(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _write_pcap(self, flows=150):
+        gen = _generator()
+        writer = RotatingPcapWriter(self.tmp.name, max_packets=None)
+        for _ in range(flows):
+            packets, _ = gen.generate_flow()
+            writer.write(packets)
+            gen.clock.sleep(gen.rng.uniform(0, 3))
+        return writer.rotate()['filepath']
+
+    def _cicflowmeter_df(self, pcap_path):
+        csv_path = os.path.join(self.tmp.name, 'flows.csv')
+        session = FlowSession(output_mode='csv', output=csv_path)
+        for pkt in rdpcap(pcap_path):
+            session.process(pkt)
+        session.flush_flows()
+        return pd.read_csv(csv_path)
+
+    def test_matches_cicflowmeter(self):
+        """Test zgodności cech z cicflowmeter na wygenerowanym pliku pcap"""
+        pcap_path = self._write_pcap()
+        expected = self._cicflowmeter_df(pcap_path)
+        native = pcap_to_flow_df(pcap_path)
+
+        self.assertEqual(len(native), len(expected))
+        merged = expected.merge(native, on=FLOW_KEY, suffixes=('_cic', '_native'))
+        self.assertEqual(len(merged), len(expected))
+        for column in FEATURE_COLUMNS + ['tot_fwd_pkts', 'tot_bwd_pkts', 'protocol']:
+            np.testing.assert_allclose(
+                merged[f'{column}_native'].astype(float), merged[f'{column}_cic'].astype(float),
+                atol=1e-5, err_msg=column)
+
+    def test_in_memory_packets_match_pcap(self):
+        """Test identycznych cech z pakietów w pamięci i z pliku"""
+        gen = _generator(seed=3)
+        packets = []
+        for _ in range(40):
+            packets.extend(gen.generate_flow()[0])
+            gen.clock.sleep(1.0)
+        writer = RotatingPcapWriter(self.tmp.name, max_packets=None)
+        writer.write(packets)
+        path = writer.rotate()['filepath']
+
+        from_memory = packets_to_flow_df(packets)
+        from_file = pcap_to_flow_df(path)
+        np.testing.assert_allclose(from_memory[FEATURE_COLUMNS].to_numpy(),
+                                   from_file[FEATURE_COLUMNS].to_numpy(), atol=1e-5)
+
+    def test_icmp_and_non_ip_frames_are_skipped(self):
+        """Test pomijania ICMP w przepływach i ramek innych niż IPv4"""
+        icmp = RawPacketBuilder().icmp(MAC_A, MAC_B, '10.0.0.1', '10.0.0.2', 8,
+                                       timestamp=START_TIME)
+        table = packets_to_table([icmp, (START_TIME, b'\x00' * 12 + b'\x86\xdd' + b'\x00' * 40)])
+        self.assertEqual(len(table), 1)
+        self.assertTrue(extract_flow_features(table).empty)
+
+    def test_reference_mode_counts_packets_once_and_measures_idle(self):
+        """Test trybu bez zgodności z cicflowmeter: brak duplikatu i okresy idle"""
+        builder = RawPacketBuilder()
+        times = [0.0, 0.5, 10.5, 11.0, 31.0]
+        packets = [builder.udp(MAC_A, MAC_B, '10.0.0.1', '10.0.0.2', 5000, 53, b'x' * 10,
+                               timestamp=START_TIME + offset) for offset in times]
+
+        compat = packets_to_flow_df(packets).iloc[0]
+        reference = packets_to_flow_df(packets, compat=False).iloc[0]
+
+        self.assertEqual(compat['tot_fwd_pkts'], len(times) + 1)
+        self.assertEqual(compat['idle_max'], 0)
+        self.assertEqual(reference['tot_fwd_pkts'], len(times))
+        self.assertAlmostEqual(reference['idle_max'], 20.0)
+        self.assertAlmostEqual(reference['idle_min'], 10.0)
+        self.assertAlmostEqual(reference['idle_mean'], 15.0)
+        self.assertAlmostEqual(reference['flow_iat_max'], 20.0)
+
+    def test_flow_split_after_expiry(self):
+        """Test podziału przepływu po przerwie dłuższej niż EXPIRED_UPDATE"""
+        builder = RawPacketBuilder()
+        first = builder.udp(MAC_A, MAC_B, '10.0.0.1', '10.0.0.2', 5000, 53, b'q',
+                            timestamp=START_TIME)
+        reply = builder.udp(MAC_B, MAC_A, '10.0.0.2', '10.0.0.1', 53, 5000, b'a',
+                            timestamp=START_TIME + 1)
+        later = builder.udp(MAC_B, MAC_A, '10.0.0.2', '10.0.0.1', 53, 5000, b'a',
+                            timestamp=START_TIME + EXPIRED_UPDATE + 10)
+
+        df = packets_to_flow_df([first, reply, later])
+        self.assertEqual(len(df), 2)
+        self.assertEqual(list(df['src_ip']), ['10.0.0.1', '10.0.0.2'])
+        self.assertEqual(list(df['tot_bwd_pkts']), [1, 0])
+
+
+
+class PcapReaderTests(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _frames(self):
+        from scapy.layers.inet import ICMP, IP, TCP, UDP
+        from scapy.layers.l2 import ARP, Dot1Q, Ether
+
+        return [
+            bytes(Ether() / IP(src='10.0.0.1', dst='10.0.0.2') / TCP(sport=1234, dport=80, flags='SA')),
+            bytes(Ether() / Dot1Q(vlan=5) / IP(src='10.0.0.3', dst='10.0.0.4') / UDP(sport=53, dport=99)),
+            bytes(Ether() / IP(src='10.0.0.5', dst='10.0.0.6', options=b'\x01' * 4) / TCP(flags='R')),
+            bytes(Ether() / IP(src='10.0.0.7', dst='10.0.0.8') / ICMP()),
+            bytes(Ether() / ARP()),
+            b'\x00' * 20,
+            bytes(Ether() / IP(src='10.0.0.9', dst='10.0.0.10') / UDP())[:36],
+        ]
+
+    def _write_raw(self, frames, byte_order='<', nano=False, tail=b''):
+        """Plik .pcap zapisany ręcznie (dowolna kolejność bajtów i precyzja czasu)."""
+        import struct
+
+        magic = 0xa1b23c4d if nano else 0xa1b2c3d4
+        path = os.path.join(self.tmp.name, f'raw{byte_order == ">"}{nano}.pcap')
+        with open(path, 'wb') as f:
+            f.write(struct.pack(byte_order + 'IHHiIII', magic, 2, 4, 0, 0, 65535, 1))
+            for i, frame in enumerate(frames):
+                f.write(struct.pack(byte_order + 'IIII', int(START_TIME) + i, 250 * (i + 1),
+                                    len(frame), len(frame)))
+                f.write(frame)
+            f.write(tail)
+        return path
+
+    def test_matches_parse_frame_on_edge_cases(self):
+        """Test zgodności z parse_frame: VLAN, opcje IP, ICMP, ARP, ramki ucięte, format pliku"""
+        from .pcap_reader import read_pcap_packets
+
+        frames = self._frames()
+        for byte_order, nano in (('<', False), ('>', True)):
+            fraction = 1e9 if nano else 1e6
+            expected = np.array(
+                [row for row in (parse_frame(frame, int(START_TIME) + i + 250 * (i + 1) / fraction)
+                                 for i, frame in enumerate(frames)) if row is not None],
+                dtype=PACKET_DTYPE)
+            # Ucięty ostatni rekord kończy plik jak w RawPcapReader
+            path = self._write_raw(frames, byte_order, nano, tail=b'\x00' * 20)
+            table = read_pcap_packets(path, chunk_records=2)
+            np.testing.assert_array_equal(table, expected)
+            self.assertEqual(list(table['proto']), [6, 17, 6, 1, 17])
+            self.assertEqual(table['flags'][0], 0x12)
+            self.assertEqual(table['src_port'][1], 53)
+
+    def test_matches_scapy_reader(self):
+        """Test zgodności z RawPcapReader i zerokopiowych widoków rekordów"""
+        from scapy.utils import RawPcapReader
+        from .pcap_reader import PcapMap, read_pcap_packets
+
+        gen = _generator(seed=5)
+        writer = RotatingPcapWriter(self.tmp.name, max_packets=None)
+        for _ in range(30):
+            writer.write(gen.generate_flow()[0])
+        path = writer.rotate()['filepath']
+
+        with RawPcapReader(path) as reader:
+            expected = [(meta.sec + meta.usec / 1e6, data) for data, meta in reader]
+        np.testing.assert_array_equal(read_pcap_packets(path, chunk_records=7),
+                                      packets_to_table(expected))
+        with PcapMap(path) as pcap:
+            records = [(ts, bytes(view)) for ts, view in pcap.records()]
+            self.assertEqual(pcap.summary(), (len(expected), expected[0][0], expected[-1][0]))
+        self.assertEqual(records, expected)
+
+    def test_pcapng_falls_back_to_scapy(self):
+        """Test odczytu pcapng przez RawPcapReader"""
+        from scapy.layers.inet import IP, UDP
+        from scapy.layers.l2 import Ether
+        from scapy.utils import PcapNgWriter
+        from .pcap_catalog import read_pcap_summary
+        from .pcap_reader import PcapMap
+
+        path = os.path.join(self.tmp.name, 'capture.pcapng')
+        pkt = Ether() / IP(src='10.0.0.1', dst='10.0.0.2') / UDP(sport=1, dport=2)
+        pkt.time = START_TIME
+        with PcapNgWriter(path) as writer:
+            writer.write(pkt)
+        with self.assertRaises(ValueError):
+            PcapMap(path)
+        self.assertEqual(len(read_pcap_table(path)), 1)
+        self.assertEqual(read_pcap_summary(path), (None, None, None))
+
+
+class FlowTableTests(TestCase):
+
+    def _tcp(self, builder, offset, flags, reverse=False):
+        if reverse:
+            return builder.tcp(MAC_B, MAC_A, '10.0.0.2', '10.0.0.1', 80, 40000, flags,
+                               timestamp=START_TIME + offset)
+        return builder.tcp(MAC_A, MAC_B, '10.0.0.1', '10.0.0.2', 40000, 80, flags,
+                           timestamp=START_TIME + offset)
+
+    def test_matches_batch_extractor(self):
+        """Test zgodności cech liczonych przyrostowo z extract_flow_features"""
+        from .flow_table import FlowTable, closed_flows_to_df
+
+        gen = _generator(seed=7)
+        packets = []
+        for _ in range(120):
+            packets.extend(gen.generate_flow()[0])
+            gen.clock.sleep(gen.rng.uniform(0, 3))
+
+        for compat in (True, False):
+            table = FlowTable(compat=compat)
+            table.add_frames(packets)
+            live = closed_flows_to_df(table.expire() + table.flush())
+            batch = packets_to_flow_df(packets, compat=compat)
+
+            self.assertEqual(len(live), len(batch))
+            merged = batch.merge(live, on=FLOW_KEY, suffixes=('_batch', '_live'))
+            self.assertEqual(len(merged), len(batch))
+            for column in FEATURE_COLUMNS + ['tot_fwd_pkts', 'tot_bwd_pkts', 'flow_duration']:
+                np.testing.assert_allclose(
+                    merged[f'{column}_live'].astype(float), merged[f'{column}_batch'].astype(float),
+                    atol=1e-9, err_msg=column)
+
+    def test_fin_and_rst_close_flows(self):
+        """Test zamykania przepływu po FIN w obu kierunkach i po RST"""
+        from .flow_table import FIN_LINGER, FlowTable
+
+        builder = RawPacketBuilder()
+        table = FlowTable()
+        table.add_frames([self._tcp(builder, 0, 'S'), self._tcp(builder, 0.1, 'SA', reverse=True),
+                          self._tcp(builder, 0.2, 'FA'), self._tcp(builder, 0.3, 'FA', reverse=True),
+                          self._tcp(builder, 0.4, 'A')])
+        # Końcowy ACK należy jeszcze do przepływu
+        self.assertEqual(table.expire(START_TIME + 0.4), [])
+        closed = table.expire(START_TIME + 0.4 + FIN_LINGER + 0.1)
+        self.assertEqual(len(closed), 1)
+        self.assertEqual(closed[0]['tot_fwd_pkts'] + closed[0]['tot_bwd_pkts'], 6)
+
+        table.add_frames([self._tcp(builder, 5, 'S'), self._tcp(builder, 5.1, 'R', reverse=True)])
+        self.assertEqual(len(table.expire()), 1)
+        self.assertEqual(len(table), 0)
+        self.assertEqual(table.status()['closed_flows'],
+                         {'fin': 1, 'rst': 1, 'idle': 0, 'flush': 0})
+
+    def test_idle_timeout_expires_and_splits_flows(self):
+        """Test wygaszania bezczynnych przepływów i podziału po przerwie"""
+        from .flow_table import FlowTable
+
+        builder = RawPacketBuilder()
+        table = FlowTable(idle_timeout=10)
+        udp = [builder.udp(MAC_A, MAC_B, '10.0.0.1', '10.0.0.2', 5000, 53, b'q',
+                           timestamp=START_TIME + offset) for offset in (0, 1, 20)]
+        table.add_frames(udp[:2])
+        self.assertEqual(table.expire(START_TIME + 5), [])
+        table.add_frames(udp[2:])
+        # Przerwa 19 s > idle_timeout: pierwszy przepływ zamknięty, drugi aktywny
+        self.assertEqual([row['tot_fwd_pkts'] for row in table.expire(START_TIME + 21)], [3])
+        self.assertEqual([row['tot_fwd_pkts'] for row in table.expire(START_TIME + 31)], [2])
+        self.assertEqual(table.status()['closed_flows']['idle'], 2)
+
+    def test_running_stats_match_numpy(self):
+        """Test statystyk Welforda względem NumPy"""
+        from .flow_table import RunningStats
+
+        values = np.random.default_rng(8).exponential(500.0, 1000)
+        stats = RunningStats()
+        for value in values:
+            stats.add(value)
+        self.assertAlmostEqual(stats.mean, values.mean(), places=9)
+        self.assertAlmostEqual(stats.std, values.std(), places=9)
+        self.assertEqual((stats.min, stats.max), (values.min(), values.max()))
+
+
+class MicroBatchScorerTests(TestCase):
+
+    def setUp(self):
+        self.batches = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def _score(self, df):
+        self.release.wait(5)
+        self.batches.append(len(df))
+        return {'flows': len(df), 'attacks': int((df['src_port'] % 2).sum())}
+
+    def _rows(self, count, start=0):
+        return [{'src_port': start + i, 'pkt_len_mean': 60.0} for i in range(count)]
+
+    def _batcher(self, **kwargs):
+        from .micro_batch import MicroBatchScorer
+        batcher = MicroBatchScorer(self._score, **kwargs)
+        self.addCleanup(batcher.close, 5)
+        return batcher
+
+    def test_flush_on_batch_size(self):
+        """Test oceny partii po uzbieraniu batch_size przepływów"""
+        batcher = self._batcher(batch_size=4, max_delay_ms=60000)
+        for i in range(8):
+            batcher.submit(self._rows(1, i))
+        deadline = time.monotonic() + 5
+        while sum(self.batches) < 8 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.batches, [4, 4])
+        status = batcher.status()
+        self.assertEqual((status['scored_flows'], status['attacks']), (8, 4))
+
+    def test_flush_on_max_delay(self):
+        """Test oceny niepełnej partii po max_delay_ms"""
+        batcher = self._batcher(batch_size=1000, max_delay_ms=30)
+        started = time.monotonic()
+        batcher.submit(self._rows(3))
+        while not self.batches and time.monotonic() - started < 5:
+            time.sleep(0.005)
+        self.assertEqual(self.batches, [3])
+        self.assertGreaterEqual(time.monotonic() - started, 0.03)
+        latency = batcher.status()['latency']
+        self.assertGreaterEqual(latency['p99_ms'], latency['p50_ms'])
+        self.assertGreaterEqual(latency['p50_ms'], 25)
+
+    def test_drain_scores_pending_and_mixes_sources(self):
+        """Test drain() bez czekania na opóźnienie, dla wierszy i DataFrame"""
+        batcher = self._batcher(batch_size=1000, max_delay_ms=60000)
+        batcher.submit(self._rows(2))
+        batcher.submit(pd.DataFrame(self._rows(3, 10)))
+        self.assertTrue(batcher.drain(timeout=5))
+        self.assertEqual(self.batches, [5])
+
+    def test_overflow_drops_oldest(self):
+        """Test odrzucania najstarszych przepływów po przepełnieniu kolejki"""
+        self.release.clear()
+        batcher = self._batcher(batch_size=2, max_delay_ms=0, max_pending=4)
+        batcher.submit(self._rows(2))
+        deadline = time.monotonic() + 5
+        while batcher.status()['pending_flows'] and time.monotonic() < deadline:
+            time.sleep(0.005)
+        for i in range(4):
+            batcher.submit(self._rows(2, i * 2))
+        self.assertEqual(batcher.status()['dropped_flows'], 4)
+        self.release.set()
+        self.assertTrue(batcher.drain(timeout=5))
+        self.assertEqual(batcher.status()['scored_flows'], 6)
+
+    def test_scoring_errors_are_counted(self):
+        """Test liczenia nieudanych partii"""
+        from .micro_batch import MicroBatchScorer
+
+        def fail(df):
+            raise RuntimeError('model unavailable')
+        batcher = MicroBatchScorer(fail, batch_size=1)
+        self.addCleanup(batcher.close, 5)
+        batcher.submit(self._rows(1))
+        self.assertTrue(batcher.drain(timeout=5))
+        self.assertEqual(batcher.status()['failed_batches'], 1)
+        with self.assertRaises(ValueError):
+            MicroBatchScorer(fail, batch_size=0)
+
+class BulkAlertInsertTests(TestCase):
+
+    def _flows(self, count, src_ip='10.0.0.1'):
+        return pd.DataFrame({
+            'src_ip': [src_ip] * count,
+            'dst_ip': ['10.0.0.2'] * count,
+            'src_port': list(range(1000, 1000 + count)),
+            'dst_port': [80] * count,
+            'protocol': [6] * count,
+            'pkt_len_mean': [60.0] * count,
+            'tot_fwd_pkts': [2] * count,
+            'tot_bwd_pkts': [1] * count,
+            'totlen_fwd_pkts': [120.0] * count,
+            'totlen_bwd_pkts': [60.0] * count,
+        })
+
+    def test_bulk_insert_in_constant_queries(self):
+        """Test zapisu wielu alertów stałą liczbą zapytań"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from network_monitor.models import Alert
+        from .traffic_predictor import save_attacks_to_db
+
+        flows = self._flows(300)
+        scores = -np.linspace(0.1, 3.0, 300)
+        with CaptureQueriesContext(connection) as queries:
+            created = save_attacks_to_db(flows, scores)
+
+        self.assertEqual(len(created), 300)
+        self.assertEqual(Alert.objects.count(), 300)
+        # +1: UPDATE licznika AlertCounter dla statusu PENDING
+        self.assertLessEqual(len(queries), 5)
+        alert = Alert.objects.get(source_port=1000)
+        self.assertEqual(alert.protocol, '6')
+        self.assertEqual(alert.packet_size, 60)
+        self.assertAlmostEqual(alert.anomaly_score, 0.1)
+        self.assertEqual(alert.description, 'CICFlow anomaly: flowsize=180 pkts=3 score=-0.1000')
+
+    def test_duplicates_skipped_in_batch_and_against_db(self):
+        """Test pomijania duplikatów w partii i już zapisanych alertów"""
+        from network_monitor.models import Alert
+        from .traffic_predictor import save_attack_to_db, save_attacks_to_db
+
+        first = self._flows(1).iloc[0].to_dict()
+        save_attack_to_db(first, -1, -0.5)
+        flows = pd.concat([self._flows(1), self._flows(1), self._flows(1, src_ip='10.0.0.9')])
+
+        created = save_attacks_to_db(flows, [-0.5, -0.5, -0.5])
+
+        self.assertEqual(len(created), 1)
+        self.assertEqual(created[0].source_ip, '10.0.0.9')
+        self.assertEqual(Alert.objects.count(), 2)
+
+
+class AnalysisJobQueueTests(TestCase):
+
+    def _post(self, payload):
+        import json
+        return self.client.post('/analytics/process/', data=json.dumps(payload),
+                                content_type='application/json')
+
+    def test_process_pcap_enqueues_and_returns_202(self):
+        """Test kolejkowania paczki plików zamiast predykcji w żądaniu HTTP"""
+        from .models import AnalysisJob
+
+        response = self._post({'filenames': ['a.pcap', 'b.pcap']})
+
+        self.assertEqual(response.status_code, 202)
+        body = response.json()
+        self.assertEqual(len(body['job_ids']), 2)
+        self.assertEqual(body['job_id'], body['job_ids'][0])
+        jobs = AnalysisJob.objects.filter(id__in=body['job_ids'])
+        self.assertEqual([job.pcap_file for job in jobs], ['a.pcap', 'b.pcap'])
+        self.assertTrue(all(job.status == AnalysisJob.Status.QUEUED for job in jobs))
+
+    def test_worker_runs_jobs_and_status_reports_result(self):
+        """Test wykonania zadań przez workera i raportu stanu"""
+        from unittest import mock
+        from .jobs import run_worker
+
+        job_id = self._post({'filename': 'a.pcap'}).json()['job_id']
+        failed_id = self._post({'filename': 'broken.pcap'}).json()['job_id']
+        self.assertEqual(self.client.get(f'/analytics/jobs/{job_id}/').json()['status'], 'queued')
+
+        result = {'flows': 3, 'attacks': 0, 'is_attack': False}
+        with mock.patch('analytic_pipline.traffic_predictor.predict_packets',
+                        side_effect=lambda name: result if name == 'a.pcap' else None):
+            processed = run_worker('test-worker', once=True)
+
+        self.assertEqual(processed, 2)
+        done = self.client.get(f'/analytics/jobs/{job_id}/').json()
+        self.assertEqual(done['status'], 'done')
+        self.assertEqual(done['result'], result)
+        self.assertEqual(done['attempts'], 1)
+        self.assertEqual(self.client.get(f'/analytics/jobs/{failed_id}/').json()['status'], 'failed')
+        queue = self.client.get('/analytics/jobs/').json()['queue']
+        self.assertEqual(queue, {'queued': 0, 'running': 0, 'done': 1, 'failed': 1})
+
+    def test_claim_skips_taken_jobs_and_requeues_stale(self):
+        """Test przejmowania zadania tylko raz i powrotu porzuconych do kolejki"""
+        from datetime import timedelta
+        from .jobs import claim_job, enqueue_jobs, requeue_stale_jobs
+        from .models import AnalysisJob
+
+        first, second = enqueue_jobs(['a.pcap', 'b.pcap'])
+        self.assertEqual(claim_job('w1').id, first.id)
+        self.assertEqual(claim_job('w2').id, second.id)
+        self.assertIsNone(claim_job('w3'))
+
+        AnalysisJob.objects.filter(id=first.id).update(
+            started_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale_jobs(timedelta(minutes=10)), 1)
+        self.assertEqual(claim_job('w3').id, first.id)
+
+    def test_missing_filename_rejected(self):
+        """Test odrzucenia żądania bez nazwy pliku"""
+        self.assertEqual(self._post({}).status_code, 400)
+
+
+    def test_path_traversal_rejected(self):
+        """Test odrzucenia ścieżek spoza PCAP_FOLDER"""
+        self.assertEqual(self._post({'filename': '../settings.py'}).status_code, 400)
+        self.assertEqual(self._post({'filenames': ['/etc/passwd']}).status_code, 400)
+
+
+class PcapCatalogTests(TestCase):
+
+    def setUp(self):
+        from django.test import override_settings
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        override = override_settings(PCAP_FOLDER=self.tmp.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def _write_files(self, count, flows=3):
+        from .pcap_catalog import register_pcap
+
+        gen = _generator(seed=11)
+        writer = RotatingPcapWriter(self.tmp.name, max_packets=None, on_close=register_pcap)
+        infos = []
+        for i in range(count):
+            writer.prefix = f'catalog{i}'
+            for _ in range(flows):
+                writer.write(gen.generate_flow()[0])
+            infos.append(writer.rotate())
+        return infos
+
+    def test_predict_packets_reads_from_pcap_folder(self):
+        """Test predict_packets z plikiem w PCAP_FOLDER zamiast zaszytej ścieżki"""
+        from unittest import mock
+        from .pcap_catalog import resolve_pcap_path
+        from .traffic_predictor import predict_packets
+
+        info = self._write_files(1)[0]
+        with mock.patch('analytic_pipline.traffic_predictor.predict_flow_df',
+                        side_effect=lambda df: {'flows': len(df)}):
+            self.assertGreater(predict_packets(info['filename'])['flows'], 0)
+        self.assertEqual(resolve_pcap_path(info['filename']), Path(info['filepath']).resolve())
+        with self.assertRaises(ValueError):
+            resolve_pcap_path('../outside.pcap')
+
+    def test_pcap_without_flows_is_analyzed_once(self):
+        """Test pliku bez przepływów TCP/UDP (analiza z flows = 0) i błędu odczytu w zadaniu"""
+        from .jobs import run_worker
+        from .models import AnalysisJob, PcapFile
+        from .pcap_catalog import enqueue_pending, register_pcap
+
+        gen = _generator(seed=5)
+        writer = RotatingPcapWriter(self.tmp.name, max_packets=None, on_close=register_pcap)
+        writer.prefix = 'icmp'
+        writer.write(gen.generate_flow(protocol='ICMP')[0])
+        icmp = writer.rotate()
+        broken = Path(self.tmp.name) / 'broken.pcap'
+        broken.write_bytes(b'not a pcap')
+        register_pcap({'filepath': str(broken), 'filename': broken.name})
+
+        enqueue_pending()
+        with self.assertLogs('analytic_pipline.jobs', 'ERROR'):
+            self.assertEqual(run_worker('catalog', once=True), 2)
+
+        job = AnalysisJob.objects.get(pcap_file=icmp['filename'])
+        self.assertEqual((job.status, job.result['flows']), (AnalysisJob.Status.DONE, 0))
+        entry = PcapFile.objects.get(filename=icmp['filename'])
+        self.assertEqual((entry.status, entry.flows), (PcapFile.Status.ANALYZED, 0))
+        failed = AnalysisJob.objects.get(pcap_file=broken.name)
+        self.assertEqual(failed.status, AnalysisJob.Status.FAILED)
+        self.assertIn('Traceback', failed.error)
+        # Ponawiany jest tylko plik z błędem
+        self.assertEqual([job.pcap_file for job in enqueue_pending(retry_failed=True)], [broken.name])
+
+    def test_writer_registers_closed_files(self):
+        """Test rejestracji zamkniętych plików przez RotatingPcapWriter"""
+        from .models import PcapFile
+        from .pcap_catalog import read_pcap_summary
+
+        info = self._write_files(1)[0]
+        entry = PcapFile.objects.get(filename=info['filename'])
+        self.assertEqual(entry.status, PcapFile.Status.NEW)
+        self.assertEqual(entry.size_bytes, os.path.getsize(info['filepath']))
+        self.assertEqual(entry.packet_count, info['packet_count'])
+        count, first_ts, last_ts = read_pcap_summary(info['filepath'])
+        self.assertEqual(count, info['packet_count'])
+        self.assertAlmostEqual(first_ts, entry.first_packet_ts, places=5)
+        self.assertAlmostEqual(last_ts, entry.last_packet_ts, places=5)
+
+    def test_only_new_or_changed_files_are_processed(self):
+        """Test skanowania i analizy tylko nowych lub zmienionych plików"""
+        from unittest import mock
+        from .jobs import run_worker
+        from .models import AnalysisJob, PcapFile
+        from .pcap_catalog import enqueue_pending, scan_folder
+
+        infos = self._write_files(3)
+        PcapFile.objects.all().delete()
+        self.assertEqual(scan_folder(), {'new': 3, 'changed': 0, 'unchanged': 0})
+        self.assertEqual(PcapFile.objects.get(filename=infos[0]['filename']).packet_count,
+                         infos[0]['packet_count'])
+
+        result = {'flows': 2, 'attacks': 1, 'is_attack': True}
+        with mock.patch('analytic_pipline.traffic_predictor.predict_packets', return_value=result):
+            self.assertEqual(len(enqueue_pending()), 3)
+            self.assertEqual(run_worker('catalog', once=True), 3)
+            self.assertEqual(scan_folder(), {'new': 0, 'changed': 0, 'unchanged': 3})
+            self.assertEqual(enqueue_pending(), [])
+
+            # Plik dopisany po analizie wraca do stanu NEW
+            with open(infos[1]['filepath'], 'ab') as f:
+                f.write(b'\0' * 16)
+            self.assertEqual(scan_folder(), {'new': 0, 'changed': 1, 'unchanged': 2})
+            jobs = enqueue_pending()
+            self.assertEqual([job.pcap_file for job in jobs], [infos[1]['filename']])
+            run_worker('catalog', once=True)
+
+        analyzed = PcapFile.objects.filter(status=PcapFile.Status.ANALYZED)
+        self.assertEqual(analyzed.count(), 3)
+        self.assertEqual(set(analyzed.values_list('attacks', flat=True)), {1})
+        self.assertEqual(AnalysisJob.objects.count(), 4)
+        self.assertEqual(self.client.get('/analytics/jobs/').json()['pcap_files']['analyzed'], 3)
+
+class BatchAnalysisTests(TestCase):
+
+    def setUp(self):
+        from django.test import override_settings
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        override = override_settings(PCAP_FOLDER=self.tmp.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        gen = _generator(seed=13)
+        writer = RotatingPcapWriter(self.tmp.name, max_packets=None)
+        self.paths = []
+        for i in range(3):
+            writer.prefix = f'batch{i}'
+            for _ in range(20):
+                writer.write(gen.generate_flow()[0])
+            self.paths.append(os.path.abspath(writer.rotate()['filepath']))
+
+    def test_collect_pcaps_accepts_directory_and_glob(self):
+        """Test wyboru plików z katalogu i ze wzorca glob"""
+        from .batch_analysis import collect_pcaps
+
+        Path(self.tmp.name, 'notes.txt').write_text('x')
+        self.assertEqual(collect_pcaps(self.tmp.name), sorted(self.paths))
+        self.assertEqual(collect_pcaps(os.path.join(self.tmp.name, 'batch1*.pcap')),
+                         [p for p in self.paths if 'batch1' in p])
+
+    def test_alerts_saved_and_analyzed_files_skipped(self):
+        """Test zapisu alertów i katalogu oraz pominięcia plików przy ponownym uruchomieniu"""
+        from network_monitor.models import Alert
+        from .batch_analysis import analyze_pcaps
+        from .models import PcapFile
+
+        progress, skipped, saved = analyze_pcaps(self.paths, workers=1, batch_rows=1)
+        self.assertEqual((progress.files, progress.errors, skipped), (3, 0, 0))
+        self.assertGreater(progress.flows, 0)
+        self.assertEqual(Alert.objects.count(), saved)
+        entries = PcapFile.objects.filter(path__in=self.paths)
+        self.assertEqual(entries.filter(status=PcapFile.Status.ANALYZED).count(), 3)
+        self.assertEqual(sum(entries.values_list('flows', flat=True)), progress.flows)
+
+        progress, skipped, saved = analyze_pcaps(self.paths, workers=1)
+        self.assertEqual((progress.files, skipped, saved), (0, 3, 0))
+
+    def test_dry_run_writes_scores_without_alerts(self):
+        """Test trybu dry-run: wyniki w CSV, bez zapisu do bazy, ze wznawianiem"""
+        from network_monitor.models import Alert
+        from .batch_analysis import SCORE_COLUMNS, analyze_pcaps
+
+        output = os.path.join(self.tmp.name, 'scores.csv')
+        progress, _, _ = analyze_pcaps(self.paths[:2], dry_run_output=output)
+        scores = pd.read_csv(output)
+        self.assertEqual(list(scores.columns), SCORE_COLUMNS)
+        self.assertEqual(len(scores), progress.flows)
+        self.assertEqual(int((scores['label'] == -1).sum()), progress.attacks)
+        self.assertEqual(Alert.objects.count(), 0)
+
+        progress, skipped, _ = analyze_pcaps(self.paths, dry_run_output=output)
+        self.assertEqual((progress.files, skipped), (1, 2))
+        self.assertEqual(set(pd.read_csv(output)['pcap_file']), set(self.paths))
+
+    def test_dry_run_resume_skips_files_without_flows(self):
+        """Test wznawiania dry-run z plikiem bez przepływów TCP/UDP (brak wierszy w CSV)"""
+        from .batch_analysis import analyze_pcaps
+
+        writer = RotatingPcapWriter(self.tmp.name, max_packets=None)
+        writer.prefix = 'icmp'
+        writer.write(_generator(seed=5).generate_flow(protocol='ICMP')[0])
+        icmp = os.path.abspath(writer.rotate()['filepath'])
+        paths = self.paths[:1] + [icmp]
+
+        output = os.path.join(self.tmp.name, 'scores.csv')
+        progress, _, _ = analyze_pcaps(paths, dry_run_output=output)
+        self.assertEqual((progress.files, progress.errors), (2, 0))
+        self.assertNotIn(icmp, set(pd.read_csv(output)['pcap_file']))
+        progress, skipped, _ = analyze_pcaps(paths, dry_run_output=output)
+        self.assertEqual((progress.files, skipped), (0, 2))
+
+    def test_command_reports_summary(self):
+        """Test komendy analyze_pcaps"""
+        from io import StringIO
+        from django.core.management import call_command
+
+        out = StringIO()
+        call_command('analyze_pcaps', self.tmp.name, '--workers', '1',
+                     '--dry-run', os.path.join(self.tmp.name, 'out.csv'), stdout=out)
+        self.assertIn('3 plików', out.getvalue())
+        self.assertIn('flows/s', out.getvalue())
+
+    def test_command_rejects_parquet_without_pyarrow(self):
+        """Test błędu komendy dla .parquet, gdy pyarrow nie jest zainstalowany"""
+        from unittest import mock
+        from django.core.management import CommandError, call_command
+
+        output = os.path.join(self.tmp.name, 'out.parquet')
+        with mock.patch('importlib.util.find_spec', return_value=None), \
+                self.assertRaisesMessage(CommandError, 'pyarrow'):
+            call_command('analyze_pcaps', self.tmp.name, '--dry-run', output)
+        self.assertFalse(os.path.exists(output))
+
+
+class ModelArtifactTests(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    @skipUnless(SKLEARN_AVAILABLE, 'scikit-learn is not installed')
+    def test_shipped_artifact_matches_pickled_model(self):
+        """Test zgodności one_class_svm_model.npz z modelem sklearn z pliku .pkl"""
+        import pickle
+        import warnings
+        from .model_artifact import ARTIFACT_PATH, load_artifact
+        from .traffic_predictor import MODEL_PATH
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            with open(MODEL_PATH, 'rb') as f:
+                model, scaler = pickle.load(f)
+        artifact = load_artifact(ARTIFACT_PATH)
+
+        rng = np.random.default_rng(0)
+        quantiles = artifact.quantiles
+        X = np.vstack([
+            quantiles[rng.integers(0, len(quantiles), (300, 16)), np.arange(16)],
+            rng.uniform(-10, quantiles[-1] * 1.5 + 1, (200, 16)),
+            np.zeros((1, 16)),
+        ])
+        frame = pd.DataFrame(X, columns=scaler.feature_names_in_)
+        X_scaled = scaler.transform(frame)
+
+        np.testing.assert_allclose(artifact.transform(X), X_scaled, atol=1e-12)
+        np.testing.assert_allclose(artifact.decision_function(X, chunk_size=64),
+                                   model.decision_function(X_scaled), atol=1e-8)
+        np.testing.assert_array_equal(artifact.predict(X), model.predict(X_scaled))
+
+    def test_arrays_are_read_only_memory_maps(self):
+        """Test mapowania tablic .npz przez mmap tylko do odczytu"""
+        from .model_artifact import ARTIFACT_PATH, load_artifact
+
+        artifact = load_artifact(ARTIFACT_PATH)
+        self.assertIsInstance(artifact.support_vectors, np.memmap)
+        self.assertFalse(artifact.support_vectors.flags.writeable)
+        copied = load_artifact(ARTIFACT_PATH, mmap=False)
+        np.testing.assert_array_equal(artifact.support_vectors, copied.support_vectors)
+
+    @skipUnless(SKLEARN_AVAILABLE, 'scikit-learn is not installed')
+    def test_export_roundtrip_with_standard_scaler(self):
+        """Test eksportu modelu ze StandardScaler"""
+        from sklearn.preprocessing import StandardScaler
+        from sklearn.svm import OneClassSVM
+        from .model_artifact import export_model, load_artifact
+
+        rng = np.random.default_rng(1)
+        train = rng.normal(5, 2, (200, 4))
+        scaler = StandardScaler().fit(train)
+        model = OneClassSVM(gamma=0.3, nu=0.1).fit(scaler.transform(train))
+        path = os.path.join(self.tmp.name, 'model.npz')
+        export_model(model, scaler, path)
+
+        artifact = load_artifact(path)
+        X = rng.normal(5, 4, (100, 4))
+        np.testing.assert_allclose(artifact.decision_function(X),
+                                   model.decision_function(scaler.transform(X)), atol=1e-10)
+        self.assertEqual(artifact.scaler_kind, 'standard')
+
+    @skipUnless(SKLEARN_AVAILABLE, 'scikit-learn is not installed')
+    def test_rejects_unsupported_inputs(self):
+        """Test odrzucenia jądra innego niż RBF i skompresowanego .npz"""
+        from sklearn.svm import OneClassSVM
+        from .model_artifact import export_model, load_artifact
+
+        model = OneClassSVM(kernel='linear').fit(np.random.default_rng(2).normal(size=(20, 2)))
+        with self.assertRaises(ValueError):
+            export_model(model, None, os.path.join(self.tmp.name, 'linear.npz'))
+
+        path = os.path.join(self.tmp.name, 'compressed.npz')
+        np.savez_compressed(path, support_vectors=np.ones((2, 2)))
+        with self.assertRaises(ValueError):
+            load_artifact(path)
+
+    def test_preload_only_in_server_and_worker_entry_points(self):
+        """Test że komendy nie ładują modelu przy starcie, a run_analysis_workers tak"""
+        from io import StringIO
+        from unittest import mock
+        from django.apps import apps
+        from django.conf import settings
+        from django.core.management import call_command
+
+        self.assertFalse(settings.ANALYTICS_PRELOAD_MODEL)
+        with mock.patch('analytic_pipline.model_artifact.preload_model_artifact') as preload:
+            apps.get_app_config('analytic_pipline').ready()
+        preload.assert_not_called()
+
+        with mock.patch('analytic_pipline.management.commands.run_analysis_workers.'
+                        'preload_model_artifact') as preload, \
+                mock.patch('analytic_pipline.management.commands.run_analysis_workers.'
+                           'run_worker', return_value=0) as run_worker:
+            call_command('run_analysis_workers', '--in-process', '--once', stdout=StringIO())
+        preload.assert_called_once_with()
+        run_worker.assert_called_once()
+
+
+@skipUnless(SKLEARN_AVAILABLE, 'scikit-learn is not installed')
+class RBFScorerTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        import pickle
+        import warnings
+        from .model_artifact import ARTIFACT_PATH, load_artifact
+        from .traffic_predictor import MODEL_PATH
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            with open(MODEL_PATH, 'rb') as f:
+                model, scaler = pickle.load(f)
+        cls.artifact = load_artifact(ARTIFACT_PATH)
+        rng = np.random.default_rng(3)
+        quantiles = cls.artifact.quantiles
+        cls.X = quantiles[rng.integers(0, len(quantiles), (400, 16)), np.arange(16)]
+        cls.X[::7] *= 3.0
+        X_scaled = scaler.transform(pd.DataFrame(cls.X, columns=scaler.feature_names_in_))
+        cls.expected_scores = model.decision_function(X_scaled)
+        cls.expected_labels = model.predict(X_scaled)
+
+    def test_float64_matches_sklearn(self):
+        """Test zgodności wyników i etykiet z OneClassSVM"""
+        labels, scores = self.artifact.scorer().predict(self.X)
+        np.testing.assert_allclose(scores, self.expected_scores, atol=1e-8)
+        np.testing.assert_array_equal(labels, self.expected_labels)
+
+    def test_chunk_size_does_not_change_scores(self):
+        """Test niezależności wyników od rozmiaru bloku"""
+        full = self.artifact.scorer(chunk_size=len(self.X)).decision_function(self.X)
+        for chunk_size in (1, 37, 128):
+            np.testing.assert_allclose(
+                self.artifact.scorer(chunk_size=chunk_size).decision_function(self.X), full,
+                rtol=0, atol=1e-10)
+
+    def test_float32_within_tolerance(self):
+        """Test trybu float32"""
+        labels, scores = self.artifact.scorer(dtype='float32').predict(self.X)
+        np.testing.assert_allclose(scores, self.expected_scores, atol=1e-2)
+        margin = np.abs(self.expected_scores) > 1e-2
+        np.testing.assert_array_equal(labels[margin], self.expected_labels[margin])
+
+    def test_invalid_input(self):
+        """Test odrzucenia złych parametrów i kształtu danych"""
+        from .svm_scorer import RBFScorer
+
+        with self.assertRaises(ValueError):
+            RBFScorer(self.artifact, chunk_size=0)
+        with self.assertRaises(ValueError):
+            RBFScorer(self.artifact, dtype='float16')
+        with self.assertRaises(ValueError):
+            self.artifact.scorer().decision_function(np.zeros((3, 5)))
+        self.assertEqual(len(self.artifact.scorer().decision_function(np.zeros((0, 16)))), 0)
+
+
+class ApproximateScorerTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        from .model_artifact import ARTIFACT_PATH, load_artifact
+        cls.artifact = load_artifact(ARTIFACT_PATH)
+
+    def _small_artifact(self):
+        from .model_artifact import ModelArtifact
+
+        rng = np.random.default_rng(4)
+        return ModelArtifact({
+            'support_vectors': rng.normal(0, 1, (300, 4)),
+            'dual_coef': rng.uniform(0, 1, 300),
+            'intercept': np.array([-20.0]),
+            'gamma': np.array([0.25]),
+            'scaler_kind': np.array('none'),
+        })
+
+    def test_fit_agrees_with_exact_scorer(self):
+        """Test dopasowania aproksymacji Nyströma do dokładnego scorera"""
+        from .approx_scorer import approx_scorer, evaluate_approximation, fit_nystroem
+
+        artifact = self._small_artifact()
+        arrays = fit_nystroem(artifact, n_components=64, samples=2000, seed=0)
+        self.assertEqual(arrays['landmarks'].shape, (64, 4))
+
+        X = np.random.default_rng(5).normal(0, 1.5, (2000, 4))
+        metrics = evaluate_approximation(artifact.scorer(), approx_scorer(artifact, arrays), X)
+        self.assertGreater(metrics['agreement'], 0.98)
+        self.assertGreater(metrics['precision'], 0.95)
+        self.assertGreater(metrics['recall'], 0.95)
+
+    def test_shipped_approximation_matches_model(self):
+        """Test zgodności one_class_svm_model_nystroem.npz z modelem dokładnym"""
+        from .approx_scorer import (
+            APPROX_ARTIFACT_PATH, approx_scorer, evaluate_approximation, load_approximation,
+            sample_scaled_points,
+        )
+
+        arrays, metrics = load_approximation(APPROX_ARTIFACT_PATH)
+        self.assertGreater(metrics['recall'], 0.99)
+        scorer = approx_scorer(self.artifact, arrays)
+        self.assertLess(scorer.n_support_vectors, self.artifact.n_support_vectors)
+
+        X = sample_scaled_points(self.artifact, 2000, seed=7)
+        result = evaluate_approximation(self.artifact.scorer(), scorer, X, scaled=True)
+        self.assertGreater(result['agreement'], 0.99)
+
+    def test_rejects_approximation_of_other_model(self):
+        """Test odrzucenia aproksymacji dopasowanej do innego gamma"""
+        from .approx_scorer import approx_scorer, load_approximation
+
+        arrays, _ = load_approximation()
+        arrays['gamma'] = arrays['gamma'] * 2
+        with self.assertRaises(ValueError):
+            approx_scorer(self.artifact, arrays)
+
+    def test_scoring_mode_setting(self):
+        """Test wyboru scorera przez ANALYTICS_SCORING_MODE"""
+        from django.test import override_settings
+        from . import traffic_predictor
 
-# Create your tests here.
+        self.addCleanup(traffic_predictor._scorer_cache.update, scorer=None)
+        for mode, exact in (('approximate', False), ('exact', True)):
+            traffic_predictor._scorer_cache['scorer'] = None
+            with override_settings(ANALYTICS_SCORING_MODE=mode):
+                scorer = traffic_predictor.get_rbf_scorer()
+            self.assertEqual(scorer.n_support_vectors == self.artifact.n_support_vectors, exact)
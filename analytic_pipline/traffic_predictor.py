@@ -3,9 +3,9 @@ Backend module for traffic prediction using One-Class SVM.
 Processes flows from traffic_generator and saves detected attacks to database.
 
 USAGE:
-    from analytic_pipline.traffic_predictor import predict_flow
+    from analytic_pipline.traffic_predictor import predict_frames
     
-    result = predict_flow(flow_data)
+    result = predict_frames(packets)
     if result and result['is_attack']:
         print(f"ATTACK DETECTED! Saved to database.")
 """
@@ -17,11 +17,23 @@ import logging
 from pathlib import Path
 from datetime import datetime
 from .test_parser import packets_to_cic_df
+from .flow_features import FEATURE_MAP, packets_to_flow_df, pcap_to_flow_df
+from .pcap_catalog import resolve_pcap_path
+from .micro_batch import DEFAULT_BATCH_SIZE, DEFAULT_MAX_DELAY_MS, MicroBatchScorer
+from .model_artifact import get_model_artifact
+from .approx_scorer import APPROX_ARTIFACT_PATH, approx_scorer, load_approximation
 
 import django
+from django.apps import apps
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'network_monitor.settings')
-django.setup()
+# Wewnątrz projektu Django aplikacje są już gotowe - setup tylko przy imporcie z zewnątrz
+if not apps.ready:
+    django.setup()
 
+from django.conf import settings
+from django.db import transaction
+from network_monitor.alert_counters import alert_counts, count_created
+from network_monitor.alert_stream import publish_alerts
 from network_monitor.models import Alert
 
 
@@ -30,26 +42,6 @@ logger = logging.getLogger(__name__)
 BASE_DIR = Path(__file__).resolve().parent.parent
 MODEL_PATH = BASE_DIR / 'analytic_pipline' / 'one_class_svm_model.pkl'
 
-# Mapowanie cech z CICFlowMeter na używane w modelu
-FEATURE_MAP = {
-    'bwd_pkt_len_std':   ' Bwd Packet Length Std',
-    'bwd_pkt_len_max':   'Bwd Packet Length Max',
-    'bwd_pkt_len_mean':  ' Bwd Packet Length Mean',
-    'bwd_seg_size_avg':  ' Avg Bwd Segment Size',
-    'pkt_len_std':       ' Packet Length Std',
-    'pkt_len_max':       ' Max Packet Length',
-    'pkt_len_var':       ' Packet Length Variance',
-    'pkt_size_avg':      ' Average Packet Size',
-    'pkt_len_mean':      ' Packet Length Mean',
-    'fwd_iat_std':       ' Fwd IAT Std',
-    'idle_max':         ' Idle Max',
-    'flow_iat_max':     ' Flow IAT Max',
-    'idle_mean':        'Idle Mean',
-    'fwd_iat_max':      ' Fwd IAT Max',
-    'idle_min':         ' Idle Min',
-    'flow_iat_std':     ' Flow IAT Std'
-}
-
 _model_cache = {'model': None, 'scaler': None, 'loaded': False}
 
 
@@ -83,83 +75,294 @@ def load_model():
         return None, None
 
 
-def save_attack_to_db(flow_data, prediction, confidence):
+_scorer_cache = {'scorer': None}
+
+
+def get_rbf_scorer():
     """
-    Zapisuje wykryty atak do bazy danych Django.
+    RBFScorer na zmapowanym artefakcie .npz (jeden na proces).
+    Rozmiar bloku i typ obliczeń: ANALYTICS_SCORER_CHUNK_SIZE, ANALYTICS_SCORER_DTYPE.
+    ANALYTICS_SCORING_MODE='approximate' używa aproksymacji Nyströma z
+    one_class_svm_model_nystroem.npz (brak pliku - ocena dokładna).
     """
-    try:
-        alert, created = Alert.objects.get_or_create(
-            source_ip=flow_data.get('src_ip', 'unknown'),
-            destination_ip=flow_data.get('dst_ip', 'unknown'),
-            anomaly_score=float(abs(confidence)),
-            protocol=str(flow_data.get('protocol')),
-            source_port=int(flow_data.get('src_port')) if pd.notna(flow_data.get('src_port')) else None,
-            destination_port=int(flow_data.get('dst_port')) if pd.notna(flow_data.get('dst_port')) else None,
-            packet_size=int(flow_data.get('pkt_len_mean', 0)),
+    if _scorer_cache['scorer'] is None:
+        artifact = get_model_artifact()
+        if artifact is None:
+            return None
+        options = {
+            'chunk_size': getattr(settings, 'ANALYTICS_SCORER_CHUNK_SIZE', 1024),
+            'dtype': getattr(settings, 'ANALYTICS_SCORER_DTYPE', 'float64'),
+        }
+        scorer = None
+        if getattr(settings, 'ANALYTICS_SCORING_MODE', 'exact') == 'approximate':
+            try:
+                arrays, metrics = load_approximation(APPROX_ARTIFACT_PATH)
+                scorer = approx_scorer(artifact, arrays, **options)
+                logger.info(f"Approximate scorer: {scorer.n_support_vectors} landmarks "
+                            f"(precision {metrics.get('precision', float('nan')):.4f}, "
+                            f"recall {metrics.get('recall', float('nan')):.4f})")
+            except (OSError, ValueError, KeyError) as e:
+                logger.error(f"Approximate scorer unavailable, using exact scoring: {e}")
+        _scorer_cache['scorer'] = scorer or artifact.scorer(**options)
+    return _scorer_cache['scorer']
+
+
+def load_scorer():
+    """
+    Zwraca funkcję X -> (preds, scores) dla formatu z settings.ANALYTICS_MODEL_FORMAT.
+    Format 'npz' używa mapowanego ModelArtifact; brak pliku .npz lub 'pickle'
+    oznacza model sklearn z one_class_svm_model.pkl.
+    """
+    if getattr(settings, 'ANALYTICS_MODEL_FORMAT', 'npz') == 'npz':
+        scorer = get_rbf_scorer()
+        if scorer is not None:
+            return lambda X: scorer.predict(X.to_numpy(dtype=np.float64))
+
+    model, scaler = load_model()
+    if model is None:
+        return None
+
+    def score_pickle(X):
+        X_scaled = scaler.transform(X)
+        return model.predict(X_scaled), model.decision_function(X_scaled)
+    return score_pickle
+
+
+# Pola, po których get_or_create rozpoznawał istniejący alert
+ALERT_DEDUP_FIELDS = ('source_ip', 'destination_ip', 'anomaly_score', 'protocol', 'source_port',
+                      'destination_port', 'packet_size', 'description', 'feedback_status')
+_DEDUP_QUERY_CHUNK = 500
+
+
+def _column(df, name, default=None):
+    """Kolumna DataFrame jako lista (albo lista wartości domyślnych)."""
+    if name in df.columns:
+        return df[name].tolist()
+    return [default] * len(df)
+
+
+def _optional_ints(values):
+    return [int(v) if pd.notna(v) else None for v in values]
+
+
+def build_alerts(flows, scores):
+    """
+    Buduje (niezapisane) obiekty Alert z przepływów uznanych za ataki.
+
+    Args:
+        flows: DataFrame z metadanymi i cechami przepływów
+        scores: Wyniki decision_function dla kolejnych wierszy
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    pkts = [fwd + bwd for fwd, bwd in zip(_column(flows, 'tot_fwd_pkts', 0),
+                                          _column(flows, 'tot_bwd_pkts', 0))]
+    # Rozmiar przepływu z kolumn obu ekstraktorów (natywny nie liczy flow_bytes)
+    flow_sizes = [int(fwd + bwd) for fwd, bwd in zip(_column(flows, 'totlen_fwd_pkts', 0),
+                                                     _column(flows, 'totlen_bwd_pkts', 0))]
+    rows = zip(
+        _column(flows, 'src_ip', 'unknown'),
+        _column(flows, 'dst_ip', 'unknown'),
+        np.abs(scores).tolist(),
+        _column(flows, 'protocol'),
+        _optional_ints(_column(flows, 'src_port')),
+        _optional_ints(_column(flows, 'dst_port')),
+        _column(flows, 'pkt_len_mean', 0),
+        flow_sizes,
+        pkts,
+        scores.tolist(),
+    )
+    return [
+        Alert(
+            source_ip=src_ip,
+            destination_ip=dst_ip,
+            anomaly_score=anomaly_score,
+            protocol=str(protocol),
+            source_port=src_port,
+            destination_port=dst_port,
+            packet_size=int(pkt_len_mean),
             description=(
                 f"CICFlow anomaly: "
-                f"flowsize={flow_data.get('flow_bytes')} "
-                f"pkts={flow_data.get('tot_fwd_pkts', 0) + flow_data.get('tot_bwd_pkts', 0)} "
-                f"score={confidence:.4f}"
+                f"flowsize={flow_size} "
+                f"pkts={pkt_count} "
+                f"score={score:.4f}"
             ),
-            feedback_status=0  
+            feedback_status=Alert.FeedbackStatus.PENDING,
         )
-        logger.info(f"✓ Attack saved to DB: ID={alert.id}")
-        
+        for (src_ip, dst_ip, anomaly_score, protocol, src_port, dst_port, pkt_len_mean,
+             flow_size, pkt_count, score) in rows
+    ]
+
+
+def _dedup_key(alert):
+    return tuple(getattr(alert, field) for field in ALERT_DEDUP_FIELDS)
+
+
+def save_attacks_to_db(flows, scores):
+    """
+    Zapisuje wykryte ataki jednym bulk_create w jednej transakcji.
+
+    Duplikaty (te same pola co w dawnym get_or_create) są odrzucane w obrębie
+    partii zbiorem kluczy, a względem bazy - jednym zapytaniem o kandydatów.
+
+    Returns:
+        list: Nowo zapisane alerty
+    """
+    alerts = build_alerts(flows, scores)
+    if not alerts:
+        return []
+
+    try:
+        with transaction.atomic():
+            seen = set()
+            scores_in_batch = sorted({alert.anomaly_score for alert in alerts})
+            for i in range(0, len(scores_in_batch), _DEDUP_QUERY_CHUNK):
+                seen.update(
+                    Alert.objects.filter(anomaly_score__in=scores_in_batch[i:i + _DEDUP_QUERY_CHUNK])
+                    .values_list(*ALERT_DEDUP_FIELDS)
+                )
+
+            new_alerts = []
+            for alert in alerts:
+                key = _dedup_key(alert)
+                if key not in seen:
+                    seen.add(key)
+                    new_alerts.append(alert)
+            created = Alert.objects.bulk_create(new_alerts)
+            # bulk_create nie wysyła sygnałów post_save
+            count_created(created)
+            # Otwarte dashboardy dostają nowe alerty po commicie
+            transaction.on_commit(lambda: publish_alerts(created))
+
+        logger.info(f"✓ {len(created)} attacks saved to DB ({len(alerts) - len(created)} duplicates)")
+        return created
+
     except Exception as e:
-        logger.error(f"✗ Error saving attack to DB: {e}")
+        logger.error(f"✗ Error saving attacks to DB: {e}")
         import traceback
         traceback.print_exc()
+        return []
 
 
+def save_attack_to_db(flow_data, prediction, confidence):
+    """
+    Zapisuje wykryty atak do bazy danych Django.
+    """
+    save_attacks_to_db(pd.DataFrame([flow_data]), [confidence])
+
+
+def extract_flows(pcap_full_path):
+    """
+    Liczy cechy przepływów z pliku .pcap ekstraktorem wybranym w
+    settings.ANALYTICS_FEATURE_EXTRACTOR ('native' lub 'cicflowmeter').
+    """
+    extractor = getattr(settings, 'ANALYTICS_FEATURE_EXTRACTOR', 'native')
+    if extractor == 'cicflowmeter':
+        return packets_to_cic_df(pcap_full_path)
+    return pcap_to_flow_df(pcap_full_path)
+
+
+def score_flow_df(df):
+    """
+    Ocenia przepływy modelem bez zapisu do bazy.
+
+    Args:
+        df: DataFrame z kolumnami FEATURE_MAP
+
+    Returns:
+        tuple | None: (etykiety, wyniki decyzyjne) albo None, gdy brak modelu
+    """
+    scorer = load_scorer()
+    if scorer is None:
+        return None
+
+    # wymagane cechy
+    X = df[list(FEATURE_MAP.keys())].copy()
+    X.rename(columns=FEATURE_MAP, inplace=True)
+    X = X.replace([np.inf, -np.inf], np.nan)
+    X = X.fillna(0)
+    return scorer(X)
+
+
+def predict_flow_df(df):
+    """
+    Ocenia przepływy modelem i zapisuje wykryte ataki do bazy.
+
+    Args:
+        df: DataFrame z kolumnami FEATURE_MAP (i metadanymi przepływu)
+
+    Returns:
+        dict | None: Podsumowanie predykcji albo None, gdy brak modelu lub przepływów
+    """
+    if df is None or df.empty:
+        return None
+    scored = score_flow_df(df)
+    if scored is None:
+        return None
+    preds, scores = scored
+
+    alerts = preds == -1
+    saved_count = int(alerts.sum())
+    if saved_count:
+        save_attacks_to_db(df[alerts], scores[alerts])
+
+    return {
+        "flows": len(df),
+        "attacks": saved_count,
+        "is_attack": saved_count > 0,
+        "attack_indices": np.where(alerts)[0].tolist(),
+        "confidence_scores": scores.tolist()
+    }
+
 
 def predict_packets(pcap_path):
     """
-    pcap_path = str
-    Zwraca ALERT jeśli dowolny flow jest atakiem
+    pcap_path = str - nazwa pliku w settings.PCAP_FOLDER (albo ścieżka bezwzględna)
+    Zwraca ALERT jeśli dowolny flow jest atakiem. Plik bez przepływów TCP/UDP
+    daje podsumowanie z flows = 0, brak modelu - None; wyjątki odczytu pliku
+    trafiają do wywołującego (run_job zapisuje je w zadaniu).
     """
-    try:
-        model, scaler = load_model()
-        if model is None:
-            return None
-        pcap_full_path = f'/home/dfir/PWR/PNW2/pcap_files/{pcap_path}'
-        df = packets_to_cic_df(pcap_full_path)
+    df = extract_flows(str(resolve_pcap_path(pcap_path)))
+    if df is None or df.empty:
+        return {"flows": 0, "attacks": 0, "is_attack": False,
+                "attack_indices": [], "confidence_scores": []}
+    return predict_flow_df(df)
 
-        if df is None or df.empty:
-            return None
-        
-        # wymagane cechy
-        X = df[list(FEATURE_MAP.keys())].copy()
-        X.rename(columns=FEATURE_MAP, inplace=True)
-        X = X.replace([np.inf, -np.inf], np.nan)
-        X = X.fillna(0)
-        X_scaled = scaler.transform(X)
-        preds = model.predict(X_scaled)
-        scores = model.decision_function(X_scaled)
-
-        alerts = preds == -1
-        saved_count = 0
-        if alerts.any():
-            for i in np.where(alerts)[0]:
-                flow = df.iloc[i].to_dict()
-                save_attack_to_db(flow, preds[i], scores[i])
-                saved_count += 1
-
-        return {
-            "flows": len(df),
-            "attacks": saved_count,
-            "is_attack": saved_count > 0,
-            "attack_indices": np.where(alerts)[0].tolist(),
-            "confidence_scores": scores.tolist()
-        }
+
+def predict_frames(packets):
+    """
+    Predykcja bezpośrednio z pakietów w pamięci (bez zapisu i ponownego
+    odczytu pliku .pcap).
+
+    Args:
+        packets: Pakiety Scapy, RawFrame lub krotki (timestamp, bytes)
+    """
+    try:
+        return predict_flow_df(packets_to_flow_df(packets))
 
     except Exception as e:
-        logger.error(f"CIC pipeline failed: {e}")
+        logger.error(f"In-process pipeline failed: {e}")
         import traceback
         traceback.print_exc()
         return None
 
 
+_micro_batcher = {'batcher': None}
+
+
+def get_micro_batcher():
+    """
+    Współdzielony w procesie MicroBatchScorer oceniający przepływy przez
+    predict_flow_df. Rozmiar partii i maksymalne opóźnienie:
+    ANALYTICS_BATCH_SIZE, ANALYTICS_BATCH_MAX_DELAY_MS.
+    """
+    if _micro_batcher['batcher'] is None:
+        _micro_batcher['batcher'] = MicroBatchScorer(
+            predict_flow_df,
+            batch_size=getattr(settings, 'ANALYTICS_BATCH_SIZE', DEFAULT_BATCH_SIZE),
+            max_delay_ms=getattr(settings, 'ANALYTICS_BATCH_MAX_DELAY_MS', DEFAULT_MAX_DELAY_MS),
+        )
+    return _micro_batcher['batcher']
+
 
 def get_recent_attacks(limit=10):
     return Alert.objects.all()[:limit]
@@ -176,7 +379,7 @@ def get_attack_statistics():
     recent_alerts = Alert.objects.filter(timestamp__gte=last_24h)
 
     stats = {
-        'total_attacks': Alert.objects.count(),
+        'total_attacks': alert_counts()['total'],
         'last_24h': recent_alerts.count(),
         'by_source_ip': recent_alerts.values('source_ip').annotate(
             count=Count('id')
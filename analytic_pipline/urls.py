@@ -5,4 +5,6 @@ app_name = 'analytic_pipline'
 
 urlpatterns = [
     path('process/', views.process_pcap, name='process_pcap'),
+    path('jobs/', views.jobs_status, name='jobs_status'),
+    path('jobs/<int:job_id>/', views.job_status, name='job_status'),
 ]
\ No newline at end of file
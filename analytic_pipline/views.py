@@ -1,48 +1,67 @@
-from django.shortcuts import render
+from django.shortcuts import get_object_or_404, render
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 import json
-from .traffic_predictor import predict_packets
-from scapy.all import IP, TCP, UDP
+from .jobs import enqueue_jobs, queue_status
+from .models import AnalysisJob
+from .pcap_catalog import catalog_status, resolve_pcap_path
 
 @csrf_exempt
 @require_http_methods(["POST"])
 def process_pcap(request):
     """
-    Odbiera informacje o PCAP od traffic_generator i uruchamia predykcję.
+    Odbiera informacje o PCAP od traffic_generator i kolejkuje predykcję.
+    Zadania wykonuje pula workerów (manage.py run_analysis_workers);
+    odpowiedź 202 zawiera identyfikatory zadań do sprawdzenia w jobs/<id>/.
     """
     try:
         data = json.loads(request.body)
-        pcap_file = data.get('filename')
+        pcap_files = data.get('filenames') or []
+        if data.get('filename') and not pcap_files:
+            pcap_files = [data['filename']]
         
-        if not pcap_file:
+        if not pcap_files:
             return JsonResponse({
                 'status': 'error',
                 'message': 'No pcap filename provided'
             }, status=400)
         
-        # Wczytaj pakiety z pliku PCAP
-        #from scapy.utils import rdpcap
-        #packets = rdpcap(pcap_file)
-        
-        # Uruchom predykcję
-        result = predict_packets(pcap_file)
-        print(f"[ANALYTICS] Prediction result for {pcap_file}: {result}")
-        if result:
-            return JsonResponse({
-                'status': 'success',
-                'pcap_file': pcap_file,
-                'prediction': result
-            }, status=200)
-        else:
+        # Tylko nazwy plików w PCAP_FOLDER - bez ścieżek bezwzględnych i '..'
+        try:
+            for name in pcap_files:
+                resolve_pcap_path(name, allow_absolute=False)
+        except ValueError as e:
             return JsonResponse({
-                'status': 'no_model',
-                'message': 'Model not loaded'
-            }, status=503)
+                'status': 'error',
+                'message': str(e)
+            }, status=400)
+        
+        jobs = enqueue_jobs(pcap_files)
+        job_ids = [job.id for job in jobs]
+        print(f"[ANALYTICS] Queued {len(jobs)} jobs: {job_ids}")
+        return JsonResponse({
+            'status': 'queued',
+            'job_id': job_ids[0],
+            'job_ids': job_ids,
+            'pcap_files': pcap_files,
+        }, status=202)
             
     except Exception as e:
         return JsonResponse({
             'status': 'error',
             'message': str(e)
-        }, status=500)
\ No newline at end of file
+        }, status=500)
+
+
+@require_http_methods(["GET"])
+def job_status(request, job_id):
+    """Zwraca stan zadania analizy i jego wynik."""
+    job = get_object_or_404(AnalysisJob, id=job_id)
+    return JsonResponse(job.as_dict())
+
+
+@require_http_methods(["GET"])
+def jobs_status(request):
+    """Zwraca liczbę zadań w każdym stanie kolejki i plików w każdym stanie katalogu."""
+    return JsonResponse({'status': 'ok', 'queue': queue_status(), 'pcap_files': catalog_status()})
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Benchmark zapytań dashboardu i statystyk alertów na dużej tabeli Alert.
+Tworzy tymczasową bazę SQLite, wypełnia ją alertami z ostatnich --days dni
+i mierzy zapytania bez indeksów Alert.Meta.indexes i z nimi, wypisując plan
+(EXPLAIN QUERY PLAN) każdego zapytania. Dashboard jest mierzony w trzech
+wariantach: osobne COUNT, jedno zapytanie GROUP BY statusu i tabela AlertCounter,
+a strona 10 000 listy przez OFFSET (Paginator) i kursorem (alert_feed).
+
+    python benchmarks/bench_alert_queries.py --alerts 1000000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'network_monitor.settings')
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.core.paginator import Paginator  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+from django.db.models import Q  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from analytic_pipline.traffic_predictor import get_attack_statistics  # noqa: E402
+from network_monitor.alert_counters import (  # noqa: E402
+    aggregate_counts, counter_counts, rebuild_counters,
+)
+from network_monitor.alert_feed import encode_cursor, fetch_page  # noqa: E402
+from network_monitor.models import Alert  # noqa: E402
+
+INSERT_BATCH = 50000
+
+
+def seed(count, days, sources, seed_value):
+    """Wstawia alerty bezpośrednio przez executemany (bulk_create jest tu wąskim gardłem)."""
+    rng = random.Random(seed_value)
+    now = timezone.now()
+    span = days * 86400
+    statuses = [Alert.FeedbackStatus.PENDING] * 16 + [Alert.FeedbackStatus.CONFIRMED] * 3 + \
+        [Alert.FeedbackStatus.FALSE_POSITIVE]
+    ips = [f'10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}' for i in range(sources)]
+    sql = (f'INSERT INTO {Alert._meta.db_table} (timestamp, source_ip, destination_ip, '
+           'anomaly_score, feedback_status, protocol, source_port, destination_port, '
+           'packet_size, description) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)')
+    with connection.cursor() as cursor:
+        for start in range(0, count, INSERT_BATCH):
+            rows = [((now - timedelta(seconds=rng.random() * span)).isoformat(' '),
+                     rng.choice(ips), '192.168.1.10', -rng.random(), rng.choice(statuses),
+                     'TCP', rng.randrange(1024, 65535), 80, 0, 'benchmark')
+                    for _ in range(min(INSERT_BATCH, count - start))]
+            with transaction.atomic():
+                cursor.executemany(sql, rows)
+
+
+def dashboard_separate_counts():
+    """Dawny widok dashboard: COUNT paginatora i cztery osobne COUNT."""
+    page = Paginator(Alert.objects.all(), 10).get_page(1)
+    list(page)
+    Alert.objects.count()
+    for status in Alert.FeedbackStatus:
+        Alert.objects.filter(feedback_status=status).count()
+
+
+def dashboard_queries(counts_func=aggregate_counts):
+    """Widok dashboard: liczniki (GROUP BY statusu lub AlertCounter) i pierwsza strona."""
+    counts_func()
+    fetch_page(limit=10)
+
+
+def offset_page(number):
+    """Strona number przez Paginator (OFFSET)."""
+    list(Paginator(Alert.objects.all(), 10).get_page(number))
+
+
+def keyset_page(cursor):
+    """Strona po kursorze (network_monitor.alert_feed)."""
+    fetch_page(after=cursor, limit=10)
+
+
+def pending_page():
+    """Najnowsze alerty oczekujące na weryfikację."""
+    list(Alert.objects.filter(feedback_status=Alert.FeedbackStatus.PENDING)[:10])
+
+
+def statistics_queries():
+    stats = get_attack_statistics()
+    list(stats['by_source_ip'])
+
+
+def source_history():
+    """Ostatnie alerty jednego źródła (szczegóły alertu)."""
+    list(Alert.objects.filter(source_ip='10.0.0.1')[:10])
+
+
+QUERIES = {
+    'dashboard_5_counts': dashboard_separate_counts,
+    'dashboard': dashboard_queries,
+    'dashboard_counters': lambda: dashboard_queries(counter_counts),
+    'page_10000_offset': lambda: offset_page(DEEP_PAGE),
+    'page_10000_keyset': lambda: keyset_page(_deep_cursor),
+    'pending_page': pending_page,
+    'statistics': statistics_queries,
+    'source_history': source_history,
+}
+
+PLANS = {
+    'alerts_page': lambda: Alert.objects.all()[:10],
+    'status_count': lambda: Alert.objects.filter(feedback_status=0).values('id'),
+    'pending_page': lambda: Alert.objects.filter(feedback_status=0)[:10],
+    'by_source_ip': lambda: get_attack_statistics()['by_source_ip'],
+    'keyset_page': lambda: Alert.objects.filter(
+        Q(timestamp__lt=timezone.now()) | Q(id__lt=1), timestamp__lte=timezone.now(),
+    ).order_by('-timestamp', '-id')[:10],
+}
+
+DEEP_PAGE = 10000
+_deep_cursor = None
+
+
+def measure(repeat):
+    results = {}
+    for name, func in QUERIES.items():
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - start)
+        results[name] = statistics.median(times)
+    return results
+
+
+def show_plans():
+    for name, query in PLANS.items():
+        plan = ' | '.join(line.strip() for line in query().explain().splitlines())
+        print(f"  {name:>14}: {plan}")
+
+
+def set_indexes(enabled):
+    with connection.schema_editor() as editor:
+        for index in Alert._meta.indexes:
+            if enabled:
+                editor.add_index(Alert, index)
+            else:
+                editor.remove_index(Alert, index)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--alerts', type=int, default=1_000_000)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--sources', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        settings.DATABASES['default']['NAME'] = os.path.join(folder, 'bench.sqlite3')
+        call_command('migrate', 'network_monitor', verbosity=0)
+        start = time.perf_counter()
+        seed(args.alerts, args.days, args.sources, args.seed)
+        print(f"Wstawiono {args.alerts} alertów w {time.perf_counter() - start:.1f} s")
+        # Wstawianie surowym SQL omija sygnały - liczniki trzeba przeliczyć
+        rebuild_counters()
+        global _deep_cursor
+        _deep_cursor = encode_cursor(Alert.objects.all()[(DEEP_PAGE - 1) * 10 - 1])
+
+        runs = {}
+        for label, enabled in (('bez indeksów', False), ('z indeksami', True)):
+            set_indexes(enabled)
+            print(f"Plan zapytań ({label}):")
+            show_plans()
+            runs[label] = measure(args.repeat)
+        connection.close()
+
+    before, after = runs['bez indeksów'], runs['z indeksami']
+    print(f"{'zapytanie':>18} {'bez indeksów':>14} {'z indeksami':>14} {'przysp.':>9}")
+    for name in QUERIES:
+        print(f"{name:>18} {before[name] * 1000:11.1f} ms {after[name] * 1000:11.1f} ms "
+              f"{before[name] / after[name]:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark generowania ataków: dawna ścieżka pakiet po pakiecie
+(generate_attack_traffic / generate_dos_attack bez przerw, ze słownikiem cech
+na pakiet) kontra attack_burst.AttackBurst (porcje prosto do .pcap).
+Raportuje pakiety na sekundę i szczyt pamięci Pythona (tracemalloc) dla
+ścieżki, która jak dawny widok generate_attack zbiera cechy w liście.
+
+    python benchmarks/bench_attack_burst.py --packets 50000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'network_monitor.settings')
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+
+import django  # noqa: E402
+
+django.setup()
+
+from traffic_generator.attack_burst import AttackBurst  # noqa: E402
+from traffic_generator.generator import TrafficGenerator  # noqa: E402
+
+
+def per_packet(attack_type, packets, folder, seed):
+    gen = TrafficGenerator(simulated_time=True, seed=seed, background_writer=False)
+    gen.set_pcap_folder(folder)
+    if attack_type == 'dos':
+        flows = gen.generate_dos_attack(count=packets, interval=0)
+    else:
+        flows = gen.generate_attack_traffic(count=packets, interval=0)
+    features = [f for f, _ in flows]
+    gen.stop()
+    return len(features)
+
+
+def bulk(attack_type, packets, folder, seed):
+    return AttackBurst(attack_type, packets, folder, seed=seed).run()['packets_generated']
+
+
+def measure(func, attack_type, packets, seed):
+    """Czas (przebieg bez tracemalloc) i szczyt pamięci (osobny przebieg)."""
+    with tempfile.TemporaryDirectory() as folder:
+        start = time.perf_counter()
+        count = func(attack_type, packets, folder, seed)
+        elapsed = time.perf_counter() - start
+    with tempfile.TemporaryDirectory() as folder:
+        tracemalloc.start()
+        func(attack_type, packets, folder, seed)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return count / elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--packets', type=int, default=50000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'atak':>10} {'ścieżka':>11} {'pkts/s':>10} {'szczyt MB':>10}")
+    for attack_type in ('syn_flood', 'dos'):
+        for name, func in (('per_packet', per_packet), ('bulk', bulk)):
+            rate, peak = measure(func, attack_type, args.packets, args.seed)
+            print(f"{attack_type:>10} {name:>11} {rate:10.0f} {peak / 1e6:10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark oceny w mikro-partiach: opóźnienie detekcji (p50/p99) i
+przepustowość dla różnych batch_size przy stałym tempie napływu przepływów.
+Przepływy pochodzą z generatora przez FlowTable, ocena modelem .npz (bez bazy).
+
+    python benchmarks/bench_micro_batch.py --rate 2000 --flows 4000 --batch-sizes 1,32,256
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from analytic_pipline.flow_features import feature_matrix
+from analytic_pipline.flow_table import FlowTable
+from analytic_pipline.micro_batch import MicroBatchScorer
+from analytic_pipline.model_artifact import ARTIFACT_PATH, load_artifact
+from traffic_generator.generator import TrafficGenerator
+
+
+def closed_flows(count, seed):
+    gen = TrafficGenerator(simulated_time=True, start_time=1_700_000_000.0, seed=seed,
+                           background_writer=False)
+    table = FlowTable()
+    rows = []
+    while len(rows) < count:
+        table.add_frames(gen.generate_flow()[0])
+        gen.clock.sleep(0.5)
+        rows.extend(table.expire(gen.clock.now()))
+    return rows[:count]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--flows', type=int, default=4000)
+    parser.add_argument('--rate', type=float, default=2000, help='Napływ przepływów na sekundę')
+    parser.add_argument('--batch-sizes', default='1,16,64,256,1024')
+    parser.add_argument('--max-delay-ms', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rows = closed_flows(args.flows, args.seed)
+    scorer = load_artifact(ARTIFACT_PATH).scorer()
+    score = lambda df: scorer.predict(feature_matrix(df))
+    print(f"{len(rows)} przepływów, napływ {args.rate:.0f}/s, max_delay {args.max_delay_ms} ms")
+
+    for batch_size in (int(b) for b in args.batch_sizes.split(',')):
+        batcher = MicroBatchScorer(score, batch_size=batch_size, max_delay_ms=args.max_delay_ms)
+        started = time.perf_counter()
+        for i, row in enumerate(rows):
+            # Stałe tempo napływu
+            delay = started + i / args.rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            batcher.submit([row])
+        batcher.close()
+        elapsed = time.perf_counter() - started
+        status = batcher.status()
+        latency = status['latency']
+        print(f"batch {batch_size:>5}: {status['batches']:>5} partii  "
+              f"p50 {latency['p50_ms']:8.1f} ms  p99 {latency['p99_ms']:8.1f} ms  "
+              f"ocena {status['scoring_flows_per_second']:9.0f} flows/s  "
+              f"całość {status['scored_flows'] / elapsed:7.0f} flows/s")
+
+
+if __name__ == '__main__':
+    main()
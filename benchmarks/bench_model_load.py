@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark zimnego startu modelu One-Class SVM: pickle vs .npz (mmap).
+Każdy pomiar to świeży proces: import, wczytanie modelu i ocena 1000 przepływów.
+Raportowany jest czas oraz pamięć procesu (RSS, w tym część prywatna i
+współdzielona - strony zmapowanego .npz są współdzielone między workerami).
+
+    python benchmarks/bench_model_load.py --processes 4
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r'''
+import json, os, sys, time, warnings
+warnings.filterwarnings('ignore')
+started = time.perf_counter()
+import numpy as np
+fmt = sys.argv[1]
+if fmt == 'pickle':
+    import pickle
+    import pandas as pd
+    with open('analytic_pipline/one_class_svm_model.pkl', 'rb') as f:
+        model, scaler = pickle.load(f)
+    loaded = time.perf_counter()
+    X = pd.DataFrame(np.zeros((1000, 16)), columns=scaler.feature_names_in_)
+    model.decision_function(scaler.transform(X))
+else:
+    from analytic_pipline.model_artifact import load_artifact
+    artifact = load_artifact('analytic_pipline/one_class_svm_model.npz')
+    loaded = time.perf_counter()
+    artifact.decision_function(np.zeros((1000, 16)))
+scored = time.perf_counter()
+
+memory = {}
+for source in ('/proc/self/status', '/proc/self/smaps_rollup'):
+    try:
+        with open(source) as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in ('VmRSS', 'Private_Clean', 'Private_Dirty', 'Shared_Clean', 'Shared_Dirty'):
+                    memory[key] = int(value.split()[0])
+    except OSError:
+        pass
+print(json.dumps({'load': loaded - started, 'first_score': scored - loaded, 'memory_kb': memory}))
+sys.stdout.flush()
+if len(sys.argv) > 2:
+    time.sleep(float(sys.argv[2]))
+'''
+
+
+def measure(fmt, processes):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    # Procesy żyją równocześnie, więc mapowanie .npz jest współdzielone
+    hold = str(2.0 + processes) if processes > 1 else None
+    args = [sys.executable, '-c', CHILD, fmt] + ([hold] if hold else [])
+    children = []
+    for _ in range(processes):
+        children.append(subprocess.Popen(args, cwd=ROOT, env=env, stdout=subprocess.PIPE, text=True))
+        time.sleep(0.2)
+    results = [json.loads(child.stdout.readline()) for child in children]
+    for child in children:
+        child.kill()
+        child.wait()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--processes', type=int, default=1, help='Liczba równoczesnych procesów')
+    args = parser.parse_args()
+
+    for fmt in ('pickle', 'npz'):
+        results = measure(fmt, args.processes)
+        load = sum(r['load'] for r in results) / len(results)
+        score = sum(r['first_score'] for r in results) / len(results)
+        last = results[-1]['memory_kb']
+        private = last.get('Private_Clean', 0) + last.get('Private_Dirty', 0)
+        shared = last.get('Shared_Clean', 0) + last.get('Shared_Dirty', 0)
+        print(f"{fmt:>6}: start+load {load * 1000:8.1f} ms  first score {score * 1000:7.1f} ms  "
+              f"RSS {last.get('VmRSS', 0) / 1024:7.1f} MiB "
+              f"(private {private / 1024:.1f}, shared {shared / 1024:.1f})")
+
+
+if __name__ == '__main__':
+    main()
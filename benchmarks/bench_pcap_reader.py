@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark czytania .pcap do tablicy PACKET_DTYPE: RawPcapReader + parse_frame
+(ścieżka Scapy) kontra mmap + wektorowe zbieranie pól (pcap_reader).
+Raportuje pakiety na sekundę oraz szczyt pamięci alokowanej przez Pythona
+i NumPy (tracemalloc - strony mmap nie są liczone, bo należą do page cache).
+
+    python benchmarks/bench_pcap_reader.py --flows 20000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'network_monitor.settings')
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+
+import django  # noqa: E402
+
+django.setup()
+
+from scapy.utils import RawPcapReader  # noqa: E402
+
+from analytic_pipline.flow_features import PACKET_DTYPE, parse_frame  # noqa: E402
+from analytic_pipline.pcap_reader import iter_pcap_tables  # noqa: E402
+from traffic_generator.generator import TrafficGenerator  # noqa: E402
+from traffic_generator.pcap_writer import RotatingPcapWriter  # noqa: E402
+
+
+def write_pcap(folder, flows, seed):
+    gen = TrafficGenerator(simulated_time=True, seed=seed, background_writer=False)
+    writer = RotatingPcapWriter(folder, max_packets=None)
+    for _ in range(flows):
+        writer.write(gen.generate_flow()[0])
+    return writer.rotate()['filepath']
+
+
+def read_scapy(path):
+    rows = []
+    with RawPcapReader(path) as reader:
+        for data, meta in reader:
+            row = parse_frame(data, meta.sec + meta.usec / (1e9 if reader.nano else 1e6))
+            if row is not None:
+                rows.append(row)
+    return np.array(rows, dtype=PACKET_DTYPE)
+
+
+def read_mmap(path, chunk_records):
+    return np.concatenate(list(iter_pcap_tables(path, chunk_records)))
+
+
+def measure(func, *args):
+    """Czas (osobny przebieg bez tracemalloc, który spowalnia alokacje) i szczyt pamięci."""
+    start = time.perf_counter()
+    table = func(*args)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return table, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--flows', type=int, default=20000)
+    parser.add_argument('--chunk-records', type=int, default=1 << 16)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = write_pcap(folder, args.flows, args.seed)
+        print(f"Plik: {os.path.getsize(path) / 1e6:.1f} MB")
+        reference, scapy_s, scapy_peak = measure(read_scapy, path)
+        table, mmap_s, mmap_peak = measure(read_mmap, path, args.chunk_records)
+        assert np.array_equal(reference, table), "Wyniki czytników różnią się"
+
+    packets = len(table)
+    print(f" scapy: {packets / scapy_s:12.0f} pkts/s  szczyt {scapy_peak / 1e6:8.1f} MB")
+    print(f"  mmap: {packets / mmap_s:12.0f} pkts/s  szczyt {mmap_peak / 1e6:8.1f} MB")
+    print(f"Przyspieszenie mmap/scapy: {scapy_s / mmap_s:.1f}x "
+          f"(wynik: {table.nbytes / 1e6:.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()
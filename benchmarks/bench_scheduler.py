@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Benchmark dokładności harmonogramu ruchu (traffic_generator.scheduler).
+Dla każdego tempa docelowego generuje przepływy na zegarze monotonicznym (bez
+zapisu .pcap) i raportuje tempo osiągnięte, dokładność oraz tokeny utracone,
+gdy generator nie nadąża - górna granica tempa to ostatni wiersz z lost = 0.
+
+    python benchmarks/bench_scheduler.py --rates 100 500 1000 2000 --seconds 3
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'network_monitor.settings')
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+
+import django  # noqa: E402
+
+django.setup()
+
+from traffic_generator.generator import TrafficGenerator  # noqa: E402
+from traffic_generator.scheduler import RateScheduler, parse_mix  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rates', type=float, nargs='+', default=[100, 500, 1000, 2000])
+    parser.add_argument('--unit', choices=['flows', 'mbps'], default='flows')
+    parser.add_argument('--mix', default='http=50,https=20,dns=20,icmp=10')
+    parser.add_argument('--seconds', type=float, default=3.0)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'cel':>9} {'osiągnięte':>11} {'dokładność':>11} {'flows/s':>9} {'Mbit/s':>8} {'lost':>9}")
+    for rate in args.rates:
+        gen = TrafficGenerator(simulated_time=True, seed=args.seed, background_writer=False)
+        gen.set_save_to_pcap(False)
+        scheduler = RateScheduler(gen, rate, unit=args.unit, mix=parse_mix(args.mix))
+        report = scheduler.run(duration=args.seconds)
+        print(f"{rate:>9g} {report['achieved_rate']:>11.1f} {report['accuracy']:>11.4f} "
+              f"{report['achieved_flows_per_second']:>9.0f} {report['achieved_mbps']:>8.2f} "
+              f"{report['lost']:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark oceny przepływów modelem One-Class SVM.
+Porównuje dotychczasową ścieżkę sklearn (scaler.transform, model.predict,
+model.decision_function) z RBFScorer (float64 i float32) oraz z aproksymacją
+Nyströma (jeśli istnieje plik z fit_approx_scorer) na losowych przepływach
+próbkowanych z kwantyli cech modelu.
+
+    python benchmarks/bench_svm_scorer.py --flows 100000 --chunk-size 1024
+"""
+
+import argparse
+import os
+import pickle
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from analytic_pipline.approx_scorer import APPROX_ARTIFACT_PATH, approx_scorer, load_approximation
+from analytic_pipline.model_artifact import ARTIFACT_PATH, load_artifact
+
+
+def sample_flows(artifact, flows, seed):
+    rng = np.random.default_rng(seed)
+    quantiles = artifact.quantiles
+    rows = rng.integers(0, len(quantiles), (flows, artifact.n_features))
+    X = quantiles[rows, np.arange(artifact.n_features)]
+    # Część przepływów poza rozkładem treningowym (anomalie)
+    outliers = rng.random(flows) < 0.1
+    X[outliers] *= rng.uniform(1.5, 5.0, (outliers.sum(), 1))
+    return X
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--flows', type=int, default=100000)
+    parser.add_argument('--chunk-size', type=int, default=1024)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--skip-sklearn', action='store_true', help='Pomiń wolną ścieżkę sklearn')
+    args = parser.parse_args()
+
+    artifact = load_artifact(ARTIFACT_PATH)
+    X = sample_flows(artifact, args.flows, args.seed)
+    print(f"{args.flows} przepływów, {artifact.n_support_vectors} wektorów nośnych, "
+          f"blok {args.chunk_size}")
+
+    reference = None
+    if not args.skip_sklearn:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            with open(os.path.join(ROOT, 'analytic_pipline', 'one_class_svm_model.pkl'), 'rb') as f:
+                model, scaler = pickle.load(f)
+        frame = pd.DataFrame(X, columns=scaler.feature_names_in_)
+
+        def sklearn_path():
+            X_scaled = scaler.transform(frame)
+            return model.predict(X_scaled), model.decision_function(X_scaled)
+
+        (ref_labels, reference), elapsed = timed(sklearn_path)
+        baseline = elapsed
+        print(f"{'sklearn':>8}: {elapsed:8.2f} s {args.flows / elapsed:12.0f} flows/s")
+
+    scorers = [(dtype, artifact.scorer(chunk_size=args.chunk_size, dtype=dtype))
+               for dtype in ('float64', 'float32')]
+    if APPROX_ARTIFACT_PATH.exists():
+        arrays, _ = load_approximation(APPROX_ARTIFACT_PATH)
+        scorers.append(('nystroem', approx_scorer(artifact, arrays, chunk_size=args.chunk_size)))
+
+    for name, scorer in scorers:
+        (labels, scores), elapsed = timed(lambda: scorer.predict(X))
+        line = f"{name:>8}: {elapsed:8.2f} s {args.flows / elapsed:12.0f} flows/s"
+        if reference is not None:
+            diff = np.abs(scores - reference).max()
+            agree = (labels == ref_labels).mean() * 100
+            line += (f"  x{baseline / elapsed:5.1f}  max |diff| {diff:.2e}"
+                     f"  zgodne etykiety {agree:.3f}%")
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark podglądu ruchu (traffic_generator.live_stream) przy wielu widzach.
+Jeden producent generuje przepływy bez przerw (zegar symulowany, bez zapisu
+.pcap), a --viewers korutyn w jednej pętli asyncio odbiera je jak połączenia
+ASGI. Raportuje tempo producenta i odebrane zdarzenia dla każdej liczby widzów -
+tempo nie powinno zależeć od liczby widzów.
+
+    python benchmarks/bench_traffic_stream.py --viewers 1 100 1000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'network_monitor.settings')
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+
+import django  # noqa: E402
+
+django.setup()
+
+from traffic_generator.generator import TrafficGenerator  # noqa: E402
+from traffic_generator.live_stream import TrafficStream  # noqa: E402
+
+
+async def run(viewers, seconds, seed):
+    gen = TrafficGenerator(simulated_time=True, seed=seed, background_writer=False)
+    gen.set_save_to_pcap(False)
+    stream = TrafficStream(gen, interval=0, max_pending=100)
+    received = [0] * viewers
+
+    async def viewer(index):
+        async for chunk in stream.aevents(heartbeat=1):
+            if chunk.startswith('data:'):
+                received[index] += 1
+
+    tasks = [asyncio.create_task(viewer(i)) for i in range(viewers)]
+    start = time.perf_counter()
+    await asyncio.sleep(seconds)
+    flows = stream.flows
+    elapsed = time.perf_counter() - start
+    dropped = stream.status()['dropped']
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    gen.stop()
+    return flows / elapsed, sum(received) / viewers / elapsed, dropped
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--viewers', type=int, nargs='+', default=[1, 100, 1000])
+    parser.add_argument('--seconds', type=float, default=3.0)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'widzowie':>9} {'producent':>14} {'na widza':>14} {'odrzucone':>10}")
+    for viewers in args.viewers:
+        produced, per_viewer, dropped = asyncio.run(run(viewers, args.seconds, args.seed))
+        print(f"{viewers:>9} {produced:10.0f} fl/s {per_viewer:10.0f} ev/s {dropped:>10}")
+
+
+if __name__ == '__main__':
+    main()
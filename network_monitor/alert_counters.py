@@ -0,0 +1,137 @@
+"""
+Liczniki alertów dla dashboardu.
+
+alert_counts() liczy wszystkie liczniki jednym zapytaniem (GROUP BY statusu)
+albo - przy ALERT_COUNTERS_ENABLED - czyta je z tabeli AlertCounter (jeden
+wiersz na status), więc koszt nie zależy od liczby alertów.
+
+Tabela jest utrzymywana tylko przy włączonym ustawieniu. Sygnały Alert
+(utworzenie, zmiana statusu, usunięcie) i ścieżki zbiorcze (count_created po
+bulk_create) zmieniają wtedy liczniki atomowym UPDATE count = count + n, a
+zmiana statusu kosztuje dodatkowo odczyt statusu sprzed zapisu
+(alert_status). Przy wyłączonym ustawieniu zapis alertu nie dotyka tabeli,
+dlatego pierwszy odczyt w procesie (także po włączeniu ustawienia) przelicza
+ją agregacją (rebuild_counters). Zapisy z pominięciem ORM (surowy SQL,
+QuerySet.update) też wymagają rebuild_counters().
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.test.signals import setting_changed
+
+from .alert_status import previous_status, track_previous_status
+from .models import Alert, AlertCounter
+
+# Status -> klucz w wyniku alert_counts()
+STATUS_KEYS = {
+    Alert.FeedbackStatus.PENDING: 'pending',
+    Alert.FeedbackStatus.CONFIRMED: 'confirmed',
+    Alert.FeedbackStatus.FALSE_POSITIVE: 'false',
+}
+
+# Tabela przeliczona w tym procesie - do tego czasu mogła nie śledzić zapisów
+_state = {'synced': False}
+
+
+def counters_enabled():
+    return getattr(settings, 'ALERT_COUNTERS_ENABLED', False)
+
+
+def aggregate_counts():
+    """
+    Liczba wszystkich alertów i alertów w każdym statusie - jedno zapytanie
+    GROUP BY feedback_status. Przechodzi tylko indeks (feedback_status,
+    timestamp), a nie tabelę, jak COUNT(*) FILTER/CASE dla każdego statusu.
+    """
+    rows = dict(Alert.objects.order_by().values_list('feedback_status')
+                .annotate(count=Count('id')))
+    counts = {key: rows.get(status, 0) for status, key in STATUS_KEYS.items()}
+    counts['total'] = sum(rows.values())
+    return counts
+
+
+def rebuild_counters():
+    """Przelicza tabelę AlertCounter z tabeli Alert."""
+    with transaction.atomic():
+        counts = aggregate_counts()
+        for status, key in STATUS_KEYS.items():
+            AlertCounter.objects.update_or_create(feedback_status=status,
+                                                  defaults={'count': counts[key]})
+    _state['synced'] = True
+    return counts
+
+
+def counter_counts():
+    """
+    Liczniki z tabeli AlertCounter - przebudowanej przy pierwszym odczycie
+    w procesie albo gdy jest niepełna.
+    """
+    if not _state['synced']:
+        return rebuild_counters()
+    rows = dict(AlertCounter.objects.values_list('feedback_status', 'count'))
+    if any(status not in rows for status in STATUS_KEYS):
+        return rebuild_counters()
+    counts = {key: rows[status] for status, key in STATUS_KEYS.items()}
+    counts['total'] = sum(counts.values())
+    return counts
+
+
+def alert_counts():
+    """
+    Returns:
+        dict: total, pending, confirmed, false
+    """
+    if counters_enabled():
+        return counter_counts()
+    return aggregate_counts()
+
+
+def add_counts(deltas):
+    """
+    Zmienia liczniki o deltas ({status: n}); przy wyłączonych licznikach
+    nic nie robi. Brak wiersza oznacza niezainicjowaną tabelę - zostanie
+    przeliczona przy odczycie.
+    """
+    if not counters_enabled():
+        return
+    deltas = {status: n for status, n in deltas.items() if n}
+    if not deltas:
+        return
+    with transaction.atomic(savepoint=False):
+        for status, n in deltas.items():
+            AlertCounter.objects.filter(feedback_status=status).update(count=F('count') + n)
+
+
+def count_created(alerts):
+    """Dolicza alerty zapisane z pominięciem sygnałów (bulk_create)."""
+    add_counts(Counter(alert.feedback_status for alert in alerts))
+
+
+track_previous_status(counters_enabled)
+
+
+@receiver(setting_changed)
+def _reset_synced(setting, **kwargs):
+    if setting == 'ALERT_COUNTERS_ENABLED':
+        _state['synced'] = False
+
+
+@receiver(post_save, sender=Alert)
+def _count_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        add_counts({instance.feedback_status: 1})
+        return
+    previous = previous_status(instance)
+    if previous is not None and previous != instance.feedback_status:
+        add_counts({previous: -1, instance.feedback_status: 1})
+
+
+@receiver(post_delete, sender=Alert)
+def _count_deleted(sender, instance, **kwargs):
+    add_counts({instance.feedback_status: -1})
@@ -0,0 +1,151 @@
+"""
+Stronicowanie alertów kluczem (timestamp, id) zamiast OFFSET.
+
+Kolejna strona to "alerty starsze niż ostatni z bieżącej strony", więc
+zapytanie schodzi po indeksie od miejsca kursora i czyta limit + 1 wierszy -
+strona 10 000 kosztuje tyle co pierwsza i nie jest potrzebny COUNT(*).
+Kursor to zakodowana para (timestamp, id) ostatniego (after) lub pierwszego
+(before) alertu strony; id rozstrzyga alerty o tym samym znaczniku czasu.
+"""
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Alert
+
+# Kolumny tabeli alertów na dashboardzie
+FEED_FIELDS = ('id', 'timestamp', 'source_ip', 'destination_ip', 'anomaly_score',
+               'feedback_status')
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+def encode_cursor(alert):
+    raw = f"{alert.timestamp.isoformat()}|{alert.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Returns:
+        tuple: (timestamp, id)
+
+    Raises:
+        ValueError: Nieprawidłowy kursor
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        timestamp, alert_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(timestamp), int(alert_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Nieprawidłowy kursor: {cursor}") from e
+
+
+def _parse_time(value, name):
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f"Nieprawidłowa data {name}: {value}")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def parse_filters(params):
+    """
+    Filtry z parametrów zapytania: status (można powtórzyć lub rozdzielić
+    przecinkami), source_ip, protocol, since, until (ISO 8601).
+
+    Raises:
+        ValueError: Nieprawidłowa wartość filtra
+    """
+    filters = {}
+    statuses = [value for item in params.getlist('status') for value in item.split(',') if value]
+    if statuses:
+        try:
+            statuses = [int(value) for value in statuses]
+        except ValueError:
+            raise ValueError(f"Nieprawidłowy status: {','.join(statuses)}")
+        if not set(statuses) <= set(Alert.FeedbackStatus.values):
+            raise ValueError(f"Nieprawidłowy status: {statuses}")
+        filters['feedback_status__in'] = statuses
+    if params.get('source_ip'):
+        filters['source_ip'] = params['source_ip']
+    if params.get('protocol'):
+        filters['protocol'] = params['protocol']
+    if params.get('since'):
+        filters['timestamp__gte'] = _parse_time(params['since'], 'since')
+    if params.get('until'):
+        filters['timestamp__lt'] = _parse_time(params['until'], 'until')
+    return filters
+
+
+def parse_limit(value, default=DEFAULT_LIMIT):
+    if value in (None, ''):
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError(f"Nieprawidłowy limit: {value}")
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def fetch_page(filters=None, after=None, before=None, limit=DEFAULT_LIMIT):
+    """
+    Strona alertów od najnowszych.
+
+    Args:
+        filters: Filtry z parse_filters
+        after: Kursor - alerty starsze niż wskazany (następna strona)
+        before: Kursor - alerty nowsze niż wskazany (poprzednia strona)
+        limit: Liczba alertów na stronie
+
+    Returns:
+        dict: alerts (instancje Alert z polami FEED_FIELDS), next, previous
+            (kursory sąsiednich stron lub None)
+    """
+    queryset = Alert.objects.filter(**(filters or {})).only(*FEED_FIELDS)
+
+    if before:
+        timestamp, alert_id = decode_cursor(before)
+        # Warunek zakresu na timestamp pozwala zejść po indeksie, id rozstrzyga remisy
+        rows = list(queryset.filter(Q(timestamp__gt=timestamp) | Q(id__gt=alert_id),
+                                    timestamp__gte=timestamp)
+                    .order_by('timestamp', 'id')[:limit + 1])
+        if len(rows) <= limit:
+            # Doszliśmy do najnowszych - pełna pierwsza strona
+            return fetch_page(filters, limit=limit)
+        alerts = rows[:limit][::-1]
+        return {
+            'alerts': alerts,
+            'next': encode_cursor(alerts[-1]),
+            'previous': encode_cursor(alerts[0]),
+        }
+
+    if after:
+        timestamp, alert_id = decode_cursor(after)
+        queryset = queryset.filter(Q(timestamp__lt=timestamp) | Q(id__lt=alert_id),
+                                   timestamp__lte=timestamp)
+    rows = list(queryset.order_by('-timestamp', '-id')[:limit + 1])
+    alerts = rows[:limit]
+    return {
+        'alerts': alerts,
+        'next': encode_cursor(alerts[-1]) if len(rows) > limit else None,
+        'previous': encode_cursor(alerts[0]) if after and alerts else None,
+    }
+
+
+def feed_item(alert):
+    """Alert jako słownik JSON z kolumnami tabeli dashboardu."""
+    return {
+        'id': alert.id,
+        'timestamp': alert.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+        'source_ip': alert.source_ip,
+        'destination_ip': alert.destination_ip,
+        'anomaly_score': alert.anomaly_score,
+        'feedback_status': alert.feedback_status,
+        'feedback_status_display': alert.get_feedback_status_display(),
+    }
@@ -0,0 +1,40 @@
+"""
+Status alertu sprzed zapisu - wspólny dla liczników (alert_counters)
+i strumienia dashboardu (alert_stream).
+
+Sygnał pre_save odczytuje go jednym zapytaniem tylko wtedy, gdy zapis może
+zmienić status (nie dla nowych alertów ani dla update_fields bez
+feedback_status) i gdy potrzebuje go któryś z modułów zarejestrowanych przez
+track_previous_status(). Odbiorniki post_save czytają go przez
+previous_status().
+"""
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+
+from .models import Alert
+
+# Warunki (funkcje bez argumentów), przy których status sprzed zapisu jest potrzebny
+_consumers = []
+
+
+def track_previous_status(needed):
+    """Rejestruje warunek odczytu statusu sprzed zapisu."""
+    _consumers.append(needed)
+
+
+def previous_status(instance):
+    """Status alertu przed bieżącym zapisem albo None (nowy alert lub status nieodczytany)."""
+    return getattr(instance, '_previous_status', None)
+
+
+@receiver(pre_save, sender=Alert)
+def _remember_status(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._previous_status = None
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and 'feedback_status' not in update_fields:
+        return
+    if not any(needed() for needed in _consumers):
+        return
+    instance._previous_status = (Alert.objects.filter(pk=instance.pk)
+                                 .values_list('feedback_status', flat=True).first())
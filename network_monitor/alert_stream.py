@@ -0,0 +1,276 @@
+"""
+Strumień nowych alertów dla otwartych dashboardów (Server-Sent Events).
+
+Jeden nadawca w procesie (AlertBroadcaster) rozsyła zdarzenia do wszystkich
+połączeń. Alerty zapisane w tym procesie (tryby in_process/live, zmiany
+statusu z dashboardu) trafiają do niego zaraz po commicie - z sygnałów Alert
+i z save_attacks_to_db po bulk_create, jak liczniki w alert_counters. Alerty
+zapisane przez inne procesy (run_analysis_workers, analyze_pcaps) odczytuje
+jeden wątek odpytujący bazę co ALERT_STREAM_POLL_SECONDS. Liczba zapytań nie
+zależy więc od liczby otwartych dashboardów; samo połączenie czyta bazę
+tylko przy starcie - doczytuje alerty od kursora (last_id wyrenderowany w
+stronie albo nagłówek Last-Event-ID po wznowieniu) do watermarku pollera.
+
+Rozsyłanie do połączeń (network_monitor.event_stream) - połączenie, które nie
+nadąża, dostaje zdarzenie "reset" zamiast zaległych zdarzeń. Pod ASGI
+(network_monitor/asgi.py) połączenie to korutyna czekająca na zdarzenia, pod
+WSGI - wątek serwera.
+
+Zdarzenia:
+    alerts - {"alerts": [feed_item, ...], "counts": {"total": +n, "pending": +n, ...}}
+    status - {"id", "feedback_status", "feedback_status_display", "counts"} (zmiana
+             statusu; przy usunięciu alertu feedback_status to null)
+    reset  - kolejka połączenia przepełniona, klient powinien przeładować listę
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import Counter, deque
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Max
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .alert_counters import STATUS_KEYS
+from .alert_feed import FEED_FIELDS, feed_item
+from .alert_status import previous_status, track_previous_status
+from .event_stream import (
+    DEFAULT_MAX_PENDING, HEARTBEAT_SECONDS, EventBroadcaster, aiter_events, format_event,
+    iter_events,
+)
+from .models import Alert
+
+logger = logging.getLogger(__name__)
+
+# Najwięcej alertów w jednym zdarzeniu (dashboard i tak pokazuje najnowsze)
+MAX_EVENT_ALERTS = 100
+
+
+class AlertBroadcaster(EventBroadcaster):
+    """Nadawca strumienia alertów; pamięta alerty wysłane już z tego procesu."""
+
+    def __init__(self, max_pending=DEFAULT_MAX_PENDING):
+        super().__init__(max_pending, overflow='reset')
+        # Wątek odpytujący bazę nie powtarza tych alertów
+        self._recent_ids = deque(maxlen=10000)
+        self._recent_set = set()
+
+    def remember(self, alert_ids):
+        with self._lock:
+            for alert_id in alert_ids:
+                if len(self._recent_ids) == self._recent_ids.maxlen:
+                    self._recent_set.discard(self._recent_ids[0])
+                self._recent_ids.append(alert_id)
+                self._recent_set.add(alert_id)
+
+    def seen(self, alert_id):
+        return alert_id in self._recent_set
+
+
+broadcaster = AlertBroadcaster()
+# Zmianę statusu publikujemy tylko do otwartych połączeń
+track_previous_status(lambda: broadcaster.has_subscribers)
+
+
+def _count_delta(statuses, sign=1):
+    counts = Counter(STATUS_KEYS[status] for status in statuses)
+    delta = {key: sign * counts.get(key, 0) for key in STATUS_KEYS.values()}
+    delta['total'] = sign * sum(counts.values())
+    return delta
+
+
+def _alerts_event(alerts):
+    alerts = sorted(alerts, key=lambda alert: alert.id)
+    return {
+        'alerts': [feed_item(alert) for alert in alerts[-MAX_EVENT_ALERTS:]][::-1],
+        'counts': _count_delta(alert.feedback_status for alert in alerts),
+    }, alerts[-1].id
+
+
+def publish_alerts(alerts):
+    """Nowe alerty zapisane w tym procesie (wywoływane po commicie)."""
+    # Bez id (bulk_create na bazie bez RETURNING) alerty dośle wątek odpytujący
+    alerts = [alert for alert in alerts if alert.id is not None]
+    if not alerts or not broadcaster.has_subscribers:
+        return
+    broadcaster.remember(alert.id for alert in alerts)
+    data, last_id = _alerts_event(alerts)
+    broadcaster.publish('alerts', data, event_id=last_id)
+
+
+def publish_status_change(alert_id, status, previous):
+    if not broadcaster.has_subscribers:
+        return
+    counts = _count_delta([status])
+    counts.update({key: counts[key] - value
+                   for key, value in _count_delta([previous]).items()})
+    broadcaster.publish('status', {'id': alert_id, 'feedback_status': status,
+                                   'feedback_status_display': Alert.FeedbackStatus(status).label,
+                                   'counts': counts})
+
+
+def publish_deleted(alert_id, status):
+    if not broadcaster.has_subscribers:
+        return
+    broadcaster.publish('status', {'id': alert_id, 'feedback_status': None,
+                                   'counts': _count_delta([status], sign=-1)})
+
+
+@receiver(post_save, sender=Alert)
+def _publish_saved(sender, instance, created, raw=False, **kwargs):
+    if raw or not broadcaster.has_subscribers:
+        return
+    if created:
+        transaction.on_commit(lambda: publish_alerts([instance]))
+        return
+    previous = previous_status(instance)
+    if previous is not None and previous != instance.feedback_status:
+        status = instance.feedback_status
+        transaction.on_commit(lambda: publish_status_change(instance.id, status, previous))
+
+
+@receiver(post_delete, sender=Alert)
+def _publish_deleted(sender, instance, **kwargs):
+    if broadcaster.has_subscribers:
+        alert_id, status = instance.id, instance.feedback_status
+        transaction.on_commit(lambda: publish_deleted(alert_id, status))
+
+
+class AlertPoller:
+    """
+    Jeden wątek na proces: co ALERT_STREAM_POLL_SECONDS sekund pobiera alerty nowsze niż
+    ostatnio widziany i publikuje te, których nie wysłał ten proces.
+    Działa tylko, gdy są subskrybenci.
+    """
+
+    def __init__(self, broadcaster):
+        self.broadcaster = broadcaster
+        self.polls = 0
+        self._watermark = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def interval(self):
+        return getattr(settings, 'ALERT_STREAM_POLL_SECONDS', 2.0)
+
+    def ensure_running(self):
+        if self.interval <= 0:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='alert-poller', daemon=True)
+                self._thread.start()
+
+    def _current_max_id(self):
+        return Alert.objects.aggregate(last=Max('id'))['last'] or 0
+
+    def snapshot(self):
+        """
+        Id, do którego alerty trafią do nowej subskrypcji tylko przez doczytanie
+        (replay_events) - nowsze opublikuje poller. Wołane po subscribe().
+        """
+        with self._lock:
+            if self._watermark is None or self._thread is None:
+                # Poller nie działa (ALERT_STREAM_POLL_SECONDS=0) - nikt nie opublikuje nowszych
+                self._watermark = self._current_max_id()
+            return self._watermark
+
+    def poll_once(self):
+        """Publikuje alerty zapisane od poprzedniego wywołania przez inne procesy."""
+        # Pod blokadą - snapshot() nie odczyta watermarku między zapytaniem a publikacją
+        with self._lock:
+            self.polls += 1
+            if self._watermark is None:
+                self._watermark = self._current_max_id()
+                return []
+            alerts = list(Alert.objects.filter(id__gt=self._watermark).order_by('id')
+                          .only(*FEED_FIELDS)[:MAX_EVENT_ALERTS * 10])
+            if not alerts:
+                return []
+            self._watermark = alerts[-1].id
+            alerts = [alert for alert in alerts if not self.broadcaster.seen(alert.id)]
+            if alerts:
+                data, last_id = _alerts_event(alerts)
+                self.broadcaster.publish('alerts', data, event_id=last_id)
+            return alerts
+
+    def _run(self):
+        try:
+            while True:
+                with self._lock:
+                    # Pod blokadą - ensure_running nie przegapi kończącego się wątku
+                    if not self.broadcaster.has_subscribers:
+                        self._thread = None
+                        self._watermark = None
+                        return
+                try:
+                    self.poll_once()
+                except Exception as e:
+                    logger.error(f"Alert stream poll failed: {e}")
+                    close_old_connections()
+                time.sleep(self.interval)
+        finally:
+            connection.close()
+
+
+poller = AlertPoller(broadcaster)
+
+
+def replay_events(last_event_id, until=None):
+    """
+    Alerty pominięte przez połączenie: od kursora (Last-Event-ID albo last_id
+    wyrenderowany w stronie) do until; przy zbyt wielu - zdarzenie reset.
+    """
+    try:
+        last_id = int(last_event_id)
+    except (TypeError, ValueError):
+        return []
+    alerts = Alert.objects.filter(id__gt=last_id)
+    if until is not None:
+        alerts = alerts.filter(id__lte=until)
+    alerts = list(alerts.order_by('id').only(*FEED_FIELDS)[:MAX_EVENT_ALERTS + 1])
+    if not alerts:
+        return []
+    if len(alerts) > MAX_EVENT_ALERTS:
+        return [format_event('reset', {})]
+    data, event_id = _alerts_event(alerts)
+    return [format_event('alerts', data, event_id)]
+
+
+def _catch_up(last_event_id):
+    """
+    Po subskrypcji: alerty od kursora do watermarku pollera. Nowsze dostarczy
+    poller, więc nic nie przepada między renderem strony (albo rozłączeniem)
+    a pierwszym odpytaniem i nic nie jest wysłane dwa razy.
+    """
+    poller.ensure_running()
+    if last_event_id is None:
+        return []
+    return replay_events(last_event_id, until=poller.snapshot())
+
+
+def stream_events(last_event_id=None, heartbeat=HEARTBEAT_SECONDS):
+    """Strumień SSE dla serwera WSGI (blokuje wątek połączenia)."""
+    subscription = broadcaster.subscribe()
+    try:
+        yield from _catch_up(last_event_id)
+        yield from iter_events(subscription, heartbeat)
+    finally:
+        broadcaster.unsubscribe(subscription)
+
+
+async def astream_events(last_event_id=None, heartbeat=HEARTBEAT_SECONDS):
+    """Strumień SSE dla serwera ASGI (korutyna na połączenie)."""
+    subscription = broadcaster.subscribe(asyncio.get_running_loop())
+    try:
+        for event in await sync_to_async(_catch_up)(last_event_id):
+            yield event
+        async for event in aiter_events(subscription, heartbeat):
+            yield event
+    finally:
+        broadcaster.unsubscribe(subscription)
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class NetworkMonitorConfig(AppConfig):
+    name = 'network_monitor'
+
+    def ready(self):
+        # Sygnały Alert aktualizujące tabelę AlertCounter
+        from . import alert_counters  # noqa: F401
+        # Sygnały Alert publikujące zdarzenia strumienia dashboardu
+        from . import alert_stream  # noqa: F401
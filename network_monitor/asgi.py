@@ -5,6 +5,11 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
+
+Strumień alertów dashboardu (/api/alerts/stream/) pod serwerem ASGI trzyma
+otwarte połączenia jako korutyny zamiast wątków WSGI:
+
+    uvicorn network_monitor.asgi:application
 """
 
 import os
@@ -14,3 +19,9 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'network_monitor.settings')
 
 application = get_asgi_application()
+
+# Model ładowany przy starcie serwera (także runserver), nie przy pierwszej
+# predykcji; komendy manage.py go nie ładują (ANALYTICS_PRELOAD_MODEL)
+from analytic_pipline.model_artifact import preload_model_artifact  # noqa: E402
+
+preload_model_artifact()
@@ -0,0 +1,201 @@
+"""
+Rozsyłanie zdarzeń Server-Sent Events do wielu połączeń w jednym procesie.
+
+Producent wywołuje EventBroadcaster.publish() z dowolnego wątku; zdarzenie
+jest serializowane raz i trafia do ograniczonej kolejki (Subscription) każdego
+połączenia, więc wolny klient nigdy nie blokuje producenta. Połączenie pod
+ASGI czeka na zdarzenia w pętli asyncio (aiter_events), pod WSGI blokuje
+wątek serwera (iter_events).
+
+Zachowanie przy pełnej kolejce (overflow):
+    reset       - zaległe zdarzenia są odrzucane, klient dostaje zdarzenie
+                  "reset" i powinien przeładować stan (strumień alertów)
+    drop_oldest - odrzucane są najstarsze zdarzenia, klient dostaje zdarzenie
+                  "dropped" z ich liczbą (podgląd ruchu, gdzie liczą się
+                  najnowsze)
+"""
+import asyncio
+import json
+import threading
+import time
+from collections import defaultdict, deque
+
+HEARTBEAT_SECONDS = 15.0
+DEFAULT_MAX_PENDING = 1000
+OVERFLOW_POLICIES = ('reset', 'drop_oldest')
+
+HEARTBEAT = ': ping\n\n'
+
+
+def format_event(kind, data, event_id=None):
+    """Zdarzenie w formacie text/event-stream (kind=None - zdarzenie "message")."""
+    lines = [] if event_id is None else [f'id: {event_id}']
+    if kind is not None:
+        lines.append(f'event: {kind}')
+    lines.append(f'data: {json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+def _wake_all(subscriptions):
+    for subscription in subscriptions:
+        subscription.wake()
+
+
+def _wake_in_loop(loop, subscriptions):
+    try:
+        loop.call_soon_threadsafe(_wake_all, subscriptions)
+    except RuntimeError:
+        # Pętla połączenia już zamknięta
+        pass
+
+
+class Subscription:
+    """
+    Kolejka zdarzeń jednego połączenia. Zapis z dowolnego wątku, odczyt
+    blokujący (get) albo w pętli asyncio (aget, gdy podano loop).
+    """
+
+    def __init__(self, max_pending=DEFAULT_MAX_PENDING, overflow='reset', loop=None):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Nieznana polityka przepełnienia: {overflow}")
+        self.max_pending = max_pending
+        self.overflow = overflow
+        self.dropped = 0
+        self._events = deque()
+        self._pending_dropped = 0
+        self._notified = False
+        self._lock = threading.Lock()
+        self.loop = loop
+        self._wakeup = asyncio.Event() if loop is not None else threading.Event()
+
+    def enqueue(self, event):
+        """Dodaje zdarzenie; True, jeśli czekającego trzeba obudzić (jeszcze nie budzony)."""
+        with self._lock:
+            if len(self._events) >= self.max_pending:
+                dropped = len(self._events) if self.overflow == 'reset' else 1
+                for _ in range(dropped):
+                    self._events.popleft()
+                self.dropped += dropped
+                self._pending_dropped += dropped
+            self._events.append(event)
+            if self._notified:
+                return False
+            self._notified = True
+            return True
+
+    def wake(self):
+        """Budzi czekającego (pod asyncio - wywoływane w wątku pętli)."""
+        self._wakeup.set()
+
+    def push(self, event):
+        if not self.enqueue(event):
+            return
+        if self.loop is None:
+            self.wake()
+            return
+        _wake_in_loop(self.loop, [self])
+
+    def _take(self):
+        with self._lock:
+            self._wakeup.clear()
+            self._notified = False
+            events = list(self._events)
+            self._events.clear()
+            dropped, self._pending_dropped = self._pending_dropped, 0
+        if dropped:
+            marker = (format_event('reset', {}) if self.overflow == 'reset'
+                      else format_event('dropped', {'count': dropped}))
+            events.insert(0, marker)
+        return events
+
+    def get(self, timeout=None):
+        """Zaległe zdarzenia; pusta lista po timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            events = self._take()
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if events or (remaining is not None and remaining <= 0):
+                return events
+            # Budzenie może przyjść po odebraniu zdarzeń - wtedy czekamy dalej
+            self._wakeup.wait(remaining)
+
+    async def aget(self, timeout=None):
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while True:
+            events = self._take()
+            remaining = None if deadline is None else deadline - loop.time()
+            if events or (remaining is not None and remaining <= 0):
+                return events
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+
+class EventBroadcaster:
+    """Rozsyła zdarzenia do wszystkich subskrypcji w procesie."""
+
+    def __init__(self, max_pending=DEFAULT_MAX_PENDING, overflow='reset'):
+        self.max_pending = max_pending
+        self.overflow = overflow
+        self.published = 0
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    @property
+    def has_subscribers(self):
+        return bool(self._subscribers)
+
+    def subscribe(self, loop=None):
+        subscription = Subscription(self.max_pending, self.overflow, loop)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, kind, data, event_id=None):
+        event = format_event(kind, data, event_id)
+        with self._lock:
+            subscribers = list(self._subscribers)
+            self.published += 1
+        # Jedno wywołanie call_soon_threadsafe na pętlę zamiast na połączenie
+        waiting = defaultdict(list)
+        for subscription in subscribers:
+            if subscription.enqueue(event):
+                if subscription.loop is None:
+                    subscription.wake()
+                else:
+                    waiting[subscription.loop].append(subscription)
+        for loop, subscriptions in waiting.items():
+            _wake_in_loop(loop, subscriptions)
+
+    def status(self):
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'published': self.published,
+                'dropped': sum(subscription.dropped for subscription in self._subscribers),
+            }
+
+
+def iter_events(subscription, heartbeat=HEARTBEAT_SECONDS):
+    """Zdarzenia subskrypcji dla serwera WSGI; komentarz heartbeat, gdy nic nie przyszło."""
+    while True:
+        events = subscription.get(heartbeat)
+        if not events:
+            yield HEARTBEAT
+        yield from events
+
+
+async def aiter_events(subscription, heartbeat=HEARTBEAT_SECONDS):
+    """Zdarzenia subskrypcji dla serwera ASGI (subskrypcja utworzona z loop)."""
+    while True:
+        events = await subscription.aget(heartbeat)
+        if not events:
+            yield HEARTBEAT
+        for event in events:
+            yield event
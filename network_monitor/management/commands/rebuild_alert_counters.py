@@ -0,0 +1,19 @@
+"""
+Przelicza liczniki alertów (AlertCounter) z tabeli Alert, np. po imporcie
+alertów surowym SQL albo po QuerySet.update() statusów.
+
+    python manage.py rebuild_alert_counters
+"""
+from django.core.management.base import BaseCommand
+
+from network_monitor.alert_counters import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = 'Przelicza tabelę AlertCounter (liczniki alertów dashboardu) z tabeli Alert.'
+
+    def handle(self, *args, **options):
+        counts = rebuild_counters()
+        self.stdout.write(self.style.SUCCESS(
+            f"Alerty: {counts['total']} (oczekujące {counts['pending']}, "
+            f"potwierdzone {counts['confirmed']}, fałszywe {counts['false']})"))
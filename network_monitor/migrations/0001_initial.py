@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-17 02:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Alert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamp', models.DateTimeField(auto_now_add=True, help_text='Time when the anomaly was detected')),
+                ('source_ip', models.CharField(help_text='Source IP address', max_length=45)),
+                ('destination_ip', models.CharField(help_text='Destination IP address', max_length=45)),
+                ('anomaly_score', models.FloatField(help_text="Score returned by the model's decision function (confidence metric)")),
+                ('feedback_status', models.IntegerField(choices=[(0, 'Pending'), (1, 'Confirmed'), (2, 'False')], default=0, help_text='Status of verification by the administrator')),
+                ('protocol', models.CharField(blank=True, max_length=10, null=True)),
+                ('source_port', models.IntegerField(blank=True, null=True)),
+                ('destination_port', models.IntegerField(blank=True, null=True)),
+                ('packet_size', models.IntegerField(blank=True, null=True)),
+                ('description', models.TextField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Alert',
+                'verbose_name_plural': 'Alerts',
+                'ordering': ['-timestamp'],
+            },
+        ),
+    ]
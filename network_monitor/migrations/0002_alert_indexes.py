@@ -0,0 +1,25 @@
+# Generated by Django 6.0 on 2026-10-17 02:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('network_monitor', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='alert',
+            index=models.Index(fields=['timestamp'], name='alert_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='alert',
+            index=models.Index(fields=['feedback_status', 'timestamp'], name='alert_status_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='alert',
+            index=models.Index(fields=['source_ip', 'timestamp'], name='alert_source_timestamp_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.0 on 2026-10-17 02:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('network_monitor', '0002_alert_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlertCounter',
+            fields=[
+                ('feedback_status', models.IntegerField(choices=[(0, 'Pending'), (1, 'Confirmed'), (2, 'False')], primary_key=True, serialize=False)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -41,6 +41,13 @@ class Alert(models.Model):
         ordering = ['-timestamp']
         verbose_name = 'Alert'
         verbose_name_plural = 'Alerts'
+        # Lista alertów (ORDER BY timestamp), liczniki i filtr statusu na dashboardzie,
+        # statystyki ostatnich 24 h grupowane po source_ip
+        indexes = [
+            models.Index(fields=['timestamp'], name='alert_timestamp_idx'),
+            models.Index(fields=['feedback_status', 'timestamp'], name='alert_status_timestamp_idx'),
+            models.Index(fields=['source_ip', 'timestamp'], name='alert_source_timestamp_idx'),
+        ]
     
     def __str__(self):
         return f"Alert {self.id}: {self.source_ip} → {self.destination_ip} (score: {self.anomaly_score:.2f})"
@@ -53,3 +60,13 @@ class Alert(models.Model):
             2: 'bg-secondary',
         }
         return badges.get(self.feedback_status, 'bg-secondary')
+
+
+class AlertCounter(models.Model):
+    """Zmaterializowana liczba alertów w danym statusie (network_monitor.alert_counters)."""
+
+    feedback_status = models.IntegerField(primary_key=True, choices=Alert.FeedbackStatus.choices)
+    count = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"AlertCounter {self.get_feedback_status_display()}: {self.count}"
@@ -80,6 +80,8 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Workery analizy piszą do bazy równolegle - czekaj na blokadę zamiast błędu
+        'OPTIONS': {'timeout': 20},
     }
 }
 
@@ -125,3 +127,38 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 LOGIN_REDIRECT_URL = 'dashboard'
 LOGOUT_REDIRECT_URL = 'login'
 LOGIN_URL = 'login'
+
+# Dashboard
+# Liczniki alertów z tabeli AlertCounter (stały koszt) zamiast agregacji po tabeli Alert
+ALERT_COUNTERS_ENABLED = config('ALERT_COUNTERS_ENABLED', default=False, cast=bool)
+# Co ile sekund jeden wątek na proces sprawdza alerty zapisane przez inne procesy
+# dla strumienia /api/alerts/stream/ (0 - tylko alerty zapisane w procesie serwera)
+ALERT_STREAM_POLL_SECONDS = config('ALERT_STREAM_POLL_SECONDS', default=2.0, cast=float)
+
+# Analytic pipeline
+# Katalog plików .pcap zapisywanych przez generator i analizowanych przez pipeline
+PCAP_FOLDER = config('PCAP_FOLDER', default=str(BASE_DIR / 'pcap_files'))
+# Ekstraktor cech przepływów: 'native' (analytic_pipline.flow_features) lub 'cicflowmeter'
+ANALYTICS_FEATURE_EXTRACTOR = config('ANALYTICS_FEATURE_EXTRACTOR', default='native')
+# 'pcap' - analiza plików zgłaszanych przez generator, 'in_process' - analiza pakietów w pamięci,
+# 'live' - przyrostowa tablica przepływów (analytic_pipline.flow_table)
+TRAFFIC_ANALYSIS_MODE = config('TRAFFIC_ANALYSIS_MODE', default='pcap')
+# Tryb 'live': przepływ bez pakietów dłużej niż tyle sekund jest zamykany i oceniany
+ANALYTICS_FLOW_IDLE_TIMEOUT = config('ANALYTICS_FLOW_IDLE_TIMEOUT', default=30, cast=float)
+# Mikro-partie oceny: partia jest oceniana po tylu przepływach albo po tylu ms oczekiwania
+ANALYTICS_BATCH_SIZE = config('ANALYTICS_BATCH_SIZE', default=256, cast=int)
+ANALYTICS_BATCH_MAX_DELAY_MS = config('ANALYTICS_BATCH_MAX_DELAY_MS', default=200, cast=int)
+# Liczba procesów run_analysis_workers (0 = liczba rdzeni)
+ANALYTICS_WORKERS = config('ANALYTICS_WORKERS', default=0, cast=int)
+# Zadania RUNNING dłużej niż tyle sekund wracają do kolejki przy starcie puli
+ANALYTICS_JOB_STALE_SECONDS = config('ANALYTICS_JOB_STALE_SECONDS', default=600, cast=int)
+# Format modelu: 'npz' (analytic_pipline/one_class_svm_model.npz, mmap) lub 'pickle'
+ANALYTICS_MODEL_FORMAT = config('ANALYTICS_MODEL_FORMAT', default='npz')
+# Ładuj model przy starcie każdego procesu Django, także komend manage.py (serwery
+# wsgi/asgi i run_analysis_workers ładują go zawsze)
+ANALYTICS_PRELOAD_MODEL = config('ANALYTICS_PRELOAD_MODEL', default=False, cast=bool)
+# Scorer RBF: przepływy w bloku (pamięć bufora ~ chunk x liczba wektorów nośnych) i typ obliczeń
+ANALYTICS_SCORER_CHUNK_SIZE = config('ANALYTICS_SCORER_CHUNK_SIZE', default=1024, cast=int)
+ANALYTICS_SCORER_DTYPE = config('ANALYTICS_SCORER_DTYPE', default='float64')
+# Tryb oceny: 'exact' (wszystkie wektory nośne) lub 'approximate' (Nyström, fit_approx_scorer)
+ANALYTICS_SCORING_MODE = config('ANALYTICS_SCORING_MODE', default='exact')
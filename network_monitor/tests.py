@@ -1,7 +1,7 @@
 """
 Testy jednostkowe dla aplikacji network_monitor.
 """
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 from django.contrib.auth.models import User
 from .models import Alert
@@ -56,6 +56,14 @@ class AlertModelTests(TestCase):
         # Nowszy alert powinien być pierwszy
         self.assertEqual(alerts[0], alert2)
 
+    def test_dashboard_queries_use_indexes(self):
+        """Test planu zapytań: lista i filtr statusu korzystają z indeksów."""
+        plan = Alert.objects.all()[:10].explain()
+        self.assertIn('alert_timestamp_idx', plan)
+        plan = Alert.objects.filter(feedback_status=Alert.FeedbackStatus.PENDING)[:10].explain()
+        self.assertIn('alert_status_timestamp_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
 
 class DashboardViewTests(TestCase):
     """Testy dla widoku dashboard."""
@@ -103,9 +111,16 @@ class DashboardViewTests(TestCase):
         response = self.client.get(reverse('dashboard'))
         self.assertEqual(len(response.context['alerts']), 10)
         
-        # Druga strona
-        response = self.client.get(reverse('dashboard') + '?page=2')
+        self.assertIsNone(response.context['newer_url'])
+        
+        # Druga strona - link "Older" z kursorem
+        response = self.client.get(reverse('dashboard') + response.context['older_url'])
         self.assertEqual(len(response.context['alerts']), 5)  # 15 - 10 = 5
+        self.assertIsNone(response.context['older_url'])
+        
+        # Powrót na pierwszą stronę
+        response = self.client.get(reverse('dashboard') + response.context['newer_url'])
+        self.assertEqual(len(response.context['alerts']), 10)
     
     def test_dashboard_statistics(self):
         """Test statystyk alertów na dashboard."""
@@ -117,6 +132,334 @@ class DashboardViewTests(TestCase):
         self.assertIn('confirmed_alerts', response.context)
         self.assertIn('false_alerts', response.context)
 
+    def test_dashboard_statistics_from_counters(self):
+        """Test statystyk z tabeli AlertCounter zgodnych z agregacją."""
+        self.client.login(username='testuser', password='testpass123')
+        expected = self.client.get(reverse('dashboard')).context
+        with override_settings(ALERT_COUNTERS_ENABLED=True):
+            response = self.client.get(reverse('dashboard') + expected['older_url'])
+        for key in ('total_alerts', 'pending_alerts', 'confirmed_alerts', 'false_alerts'):
+            self.assertEqual(response.context[key], expected[key])
+        self.assertEqual(response.context['pending_alerts'], 5)
+        self.assertEqual(len(response.context['alerts']), 5)
+
+
+class AlertFeedTests(TestCase):
+    """Testy stronicowanego kursorem feedu alertów (network_monitor.alert_feed)."""
+
+    def setUp(self):
+        from datetime import timedelta
+        from django.utils import timezone
+
+        self.client = Client()
+        User.objects.create_user(username='testuser', password='testpass123')
+        self.client.login(username='testuser', password='testpass123')
+        # 25 alertów, po pięć z tym samym znacznikiem czasu (remisy rozstrzyga id)
+        base = timezone.now()
+        alerts = [Alert(source_ip=f'10.0.0.{i % 4}', destination_ip='10.0.0.99',
+                        anomaly_score=0.1 * i, feedback_status=i % 3,
+                        protocol='6' if i % 2 else '17') for i in range(25)]
+        Alert.objects.bulk_create(alerts)
+        for i, alert in enumerate(Alert.objects.order_by('id')):
+            Alert.objects.filter(pk=alert.pk).update(timestamp=base - timedelta(minutes=i // 5))
+        self.expected = list(Alert.objects.order_by('-timestamp', '-id').values_list('id', flat=True))
+
+    def _walk(self, **params):
+        ids = []
+        response = self.client.get(reverse('alert_feed'), {'limit': 7, **params}).json()
+        while True:
+            ids.extend(item['id'] for item in response['results'])
+            if not response['next']:
+                return ids, response
+            response = self.client.get(reverse('alert_feed'),
+                                       {'limit': 7, 'after': response['next'], **params}).json()
+
+    def test_feed_walks_all_alerts_in_order(self):
+        """Test przejścia wszystkich stron kursorem bez pominięć i powtórzeń."""
+        ids, last = self._walk()
+        self.assertEqual(ids, self.expected)
+        self.assertEqual(set(last['results'][0]), {
+            'id', 'timestamp', 'source_ip', 'destination_ip', 'anomaly_score',
+            'feedback_status', 'feedback_status_display'})
+
+        previous = self.client.get(reverse('alert_feed'),
+                                   {'limit': 7, 'before': last['previous']}).json()
+        self.assertEqual([item['id'] for item in previous['results']], self.expected[14:21])
+
+    def test_feed_filters(self):
+        """Test filtrów statusu, adresu, protokołu i zakresu czasu."""
+        from datetime import timedelta
+        from django.utils import timezone
+
+        ids, _ = self._walk(status='1,2', source_ip='10.0.0.1')
+        expected = list(Alert.objects.filter(feedback_status__in=[1, 2], source_ip='10.0.0.1')
+                        .order_by('-timestamp', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+        ids, _ = self._walk(protocol='17')
+        self.assertEqual(len(ids), 13)
+
+        since = (timezone.now() - timedelta(minutes=1, seconds=30)).isoformat()
+        ids, _ = self._walk(since=since)
+        self.assertEqual(ids, self.expected[:10])
+
+    def test_feed_rejects_invalid_parameters(self):
+        """Test błędów 400 dla nieprawidłowego kursora, statusu i daty."""
+        for params in ({'after': 'xyz'}, {'status': '7'}, {'since': 'wczoraj'}, {'limit': 'a'}):
+            response = self.client.get(reverse('alert_feed'), params)
+            self.assertEqual(response.status_code, 400, params)
+
+    def test_deep_page_uses_index_without_offset(self):
+        """Test zapytania o głęboką stronę: zakres na indeksie zamiast OFFSET."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .alert_feed import encode_cursor, fetch_page
+
+        cursor = encode_cursor(Alert.objects.get(pk=self.expected[20]))
+        with CaptureQueriesContext(connection) as queries:
+            page = fetch_page(after=cursor, limit=3)
+        self.assertEqual([alert.id for alert in page['alerts']], self.expected[21:24])
+        self.assertNotIn('OFFSET', queries[0]['sql'])
+        plan = Alert.objects.filter(timestamp__lte=page['alerts'][0].timestamp).order_by(
+            '-timestamp', '-id')[:3].explain()
+        self.assertIn('alert_timestamp_idx', plan)
+
+
+@override_settings(ALERT_COUNTERS_ENABLED=True)
+class AlertCounterTests(TestCase):
+    """Testy liczników alertów (network_monitor.alert_counters)."""
+
+    def _create(self, status=Alert.FeedbackStatus.PENDING, ip='10.0.0.1'):
+        return Alert.objects.create(source_ip=ip, destination_ip='10.0.0.2',
+                                    anomaly_score=0.5, feedback_status=status)
+
+    def test_aggregate_counts_single_query(self):
+        """Test wszystkich liczników jednym zapytaniem."""
+        from .alert_counters import aggregate_counts
+
+        for status in (0, 0, 1, 2, 2, 2):
+            self._create(status)
+        with self.assertNumQueries(1):
+            counts = aggregate_counts()
+        self.assertEqual(counts, {'total': 6, 'pending': 2, 'confirmed': 1, 'false': 3})
+
+    def test_counters_follow_create_update_delete(self):
+        """Test aktualizacji liczników przez sygnały zapisu, zmiany statusu i usunięcia."""
+        from .alert_counters import aggregate_counts, counter_counts
+
+        self._create()
+        self.assertEqual(counter_counts()['total'], 1)  # pierwsza inicjalizacja tabeli
+        alerts = [self._create() for _ in range(3)]
+        alerts[0].feedback_status = Alert.FeedbackStatus.CONFIRMED
+        alerts[0].save()
+        alerts[1].feedback_status = Alert.FeedbackStatus.FALSE_POSITIVE
+        alerts[1].save(update_fields=['feedback_status'])
+        alerts[2].description = 'bez zmiany statusu'
+        alerts[2].save()
+        Alert.objects.filter(pk=alerts[1].pk).delete()
+
+        with self.assertNumQueries(1):
+            counts = counter_counts()
+        self.assertEqual(counts, aggregate_counts())
+        self.assertEqual(counts, {'total': 3, 'pending': 2, 'confirmed': 1, 'false': 0})
+
+    def test_disabled_counters_skip_hooks_and_rebuild_on_enable(self):
+        """Test braku zapytań liczników przy wyłączonym ustawieniu i przeliczenia po włączeniu."""
+        from .alert_counters import aggregate_counts, alert_counts, counter_counts
+
+        counter_counts()
+        with override_settings(ALERT_COUNTERS_ENABLED=False):
+            alert = self._create()
+            alert.feedback_status = Alert.FeedbackStatus.CONFIRMED
+            with self.assertNumQueries(1):
+                alert.save()
+            self._create()
+        self.assertEqual(alert_counts(), aggregate_counts())
+        self.assertEqual(alert_counts(), {'total': 2, 'pending': 1, 'confirmed': 1, 'false': 0})
+
+    def test_bulk_insert_path_updates_counters(self):
+        """Test liczników po zbiorczym zapisie ataków (bulk_create bez sygnałów)."""
+        import pandas as pd
+        from analytic_pipline.traffic_predictor import save_attacks_to_db
+        from .alert_counters import aggregate_counts, counter_counts
+
+        counter_counts()
+        flows = pd.DataFrame({'src_ip': [f'10.0.1.{i}' for i in range(4)],
+                              'dst_ip': ['10.0.0.2'] * 4, 'protocol': [6] * 4})
+        self.assertEqual(len(save_attacks_to_db(flows, [-0.1, -0.2, -0.3, -0.4])), 4)
+        self.assertEqual(counter_counts(), aggregate_counts())
+        self.assertEqual(counter_counts()['pending'], 4)
+
+    def test_rebuild_after_update_bypassing_signals(self):
+        """Test przeliczenia liczników po QuerySet.update()."""
+        from django.core.management import call_command
+        from io import StringIO
+        from .alert_counters import aggregate_counts, counter_counts
+
+        for _ in range(3):
+            self._create()
+        counter_counts()
+        Alert.objects.update(feedback_status=Alert.FeedbackStatus.CONFIRMED)
+        self.assertNotEqual(counter_counts(), aggregate_counts())
+        call_command('rebuild_alert_counters', stdout=StringIO())
+        self.assertEqual(counter_counts(), {'total': 3, 'pending': 0, 'confirmed': 3, 'false': 0})
+
+
+class AlertStreamTests(TestCase):
+    """Testy strumienia alertów dashboardu (network_monitor.alert_stream)."""
+
+    def setUp(self):
+        from .alert_stream import broadcaster
+
+        self.broadcaster = broadcaster
+        self.subscription = broadcaster.subscribe()
+
+    def tearDown(self):
+        self.broadcaster.unsubscribe(self.subscription)
+
+    def _events(self, chunks):
+        import json
+
+        events = []
+        for chunk in chunks:
+            fields = dict(line.split(': ', 1) for line in chunk.strip().splitlines())
+            events.append((fields['event'], json.loads(fields['data'])))
+        return events
+
+    def test_broadcast_fan_out_and_overflow(self):
+        """Test rozsyłania zdarzenia do wszystkich subskrypcji i resetu po przepełnieniu."""
+        from .alert_stream import AlertBroadcaster
+
+        broadcaster = AlertBroadcaster(max_pending=3)
+        first, second = broadcaster.subscribe(), broadcaster.subscribe()
+        broadcaster.publish('status', {'n': 0})
+        self.assertEqual(self._events(first.get(0)), [('status', {'n': 0})])
+        self.assertEqual(self._events(second.get(0)), [('status', {'n': 0})])
+
+        for n in range(1, 6):
+            broadcaster.publish('status', {'n': n})
+        self.assertEqual(self._events(first.get(0)),
+                         [('reset', {}), ('status', {'n': 4}), ('status', {'n': 5})])
+        self.assertEqual(broadcaster.status()['dropped'], 6)
+        broadcaster.unsubscribe(first)
+        self.assertEqual(broadcaster.status()['subscribers'], 1)
+
+    def test_events_published_after_commit(self):
+        """Test zdarzeń po commicie: nowy alert, zmiana statusu, zbiorczy zapis ataków."""
+        import pandas as pd
+        from analytic_pipline.traffic_predictor import save_attacks_to_db
+
+        with self.captureOnCommitCallbacks(execute=True):
+            alert = Alert.objects.create(source_ip='10.0.0.1', destination_ip='10.0.0.2',
+                                         anomaly_score=0.5)
+            self.assertEqual(self.subscription.get(0), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            alert.feedback_status = Alert.FeedbackStatus.CONFIRMED
+            alert.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            flows = pd.DataFrame({'src_ip': ['10.0.1.1', '10.0.1.2'], 'dst_ip': ['10.0.0.2'] * 2,
+                                  'protocol': [6, 6]})
+            created = save_attacks_to_db(flows, [-0.1, -0.2])
+
+        (kind, new), (_, status), (_, bulk) = self._events(self.subscription.get(0))
+        self.assertEqual(kind, 'alerts')
+        self.assertEqual(new['alerts'][0]['id'], alert.id)
+        self.assertEqual(new['counts'], {'total': 1, 'pending': 1, 'confirmed': 0, 'false': 0})
+        self.assertEqual(status['counts'], {'total': 0, 'pending': -1, 'confirmed': 1, 'false': 0})
+        self.assertEqual([item['id'] for item in bulk['alerts']],
+                         sorted((a.id for a in created), reverse=True))
+        self.assertEqual(bulk['counts']['total'], 2)
+
+    def test_poller_one_query_for_all_subscribers(self):
+        """Test odpytywania bazy jednym zapytaniem niezależnie od liczby połączeń."""
+        from .alert_stream import AlertBroadcaster, AlertPoller
+
+        broadcaster = AlertBroadcaster()
+        subscriptions = [broadcaster.subscribe() for _ in range(20)]
+        poller = AlertPoller(broadcaster)
+        poller.poll_once()
+        # bulk_create bez publikacji - jak zapis z innego procesu
+        Alert.objects.bulk_create([Alert(source_ip='10.0.0.1', destination_ip='10.0.0.2',
+                                         anomaly_score=-0.1 * i) for i in range(3)])
+        local = Alert.objects.create(source_ip='10.0.0.9', destination_ip='10.0.0.2',
+                                     anomaly_score=0.5)
+        broadcaster.remember([local.id])  # już wysłany przez ten proces
+        with self.assertNumQueries(1):
+            published = poller.poll_once()
+        self.assertEqual(len(published), 3)
+        for subscription in subscriptions:
+            [(kind, data)] = self._events(subscription.get(0))
+            self.assertEqual(len(data['alerts']), 3)
+            self.assertNotIn(local.id, [item['id'] for item in data['alerts']])
+        with self.assertNumQueries(1):
+            self.assertEqual(poller.poll_once(), [])
+
+    @override_settings(ALERT_STREAM_POLL_SECONDS=0)
+    def test_stream_view_replays_missed_alerts(self):
+        """Test widoku SSE: doczytanie alertów od Last-Event-ID i zdarzenia na żywo."""
+        User.objects.create_user(username='testuser', password='testpass123')
+        self.client.login(username='testuser', password='testpass123')
+        alerts = [Alert.objects.create(source_ip='10.0.0.1', destination_ip='10.0.0.2',
+                                       anomaly_score=0.5) for _ in range(3)]
+
+        response = self.client.get(reverse('alert_stream'), HTTP_LAST_EVENT_ID=str(alerts[0].id))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = iter(response.streaming_content)
+        replay = next(chunks).decode()
+        self.assertTrue(replay.startswith(f'id: {alerts[2].id}\n'))
+        [(_, data)] = self._events([replay])
+        self.assertEqual([item['id'] for item in data['alerts']], [alerts[2].id, alerts[1].id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Alert.objects.filter(pk=alerts[1].pk).first().delete()
+        [(kind, data)] = self._events([next(chunks).decode()])
+        self.assertEqual((kind, data['id'], data['counts']['total']), ('status', alerts[1].id, -1))
+        response.close()
+
+    @override_settings(ALERT_STREAM_POLL_SECONDS=0)
+    def test_stream_starts_from_dashboard_cursor(self):
+        """Test doczytania alertów zapisanych między renderem dashboardu a połączeniem."""
+        User.objects.create_user(username='testuser', password='testpass123')
+        self.client.login(username='testuser', password='testpass123')
+        shown = Alert.objects.create(source_ip='10.0.0.1', destination_ip='10.0.0.2',
+                                     anomaly_score=0.5)
+        page = self.client.get(reverse('dashboard'))
+        self.assertEqual(page.context['stream_cursor'], shown.id)
+        self.assertContains(page, f'?last_id={shown.id}')
+        # bulk_create bez publikacji - jak zapis z innego procesu
+        Alert.objects.bulk_create([Alert(source_ip='10.0.0.3', destination_ip='10.0.0.2',
+                                         anomaly_score=-0.2)])
+        missed = Alert.objects.latest('id')
+
+        response = self.client.get(reverse('alert_stream'), {'last_id': shown.id})
+        [(kind, data)] = self._events([next(iter(response.streaming_content)).decode()])
+        self.assertEqual((kind, [item['id'] for item in data['alerts']]), ('alerts', [missed.id]))
+        response.close()
+
+    @override_settings(ALERT_STREAM_POLL_SECONDS=0)
+    async def test_stream_view_under_asgi(self):
+        """Test widoku SSE pod ASGI: korutyna czekająca na zdarzenia i heartbeat."""
+        import asyncio
+        from asgiref.sync import sync_to_async
+        from .alert_stream import astream_events, publish_status_change
+
+        user = await sync_to_async(User.objects.create_user)(username='asgi', password='testpass123')
+        await self.async_client.aforce_login(user)
+        response = await self.async_client.get(reverse('alert_stream'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertTrue(response.is_async)
+
+        events = astream_events(heartbeat=0.01)
+        self.assertEqual(await anext(events), ': ping\n\n')
+        asyncio.get_running_loop().call_later(
+            0.01, publish_status_change, 7, Alert.FeedbackStatus.FALSE_POSITIVE,
+            Alert.FeedbackStatus.PENDING)
+        chunk = await anext(events)
+        while chunk.startswith(':'):
+            chunk = await anext(events)
+        [(kind, data)] = self._events([chunk])
+        self.assertEqual((kind, data['id'], data['feedback_status_display']), ('status', 7, 'False'))
+        await events.aclose()
+
 
 class ProfileViewTests(TestCase):
     """Testy dla widoku profilu."""
@@ -28,6 +28,8 @@ urlpatterns = [
     path('logout/', auth_views.LogoutView.as_view(next_page='login'), name='logout'),
     path('traffic/', include('traffic_generator.urls')),
     # Alert API endpoints
+    path('api/alerts/', views.alert_feed, name='alert_feed'),
+    path('api/alerts/stream/', views.alert_stream, name='alert_stream'),
     path('api/alert/<int:alert_id>/', views.alert_detail, name='alert_detail'),
     path('api/alert/<int:alert_id>/status/', views.alert_update_status, name='alert_update_status'),
     path('analytics/', include('analytic_pipline.urls')),
@@ -1,37 +1,95 @@
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Max
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.http import require_POST
-from django.core.paginator import Paginator
+from .alert_counters import alert_counts
+from .alert_stream import astream_events, stream_events
+from .alert_feed import feed_item, fetch_page, parse_filters, parse_limit
 from .models import Alert
 
 
+def _page_query(params, **cursor):
+    """Query string strony z zachowanymi filtrami i nowym kursorem."""
+    query = params.copy()
+    for key in ('after', 'before', 'page'):
+        query.pop(key, None)
+    for key, value in cursor.items():
+        query[key] = value
+    return '?' + query.urlencode()
+
+
 @login_required
 def dashboard(request):
     """Dashboard view showing currently logged in user information and alerts."""
-    alerts_list = Alert.objects.all()
-    
-    # Paginacja - 10 alertów na stronę
-    paginator = Paginator(alerts_list, 10)
-    page_number = request.GET.get('page', 1)
-    alerts = paginator.get_page(page_number)
+    # Kursor strumienia przed licznikami - alert zapisany po renderze doczyta alert_stream
+    stream_cursor = Alert.objects.aggregate(last=Max('id'))['last'] or 0
+    # Statystyki alertów - jedno zapytanie (albo tabela AlertCounter)
+    counts = alert_counts()
     
-    # Statystyki alertów
-    total_alerts = Alert.objects.count()
-    pending_alerts = Alert.objects.filter(feedback_status=Alert.FeedbackStatus.PENDING).count()
-    confirmed_alerts = Alert.objects.filter(feedback_status=Alert.FeedbackStatus.CONFIRMED).count()
-    false_alerts = Alert.objects.filter(feedback_status=Alert.FeedbackStatus.FALSE_POSITIVE).count()
+    # Stronicowanie kluczem (timestamp, id) - 10 alertów na stronę, bez OFFSET i COUNT(*)
+    try:
+        filters = parse_filters(request.GET)
+        page = fetch_page(filters, after=request.GET.get('after'),
+                          before=request.GET.get('before'), limit=10)
+    except ValueError:
+        filters = {}
+        page = fetch_page(limit=10)
     
     context = {
-        'alerts': alerts,
-        'total_alerts': total_alerts,
-        'pending_alerts': pending_alerts,
-        'confirmed_alerts': confirmed_alerts,
-        'false_alerts': false_alerts,
+        'alerts': page['alerts'],
+        'is_filtered': bool(filters),
+        # Nowe alerty ze strumienia są dopisywane tylko do pierwszej strony bez filtrów
+        'live_rows': not filters and not page['previous'],
+        'newest_url': _page_query(request.GET) if page['previous'] else None,
+        'newer_url': _page_query(request.GET, before=page['previous']) if page['previous'] else None,
+        'older_url': _page_query(request.GET, after=page['next']) if page['next'] else None,
+        'stream_cursor': stream_cursor,
+        'total_alerts': counts['total'],
+        'pending_alerts': counts['pending'],
+        'confirmed_alerts': counts['confirmed'],
+        'false_alerts': counts['false'],
     }
     return render(request, 'dashboard.html', context)
 
 
+@login_required
+def alert_feed(request):
+    """
+    Strona alertów jako JSON, stronicowana kursorem (next/previous).
+    Parametry: after/before (kursor), limit, status, source_ip, protocol, since, until.
+    """
+    try:
+        page = fetch_page(parse_filters(request.GET), after=request.GET.get('after'),
+                          before=request.GET.get('before'), limit=parse_limit(request.GET.get('limit')))
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    return JsonResponse({
+        'results': [feed_item(alert) for alert in page['alerts']],
+        'next': page['next'],
+        'previous': page['previous'],
+    })
+
+
+@login_required
+def alert_stream(request):
+    """
+    Server-Sent Events z nowymi alertami i zmianami liczników (network_monitor.alert_stream).
+    Po wznowieniu połączenia przeglądarka wysyła Last-Event-ID - pominięte alerty są doczytywane;
+    przy pierwszym połączeniu kursorem jest last_id wyrenderowany w dashboardzie.
+    """
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_id')
+    if isinstance(request, ASGIRequest):
+        events = astream_events(last_event_id)
+    else:
+        events = stream_events(last_event_id)
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @login_required
 def profile(request):
     """Strona profilu użytkownika."""
@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'network_monitor.settings')
 
 application = get_wsgi_application()
+
+# Model ładowany przy starcie serwera (także runserver), nie przy pierwszej
+# predykcji; komendy manage.py go nie ładują (ANALYTICS_PRELOAD_MODEL)
+from analytic_pipline.model_artifact import preload_model_artifact  # noqa: E402
+
+preload_model_artifact()
@@ -0,0 +1,207 @@
+"""
+Masowe generowanie ataków (SYN flood, DoS/HTTP flood) prosto do plików .pcap.
+
+W przeciwieństwie do generate_attack_traffic/generate_dos_attack nie powstaje
+słownik cech na pakiet ani odpowiedź z listą pakietów: ramki są budowane
+silnikiem raw w porcjach (adresy jako gotowe bajty z random.Random, payloady
+DoS z małej puli zamiast 1400 losowań na pakiet) i porcjami zapisywane przez
+własny RotatingPcapWriter. Wynikiem jest podsumowanie (pakiety, bajty, pliki,
+osiągnięte pakiety/s); szczegóły pakietów są opcjonalne (iter_details).
+
+Tempo:
+    pps=None        - tak szybko, jak się da; znaczniki czasu z zegara
+    pps=N           - porcje wysyłane według zegara monotonicznego tak, by
+                      średnio wychodziło N pakietów/s; znaczniki co 1/N s
+    simulated=True  - bez czekania, tylko znaczniki czasu co 1/N s
+"""
+import random
+import socket
+import time
+from datetime import datetime, timezone
+
+from .pcap_writer import RotatingPcapWriter
+from .raw_packets import RawPacketBuilder
+
+# Typ ataku -> opis (attack_type w szczegółach, jak w generate_attack_traffic)
+ATTACK_TYPES = {
+    'syn_flood': 'SYN Flood / Port Scan',
+    'dos': 'DoS / HTTP Flood',
+}
+
+CHUNK_PACKETS = 2048
+# Porcja przy zadanym tempie - najwyżej tyle sekund ruchu naraz
+PACING_CHUNK_SECONDS = 0.02
+# Rotacja plików ataku (plik = jednostka analizy w analyze_pcaps)
+ATTACK_PACKETS_PER_FILE = 100_000
+DOS_PAYLOAD_SIZE = 1400
+DOS_PAYLOAD_POOL = 64
+TARGET_PORTS = [80, 443, 22, 21, 25, 53, 8080, 3306, 5432]
+
+
+class AttackBurst:
+    """
+    Args:
+        attack_type: Klucz ATTACK_TYPES
+        count: Liczba pakietów
+        folder: Katalog plików .pcap
+        pps: Docelowe tempo w pakietach na sekundę (None - bez ograniczenia)
+        simulated: Znaczniki czasu co 1/pps bez czekania (wymaga pps)
+        seed: Seed random.Random (None - losowy)
+        packets_per_file: Rotacja plików
+        on_file: Funkcja wołana z informacjami o każdym zamkniętym pliku
+    """
+
+    def __init__(self, attack_type, count, folder, pps=None, simulated=False, seed=None,
+                 packets_per_file=ATTACK_PACKETS_PER_FILE, on_file=None):
+        if attack_type not in ATTACK_TYPES:
+            raise ValueError(f"Nieznany typ ataku: {attack_type}")
+        if count < 1:
+            raise ValueError(f"Liczba pakietów musi być dodatnia: {count}")
+        if pps is not None and pps <= 0:
+            raise ValueError(f"Tempo musi być dodatnie: {pps}")
+        if simulated and pps is None:
+            raise ValueError("Tryb simulated wymaga pps")
+        self.attack_type = attack_type
+        self.count = count
+        self.pps = pps
+        self.simulated = simulated
+        self.rng = random.Random(seed)
+        self.builder = RawPacketBuilder(ttl=64)
+        self.writer = RotatingPcapWriter(folder, max_packets=packets_per_file,
+                                         prefix=f'attack_{attack_type}', on_close=self._file_closed)
+        self.on_file = on_file
+        self.files = []
+        self.packets = 0
+        self.bytes = 0
+        self.elapsed = 0.0
+        self.target_ip = self._random_ip()
+        self.target_mac = self._random_mac()
+        self.target_port = 80 if attack_type == 'dos' else self.rng.choice(TARGET_PORTS)
+        if attack_type == 'dos':
+            # Jeden napastnik, payloady HTTP flood z puli
+            self.attacker_ip = self._random_ip()
+            self.attacker_mac = self._random_mac()
+            self.payloads = [bytes(self.rng.choices(range(32, 127), k=DOS_PAYLOAD_SIZE))
+                             for _ in range(DOS_PAYLOAD_POOL)]
+
+    def _random_ip(self):
+        return self.rng.getrandbits(32).to_bytes(4, 'big')
+
+    def _random_mac(self):
+        # Adres unicast, administrowany lokalnie
+        first = self.rng.getrandbits(8) & 0xfc | 0x02
+        return bytes([first]) + self.rng.getrandbits(40).to_bytes(5, 'big')
+
+    def _file_closed(self, info):
+        self.files.append(info)
+        if self.on_file is not None:
+            self.on_file(info)
+
+    def _chunk_size(self):
+        # Rotacja następuje po zapisie porcji - plik przekracza próg najwyżej o porcję
+        chunk = min(CHUNK_PACKETS, self.writer.max_packets or CHUNK_PACKETS)
+        if self.pps is None or self.simulated:
+            return chunk
+        return max(1, min(chunk, int(self.pps * PACING_CHUNK_SECONDS)))
+
+    def _syn_frames(self, timestamps):
+        rng, tcp = self.rng, self.builder.tcp
+        dst_ip, dst_mac, dport = self.target_ip, self.target_mac, self.target_port
+        frames, sources = [], []
+        for ts in timestamps:
+            # Każdy SYN z innego (podszytego) źródła
+            src_ip = self._random_ip()
+            sport = rng.randint(1024, 65535)
+            frames.append(tcp(self._random_mac(), dst_mac, src_ip, dst_ip, sport, dport, 'S',
+                              seq=rng.randint(1000, 100000), timestamp=ts))
+            sources.append((src_ip, sport))
+        return frames, sources
+
+    def _dos_frames(self, timestamps):
+        rng, tcp = self.rng, self.builder.tcp
+        src_ip, src_mac = self.attacker_ip, self.attacker_mac
+        dst_ip, dst_mac, dport = self.target_ip, self.target_mac, self.target_port
+        frames, sources = [], []
+        for ts in timestamps:
+            sport = rng.randint(1024, 65535)
+            frames.append(tcp(src_mac, dst_mac, src_ip, dst_ip, sport, dport, 'PA',
+                              seq=rng.randint(1000, 100000), payload=rng.choice(self.payloads),
+                              timestamp=ts))
+            sources.append((src_ip, sport))
+        return frames, sources
+
+    def chunks(self):
+        """
+        Generuje i zapisuje atak porcjami.
+
+        Yields:
+            tuple: (ramki porcji, lista (bajty IP źródła, port źródłowy))
+        """
+        build = self._dos_frames if self.attack_type == 'dos' else self._syn_frames
+        chunk = self._chunk_size()
+        start = time.monotonic()
+        start_ts = last_ts = time.time()
+        try:
+            for offset in range(0, self.count, chunk):
+                size = min(chunk, self.count - offset)
+                if self.pps is None:
+                    # Bez tempa: znaczniki równo od końca poprzedniej porcji do chwili zbudowania tej
+                    frames, sources = build([last_ts] * size)
+                    now = time.time()
+                    step = (now - last_ts) / size
+                    for i, frame in enumerate(frames, 1):
+                        frame.time = last_ts + i * step
+                    last_ts = now
+                else:
+                    if not self.simulated:
+                        # Porcja wychodzi, gdy uzbiera się na nią czas (koniec jej okna)
+                        delay = start + (offset + size) / self.pps - time.monotonic()
+                        if delay > 0:
+                            time.sleep(delay)
+                    timestamps = [start_ts + (offset + i) / self.pps for i in range(size)]
+                    frames, sources = build(timestamps)
+                self.writer.write(frames)
+                self.packets += size
+                self.bytes += sum(len(frame) for frame in frames)
+                yield frames, sources
+        finally:
+            self.writer.rotate()
+            self.elapsed = time.monotonic() - start
+
+    def iter_details(self):
+        """Generuje atak, zwracając szczegóły każdego pakietu (jak features w generate_attack_traffic)."""
+        description = ATTACK_TYPES[self.attack_type]
+        dest_ip = socket.inet_ntoa(self.target_ip)
+        for frames, sources in self.chunks():
+            for frame, (src_ip, sport) in zip(frames, sources):
+                yield {
+                    'timestamp': datetime.fromtimestamp(frame.time, tz=timezone.utc).isoformat(),
+                    'source_ip': socket.inet_ntoa(src_ip),
+                    'dest_ip': dest_ip,
+                    'protocol': 'TCP',
+                    'source_port': sport,
+                    'dest_port': self.target_port,
+                    'packet_size': len(frame),
+                    'attack_type': description,
+                }
+
+    def run(self):
+        """Generuje cały atak bez szczegółów pakietów; zwraca summary()."""
+        for _ in self.chunks():
+            pass
+        return self.summary()
+
+    def summary(self):
+        return {
+            'attack_type': self.attack_type,
+            'description': ATTACK_TYPES[self.attack_type],
+            'target_ip': socket.inet_ntoa(self.target_ip),
+            'target_port': self.target_port,
+            'packets_generated': self.packets,
+            'bytes_generated': self.bytes,
+            'target_pps': self.pps,
+            'achieved_pps': round(self.packets / self.elapsed, 1) if self.elapsed else None,
+            'elapsed_seconds': round(self.elapsed, 3),
+            'simulated': self.simulated,
+            'pcap_files': [info['filepath'] for info in self.files],
+        }
@@ -0,0 +1,49 @@
+"""
+Zegary dla generatora ruchu.
+WallClock naprawdę czeka (time.sleep), VirtualClock tylko przesuwa czas
+symulowany - opóźnienia RTT/idle trafiają wtedy do znaczników czasu pakietów
+zamiast blokować wątek.
+"""
+import threading
+import time
+
+
+class WallClock:
+    """Zegar rzeczywisty: now() to time.time(), sleep() blokuje wątek."""
+
+    simulated = False
+
+    def now(self):
+        return time.time()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+class VirtualClock:
+    """
+    Zegar symulowany: sleep() przesuwa czas bez czekania.
+
+    Args:
+        start: Początkowy czas (epoch w sekundach), domyślnie bieżący czas
+    """
+
+    simulated = True
+
+    def __init__(self, start=None):
+        self._now = time.time() if start is None else float(start)
+        self._lock = threading.Lock()
+
+    def now(self):
+        return self._now
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            with self._lock:
+                self._now += seconds
+
+    def set(self, now):
+        """Ustawia bieżący czas (np. zaplanowany czas startu przepływu)."""
+        with self._lock:
+            self._now = float(now)
@@ -5,11 +5,13 @@ Zapisuje pakiety do plików .pcap.
 """
 import os
 import random
-import time
 import threading
-from datetime import datetime
-from scapy.all import IP, TCP, UDP, ICMP, wrpcap, Ether, conf, Raw
+from datetime import datetime, timezone
+from scapy.all import IP, TCP, UDP, ICMP, Ether, conf, Raw
 from faker import Faker
+from .clock import VirtualClock, WallClock
+from .pcap_writer import BackgroundPcapWriter, RotatingPcapWriter
+from .raw_packets import RawPacketBuilder
 
 # Wyłącz ostrzeżenia Scapy o MAC
 conf.verb = 0
@@ -18,6 +20,13 @@ fake = Faker()
 
 DEFAULT_PCAP_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'pcap_files')
 
+# Silniki budowania pakietów: 'raw' zapisuje nagłówki bezpośrednio do bufora,
+# 'scapy' składa warstwy Scapy (tryb referencyjny)
+PACKET_ENGINES = ('raw', 'scapy')
+DEFAULT_PACKET_ENGINE = 'raw'
+
+_PRINTABLE_BYTES = range(32, 127)
+
 # Import predictora (lazy load żeby nie blokować importu jeśli model nie istnieje) ~ZUZA
 _predictor = None
 
@@ -26,14 +35,28 @@ def get_predictor():
     global _predictor
     if _predictor is None:
         try:
-            from analytic_pipline.traffic_predictor import predict_packets
-            _predictor = predict_packets
+            from analytic_pipline.traffic_predictor import predict_frames
+            _predictor = predict_frames
         except Exception as e:
             print(f"Warning: Could not load traffic predictor: {e}")
             _predictor = lambda x: None  # Dummy function
     return _predictor
 
 
+_flow_batcher = None
+
+def get_flow_batcher():
+    """Lazy load kolejki mikro-partii dla przepływów zamkniętych w FlowTable (tryb 'live')."""
+    global _flow_batcher
+    if _flow_batcher is None:
+        try:
+            from analytic_pipline.traffic_predictor import get_micro_batcher
+            _flow_batcher = get_micro_batcher()
+        except Exception as e:
+            print(f"Warning: Could not load traffic predictor: {e}")
+    return _flow_batcher
+
+
 USER_AGENTS = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15",
@@ -54,33 +77,40 @@ CONTENT_TYPES = [
 ]
 
 
-def generate_random_http_request():
-    method = random.choice(["GET", "POST", "PUT", "DELETE", "HEAD"])
-    path = random.choice(HTTP_PATHS)
-    if random.random() > 0.7:
-        path += f"?id={random.randint(1, 10000)}&page={random.randint(1, 100)}"
+def random_printable_bytes(length, rng=random):
+    """Losowe drukowalne bajty ASCII (32-126) jako payload."""
+    return bytes(rng.choices(_PRINTABLE_BYTES, k=length))
+
+
+def generate_random_http_request(now=None, rng=random, faker=None):
+    now = now or datetime.now(timezone.utc)
+    faker = faker or fake
+    method = rng.choice(["GET", "POST", "PUT", "DELETE", "HEAD"])
+    path = rng.choice(HTTP_PATHS)
+    if rng.random() > 0.7:
+        path += f"?id={rng.randint(1, 10000)}&page={rng.randint(1, 100)}"
     
-    host = fake.domain_name()
-    user_agent = random.choice(USER_AGENTS)
+    host = faker.domain_name()
+    user_agent = rng.choice(USER_AGENTS)
     
     headers = f"{method} {path} HTTP/1.1\r\n"
     headers += f"Host: {host}\r\n"
     headers += f"User-Agent: {user_agent}\r\n"
     headers += f"Accept: */*\r\n"
     headers += f"Accept-Language: en-US,en;q=0.9\r\n"
-    headers += f"Connection: {random.choice(['keep-alive', 'close'])}\r\n"
+    headers += f"Connection: {rng.choice(['keep-alive', 'close'])}\r\n"
     
-    if random.random() > 0.5:
-        headers += f"X-Request-ID: {fake.uuid4()}\r\n"
+    if rng.random() > 0.5:
+        headers += f"X-Request-ID: {faker.uuid4()}\r\n"
     
     body = b""
     if method in ["POST", "PUT"]:
         # Losowe dane JSON
         data = {
-            "id": random.randint(1, 10000),
-            "name": fake.name(),
-            "email": fake.email(),
-            "timestamp": datetime.now().isoformat(),
+            "id": rng.randint(1, 10000),
+            "name": faker.name(),
+            "email": faker.email(),
+            "timestamp": now.isoformat(),
         }
         import json as json_lib
         body = json_lib.dumps(data).encode()
@@ -91,7 +121,9 @@ def generate_random_http_request():
     return headers.encode() + body
 
 
-def generate_random_http_response():
+def generate_random_http_response(now=None, rng=random, faker=None):
+    now = now or datetime.now(timezone.utc)
+    faker = faker or fake
     status_codes = [
         (200, "OK"), (201, "Created"), (204, "No Content"),
         (301, "Moved Permanently"), (302, "Found"), (304, "Not Modified"),
@@ -100,39 +132,40 @@ def generate_random_http_response():
     ]
     
     # Większość odpowiedzi to 200 OK
-    if random.random() > 0.3:
+    if rng.random() > 0.3:
         code, status = 200, "OK"
     else:
-        code, status = random.choice(status_codes)
+        code, status = rng.choice(status_codes)
     
-    content_type = random.choice(CONTENT_TYPES)
+    content_type = rng.choice(CONTENT_TYPES)
     
     # Generuj losową zawartość
     if content_type == "application/json":
         import json as json_lib
         body = json_lib.dumps({
             "status": "success" if code < 400 else "error",
-            "data": {"id": random.randint(1, 1000), "value": fake.word()},
-            "timestamp": datetime.now().isoformat(),
+            "data": {"id": rng.randint(1, 1000), "value": faker.word()},
+            "timestamp": now.isoformat(),
         }).encode()
     elif content_type == "text/html":
-        body = f"<html><head><title>{fake.sentence()}</title></head><body><h1>{fake.sentence()}</h1><p>{fake.paragraph()}</p></body></html>".encode()
+        body = f"<html><head><title>{faker.sentence()}</title></head><body><h1>{faker.sentence()}</h1><p>{faker.paragraph()}</p></body></html>".encode()
     else:
-        body = fake.text(max_nb_chars=random.randint(50, 500)).encode()
+        body = faker.text(max_nb_chars=rng.randint(50, 500)).encode()
     
     response = f"HTTP/1.1 {code} {status}\r\n"
     response += f"Content-Type: {content_type}\r\n"
     response += f"Content-Length: {len(body)}\r\n"
-    response += f"Date: {datetime.now().strftime('%a, %d %b %Y %H:%M:%S GMT')}\r\n"
-    response += f"Server: {random.choice(['nginx/1.18.0', 'Apache/2.4.46', 'cloudflare'])}\r\n"
+    response += f"Date: {now.strftime('%a, %d %b %Y %H:%M:%S GMT')}\r\n"
+    response += f"Server: {rng.choice(['nginx/1.18.0', 'Apache/2.4.46', 'cloudflare'])}\r\n"
     response += "\r\n"
     
     return response.encode() + body
 
 
-def generate_random_dns_query():
-    domain = fake.domain_name()
-    query_id = random.randint(0, 65535).to_bytes(2, 'big')
+def generate_random_dns_query(rng=random, faker=None):
+    faker = faker or fake
+    domain = faker.domain_name()
+    query_id = rng.randint(0, 65535).to_bytes(2, 'big')
     flags = b'\x01\x00'  # Standard query
     qdcount = b'\x00\x01'
     ancount = b'\x00\x00'
@@ -145,13 +178,13 @@ def generate_random_dns_query():
         qname += bytes([len(part)]) + part.encode()
     qname += b'\x00'
     
-    qtype = random.choice([b'\x00\x01', b'\x00\x1c', b'\x00\x0f'])  # A, AAAA, MX
+    qtype = rng.choice([b'\x00\x01', b'\x00\x1c', b'\x00\x0f'])  # A, AAAA, MX
     qclass = b'\x00\x01'  # IN
     
     return query_id + flags + qdcount + ancount + nscount + arcount + qname + qtype + qclass
 
 
-def generate_random_dns_response(query):
+def generate_random_dns_response(query, rng=random):
     # Zmień flags na response
     response = query[:2] + b'\x81\x80' + query[4:6] + b'\x00\x01' + query[8:]
     
@@ -159,68 +192,220 @@ def generate_random_dns_response(query):
     response += b'\xc0\x0c'  # Pointer to domain name
     response += b'\x00\x01'  # Type A
     response += b'\x00\x01'  # Class IN
-    response += random.randint(60, 3600).to_bytes(4, 'big')  # TTL
+    response += rng.randint(60, 3600).to_bytes(4, 'big')  # TTL
     response += b'\x00\x04'  # RDLENGTH
     # Random IP
-    response += bytes([random.randint(1, 254) for _ in range(4)])
+    response += bytes([rng.randint(1, 254) for _ in range(4)])
     
     return response
 
 
 class TrafficGenerator:
     
-    def __init__(self):
+    def __init__(self, engine=DEFAULT_PACKET_ENGINE, simulated_time=False, start_time=None,
+                 seed=None, background_writer=True):
         self.protocols = ['TCP', 'UDP', 'ICMP']
         self.common_ports = [80, 443, 22, 21, 25, 53, 8080, 3306, 5432]
-        self.packet_buffer = []  # Bufor na pakiety Scapy do zapisu
-        self.pcap_folder = DEFAULT_PCAP_FOLDER
-        self.packets_per_file = 50
-        self.file_counter = 0
+        # Pakiety są od razu dopisywane do bieżącego pliku .pcap (stała pamięć)
+        self._writer = RotatingPcapWriter(DEFAULT_PCAP_FOLDER, max_packets=50)
+        self._background = None
         self.is_running = False
         self.save_to_pcap = True
-        self._lock = threading.Lock()
+        self.analyze_in_process = False
+        self.flow_table = None
+        self.flow_batcher = None
         self._stop_event = threading.Event()
+        self._raw_builder = RawPacketBuilder(ttl=64)
+        self.set_seed(seed)
+        self.set_engine(engine)
+        self.set_simulated_time(simulated_time, start_time)
+        self.set_background_writer(background_writer)
+    
+    def set_seed(self, seed):
+        """
+        Ustawia własny strumień losowości (random.Random + Faker) dla instancji.
+        Bez seeda używany jest globalny moduł random i wspólny Faker.
+        """
+        self.seed = seed
+        if seed is None:
+            self.rng = random
+            self.fake = fake
+        else:
+            self.rng = random.Random(seed)
+            self.fake = Faker()
+            self.fake.seed_instance(seed)
+    
+    def set_engine(self, engine):
+        """Wybiera silnik budowania pakietów ('raw' lub referencyjny 'scapy')."""
+        if engine not in PACKET_ENGINES:
+            raise ValueError(f"Nieznany silnik pakietów: {engine}")
+        self.engine = engine
+    
+    def set_simulated_time(self, enabled, start_time=None):
+        """
+        Włącza zegar wirtualny: opóźnienia RTT/idle i interval nie usypiają
+        wątku, tylko przesuwają znaczniki czasu pakietów (pkt.time).
+        """
+        self.clock = VirtualClock(start_time) if enabled else WallClock()
+    
+    def _now_datetime(self):
+        # UTC - payloady (nagłówek Date) nie zależą od strefy czasowej hosta
+        return datetime.fromtimestamp(self.clock.now(), tz=timezone.utc)
+    
+    @property
+    def pcap_folder(self):
+        return self._writer.folder
+    
+    @property
+    def packets_per_file(self):
+        return self._writer.max_packets
+    
+    @packets_per_file.setter
+    def packets_per_file(self, value):
+        self._writer.max_packets = value
+    
+    @property
+    def file_counter(self):
+        return self._writer.file_counter
+    
+    @property
+    def _sink(self):
+        return self._background or self._writer
+    
+    def set_background_writer(self, enabled, max_queue_packets=10000, policy='block', fsync=True):
+        """
+        Przełącza zapis .pcap na osobny wątek z ograniczoną kolejką.
+        
+        Args:
+            enabled: Czy zapisywać w tle
+            max_queue_packets: Pojemność kolejki w pakietach
+            policy: Zachowanie przy pełnej kolejce: 'block', 'drop_oldest', 'drop_newest'
+            fsync: Czy robić fsync zamykanych plików
+        """
+        if self._background is not None:
+            self._background.close()
+            self._background = None
+        if enabled:
+            self._background = BackgroundPcapWriter(
+                self._writer, max_queue_packets=max_queue_packets, policy=policy, fsync=fsync)
+        else:
+            self._writer.fsync = False
     
     def set_pcap_folder(self, folder_path):
         if folder_path:
-            self.pcap_folder = folder_path
+            self._sink.set_folder(folder_path)
         os.makedirs(self.pcap_folder, exist_ok=True)
     
+    def set_file_prefix(self, prefix):
+        """Ustawia prefiks nazw kolejnych plików .pcap."""
+        self._writer.prefix = prefix
+    
+    def set_file_callback(self, callback):
+        """Ustawia funkcję wołaną z informacjami o każdym zamkniętym pliku .pcap."""
+        self._writer.on_close = callback
+    
     def set_save_to_pcap(self, enabled):
         self.save_to_pcap = enabled
     
-    def _save_pcap_file(self, force=False):
-        with self._lock:
-            if not self.packet_buffer:
-                return None
-            
-            if not force and len(self.packet_buffer) < self.packets_per_file:
-                return None
-            
-            os.makedirs(self.pcap_folder, exist_ok=True)
-            
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"traffic_{timestamp}_{self.file_counter}.pcap"
-            filepath = os.path.join(self.pcap_folder, filename)
-            
-            try:
-                wrpcap(filepath, self.packet_buffer)
-                saved_count = len(self.packet_buffer)
-                self.packet_buffer = []
-                self.file_counter += 1
-                return {'filepath': filepath, 'packet_count': saved_count, 'filename': filename}
-            except Exception as e:
-                print(f"Błąd zapisu pcap: {e}")
-                return None
+    def set_analysis_mode(self, in_process, save_to_pcap=None, live=False, idle_timeout=None,
+                          batcher=None):
+        """
+        Włącza analizę w procesie: pakiety każdego przepływu trafiają prosto do
+        ekstrakcji cech i modelu, a wynik jest dołączany do features['prediction'].
+        
+        W trybie live pakiety trafiają do przyrostowej tablicy przepływów
+        (analytic_pipline.flow_table.FlowTable), a przepływy zamknięte (FIN/RST
+        lub bezczynność) są oceniane w mikro-partiach przez self.flow_batcher -
+        features['prediction'] pozostaje wtedy puste.
+        
+        Args:
+            in_process: Czy analizować pakiety bez pośrednictwa plików .pcap
+            save_to_pcap: Opcjonalnie włącza/wyłącza zapis .pcap jako wyjście poboczne
+            live: Analiza przez tablicę przepływów zamiast oceny każdego przepływu osobno
+            idle_timeout: Czas bezczynności zamykający przepływ w trybie live (sekundy)
+            batcher: Kolejka oceny (MicroBatchScorer); domyślnie wspólna z traffic_predictor
+        """
+        self.analyze_in_process = in_process or live
+        self.flow_table = None
+        self.flow_batcher = None
+        if live:
+            from analytic_pipline.flow_table import FlowTable
+            self.flow_table = FlowTable() if idle_timeout is None else FlowTable(idle_timeout)
+            self.flow_batcher = batcher or get_flow_batcher()
+        if save_to_pcap is not None:
+            self.set_save_to_pcap(save_to_pcap)
+    
+    def set_rotation(self, packets=None, size_bytes=None, seconds=None):
+        """
+        Ustawia progi rotacji plików .pcap (None wyłącza dany próg).
+        
+        Args:
+            packets: Maksymalna liczba pakietów w pliku
+            size_bytes: Maksymalny rozmiar pliku w bajtach
+            seconds: Maksymalny czas zapisu do jednego pliku
+        """
+        self._writer.max_packets = packets
+        self._writer.max_bytes = size_bytes
+        self._writer.max_seconds = seconds
     
     def flush_buffer(self):
-        """Wymusza zapis pozostałych pakietów do pliku."""
+        """Wymusza zamknięcie bieżącego pliku .pcap."""
         if self.save_to_pcap:
-            return self._save_pcap_file(force=True)
+            return self._sink.rotate()
         return None
     
+    def wait_for_writes(self, timeout=None):
+        """
+        Czeka, aż kolejka zapisu w tle trafi do plików (bez zamykania bieżącego).
+        Pliki zamknięte w tle są zgłaszane przez set_file_callback.
+        """
+        if self._background is not None:
+            return self._background.drain(timeout)
+        return True
+    
     def _generate_mac(self):
-        return ':'.join(['{:02x}'.format(random.randint(0, 255)) for _ in range(6)])
+        return ':'.join(['{:02x}'.format(self.rng.randint(0, 255)) for _ in range(6)])
+    
+    def _tcp_packet(self, src_mac, dst_mac, src_ip, dst_ip, sport, dport, flags,
+                    seq=0, ack=0, payload=None):
+        """Buduje pojedynczy pakiet TCP wybranym silnikiem."""
+        if self.engine == 'raw':
+            return self._raw_builder.tcp(src_mac, dst_mac, src_ip, dst_ip, sport, dport,
+                                         flags, seq=seq, ack=ack, payload=payload or b'',
+                                         timestamp=self.clock.now())
+        pkt = Ether(src=src_mac, dst=dst_mac) / \
+              IP(src=src_ip, dst=dst_ip, ttl=64) / \
+              TCP(sport=sport, dport=dport, flags=flags, seq=seq, ack=ack)
+        if payload:
+            pkt = pkt / Raw(load=payload)
+        pkt.time = self.clock.now()
+        return pkt
+    
+    def _udp_packet(self, src_mac, dst_mac, src_ip, dst_ip, sport, dport, payload):
+        """Buduje pojedynczy pakiet UDP wybranym silnikiem."""
+        if self.engine == 'raw':
+            return self._raw_builder.udp(src_mac, dst_mac, src_ip, dst_ip, sport, dport,
+                                         payload=payload, timestamp=self.clock.now())
+        pkt = Ether(src=src_mac, dst=dst_mac) / \
+              IP(src=src_ip, dst=dst_ip, ttl=64) / \
+              UDP(sport=sport, dport=dport) / \
+              Raw(load=payload)
+        pkt.time = self.clock.now()
+        return pkt
+    
+    def _icmp_packet(self, src_mac, dst_mac, src_ip, dst_ip, icmp_type, icmp_id, icmp_seq,
+                     payload):
+        """Buduje pojedynczy pakiet ICMP wybranym silnikiem."""
+        if self.engine == 'raw':
+            return self._raw_builder.icmp(src_mac, dst_mac, src_ip, dst_ip, icmp_type,
+                                          icmp_id=icmp_id, icmp_seq=icmp_seq, payload=payload,
+                                          timestamp=self.clock.now())
+        pkt = Ether(src=src_mac, dst=dst_mac) / \
+              IP(src=src_ip, dst=dst_ip, ttl=64) / \
+              ICMP(type=icmp_type, code=0, id=icmp_id, seq=icmp_seq) / \
+              Raw(load=payload)
+        pkt.time = self.clock.now()
+        return pkt
     
     def _generate_tcp_flow(self, src_ip, dst_ip, src_port, dst_port, src_mac, dst_mac, 
                            include_data=True, service_type='http'):
@@ -228,117 +413,98 @@ class TrafficGenerator:
         Generuje kompletny przepływ TCP z handshake, danymi i zakończeniem.
         
         Returns:
-            list: Lista pakietów Scapy tworzących przepływ
+            list: Lista pakietów (Scapy lub RawFrame) tworzących przepływ
         """
         packets = []
         
         # Sekwencje TCP
-        client_seq = random.randint(1000, 100000)
-        server_seq = random.randint(1000, 100000)
+        client_seq = self.rng.randint(1000, 100000)
+        server_seq = self.rng.randint(1000, 100000)
         
         # 1. SYN (Client -> Server)
-        syn = Ether(src=src_mac, dst=dst_mac) / \
-              IP(src=src_ip, dst=dst_ip, ttl=64) / \
-              TCP(sport=src_port, dport=dst_port, flags='S', seq=client_seq)
+        syn = self._tcp_packet(src_mac, dst_mac, src_ip, dst_ip, src_port, dst_port,
+                               'S', seq=client_seq)
         packets.append(syn)
         
         # Małe opóźnienie symulujące RTT
-        time.sleep(random.uniform(0.001, 0.01))
+        self.clock.sleep(self.rng.uniform(0.001, 0.01))
         
         # 2. SYN-ACK (Server -> Client)
-        syn_ack = Ether(src=dst_mac, dst=src_mac) / \
-                  IP(src=dst_ip, dst=src_ip, ttl=64) / \
-                  TCP(sport=dst_port, dport=src_port, flags='SA', 
-                      seq=server_seq, ack=client_seq + 1)
+        syn_ack = self._tcp_packet(dst_mac, src_mac, dst_ip, src_ip, dst_port, src_port,
+                                   'SA', seq=server_seq, ack=client_seq + 1)
         packets.append(syn_ack)
         
-        time.sleep(random.uniform(0.001, 0.01))
+        self.clock.sleep(self.rng.uniform(0.001, 0.01))
         
         # 3. ACK (Client -> Server) - zakończenie handshake
         client_seq += 1
-        ack = Ether(src=src_mac, dst=dst_mac) / \
-              IP(src=src_ip, dst=dst_ip, ttl=64) / \
-              TCP(sport=src_port, dport=dst_port, flags='A', 
-                  seq=client_seq, ack=server_seq + 1)
+        ack = self._tcp_packet(src_mac, dst_mac, src_ip, dst_ip, src_port, dst_port,
+                               'A', seq=client_seq, ack=server_seq + 1)
         packets.append(ack)
         
         server_seq += 1
         
         if include_data:
-            time.sleep(random.uniform(0.001, 0.05))
+            self.clock.sleep(self.rng.uniform(0.001, 0.05))
             
             # 4. Dane od klienta (Request)
             if service_type == 'http' and dst_port in [80, 8080]:
-                request_data = generate_random_http_request()
+                request_data = generate_random_http_request(self._now_datetime(), self.rng, self.fake)
             else:
-                request_data = bytes([random.randint(32, 126) for _ in range(random.randint(50, 200))])
+                request_data = random_printable_bytes(self.rng.randint(50, 200), self.rng)
             
-            request = Ether(src=src_mac, dst=dst_mac) / \
-                      IP(src=src_ip, dst=dst_ip, ttl=64) / \
-                      TCP(sport=src_port, dport=dst_port, flags='PA', 
-                          seq=client_seq, ack=server_seq) / \
-                      Raw(load=request_data)
+            request = self._tcp_packet(src_mac, dst_mac, src_ip, dst_ip, src_port, dst_port,
+                                       'PA', seq=client_seq, ack=server_seq,
+                                       payload=request_data)
             packets.append(request)
             client_seq += len(request_data)
             
-            time.sleep(random.uniform(0.001, 0.05))
+            self.clock.sleep(self.rng.uniform(0.001, 0.05))
             
             # 5. ACK od serwera
-            ack_request = Ether(src=dst_mac, dst=src_mac) / \
-                          IP(src=dst_ip, dst=src_ip, ttl=64) / \
-                          TCP(sport=dst_port, dport=src_port, flags='A', 
-                              seq=server_seq, ack=client_seq)
+            ack_request = self._tcp_packet(dst_mac, src_mac, dst_ip, src_ip, dst_port, src_port,
+                                           'A', seq=server_seq, ack=client_seq)
             packets.append(ack_request)
             
-            time.sleep(random.uniform(0.01, 0.1))
+            self.clock.sleep(self.rng.uniform(0.01, 0.1))
             
             # 6. Dane od serwera (Response)
             if service_type == 'http' and dst_port in [80, 8080]:
-                response_data = generate_random_http_response()
+                response_data = generate_random_http_response(self._now_datetime(), self.rng, self.fake)
             else:
-                response_data = bytes([random.randint(32, 126) for _ in range(random.randint(100, 500))])
+                response_data = random_printable_bytes(self.rng.randint(100, 500), self.rng)
             
-            response = Ether(src=dst_mac, dst=src_mac) / \
-                       IP(src=dst_ip, dst=src_ip, ttl=64) / \
-                       TCP(sport=dst_port, dport=src_port, flags='PA', 
-                           seq=server_seq, ack=client_seq) / \
-                       Raw(load=response_data)
+            response = self._tcp_packet(dst_mac, src_mac, dst_ip, src_ip, dst_port, src_port,
+                                        'PA', seq=server_seq, ack=client_seq,
+                                        payload=response_data)
             packets.append(response)
             server_seq += len(response_data)
             
-            time.sleep(random.uniform(0.001, 0.01))
+            self.clock.sleep(self.rng.uniform(0.001, 0.01))
             
             # 7. ACK od klienta
-            ack_response = Ether(src=src_mac, dst=dst_mac) / \
-                           IP(src=src_ip, dst=dst_ip, ttl=64) / \
-                           TCP(sport=src_port, dport=dst_port, flags='A', 
-                               seq=client_seq, ack=server_seq)
+            ack_response = self._tcp_packet(src_mac, dst_mac, src_ip, dst_ip, src_port, dst_port,
+                                            'A', seq=client_seq, ack=server_seq)
             packets.append(ack_response)
         
         # 8. FIN-ACK (Client -> Server)
-        time.sleep(random.uniform(0.01, 0.05))
-        fin = Ether(src=src_mac, dst=dst_mac) / \
-              IP(src=src_ip, dst=dst_ip, ttl=64) / \
-              TCP(sport=src_port, dport=dst_port, flags='FA', 
-                  seq=client_seq, ack=server_seq)
+        self.clock.sleep(self.rng.uniform(0.01, 0.05))
+        fin = self._tcp_packet(src_mac, dst_mac, src_ip, dst_ip, src_port, dst_port,
+                               'FA', seq=client_seq, ack=server_seq)
         packets.append(fin)
         
-        time.sleep(random.uniform(0.001, 0.01))
+        self.clock.sleep(self.rng.uniform(0.001, 0.01))
         
         # 9. FIN-ACK (Server -> Client)
-        fin_ack = Ether(src=dst_mac, dst=src_mac) / \
-                  IP(src=dst_ip, dst=src_ip, ttl=64) / \
-                  TCP(sport=dst_port, dport=src_port, flags='FA', 
-                      seq=server_seq, ack=client_seq + 1)
+        fin_ack = self._tcp_packet(dst_mac, src_mac, dst_ip, src_ip, dst_port, src_port,
+                                   'FA', seq=server_seq, ack=client_seq + 1)
         packets.append(fin_ack)
         
-        time.sleep(random.uniform(0.001, 0.01))
+        self.clock.sleep(self.rng.uniform(0.001, 0.01))
         
         # 10. Final ACK (Client -> Server)
-        final_ack = Ether(src=src_mac, dst=dst_mac) / \
-                    IP(src=src_ip, dst=dst_ip, ttl=64) / \
-                    TCP(sport=src_port, dport=dst_port, flags='A', 
-                        seq=client_seq + 1, ack=server_seq + 1)
+        final_ack = self._tcp_packet(src_mac, dst_mac, src_ip, dst_ip, src_port, dst_port,
+                                     'A', seq=client_seq + 1, ack=server_seq + 1)
         packets.append(final_ack)
         
         return packets
@@ -348,45 +514,37 @@ class TrafficGenerator:
         Generuje przepływ UDP (request-response).
         
         Returns:
-            list: Lista pakietów Scapy
+            list: Lista pakietów (Scapy lub RawFrame)
         """
         packets = []
         
         # DNS-like flow dla portu 53
         if dst_port == 53:
             # Query - losowo generowane
-            dns_query = generate_random_dns_query()
-            query = Ether(src=src_mac, dst=dst_mac) / \
-                    IP(src=src_ip, dst=dst_ip, ttl=64) / \
-                    UDP(sport=src_port, dport=dst_port) / \
-                    Raw(load=dns_query)
+            dns_query = generate_random_dns_query(self.rng, self.fake)
+            query = self._udp_packet(src_mac, dst_mac, src_ip, dst_ip, src_port, dst_port,
+                                     dns_query)
             packets.append(query)
             
-            time.sleep(random.uniform(0.005, 0.05))
+            self.clock.sleep(self.rng.uniform(0.005, 0.05))
             
             # Response - losowo generowane na podstawie query
-            dns_response = generate_random_dns_response(dns_query)
-            response = Ether(src=dst_mac, dst=src_mac) / \
-                       IP(src=dst_ip, dst=src_ip, ttl=64) / \
-                       UDP(sport=dst_port, dport=src_port) / \
-                       Raw(load=dns_response)
+            dns_response = generate_random_dns_response(dns_query, self.rng)
+            response = self._udp_packet(dst_mac, src_mac, dst_ip, src_ip, dst_port, src_port,
+                                        dns_response)
             packets.append(response)
         else:
             # Generic UDP exchange
-            request_data = bytes([random.randint(32, 126) for _ in range(random.randint(20, 100))])
-            request = Ether(src=src_mac, dst=dst_mac) / \
-                      IP(src=src_ip, dst=dst_ip, ttl=64) / \
-                      UDP(sport=src_port, dport=dst_port) / \
-                      Raw(load=request_data)
+            request_data = random_printable_bytes(self.rng.randint(20, 100), self.rng)
+            request = self._udp_packet(src_mac, dst_mac, src_ip, dst_ip, src_port, dst_port,
+                                       request_data)
             packets.append(request)
             
-            time.sleep(random.uniform(0.005, 0.05))
+            self.clock.sleep(self.rng.uniform(0.005, 0.05))
             
-            response_data = bytes([random.randint(32, 126) for _ in range(random.randint(20, 200))])
-            response = Ether(src=dst_mac, dst=src_mac) / \
-                       IP(src=dst_ip, dst=src_ip, ttl=64) / \
-                       UDP(sport=dst_port, dport=src_port) / \
-                       Raw(load=response_data)
+            response_data = random_printable_bytes(self.rng.randint(20, 200), self.rng)
+            response = self._udp_packet(dst_mac, src_mac, dst_ip, src_ip, dst_port, src_port,
+                                        response_data)
             packets.append(response)
         
         return packets
@@ -396,50 +554,48 @@ class TrafficGenerator:
         Generuje przepływ ICMP (ping request-reply).
         
         Returns:
-            list: Lista pakietów Scapy
+            list: Lista pakietów (Scapy lub RawFrame)
         """
         packets = []
-        icmp_id = random.randint(1, 65535)
-        icmp_seq = random.randint(1, 100)
-        payload = bytes([random.randint(0, 255) for _ in range(56)])  # Standard ping payload
+        icmp_id = self.rng.randint(1, 65535)
+        icmp_seq = self.rng.randint(1, 100)
+        payload = self.rng.randbytes(56)  # Standard ping payload
         
         # Echo Request
-        echo_request = Ether(src=src_mac, dst=dst_mac) / \
-                       IP(src=src_ip, dst=dst_ip, ttl=64) / \
-                       ICMP(type=8, code=0, id=icmp_id, seq=icmp_seq) / \
-                       Raw(load=payload)
+        echo_request = self._icmp_packet(src_mac, dst_mac, src_ip, dst_ip, 8,
+                                         icmp_id, icmp_seq, payload)
         packets.append(echo_request)
         
-        time.sleep(random.uniform(0.001, 0.02))
+        self.clock.sleep(self.rng.uniform(0.001, 0.02))
         
         # Echo Reply
-        echo_reply = Ether(src=dst_mac, dst=src_mac) / \
-                     IP(src=dst_ip, dst=src_ip, ttl=64) / \
-                     ICMP(type=0, code=0, id=icmp_id, seq=icmp_seq) / \
-                     Raw(load=payload)
+        echo_reply = self._icmp_packet(dst_mac, src_mac, dst_ip, src_ip, 0,
+                                       icmp_id, icmp_seq, payload)
         packets.append(echo_reply)
         
         return packets
     
-    def generate_flow(self, protocol=None):
+    def generate_flow(self, protocol=None, dst_port=None):
         """
         Generuje kompletny dwukierunkowy przepływ sieciowy.
         
         Args:
             protocol: Protokół do użycia (TCP, UDP, ICMP) lub None dla losowego
+            dst_port: Port docelowy (usługa) lub None dla losowego z common_ports
         
         Returns:
             tuple: (list of scapy_packets, features_dict)
         """
         if protocol is None:
-            protocol = random.choice(self.protocols)
+            protocol = self.rng.choice(self.protocols)
         
-        src_ip = fake.ipv4()
-        dst_ip = fake.ipv4()
+        src_ip = self.fake.ipv4()
+        dst_ip = self.fake.ipv4()
         src_mac = self._generate_mac()
         dst_mac = self._generate_mac()
-        src_port = random.randint(1024, 65535)
-        dst_port = random.choice(self.common_ports)
+        src_port = self.rng.randint(1024, 65535)
+        if dst_port is None:
+            dst_port = self.rng.choice(self.common_ports)
         
         if protocol == 'TCP':
             packets = self._generate_tcp_flow(src_ip, dst_ip, src_port, dst_port, 
@@ -453,10 +609,10 @@ class TrafficGenerator:
             dst_port = None
         
         # Oblicz całkowity rozmiar przepływu
-        total_size = sum(len(bytes(p)) for p in packets)
+        total_size = sum(len(p) for p in packets)
         
         features = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': self._now_datetime().isoformat(),
             'source_ip': src_ip,
             'dest_ip': dst_ip,
             'protocol': protocol,
@@ -470,26 +626,22 @@ class TrafficGenerator:
         return packets, features
     
     def add_packet_to_buffer(self, scapy_packet):
-        """Dodaje pakiet do bufora i zapisuje plik gdy osiągnie limit."""
-        saved_file = None
-        with self._lock:
-            self.packet_buffer.append(scapy_packet)
-            
-        if self.save_to_pcap and len(self.packet_buffer) >= self.packets_per_file:
-            saved_file = self._save_pcap_file()
-        
-        return saved_file
+        """Zapisuje pakiet do bieżącego pliku; zwraca info o pliku zamkniętym przez rotację."""
+        return self.add_packets_to_buffer([scapy_packet])
     
     def add_packets_to_buffer(self, packets):
-        """Dodaje wiele pakietów do bufora."""
-        saved_file = None
-        with self._lock:
-            self.packet_buffer.extend(packets)
-            
-        if self.save_to_pcap and len(self.packet_buffer) >= self.packets_per_file:
-            saved_file = self._save_pcap_file()
-        
-        return saved_file
+        """
+        Zapisuje wiele pakietów (np. cały przepływ) do bieżącego pliku.
+        Info o zamkniętym pliku zwraca tylko zapis synchroniczny - przy zapisie
+        w tle każdy zamknięty plik trafia wyłącznie do set_file_callback.
+        """
+        if not self.save_to_pcap:
+            return None
+        try:
+            return self._sink.write(packets)
+        except OSError as e:
+            print(f"Błąd zapisu pcap: {e}")
+            return None
     
     def generate_normal_traffic(self, count=1, interval=1.0):
         """
@@ -508,14 +660,13 @@ class TrafficGenerator:
         while (count is None or generated < count) and not self._stop_event.is_set():
             packets, features = self.generate_flow()
             saved_file = self.add_packets_to_buffer(packets)
-            
-            # ~Z
-            #prediction = self.predict_packet(packets)
+            if self.analyze_in_process:
+                features['prediction'] = self.analyze_packets(packets)
             
             yield features, saved_file
             generated += 1
             if interval > 0:
-                time.sleep(interval)
+                self.clock.sleep(interval)
     
     def generate_attack_traffic(self, count=10, interval=0.1):
         """
@@ -529,43 +680,40 @@ class TrafficGenerator:
             tuple: (features, saved_file_info or None)
         """
         # Atak: wiele SYN pakietów z różnych źródeł do tego samego celu
-        target_ip = fake.ipv4()
-        target_port = random.choice(self.common_ports)
+        target_ip = self.fake.ipv4()
+        target_port = self.rng.choice(self.common_ports)
         target_mac = self._generate_mac()
-        packets = []
         for i in range(count):
             # Różne źródła (spoofed IPs)
-            src_ip = fake.ipv4()
+            src_ip = self.fake.ipv4()
             src_mac = self._generate_mac()
-            src_port = random.randint(1024, 65535)
+            src_port = self.rng.randint(1024, 65535)
             
             # SYN flood - tylko SYN pakiety bez odpowiedzi
-            syn = Ether(src=src_mac, dst=target_mac) / \
-                  IP(src=src_ip, dst=target_ip, ttl=64) / \
-                  TCP(sport=src_port, dport=target_port, flags='S', 
-                      seq=random.randint(1000, 100000))
+            syn = self._tcp_packet(src_mac, target_mac, src_ip, target_ip, src_port, target_port,
+                                   'S', seq=self.rng.randint(1000, 100000))
             
             features = {
-                'timestamp': datetime.now().isoformat(),
+                'timestamp': self._now_datetime().isoformat(),
                 'source_ip': src_ip,
                 'dest_ip': target_ip,
                 'protocol': 'TCP',
                 'source_port': src_port,
                 'dest_port': target_port,
-                'packet_size': len(bytes(syn)),
+                'packet_size': len(syn),
                 'ttl': 64,
                 'attack_type': 'SYN Flood / Port Scan',
                 'flow_type': 'attack',
             }
             
-            packets.append(syn)
             saved_file = self.add_packet_to_buffer(syn)
+            # Każdy SYN ma inne źródło, więc jest osobnym przepływem
+            if self.analyze_in_process:
+                features['prediction'] = self.analyze_packets([syn])
             yield features, saved_file
             
             if interval > 0:
-                time.sleep(interval)
-        # ~Z
-        #prediction = self.predict_packet(packets) 
+                self.clock.sleep(interval)
 
     
     def generate_dos_attack(self, count=50, interval=0.01):
@@ -579,69 +727,102 @@ class TrafficGenerator:
         Yields:
             tuple: (features, saved_file_info or None)
         """
-        target_ip = fake.ipv4()
+        target_ip = self.fake.ipv4()
         target_port = 80
         target_mac = self._generate_mac()
-        attacker_ip = fake.ipv4()
+        attacker_ip = self.fake.ipv4()
         attacker_mac = self._generate_mac()
         
         for i in range(count):
-            src_port = random.randint(1024, 65535)
+            src_port = self.rng.randint(1024, 65535)
             
             # HTTP flood z dużym payloadem
-            payload = bytes([random.randint(32, 126) for _ in range(1400)])
+            payload = random_printable_bytes(1400, self.rng)
             
-            pkt = Ether(src=attacker_mac, dst=target_mac) / \
-                  IP(src=attacker_ip, dst=target_ip, ttl=64) / \
-                  TCP(sport=src_port, dport=target_port, flags='PA', 
-                      seq=random.randint(1000, 100000)) / \
-                  Raw(load=payload)
+            pkt = self._tcp_packet(attacker_mac, target_mac, attacker_ip, target_ip,
+                                   src_port, target_port, 'PA',
+                                   seq=self.rng.randint(1000, 100000), payload=payload)
             
             features = {
-                'timestamp': datetime.now().isoformat(),
+                'timestamp': self._now_datetime().isoformat(),
                 'source_ip': attacker_ip,
                 'dest_ip': target_ip,
                 'protocol': 'TCP',
                 'source_port': src_port,
                 'dest_port': target_port,
-                'packet_size': len(bytes(pkt)),
+                'packet_size': len(pkt),
                 'ttl': 64,
                 'attack_type': 'DoS / HTTP Flood',
                 'flow_type': 'attack',
             }
             
             saved_file = self.add_packet_to_buffer(pkt)
+            # Losowy port źródłowy - każdy pakiet to osobny przepływ
+            if self.analyze_in_process:
+                features['prediction'] = self.analyze_packets([pkt])
             yield features, saved_file
             
             if interval > 0:
-                time.sleep(interval)
-
-        #prediction = self.predict_packet(pkt) # ~Z
+                self.clock.sleep(interval)
 
     
     def stop(self):
         """Zatrzymuje generator i zapisuje pozostałe pakiety."""
         self._stop_event.set()
         self.is_running = False
+        if self.flow_table is not None:
+            self._submit_flows(self.flow_table.flush())
+            if self.flow_batcher is not None:
+                self.flow_batcher.drain()
         return self.flush_buffer()
     
     def get_buffer_status(self):
-        """Zwraca status bufora."""
-        with self._lock:
-            return {
-                'buffer_size': len(self.packet_buffer),
-                'packets_per_file': self.packets_per_file,
-                'files_saved': self.file_counter,
-                'save_enabled': self.save_to_pcap,
-                'pcap_folder': self.pcap_folder
-            }
+        """Zwraca status zapisu (bieżący plik, progi rotacji, kolejka zapisu w tle)."""
+        writer_status = self._sink.status()
+        status = {
+            'buffer_size': writer_status['current_packets'],
+            'current_file': writer_status['current_file'],
+            'current_file_bytes': writer_status['current_bytes'],
+            'packets_per_file': self.packets_per_file,
+            'max_file_bytes': self._writer.max_bytes,
+            'max_file_seconds': self._writer.max_seconds,
+            'files_saved': writer_status['files_saved'],
+            'save_enabled': self.save_to_pcap,
+            'pcap_folder': self.pcap_folder,
+            'background_writer': self._background is not None,
+            'analyze_in_process': self.analyze_in_process,
+        }
+        if self.flow_table is not None:
+            status['flow_table'] = self.flow_table.status()
+        if self.flow_batcher is not None:
+            status['scoring'] = self.flow_batcher.status()
+        if self._background is not None:
+            for key in ('queue_depth', 'queue_batches', 'queue_capacity', 'backpressure_policy',
+                        'enqueued_packets', 'dropped_packets', 'dropped_batches'):
+                status[key] = writer_status[key]
+        return status
+
+    def analyze_packets(self, packets):
+        """
+        Analiza w procesie: cały przepływ od razu albo (tryb live) przez
+        tablicę przepływów i kolejkę mikro-partii - wtedy zwraca None.
+        """
+        if self.flow_table is None:
+            return self.predict_packet(packets)
+        self.flow_table.add_frames(packets)
+        self._submit_flows(self.flow_table.expire(self.clock.now()))
+        return None
+
+    def _submit_flows(self, rows):
+        if rows and self.flow_batcher is not None:
+            self.flow_batcher.submit(rows)
 
-    def predict_packet(self, pacaket):
-        """Predykcja przepływu za pomocą załadowanego modelu."""
+    def predict_packet(self, packets):
+        """Predykcja przepływu (lista pakietów w pamięci) za pomocą załadowanego modelu."""
         predictor = get_predictor()
         if predictor:
             try:
-                return predictor(pacaket)
+                return predictor(packets)
             except Exception as e:
                 print(f"Prediction error: {e}")
         return None
@@ -0,0 +1,104 @@
+"""
+Podgląd ruchu na żywo (SSE /traffic/api/stream/) dla dowolnej liczby widzów.
+
+Jeden wątek producenta generuje przepływy (generate_normal_traffic) i rozsyła
+je przez EventBroadcaster do ograniczonych kolejek widzów - liczba widzów nie
+zmienia tempa generatora ani liczby plików .pcap. Widz, który nie nadąża,
+traci najstarsze przepływy i dostaje zdarzenie "dropped" z ich liczbą.
+Producent działa, dopóki ktoś ogląda, i kończy się po stop() generatora
+(zdarzenie "stopped"); kolejny widz uruchamia go ponownie.
+
+Pod ASGI (network_monitor/asgi.py) widz to korutyna czekająca na zdarzenia,
+pod WSGI - wątek serwera.
+"""
+import asyncio
+import logging
+import threading
+
+from network_monitor.event_stream import (
+    HEARTBEAT_SECONDS, EventBroadcaster, aiter_events, iter_events,
+)
+
+logger = logging.getLogger(__name__)
+
+# Odstęp między przepływami podglądu (sekundy)
+STREAM_INTERVAL = 0.5
+# Przepływy oczekujące na wysłanie do jednego widza
+MAX_PENDING_FLOWS = 100
+
+
+class TrafficStream:
+    """
+    Args:
+        generator: TrafficGenerator napędzany przez producenta
+        interval: Odstęp między przepływami (interval generate_normal_traffic)
+        max_pending: Pojemność kolejki jednego widza
+    """
+
+    def __init__(self, generator, interval=STREAM_INTERVAL, max_pending=MAX_PENDING_FLOWS):
+        self.generator = generator
+        self.interval = interval
+        self.broadcaster = EventBroadcaster(max_pending, overflow='drop_oldest')
+        self.flows = 0
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def ensure_running(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='traffic-stream', daemon=True)
+                self._thread.start()
+
+    def _idle(self):
+        """Pod blokadą - ensure_running nie przegapi kończącego się producenta."""
+        with self._lock:
+            if self.broadcaster.has_subscribers:
+                return False
+            self._thread = None
+            return True
+
+    def _run(self):
+        flows = self.generator.generate_normal_traffic(count=None, interval=self.interval)
+        try:
+            for features, saved_file in flows:
+                # Plik zgłaszany jest przez callback generatora (set_file_callback)
+                if saved_file:
+                    features['pcap_saved'] = saved_file
+                self.broadcaster.publish(None, features)
+                self.flows += 1
+                if self._idle():
+                    return
+            self.broadcaster.publish('stopped', {'flows': self.flows})
+        except Exception as e:
+            logger.error(f"Traffic stream producer failed: {e}")
+        finally:
+            flows.close()
+            with self._lock:
+                if self._thread is threading.current_thread():
+                    self._thread = None
+
+    def events(self, heartbeat=HEARTBEAT_SECONDS):
+        """Strumień SSE dla serwera WSGI (blokuje wątek połączenia)."""
+        subscription = self.broadcaster.subscribe()
+        self.ensure_running()
+        try:
+            yield from iter_events(subscription, heartbeat)
+        finally:
+            self.broadcaster.unsubscribe(subscription)
+
+    async def aevents(self, heartbeat=HEARTBEAT_SECONDS):
+        """Strumień SSE dla serwera ASGI (korutyna na połączenie)."""
+        subscription = self.broadcaster.subscribe(asyncio.get_running_loop())
+        self.ensure_running()
+        try:
+            async for event in aiter_events(subscription, heartbeat):
+                yield event
+        finally:
+            self.broadcaster.unsubscribe(subscription)
+
+    def status(self):
+        return {'running': self.running, 'flows': self.flows, **self.broadcaster.status()}
@@ -0,0 +1,76 @@
+"""
+Generuje ruch z zadaną intensywnością do testów obciążeniowych analityki.
+
+    python manage.py run_traffic_schedule --rate 500 --duration 60 --mix http=50,dns=30,icmp=20
+    python manage.py run_traffic_schedule --mbps 20 --duration 600 --profile diurnal:period=600,low=0.2
+"""
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from traffic_generator.clock import VirtualClock
+from traffic_generator.generator import TrafficGenerator
+from traffic_generator.scheduler import RateScheduler, parse_mix, parse_profile
+
+UNIT_LABELS = {'flows': 'flows/s', 'mbps': 'Mbit/s'}
+
+
+class Command(BaseCommand):
+    help = 'Generuje ruch .pcap w zadanym tempie (przepływy/s lub Mbit/s) i raportuje tempo osiągnięte.'
+
+    def add_arguments(self, parser):
+        rate = parser.add_mutually_exclusive_group(required=True)
+        rate.add_argument('--rate', type=float, help='Tempo docelowe w przepływach na sekundę')
+        rate.add_argument('--mbps', type=float, help='Tempo docelowe w Mbit/s')
+        parser.add_argument('--mix', default=None, help='Mix usług, np. http=50,dns=30,icmp=20')
+        parser.add_argument('--profile', default='constant',
+                            help='constant, diurnal:period=600,low=0.2 lub burst:every=60,duration=5,factor=5')
+        parser.add_argument('--duration', type=float, default=None, help='Czas trwania w sekundach')
+        parser.add_argument('--max-flows', type=int, default=None, help='Najwięcej przepływów')
+        parser.add_argument('--seed', type=int, default=None, help='Seed generatora')
+        parser.add_argument('--output', default=None, help='Katalog plików .pcap (domyślnie PCAP_FOLDER)')
+        parser.add_argument('--packets-per-file', type=int, default=10000, help='Rotacja plików .pcap')
+        parser.add_argument('--simulated', action='store_true',
+                            help='Bez czekania: harmonogram na zegarze wirtualnym (start od --start-time)')
+        parser.add_argument('--start-time', type=float, default=None,
+                            help='Znacznik czasu pierwszego przepływu (epoch)')
+        parser.add_argument('--no-register', action='store_true',
+                            help='Nie rejestruj plików w katalogu .pcap analityki')
+
+    def handle(self, *args, **options):
+        if options['duration'] is None and options['max_flows'] is None:
+            raise CommandError('Podaj --duration lub --max-flows')
+        try:
+            mix = parse_mix(options['mix']) if options['mix'] else None
+            profile = parse_profile(options['profile'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        generator = TrafficGenerator(simulated_time=True, seed=options['seed'], background_writer=False)
+        generator.set_pcap_folder(options['output'] or settings.PCAP_FOLDER)
+        generator.set_rotation(packets=options['packets_per_file'])
+        if not options['no_register']:
+            from analytic_pipline.pcap_catalog import register_pcap
+            generator.set_file_callback(register_pcap)
+
+        clock = VirtualClock(0) if options['simulated'] else None
+        unit, rate = ('mbps', options['mbps']) if options['mbps'] is not None else ('flows', options['rate'])
+        try:
+            scheduler = RateScheduler(generator, rate, unit=unit, mix=mix, profile=profile,
+                                      clock=clock, start_time=options['start_time'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        try:
+            report = scheduler.run(duration=options['duration'], max_flows=options['max_flows'])
+        except KeyboardInterrupt:
+            generator.flush_buffer()
+            report = scheduler.report()
+
+        self.stdout.write(json.dumps(report, indent=2))
+        style = self.style.SUCCESS if report['accuracy'] and report['accuracy'] >= 0.99 else self.style.WARNING
+        self.stdout.write(style(
+            f"Tempo {report['achieved_rate']} / {report['target_rate']} {UNIT_LABELS[unit]} "
+            f"({report['flows']} przepływów w {report['elapsed_seconds']}s)"
+        ))
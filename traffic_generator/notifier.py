@@ -0,0 +1,154 @@
+"""
+Nieblokujące powiadamianie analytic_pipline o nowych plikach .pcap.
+
+Producenci (SSE, generowanie ataków) tylko wrzucają informację o pliku do
+ograniczonej kolejki. Osobny wątek zbiera kilka plików w jedno żądanie
+(pole 'filenames'), wysyła je przez trwałą sesję HTTP (keep-alive, pula
+połączeń) i ponawia nieudane próby z wykładniczym opóźnieniem.
+"""
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class AnalyticsNotifier:
+    """
+    Kolejka powiadomień z wątkiem wysyłającym.
+
+    Args:
+        url: Adres endpointu analytic_pipline
+        max_pending: Pojemność kolejki (po przepełnieniu odrzucane są najstarsze pliki)
+        batch_size: Maksymalna liczba plików w jednym żądaniu
+        max_retries: Liczba ponowień po nieudanym wysłaniu
+        backoff: Opóźnienie pierwszego ponowienia w sekundach (podwajane)
+        timeout: Timeout żądania HTTP w sekundach
+        session: Sesja HTTP (domyślnie requests.Session z pulą połączeń)
+    """
+
+    def __init__(self, url, max_pending=1000, batch_size=20, max_retries=3, backoff=0.5,
+                 timeout=5, session=None):
+        self.url = url
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.session = session or self._create_session()
+        self.sent_files = 0
+        self.sent_requests = 0
+        self.failed_files = 0
+        self.dropped_files = 0
+        self.retries = 0
+        self._queue = deque()
+        self._busy = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = None
+
+    @staticmethod
+    def _create_session():
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._closed = False
+            self._thread = threading.Thread(target=self._run, name='analytics-notifier', daemon=True)
+            self._thread.start()
+
+    def notify(self, pcap_info):
+        """
+        Dodaje plik do kolejki powiadomień. Nigdy nie czeka na analytics.
+
+        Returns:
+            bool: False, jeśli brak informacji o pliku
+        """
+        if not pcap_info:
+            return False
+        with self._cond:
+            self._ensure_thread()
+            if len(self._queue) >= self.max_pending:
+                self._queue.popleft()
+                self.dropped_files += 1
+            self._queue.append(pcap_info)
+            self._cond.notify_all()
+        return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                batch = [self._queue.popleft()
+                         for _ in range(min(self.batch_size, len(self._queue)))]
+                self._busy = True
+            delivered = self._send(batch)
+            with self._cond:
+                self._busy = False
+                if delivered:
+                    self.sent_files += len(batch)
+                    self.sent_requests += 1
+                else:
+                    self.failed_files += len(batch)
+                self._cond.notify_all()
+
+    def _send(self, batch):
+        """Wysyła paczkę plików, ponawiając z wykładniczym opóźnieniem."""
+        payload = {
+            'filenames': [info.get('filename') for info in batch],
+            'files': batch,
+        }
+        delay = self.backoff
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.session.post(self.url, json=payload, timeout=self.timeout)
+                # 4xx to błąd żądania - ponawianie nic nie da
+                if response.status_code < 500:
+                    print(f"[PCAP] Analytics response: {response.status_code} "
+                          f"({len(batch)} files)")
+                    return response.status_code < 400
+                error = f"HTTP {response.status_code}"
+            except requests.RequestException as e:
+                error = e
+            if attempt < self.max_retries:
+                with self._cond:
+                    self.retries += 1
+                time.sleep(delay)
+                delay *= 2
+        print(f"[PCAP] Error sending to analytics: {error}")
+        return False
+
+    def drain(self, timeout=None):
+        """Czeka, aż kolejka zostanie wysłana. Zwraca False po przekroczeniu timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._queue and not self._busy, timeout)
+
+    def close(self, timeout=None):
+        """Wysyła zaległe powiadomienia i kończy wątek."""
+        self.drain(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def status(self):
+        with self._cond:
+            return {
+                'pending_files': len(self._queue),
+                'max_pending': self.max_pending,
+                'sent_files': self.sent_files,
+                'sent_requests': self.sent_requests,
+                'failed_files': self.failed_files,
+                'dropped_files': self.dropped_files,
+                'retries': self.retries,
+            }
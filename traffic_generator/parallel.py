@@ -0,0 +1,159 @@
+"""
+Równoległe generowanie zbiorów ruchu w wielu procesach.
+Każdy worker dostaje własny seed (random.Random + Faker), zegar symulowany
+i zapisuje własny shard .pcap. Na końcu shardy są scalane według znaczników
+czasu. Ten sam seed, liczba workerów i czas startu dają zawsze ten sam plik.
+"""
+import heapq
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from scapy.data import DLT_EN10MB
+from scapy.utils import PcapWriter, RawPcapReader, RawPcapWriter
+
+from .generator import DEFAULT_PCAP_FOLDER, TrafficGenerator
+
+# Stały czas startu zegara symulowanego - część "przepisu" na zbiór danych
+DEFAULT_START_TIME = 1_700_000_000.0
+
+
+def shard_seeds(seed, workers):
+    """Deterministycznie wyprowadza seedy workerów z seeda głównego."""
+    master = random.Random(seed)
+    return [master.getrandbits(63) for _ in range(workers)]
+
+
+def split_flows(total_flows, workers):
+    """Dzieli liczbę przepływów między workery (pierwsze dostają resztę)."""
+    base, extra = divmod(total_flows, workers)
+    return [base + (1 if i < extra else 0) for i in range(workers)]
+
+
+def generate_shard(shard_index, flows, seed, output_folder, start_time=DEFAULT_START_TIME,
+                   interval=0.0, engine='raw'):
+    """
+    Generuje jeden shard w bieżącym procesie i strumieniowo zapisuje go do pliku.
+
+    Returns:
+        dict: Informacje o shardzie (ścieżka, liczba przepływów i pakietów)
+    """
+    gen = TrafficGenerator(engine=engine, simulated_time=True, start_time=start_time, seed=seed)
+    filepath = os.path.join(output_folder, f"shard_{shard_index:03d}.pcap")
+    packet_count = 0
+
+    writer = PcapWriter(filepath, linktype=DLT_EN10MB, sync=False)
+    try:
+        for _ in range(flows):
+            packets, _ = gen.generate_flow()
+            writer.write(packets)
+            packet_count += len(packets)
+            gen.clock.sleep(interval)
+    finally:
+        writer.close()
+
+    return {
+        'shard': shard_index,
+        'filepath': filepath,
+        'flows': flows,
+        'packet_count': packet_count,
+    }
+
+
+def _generate_shard_task(args):
+    return generate_shard(**args)
+
+
+def merge_shards(shard_paths, output_path):
+    """
+    Scala shardy w jeden plik według czasu przechwycenia.
+
+    Przy równych znacznikach czasu kolejność wyznacza numer sharda, więc wynik
+    jest deterministyczny. Pakiety są czytane i zapisywane strumieniowo.
+
+    Returns:
+        int: Liczba zapisanych pakietów
+    """
+    readers = [RawPcapReader(path) for path in shard_paths]
+    written = 0
+    try:
+        def records(shard_index, reader):
+            for data, meta in reader:
+                yield (meta.sec, meta.usec, shard_index), data
+
+        merged = heapq.merge(*(records(i, r) for i, r in enumerate(readers)),
+                             key=lambda record: record[0])
+        writer = RawPcapWriter(output_path, linktype=DLT_EN10MB, sync=False)
+        writer.write_header(None)
+        try:
+            for (sec, usec, _), data in merged:
+                writer.write_packet(data, sec=sec, usec=usec)
+                written += 1
+        finally:
+            writer.close()
+    finally:
+        for reader in readers:
+            reader.close()
+    return written
+
+
+def generate_dataset(total_flows, workers=None, seed=0, output_folder=None,
+                     start_time=DEFAULT_START_TIME, interval=0.0, keep_shards=False):
+    """
+    Generuje zbiór ruchu na puli procesów i scala shardy w jeden plik .pcap.
+
+    Args:
+        total_flows: Łączna liczba przepływów
+        workers: Liczba procesów (domyślnie liczba rdzeni)
+        seed: Seed główny - z niego wyprowadzane są seedy shardów
+        output_folder: Katalog wyjściowy (domyślnie settings.PCAP_FOLDER)
+        start_time: Początek zegara symulowanego w każdym shardzie
+        interval: Symulowany odstęp między przepływami w shardzie (sekundy)
+        keep_shards: Czy zostawić pliki shardów po scaleniu
+
+    Returns:
+        dict: Ścieżka wyniku, liczba pakietów/przepływów i czasy etapów
+    """
+    workers = workers or os.cpu_count() or 1
+    output_folder = output_folder or getattr(settings, 'PCAP_FOLDER', DEFAULT_PCAP_FOLDER)
+    shard_folder = os.path.join(output_folder, f"shards_seed{seed}_w{workers}")
+    os.makedirs(shard_folder, exist_ok=True)
+
+    tasks = [
+        {
+            'shard_index': index,
+            'flows': flows,
+            'seed': shard_seed,
+            'output_folder': shard_folder,
+            'start_time': start_time,
+            'interval': interval,
+        }
+        for index, (flows, shard_seed) in enumerate(
+            zip(split_flows(total_flows, workers), shard_seeds(seed, workers)))
+    ]
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        shards = list(pool.map(_generate_shard_task, tasks))
+    generated = time.perf_counter()
+
+    output_path = os.path.join(output_folder, f"dataset_seed{seed}_w{workers}_{total_flows}.pcap")
+    packet_count = merge_shards([shard['filepath'] for shard in shards], output_path)
+    merged = time.perf_counter()
+
+    if not keep_shards:
+        for shard in shards:
+            os.remove(shard['filepath'])
+        os.rmdir(shard_folder)
+
+    return {
+        'filepath': output_path,
+        'flows': total_flows,
+        'packet_count': packet_count,
+        'workers': workers,
+        'seed': seed,
+        'generate_seconds': generated - started,
+        'merge_seconds': merged - generated,
+    }
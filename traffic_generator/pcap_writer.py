@@ -0,0 +1,345 @@
+"""
+Strumieniowy zapis pakietów do plików .pcap z rotacją.
+Pakiety są serializowane do rekordów pcap poza blokadą, a pod blokadą trafia
+tylko gotowy blok bajtów do jednego, buforowanego uchwytu pliku. Pliki
+rotują po liczbie pakietów, rozmiarze lub oknie czasowym; otwarty plik ma
+rozszerzenie .part i dostaje docelową nazwę dopiero po zamknięciu.
+
+BackgroundPcapWriter przenosi serializację i zapis na osobny wątek: producenci
+tylko wrzucają przepływy do ograniczonej kolejki.
+"""
+import logging
+import os
+import struct
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from scapy.data import DLT_EN10MB
+
+PCAP_MAGIC = 0xa1b2c3d4
+PCAP_SNAPLEN = 65535
+PCAP_GLOBAL_HEADER = struct.pack('<IHHiIII', PCAP_MAGIC, 2, 4, 0, 0, PCAP_SNAPLEN, DLT_EN10MB)
+PARTIAL_SUFFIX = '.part'
+
+# Zachowanie przy pełnej kolejce zapisu
+BACKPRESSURE_POLICIES = ('block', 'drop_oldest', 'drop_newest')
+
+_RECORD_HEADER = struct.Struct('<IIII')
+
+logger = logging.getLogger(__name__)
+
+
+def encode_records(packets):
+    """
+    Serializuje pakiety (Scapy lub RawFrame) do rekordów pcap.
+
+    Returns:
+        tuple: (bajty rekordów, pierwszy znacznik czasu, ostatni znacznik czasu)
+    """
+    chunks = []
+    first_ts = last_ts = None
+    for pkt in packets:
+        data = bytes(pkt)
+        ts = float(getattr(pkt, 'time', None) or time.time())
+        sec = int(ts)
+        usec = int(round((ts - sec) * 1_000_000))
+        if usec >= 1_000_000:
+            sec, usec = sec + 1, usec - 1_000_000
+        chunks.append(_RECORD_HEADER.pack(sec, usec, len(data), len(data)))
+        chunks.append(data)
+        if first_ts is None:
+            first_ts = ts
+        last_ts = ts
+    return b''.join(chunks), first_ts, last_ts
+
+
+class RotatingPcapWriter:
+    """
+    Dopisuje pakiety do bieżącego pliku .pcap i rotuje go po przekroczeniu progu.
+
+    Args:
+        folder: Katalog docelowy
+        max_packets: Rotacja po tylu pakietach (None = bez limitu)
+        max_bytes: Rotacja po takim rozmiarze pliku w bajtach (None = bez limitu)
+        max_seconds: Rotacja po tylu sekundach od otwarcia pliku (None = bez limitu)
+        prefix: Prefiks nazw plików
+        buffer_size: Rozmiar bufora zapisu pliku
+        fsync: Czy wywołać fsync przed zamknięciem pliku
+        on_close: Opcjonalna funkcja wołana z informacjami o każdym zamkniętym pliku
+    """
+
+    def __init__(self, folder, max_packets=50, max_bytes=None, max_seconds=None,
+                 prefix='traffic', buffer_size=1 << 20, fsync=False, on_close=None):
+        self.folder = folder
+        self.max_packets = max_packets
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.prefix = prefix
+        self.buffer_size = buffer_size
+        self.fsync = fsync
+        self.on_close = on_close
+        self.file_counter = 0
+        self.packets_written = 0
+        self._lock = threading.Lock()
+        self._file = None
+        self._reset_current()
+
+    def _reset_current(self):
+        self._file = None
+        self._filename = None
+        self._packet_count = 0
+        self._bytes = 0
+        self._opened_at = None
+        self._first_ts = None
+        self._last_ts = None
+
+    def _open(self):
+        os.makedirs(self.folder, exist_ok=True)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        base = f"{self.prefix}_{timestamp}_{self.file_counter}"
+        self._filename = f"{base}.pcap"
+        # Inny writer w tym samym katalogu (np. osobny generator ataku) mógł w tej
+        # samej sekundzie użyć tej nazwy - os.replace nadpisałby jego plik
+        suffix = 0
+        while any(os.path.exists(os.path.join(self.folder, self._filename + ext))
+                  for ext in ('', PARTIAL_SUFFIX)):
+            suffix += 1
+            self._filename = f"{base}_{suffix}.pcap"
+        path = os.path.join(self.folder, self._filename + PARTIAL_SUFFIX)
+        self._file = open(path, 'wb', buffering=self.buffer_size)
+        self._file.write(PCAP_GLOBAL_HEADER)
+        self._bytes = len(PCAP_GLOBAL_HEADER)
+        self._opened_at = time.monotonic()
+
+    def _should_rotate(self):
+        if self.max_packets and self._packet_count >= self.max_packets:
+            return True
+        if self.max_bytes and self._bytes >= self.max_bytes:
+            return True
+        if self.max_seconds and time.monotonic() - self._opened_at >= self.max_seconds:
+            return True
+        return False
+
+    def _close_current(self):
+        """Zamyka bieżący plik i nadaje mu docelową nazwę. Wywoływane pod blokadą."""
+        if self._file is None:
+            return None
+        if self.fsync:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._file.close()
+        final_path = os.path.join(self.folder, self._filename)
+        os.replace(final_path + PARTIAL_SUFFIX, final_path)
+        info = {
+            'filepath': final_path,
+            'packet_count': self._packet_count,
+            'filename': self._filename,
+            'size_bytes': self._bytes,
+            'first_timestamp': self._first_ts,
+            'last_timestamp': self._last_ts,
+        }
+        self.file_counter += 1
+        self._reset_current()
+        return info
+
+    def _notify_closed(self, info):
+        """Przekazuje zamknięty plik do on_close (poza blokadą zapisu)."""
+        if info and self.on_close is not None:
+            try:
+                self.on_close(info)
+            except Exception as e:
+                print(f"Błąd obsługi zamkniętego pliku pcap: {e}")
+        return info
+
+    def write(self, packets):
+        """
+        Zapisuje pakiety (całe przepływy trafiają do jednego pliku).
+
+        Returns:
+            dict | None: Informacje o pliku zamkniętym przez rotację
+        """
+        blob, first_ts, last_ts = encode_records(packets)
+        if not blob:
+            return None
+        count = len(packets)
+
+        with self._lock:
+            if self._file is None:
+                self._open()
+            self._file.write(blob)
+            self._packet_count += count
+            self._bytes += len(blob)
+            self.packets_written += count
+            if self._first_ts is None:
+                self._first_ts = first_ts
+            self._last_ts = last_ts
+            if not self._should_rotate():
+                return None
+            info = self._close_current()
+        return self._notify_closed(info)
+
+    def rotate(self):
+        """Wymusza zamknięcie bieżącego pliku (jeśli coś zawiera)."""
+        with self._lock:
+            info = self._close_current()
+        return self._notify_closed(info)
+
+    def set_folder(self, folder):
+        """Zmienia katalog docelowy; bieżący plik jest najpierw zamykany."""
+        with self._lock:
+            info = self._close_current()
+            self.folder = folder
+        return self._notify_closed(info)
+
+    def status(self):
+        with self._lock:
+            return {
+                'current_file': self._filename,
+                'current_packets': self._packet_count,
+                'current_bytes': self._bytes,
+                'files_saved': self.file_counter,
+                'packets_written': self.packets_written,
+            }
+
+
+class BackgroundPcapWriter:
+    """
+    Kolejka producent/konsument przed RotatingPcapWriter.
+
+    Producenci wywołują write() i wracają od razu; osobny wątek serializuje
+    pakiety, zapisuje je i robi fsync przy rotacji. Pliki zamknięte przez
+    rotację w tle są przekazywane wyłącznie przez writer.on_close (write()
+    nie zwraca informacji o plikach); rotate() i close() zwracają plik, który
+    same zamknęły.
+
+    Args:
+        writer: RotatingPcapWriter, do którego trafiają pakiety
+        max_queue_packets: Pojemność kolejki w pakietach
+        policy: 'block' (czekaj na miejsce), 'drop_oldest' lub 'drop_newest'
+        fsync: Czy robić fsync zamykanych plików
+    """
+
+    def __init__(self, writer, max_queue_packets=10000, policy='block', fsync=True):
+        if policy not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"Nieznana polityka kolejki: {policy}")
+        self.writer = writer
+        self.writer.fsync = fsync
+        self.max_queue_packets = max_queue_packets
+        self.policy = policy
+        self.enqueued_packets = 0
+        self.dropped_packets = 0
+        self.dropped_batches = 0
+        self._queue = deque()
+        self._queued_packets = 0
+        self._busy = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._closed = False
+            self._thread = threading.Thread(target=self._run, name='pcap-writer', daemon=True)
+            self._thread.start()
+
+    def _fits(self, count):
+        # Przepływ większy niż cała kolejka przechodzi, gdy kolejka jest pusta
+        return not self._queue or self._queued_packets + count <= self.max_queue_packets
+
+    def _drop_batch(self, count):
+        self.dropped_packets += count
+        self.dropped_batches += 1
+
+    def write(self, packets):
+        """
+        Wrzuca przepływ do kolejki zapisu.
+
+        Returns:
+            None: Zamknięte pliki trafiają do writer.on_close
+        """
+        packets = list(packets)
+        count = len(packets)
+        with self._cond:
+            if count:
+                self._ensure_thread()
+                while not self._fits(count):
+                    if self.policy == 'drop_newest':
+                        self._drop_batch(count)
+                        return None
+                    if self.policy == 'drop_oldest':
+                        dropped = self._queue.popleft()
+                        self._queued_packets -= len(dropped)
+                        self._drop_batch(len(dropped))
+                    else:
+                        self._cond.wait()
+                self._queue.append(packets)
+                self._queued_packets += count
+                self.enqueued_packets += count
+                self._cond.notify_all()
+        return None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                batch = self._queue.popleft()
+                self._queued_packets -= len(batch)
+                self._busy = True
+                self._cond.notify_all()
+            try:
+                # Zamknięty plik jest zgłaszany przez writer.on_close
+                self.writer.write(batch)
+            except Exception:
+                # Zła paczka (np. struct.error z encode_records) nie może zatrzymać wątku -
+                # inaczej drain() i wszystko, co na nim czeka, wisiałoby bez końca
+                logger.exception(f"Błąd zapisu pcap ({len(batch)} pakietów odrzuconych)")
+                with self._cond:
+                    self._drop_batch(len(batch))
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def drain(self, timeout=None):
+        """Czeka, aż kolejka zostanie zapisana. Zwraca False po przekroczeniu timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._queue and not self._busy, timeout)
+
+    def rotate(self):
+        """Zapisuje zaległe pakiety i zamyka bieżący plik."""
+        self.drain()
+        return self.writer.rotate()
+
+    def set_folder(self, folder):
+        self.drain()
+        return self.writer.set_folder(folder)
+
+    def close(self):
+        """Zapisuje kolejkę, zamyka bieżący plik i kończy wątek."""
+        info = self.rotate()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        return info
+
+    def status(self):
+        status = self.writer.status()
+        with self._cond:
+            status.update({
+                'queue_depth': self._queued_packets,
+                'queue_batches': len(self._queue),
+                'queue_capacity': self.max_queue_packets,
+                'backpressure_policy': self.policy,
+                'enqueued_packets': self.enqueued_packets,
+                'dropped_packets': self.dropped_packets,
+                'dropped_batches': self.dropped_batches,
+            })
+        return status
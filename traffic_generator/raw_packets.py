@@ -0,0 +1,177 @@
+"""
+Silnik budowania ramek bez warstw Scapy.
+Nagłówki Ethernet/IPv4/TCP/UDP/ICMP są zapisywane bezpośrednio do bufora
+``bytearray`` przez ``struct.pack_into``. Ramki są bajt w bajt identyczne z
+tymi, które buduje Scapy przy domyślnych wartościach pól (IP id=1, okno TCP
+8192), więc ścieżka Scapy pozostaje referencją do testów.
+"""
+import socket
+import struct
+import sys
+import time
+
+ETH_HEADER_LEN = 14
+IP_HEADER_LEN = 20
+TCP_HEADER_LEN = 20
+UDP_HEADER_LEN = 8
+ICMP_HEADER_LEN = 8
+
+ETHERTYPE_IPV4 = 0x0800
+IPPROTO_ICMP = 1
+IPPROTO_TCP = 6
+IPPROTO_UDP = 17
+
+# Wartości domyślne pól Scapy
+IP_DEFAULT_ID = 1
+TCP_DEFAULT_WINDOW = 8192
+
+TCP_FLAG_BITS = {
+    'F': 0x01, 'S': 0x02, 'R': 0x04, 'P': 0x08,
+    'A': 0x10, 'U': 0x20, 'E': 0x40, 'C': 0x80,
+}
+
+_ETH = struct.Struct('!6s6sH')
+_IP = struct.Struct('!BBHHHBBH4s4s')
+_TCP = struct.Struct('!HHIIBBHHH')
+_UDP = struct.Struct('!HHHH')
+_ICMP = struct.Struct('!BBHHH')
+# Suma kontrolna liczona w natywnej kolejności bajtów (RFC 1071, 2.B)
+_NATIVE_U16 = struct.Struct('=H')
+_PSEUDO_PROTO = {
+    proto: (proto if sys.byteorder == 'big' else proto << 8)
+    for proto in (IPPROTO_TCP, IPPROTO_UDP)
+}
+
+
+class RawFrame(bytes):
+    """Gotowa ramka Ethernet z czasem przechwycenia (jak ``Packet.time`` w Scapy)."""
+
+    def __new__(cls, data, timestamp=None):
+        frame = super().__new__(cls, data)
+        frame.time = time.time() if timestamp is None else timestamp
+        return frame
+
+
+def tcp_flags_value(flags):
+    """Zamienia flagi w notacji Scapy ('S', 'SA', 'PA'...) na bajt flag TCP."""
+    if isinstance(flags, int):
+        return flags
+    value = 0
+    for flag in flags:
+        value |= TCP_FLAG_BITS[flag]
+    return value
+
+
+def _ones_sum(view):
+    """Suma 16-bitowych słów bufora o parzystej długości (bez zawijania)."""
+    return sum(view.cast('H'))
+
+
+def _finish_checksum(total):
+    while total >> 16:
+        total = (total & 0xffff) + (total >> 16)
+    return ~total & 0xffff
+
+
+class RawPacketBuilder:
+    """
+    Buduje ramki IPv4 bez tworzenia obiektów warstw.
+
+    Adresy MAC/IP są zamieniane na bajty raz i trzymane w małym cache (można
+    też podać gotowe bajty), a sumy kontrolne liczone są z sum częściowych:
+    pary adresów (pseudo-nagłówek), nagłówka i danych.
+    """
+
+    def __init__(self, ttl=64):
+        self.ttl = ttl
+        self._mac_cache = {}
+        self._ip_cache = {}
+
+    def _mac(self, mac):
+        if isinstance(mac, bytes):
+            return mac
+        raw = self._mac_cache.get(mac)
+        if raw is None:
+            if len(self._mac_cache) > 4096:
+                self._mac_cache.clear()
+            raw = self._mac_cache[mac] = bytes.fromhex(mac.replace(':', ''))
+        return raw
+
+    def _ip(self, ip):
+        if isinstance(ip, bytes):
+            return ip
+        raw = self._ip_cache.get(ip)
+        if raw is None:
+            if len(self._ip_cache) > 4096:
+                self._ip_cache.clear()
+            raw = self._ip_cache[ip] = socket.inet_aton(ip)
+        return raw
+
+    def _frame(self, src_mac, dst_mac, src_ip, dst_ip, proto, l4_len, payload):
+        """Alokuje bufor i wypełnia nagłówki Ethernet oraz IPv4."""
+        ip_total = IP_HEADER_LEN + l4_len + len(payload)
+        frame_len = ETH_HEADER_LEN + ip_total
+        # +1 bajt zapasu na wyrównanie sumy kontrolnej przy nieparzystej długości
+        buf = bytearray(frame_len + 1)
+        src = self._ip(src_ip)
+        dst = self._ip(dst_ip)
+
+        _ETH.pack_into(buf, 0, self._mac(dst_mac), self._mac(src_mac), ETHERTYPE_IPV4)
+        _IP.pack_into(buf, ETH_HEADER_LEN, 0x45, 0, ip_total, IP_DEFAULT_ID, 0,
+                      self.ttl, proto, 0, src, dst)
+        l4_offset = ETH_HEADER_LEN + IP_HEADER_LEN + l4_len
+        buf[l4_offset:frame_len] = payload
+
+        view = memoryview(buf)
+        ip_header = view[ETH_HEADER_LEN:ETH_HEADER_LEN + IP_HEADER_LEN]
+        _NATIVE_U16.pack_into(buf, ETH_HEADER_LEN + 10, _finish_checksum(_ones_sum(ip_header)))
+        # Adresy zajmują ostatnie 8 bajtów nagłówka IP - suma pseudo-nagłówka
+        addr_sum = _ones_sum(ip_header[12:20])
+        return buf, view, frame_len, addr_sum
+
+    def _l4_checksum(self, buf, view, frame_len, addr_sum, proto, offset, csum_offset):
+        segment_len = frame_len - offset
+        padded_end = offset + segment_len + (segment_len & 1)
+        total = addr_sum + _PSEUDO_PROTO[proto] + _byteorder_len(segment_len)
+        total += _ones_sum(view[offset:padded_end])
+        checksum = _finish_checksum(total)
+        if proto == IPPROTO_UDP and checksum == 0:
+            checksum = 0xffff
+        _NATIVE_U16.pack_into(buf, csum_offset, checksum)
+
+    def tcp(self, src_mac, dst_mac, src_ip, dst_ip, sport, dport, flags,
+            seq=0, ack=0, payload=b'', window=TCP_DEFAULT_WINDOW, timestamp=None):
+        buf, view, frame_len, addr_sum = self._frame(
+            src_mac, dst_mac, src_ip, dst_ip, IPPROTO_TCP, TCP_HEADER_LEN, payload)
+        offset = ETH_HEADER_LEN + IP_HEADER_LEN
+        _TCP.pack_into(buf, offset, sport, dport, seq & 0xffffffff, ack & 0xffffffff,
+                       (TCP_HEADER_LEN // 4) << 4, tcp_flags_value(flags), window, 0, 0)
+        self._l4_checksum(buf, view, frame_len, addr_sum, IPPROTO_TCP, offset, offset + 16)
+        return RawFrame(view[:frame_len], timestamp)
+
+    def udp(self, src_mac, dst_mac, src_ip, dst_ip, sport, dport, payload=b'',
+            timestamp=None):
+        buf, view, frame_len, addr_sum = self._frame(
+            src_mac, dst_mac, src_ip, dst_ip, IPPROTO_UDP, UDP_HEADER_LEN, payload)
+        offset = ETH_HEADER_LEN + IP_HEADER_LEN
+        _UDP.pack_into(buf, offset, sport, dport, UDP_HEADER_LEN + len(payload), 0)
+        self._l4_checksum(buf, view, frame_len, addr_sum, IPPROTO_UDP, offset, offset + 6)
+        return RawFrame(view[:frame_len], timestamp)
+
+    def icmp(self, src_mac, dst_mac, src_ip, dst_ip, icmp_type, code=0, icmp_id=0,
+             icmp_seq=0, payload=b'', timestamp=None):
+        buf, view, frame_len, _ = self._frame(
+            src_mac, dst_mac, src_ip, dst_ip, IPPROTO_ICMP, ICMP_HEADER_LEN, payload)
+        offset = ETH_HEADER_LEN + IP_HEADER_LEN
+        _ICMP.pack_into(buf, offset, icmp_type, code, 0, icmp_id, icmp_seq)
+        segment_len = frame_len - offset
+        checksum = _finish_checksum(_ones_sum(view[offset:offset + segment_len + (segment_len & 1)]))
+        _NATIVE_U16.pack_into(buf, offset + 2, checksum)
+        return RawFrame(view[:frame_len], timestamp)
+
+
+def _byteorder_len(length):
+    """Długość segmentu jako słowo pseudo-nagłówka w natywnej kolejności bajtów."""
+    if sys.byteorder == 'big':
+        return length
+    return ((length & 0xff) << 8) | (length >> 8)
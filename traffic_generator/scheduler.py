@@ -0,0 +1,350 @@
+"""
+Generowanie ruchu z zadaną intensywnością (testy obciążeniowe pipeline'u).
+
+RateScheduler wydaje przepływy według kubełka tokenów liczonego na zegarze
+monotonicznym: tempo docelowe w przepływach/s albo Mbit/s (koszt przepływu to
+jego rozmiar), mnożone przez profil (stały, dobowy, paczki). Przepływy są
+generowane na zegarze wirtualnym ustawianym na zaplanowany czas, więc
+opóźnienia RTT wewnątrz przepływu trafiają do znaczników czasu zamiast
+spowalniać wydawanie. Raport podaje tempo osiągnięte i docelowe (całka tempa
+z profilem po czasie trwania).
+
+Ten sam seed, mix, profil i tempo dają w trybie symulowanym (VirtualClock jako
+zegar harmonogramu) zawsze ten sam ruch.
+"""
+import math
+import time
+
+# Usługa -> (protokół, port docelowy); klucze TCP/UDP/ICMP - losowy port z common_ports
+SERVICES = {
+    'http': ('TCP', 80),
+    'https': ('TCP', 443),
+    'http-alt': ('TCP', 8080),
+    'ssh': ('TCP', 22),
+    'ftp': ('TCP', 21),
+    'smtp': ('TCP', 25),
+    'mysql': ('TCP', 3306),
+    'postgres': ('TCP', 5432),
+    'dns': ('UDP', 53),
+    'icmp': ('ICMP', None),
+    'TCP': ('TCP', None),
+    'UDP': ('UDP', None),
+    'ICMP': ('ICMP', None),
+}
+
+RATE_UNITS = ('flows', 'mbps')
+# Pojemność kubełka w sekundach tempa - pochłania niedokładność sleep()
+DEFAULT_BURST_SECONDS = 0.05
+# Najdłuższe pojedyncze czekanie (profil jest ponownie liczony po każdym)
+MAX_SLEEP = 0.05
+# Dług poniżej tej wartości to błąd zaokrągleń (inaczej VirtualClock utknąłby
+# na sleep() krótszym niż rozdzielczość float)
+TOKEN_EPSILON = 1e-9
+
+
+def parse_mix(spec):
+    """
+    Mix usług z tekstu 'http=50,dns=30,icmp=20' (wagi względne).
+
+    Returns:
+        dict: usługa -> waga
+
+    Raises:
+        ValueError: Nieznana usługa lub nieprawidłowa waga
+    """
+    mix = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, weight = item.partition('=')
+        if name not in SERVICES:
+            raise ValueError(f"Nieznana usługa: {name} (dostępne: {', '.join(SERVICES)})")
+        try:
+            mix[name] = float(weight) if weight else 1.0
+        except ValueError:
+            raise ValueError(f"Nieprawidłowa waga usługi {name}: {weight}")
+        if mix[name] < 0:
+            raise ValueError(f"Nieprawidłowa waga usługi {name}: {weight}")
+    if not mix or not sum(mix.values()):
+        raise ValueError(f"Pusty mix usług: {spec}")
+    return mix
+
+
+class ConstantProfile:
+    def __call__(self, elapsed):
+        return 1.0
+
+    def describe(self):
+        return 'constant'
+
+
+class DiurnalProfile:
+    """
+    Cykl dobowy: mnożnik od low (początek okresu) do 1.0 (połowa okresu).
+
+    Args:
+        period: Długość cyklu w sekundach (do testów skrócona doba)
+        low: Mnożnik w dolinie
+        phase: Przesunięcie cyklu w sekundach
+    """
+
+    def __init__(self, period=86400.0, low=0.2, phase=0.0):
+        if period <= 0 or not 0 <= low <= 1:
+            raise ValueError(f"Nieprawidłowy profil dobowy: period={period}, low={low}")
+        self.period = period
+        self.low = low
+        self.phase = phase
+
+    def __call__(self, elapsed):
+        angle = 2 * math.pi * (elapsed + self.phase) / self.period
+        return self.low + (1 - self.low) * (1 - math.cos(angle)) / 2
+
+    def describe(self):
+        return f'diurnal:period={self.period:g},low={self.low:g},phase={self.phase:g}'
+
+
+class BurstProfile:
+    """
+    Paczki: co every sekund przez duration sekund tempo razy factor.
+    """
+
+    def __init__(self, every=60.0, duration=5.0, factor=5.0):
+        if every <= 0 or not 0 < duration <= every or factor <= 0:
+            raise ValueError(f"Nieprawidłowy profil paczek: every={every}, duration={duration}, "
+                             f"factor={factor}")
+        self.every = every
+        self.duration = duration
+        self.factor = factor
+
+    def __call__(self, elapsed):
+        return self.factor if elapsed % self.every < self.duration else 1.0
+
+    def describe(self):
+        return f'burst:every={self.every:g},duration={self.duration:g},factor={self.factor:g}'
+
+
+PROFILES = {
+    'constant': ConstantProfile,
+    'diurnal': DiurnalProfile,
+    'burst': BurstProfile,
+}
+
+
+def parse_profile(spec):
+    """
+    Profil z tekstu: 'constant', 'diurnal:period=600,low=0.2', 'burst:every=30,duration=5,factor=4'.
+
+    Raises:
+        ValueError: Nieznany profil lub parametr
+    """
+    name, _, params = (spec or 'constant').partition(':')
+    if name not in PROFILES:
+        raise ValueError(f"Nieznany profil: {name} (dostępne: {', '.join(PROFILES)})")
+    kwargs = {}
+    for item in filter(None, params.split(',')):
+        key, _, value = item.partition('=')
+        try:
+            kwargs[key] = float(value)
+        except ValueError:
+            raise ValueError(f"Nieprawidłowy parametr profilu {name}: {item}")
+    try:
+        return PROFILES[name](**kwargs)
+    except TypeError as e:
+        raise ValueError(f"Nieprawidłowy parametr profilu {name}: {e}")
+
+
+class TokenBucket:
+    """
+    Kubełek tokenów na zegarze monotonicznym. Koszt pobierany jest po
+    wydaniu (rozmiar przepływu znany dopiero po wygenerowaniu), więc stan
+    może spaść poniżej zera - kolejny przepływ czeka, aż dług zostanie spłacony.
+
+    Args:
+        rate: Tokeny na sekundę
+        capacity: Najwięcej zgromadzonych tokenów (nadwyżka przepada jako lost)
+        now: Czas startu (wartość zegara)
+    """
+
+    def __init__(self, rate, capacity, now):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = 0.0
+        self.lost = 0.0
+        self._last = now
+
+    def refill(self, now):
+        self.tokens += self.rate * (now - self._last)
+        self._last = now
+        if self.tokens > self.capacity:
+            self.lost += self.tokens - self.capacity
+            self.tokens = self.capacity
+
+    def set_rate(self, rate, now):
+        """Zmienia tempo od chwili now (wcześniejszy czas liczony po starym tempie)."""
+        self.refill(now)
+        self.rate = rate
+
+    def delay(self):
+        """Sekundy do spłaty długu (0 - można wydawać)."""
+        if self.tokens >= -TOKEN_EPSILON:
+            return 0.0
+        return -self.tokens / self.rate if self.rate > 0 else MAX_SLEEP
+
+    def consume(self, cost):
+        self.tokens -= cost
+
+
+class RateScheduler:
+    """
+    Args:
+        generator: TrafficGenerator z zegarem wirtualnym (simulated_time=True)
+        rate: Tempo docelowe w jednostkach unit
+        unit: 'flows' (przepływy/s) albo 'mbps' (Mbit/s)
+        mix: Wagi usług (SERVICES); None - losowy protokół jak generate_flow()
+        profile: Mnożnik tempa od czasu (ConstantProfile, DiurnalProfile, BurstProfile)
+        burst_seconds: Pojemność kubełka w sekundach tempa docelowego
+        clock: Zegar harmonogramu z now() i sleep() (None - zegar monotoniczny;
+            VirtualClock - symulacja bez czekania)
+        start_time: Znacznik czasu pierwszego przepływu (domyślnie bieżący czas)
+    """
+
+    def __init__(self, generator, rate, unit='flows', mix=None, profile=None,
+                 burst_seconds=DEFAULT_BURST_SECONDS, clock=None, start_time=None):
+        if unit not in RATE_UNITS:
+            raise ValueError(f"Nieznana jednostka tempa: {unit}")
+        if rate <= 0:
+            raise ValueError(f"Tempo musi być dodatnie: {rate}")
+        if not getattr(generator.clock, 'simulated', False):
+            raise ValueError("Harmonogram wymaga generatora z zegarem wirtualnym")
+        self.generator = generator
+        self.rate = rate
+        self.unit = unit
+        self.profile = profile or ConstantProfile()
+        self.burst_seconds = burst_seconds
+        self.clock = clock or _MonotonicClock()
+        self.start_time = time.time() if start_time is None else start_time
+        if mix:
+            self._services = [SERVICES[name] for name in mix]
+            total = sum(mix.values())
+            self._cum_weights = list(_accumulate(weight / total for weight in mix.values()))
+        else:
+            self._services = None
+        self.flows = 0
+        self.packets = 0
+        self.bytes = 0
+        self.target = 0.0
+        self.elapsed = 0.0
+        self.lost = 0.0
+        self.by_service = {}
+
+    def _cost(self, features):
+        if self.unit == 'flows':
+            return 1.0
+        return features['total_size'] * 8 / 1e6
+
+    def _next_service(self):
+        if self._services is None:
+            return None, None
+        return self.generator.rng.choices(self._services, cum_weights=self._cum_weights)[0]
+
+    def iter_flows(self, duration=None, max_flows=None):
+        """
+        Wydaje przepływy w tempie docelowym.
+
+        Args:
+            duration: Czas trwania w sekundach (None - bez limitu)
+            max_flows: Najwięcej przepływów (None - bez limitu)
+
+        Yields:
+            tuple: (pakiety, features) - features jak z generate_flow()
+        """
+        if duration is None and max_flows is None:
+            raise ValueError("Podaj duration lub max_flows")
+        start = self.clock.now()
+        current = self.rate * self.profile(0.0)
+        bucket = TokenBucket(current, max(self.rate * self.burst_seconds, self._cost_floor()), start)
+        last = start
+        try:
+            while max_flows is None or self.flows < max_flows:
+                now = self.clock.now()
+                elapsed = now - start
+                if duration is not None and elapsed >= duration:
+                    break
+                # Cel: całka tempa z profilem (prostokąty o szerokości kroku pętli)
+                self.target += current * (now - last)
+                last = now
+                current = self.rate * self.profile(elapsed)
+                bucket.set_rate(current, now)
+                wait = bucket.delay()
+                if wait > 0:
+                    if duration is not None:
+                        wait = min(wait, duration - elapsed)
+                    self.clock.sleep(min(wait, MAX_SLEEP))
+                    continue
+
+                protocol, dst_port = self._next_service()
+                self.generator.clock.set(self.start_time + elapsed)
+                packets, features = self.generator.generate_flow(protocol, dst_port)
+                bucket.consume(self._cost(features))
+                self.flows += 1
+                self.packets += len(packets)
+                self.bytes += features['total_size']
+                key = (features['protocol'], dst_port)
+                self.by_service[key] = self.by_service.get(key, 0) + 1
+                yield packets, features
+        finally:
+            now = self.clock.now()
+            self.target += current * (now - last)
+            self.elapsed = now - start
+            self.lost = bucket.lost
+
+    def _cost_floor(self):
+        # Kubełek musi pomieścić co najmniej jeden przepływ
+        return 1.0 if self.unit == 'flows' else 0.01
+
+    def run(self, duration=None, max_flows=None):
+        """Wydaje przepływy do plików .pcap generatora; zwraca report()."""
+        for packets, _ in self.iter_flows(duration, max_flows):
+            self.generator.add_packets_to_buffer(packets)
+        self.generator.flush_buffer()
+        return self.report()
+
+    def report(self):
+        """Tempo osiągnięte i docelowe (w jednostce unit oraz w przepływach i Mbit/s)."""
+        achieved = self.flows if self.unit == 'flows' else self.bytes * 8 / 1e6
+
+        def per_second(value):
+            return round(value / self.elapsed, 3) if self.elapsed else None
+
+        return {
+            'unit': self.unit,
+            'profile': self.profile.describe(),
+            'elapsed_seconds': round(self.elapsed, 3),
+            'flows': self.flows,
+            'packets': self.packets,
+            'bytes': self.bytes,
+            'target_rate': per_second(self.target),
+            'achieved_rate': per_second(achieved),
+            'accuracy': round(achieved / self.target, 4) if self.target else None,
+            'achieved_flows_per_second': per_second(self.flows),
+            'achieved_mbps': per_second(self.bytes * 8 / 1e6),
+            # Tokeny, których generator nie nadążył wydać (przepełniony kubełek)
+            'lost': round(self.lost, 3),
+            'by_service': {f'{protocol}/{port or "*"}': count
+                           for (protocol, port), count in sorted(self.by_service.items(),
+                                                                 key=lambda item: -item[1])},
+        }
+
+
+class _MonotonicClock:
+    def now(self):
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+def _accumulate(values):
+    total = 0.0
+    for value in values:
+        total += value
+        yield total
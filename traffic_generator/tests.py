@@ -1,3 +1,865 @@
+"""
+Testy jednostkowe dla aplikacji traffic_generator.
+"""
+import itertools
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from unittest import mock
+
 from django.test import TestCase
+from django.urls import reverse
+from scapy.utils import RawPcapReader, rdpcap
+
+from .attack_burst import AttackBurst
+from .clock import VirtualClock
+from .generator import TrafficGenerator
+from .live_stream import TrafficStream
+from .notifier import AnalyticsNotifier
+from .parallel import generate_dataset, shard_seeds, split_flows
+from .pcap_writer import PARTIAL_SUFFIX, BackgroundPcapWriter, RotatingPcapWriter
+from .raw_packets import RawFrame, RawPacketBuilder
+from .scheduler import (BurstProfile, DiurnalProfile, RateScheduler, TokenBucket, parse_mix,
+                        parse_profile)
+
+START_TIME = 1_700_000_000.0
+
+
+class RawPacketEngineTests(TestCase):
+    """Testy silnika budującego ramki bezpośrednio w buforze."""
+
+    def setUp(self):
+        self.raw = TrafficGenerator(engine='raw')
+        self.scapy = TrafficGenerator(engine='scapy')
+        self.addrs = ('02:00:00:00:00:01', '02:00:00:00:00:02', '10.0.0.1', '192.168.1.20')
+
+    def test_tcp_frame_matches_scapy(self):
+        """Test identyczności ramek TCP (także z nieparzystym payloadem)."""
+        for payload in (None, b'GET / HTTP/1.1\r\n\r\n', b'x' * 1401):
+            raw = self.raw._tcp_packet(*self.addrs, 40000, 80, 'PA', seq=12345,
+                                       ack=678, payload=payload)
+            ref = self.scapy._tcp_packet(*self.addrs, 40000, 80, 'PA', seq=12345,
+                                         ack=678, payload=payload)
+            self.assertEqual(bytes(raw), bytes(ref))
+
+    def test_udp_frame_matches_scapy(self):
+        """Test identyczności ramek UDP."""
+        for payload in (b'\x12\x34', b'abc'):
+            raw = self.raw._udp_packet(*self.addrs, 5353, 53, payload)
+            ref = self.scapy._udp_packet(*self.addrs, 5353, 53, payload)
+            self.assertEqual(bytes(raw), bytes(ref))
+
+    def test_icmp_frame_matches_scapy(self):
+        """Test identyczności ramek ICMP echo."""
+        payload = bytes(range(56))
+        raw = self.raw._icmp_packet(*self.addrs, 8, 4242, 7, payload)
+        ref = self.scapy._icmp_packet(*self.addrs, 8, 4242, 7, payload)
+        self.assertEqual(bytes(raw), bytes(ref))
+
+    def test_flows_identical_across_engines(self):
+        """Test że ten sam seed daje te same bajty w obu silnikach."""
+        def frames(engine):
+            gen = TrafficGenerator(engine=engine, simulated_time=True, start_time=START_TIME,
+                                   seed=7)
+            result = []
+            for protocol in ['TCP', 'UDP', 'ICMP'] * 10:
+                packets, _ = gen.generate_flow(protocol=protocol)
+                result.append([bytes(p) for p in packets])
+            return result
+
+        self.assertEqual(frames('raw'), frames('scapy'))
+
+    def test_raw_frame_has_capture_time(self):
+        """Test że RawFrame niesie czas przechwycenia jak pakiet Scapy."""
+        frame = RawPacketBuilder().udp(*self.addrs, 1, 2, b'x', timestamp=123.5)
+        self.assertIsInstance(frame, RawFrame)
+        self.assertEqual(frame.time, 123.5)
+
+    def test_unknown_engine_rejected(self):
+        """Test odrzucenia nieznanego silnika."""
+        with self.assertRaises(ValueError):
+            TrafficGenerator(engine='dpdk')
+
+
+class VirtualClockTests(TestCase):
+    """Testy trybu czasu symulowanego."""
+
+    def setUp(self):
+        self.gen = TrafficGenerator(simulated_time=True, start_time=START_TIME)
+        self.gen.set_save_to_pcap(False)
+
+    def test_no_wall_clock_sleep(self):
+        """Test że w trybie symulowanym nic nie wywołuje time.sleep."""
+        with mock.patch('time.sleep') as sleep:
+            list(self.gen.generate_normal_traffic(count=20, interval=1.0))
+            list(self.gen.generate_attack_traffic(count=5, interval=0.1))
+            list(self.gen.generate_dos_attack(count=5, interval=0.01))
+        sleep.assert_not_called()
+
+    def test_packet_timestamps_follow_virtual_clock(self):
+        """Test że opóźnienia RTT trafiają do znaczników czasu pakietów."""
+        for engine in ('raw', 'scapy'):
+            self.gen.set_engine(engine)
+            packets, _ = self.gen.generate_flow(protocol='TCP')
+            times = [float(p.time) for p in packets]
+            self.assertEqual(times, sorted(times))
+            self.assertGreaterEqual(times[0], START_TIME)
+            # 10 pakietów, każdy po opóźnieniu co najmniej 1 ms
+            self.assertGreater(times[-1] - times[0], 0.009)
+
+    def test_interval_advances_clock(self):
+        """Test że interval przesuwa zegar zamiast czekać."""
+        list(self.gen.generate_normal_traffic(count=3, interval=60.0))
+        self.assertGreaterEqual(self.gen.clock.now() - START_TIME, 180.0)
+
+    def test_feature_timestamp_uses_virtual_clock(self):
+        """Test że timestamp w features pochodzi z zegara symulowanego."""
+        _, features = self.gen.generate_flow(protocol='UDP')
+        timestamp = datetime.fromisoformat(features['timestamp']).timestamp()
+        self.assertAlmostEqual(timestamp, self.gen.clock.now(), places=3)
+
+
+class ParallelGenerationTests(TestCase):
+    """Testy równoległego generowania zbiorów z deterministycznymi seedami."""
+
+    def _read(self, path):
+        with RawPcapReader(path) as reader:
+            return [(meta.sec, meta.usec, data) for data, meta in reader]
+
+    def test_seeded_generators_are_reproducible(self):
+        """Test że dwa generatory z tym samym seedem dają te same przepływy."""
+        def flows():
+            gen = TrafficGenerator(simulated_time=True, start_time=START_TIME, seed=3)
+            return [[bytes(p) for p in gen.generate_flow()[0]] for _ in range(10)]
+
+        self.assertEqual(flows(), flows())
+
+    def test_shard_seeds_and_split(self):
+        """Test wyprowadzania seedów i podziału przepływów."""
+        self.assertEqual(shard_seeds(1, 4), shard_seeds(1, 4))
+        self.assertEqual(len(set(shard_seeds(1, 4))), 4)
+        self.assertEqual(split_flows(10, 4), [3, 3, 2, 2])
+
+    def _in_timezone(self, tz, func, *args, **kwargs):
+        try:
+            with mock.patch.dict(os.environ, {'TZ': tz}):
+                time.tzset()
+                return func(*args, **kwargs)
+        finally:
+            time.tzset()
+
+    def test_dataset_is_deterministic_and_time_ordered(self):
+        """Test że ten sam seed i liczba workerów dają identyczny zbiór (niezależnie od strefy czasowej)."""
+        with tempfile.TemporaryDirectory() as first, tempfile.TemporaryDirectory() as second:
+            a = self._in_timezone('UTC', generate_dataset, 30, workers=2, seed=11, output_folder=first)
+            b = self._in_timezone('Asia/Tokyo', generate_dataset, 30, workers=2, seed=11,
+                                  output_folder=second)
+
+            records = self._read(a['filepath'])
+            self.assertEqual(records, self._read(b['filepath']))
+            self.assertEqual(len(records), a['packet_count'])
+            times = [(sec, usec) for sec, usec, _ in records]
+            self.assertEqual(times, sorted(times))
+            self.assertEqual(os.listdir(first), [os.path.basename(a['filepath'])])
+
+
+    def test_dataset_defaults_to_pcap_folder(self):
+        """Test zapisu zbioru bez output_folder do PCAP_FOLDER."""
+        from django.test import override_settings
+
+        with tempfile.TemporaryDirectory() as folder, override_settings(PCAP_FOLDER=folder):
+            result = generate_dataset(4, workers=1, seed=2)
+            self.assertEqual(os.path.dirname(result['filepath']), folder)
+
+class RotatingPcapWriterTests(TestCase):
+    """Testy strumieniowego zapisu .pcap z rotacją."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.folder = self.tmp.name
+        self.gen = TrafficGenerator(simulated_time=True, start_time=START_TIME, seed=5,
+                                    background_writer=False)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_rotation_by_packet_count(self):
+        """Test rotacji po liczbie pakietów (przepływ nie jest dzielony)."""
+        writer = RotatingPcapWriter(self.folder, max_packets=20)
+        saved = []
+        for _ in range(12):
+            info = writer.write(self.gen.generate_flow(protocol='TCP')[0])
+            if info:
+                saved.append(info)
+        self.assertTrue(saved)
+        for info in saved:
+            self.assertGreaterEqual(info['packet_count'], 20)
+            self.assertEqual(len(rdpcap(info['filepath'])), info['packet_count'])
+
+    def test_rotation_by_size(self):
+        """Test rotacji po rozmiarze pliku."""
+        writer = RotatingPcapWriter(self.folder, max_packets=None, max_bytes=2000)
+        info = None
+        while info is None:
+            info = writer.write(self.gen.generate_flow(protocol='UDP')[0])
+        self.assertGreaterEqual(os.path.getsize(info['filepath']), 2000)
+        self.assertEqual(info['size_bytes'], os.path.getsize(info['filepath']))
+
+    def test_rotation_by_time_window(self):
+        """Test rotacji po oknie czasowym."""
+        writer = RotatingPcapWriter(self.folder, max_packets=None, max_seconds=5)
+        with mock.patch('traffic_generator.pcap_writer.time.monotonic', return_value=100.0):
+            self.assertIsNone(writer.write(self.gen.generate_flow(protocol='ICMP')[0]))
+        with mock.patch('traffic_generator.pcap_writer.time.monotonic', return_value=106.0):
+            info = writer.write(self.gen.generate_flow(protocol='ICMP')[0])
+        self.assertEqual(info['packet_count'], 4)
+
+    def test_writers_sharing_folder_do_not_overwrite(self):
+        """Test że dwa writery z tym samym prefiksem w jednym katalogu nie nadpisują plików."""
+        first = RotatingPcapWriter(self.folder, max_packets=None)
+        second = RotatingPcapWriter(self.folder, max_packets=None)
+        for writer in (first, second):
+            writer.write(self.gen.generate_flow(protocol='UDP')[0])
+        names = {first.rotate()['filename'], second.rotate()['filename']}
+        self.assertEqual(len(names), 2)
+        self.assertEqual(set(os.listdir(self.folder)), names)
+
+    def test_open_file_is_partial_until_closed(self):
+        """Test że otwarty plik ma sufiks .part, a po zamknięciu docelową nazwę."""
+        writer = RotatingPcapWriter(self.folder, max_packets=1000)
+        packets = self.gen.generate_flow(protocol='TCP')[0]
+        writer.write(packets)
+        self.assertTrue(all(name.endswith(PARTIAL_SUFFIX) for name in os.listdir(self.folder)))
+
+        info = writer.rotate()
+        self.assertEqual(os.listdir(self.folder), [info['filename']])
+        stored = rdpcap(info['filepath'])
+        self.assertEqual([bytes(p) for p in stored], [bytes(p) for p in packets])
+        self.assertEqual([float(p.time) for p in stored],
+                         [round(float(p.time), 6) for p in packets])
+        self.assertIsNone(writer.rotate())
+
+    def test_generator_streams_without_buffering(self):
+        """Test że generator nie trzyma pakietów w pamięci między rotacjami."""
+        self.gen.set_pcap_folder(self.folder)
+        self.gen.packets_per_file = 30
+        saved = [info for _, info in self.gen.generate_normal_traffic(count=20, interval=0)
+                 if info]
+        self.assertTrue(saved)
+        self.assertFalse(hasattr(self.gen, 'packet_buffer'))
+        status = self.gen.get_buffer_status()
+        self.assertLess(status['buffer_size'], 30 + 10)
+        self.assertEqual(status['files_saved'], len(saved))
+
+        final = self.gen.stop()
+        if status['buffer_size']:
+            self.assertEqual(final['packet_count'], status['buffer_size'])
+
+
+class _BlockingWriter:
+    """Atrapa RotatingPcapWriter, której zapis czeka na zwolnienie."""
+
+    def __init__(self):
+        self.fsync = False
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.batches = []
+
+    def write(self, packets):
+        self.started.set()
+        self.release.wait(5)
+        self.batches.append(len(packets))
+        return None
+
+    def rotate(self):
+        return None
+
+    def status(self):
+        return {}
+
+
+class BackgroundPcapWriterTests(TestCase):
+    """Testy zapisu w tle z ograniczoną kolejką."""
+
+    def _writer(self, policy):
+        writer = _BlockingWriter()
+        background = BackgroundPcapWriter(writer, max_queue_packets=4, policy=policy)
+        # Pierwsza paczka zajmuje wątek zapisu, kolejne czekają w kolejce
+        background.write([b'a'])
+        writer.started.wait(5)
+        return writer, background
+
+    def test_drop_newest(self):
+        """Test odrzucania nowych paczek przy pełnej kolejce."""
+        writer, background = self._writer('drop_newest')
+        background.write([b'x'] * 3)
+        background.write([b'y'] * 2)
+        status = background.status()
+        self.assertEqual(status['queue_depth'], 3)
+        self.assertEqual(status['dropped_packets'], 2)
+        writer.release.set()
+        background.close()
+        self.assertEqual(writer.batches, [1, 3])
+
+    def test_drop_oldest(self):
+        """Test wyrzucania najstarszych paczek przy pełnej kolejce."""
+        writer, background = self._writer('drop_oldest')
+        background.write([b'x'] * 3)
+        background.write([b'y'] * 2)
+        self.assertEqual(background.status()['dropped_packets'], 3)
+        writer.release.set()
+        background.close()
+        self.assertEqual(writer.batches, [1, 2])
+
+    def test_block_waits_for_space(self):
+        """Test że polityka block wstrzymuje producenta do zwolnienia miejsca."""
+        writer, background = self._writer('block')
+        background.write([b'x'] * 3)
+        producer = threading.Thread(target=background.write, args=([b'y'] * 2,))
+        producer.start()
+        producer.join(0.2)
+        self.assertTrue(producer.is_alive())
+        writer.release.set()
+        producer.join(5)
+        self.assertFalse(producer.is_alive())
+        background.close()
+        self.assertEqual(writer.batches, [1, 3, 2])
+        self.assertEqual(background.status()['dropped_packets'], 0)
+
+    def test_failed_batch_does_not_wedge_writer(self):
+        """Test że wyjątek przy zapisie paczki nie blokuje drain() ani kolejnych zapisów."""
+        writer = _BlockingWriter()
+        writer.release.set()
+        background = BackgroundPcapWriter(writer, max_queue_packets=10)
+        with mock.patch.object(writer, 'write', side_effect=[TypeError('zła ramka'), None]), \
+                self.assertLogs('traffic_generator.pcap_writer', 'ERROR'):
+            background.write([b'x'] * 2)
+            self.assertTrue(background.drain(5))
+            background.write([b'y'])
+            self.assertTrue(background.drain(5))
+        self.assertEqual(background.status()['dropped_packets'], 2)
+        background.close()
+
+    def test_generator_background_writes_everything(self):
+        """Test że po stop() wszystkie pakiety są w plikach, a status ma liczniki kolejki."""
+        with tempfile.TemporaryDirectory() as folder:
+            gen = TrafficGenerator(simulated_time=True, start_time=START_TIME, seed=9)
+            gen.set_pcap_folder(folder)
+            gen.packets_per_file = 25
+            generated = 0
+            for _ in range(15):
+                packets, _ = gen.generate_flow()
+                generated += len(packets)
+                gen.add_packets_to_buffer(packets)
+
+            status = gen.get_buffer_status()
+            self.assertTrue(status['background_writer'])
+            self.assertIn('queue_depth', status)
+            self.assertEqual(status['dropped_packets'], 0)
+
+            gen.stop()
+            stored = sum(len(rdpcap(os.path.join(folder, name))) for name in os.listdir(folder))
+            self.assertEqual(stored, generated)
+
+    def test_every_rotated_file_is_reported(self):
+        """Test że każdy plik zamknięty w tle (rotacja i stop()) trafia do callbacku."""
+        with tempfile.TemporaryDirectory() as folder:
+            gen = TrafficGenerator(simulated_time=True, start_time=START_TIME, seed=1)
+            gen.set_pcap_folder(folder)
+            reported = []
+            gen.set_file_callback(reported.append)
+            for _, saved_file in gen.generate_attack_traffic(count=100, interval=0):
+                self.assertIsNone(saved_file)
+            self.assertTrue(gen.wait_for_writes(5))
+            self.assertEqual(len(reported), 2)
+
+            final = gen.stop()
+            self.assertIsNone(final)
+            gen.add_packets_to_buffer(gen.generate_flow()[0])
+            final = gen.stop()
+            self.assertEqual(reported[-1], final)
+            self.assertEqual(sorted(info['filename'] for info in reported), sorted(os.listdir(folder)))
+
+    def test_generate_attack_view_notifies_every_file(self):
+        """Test widoku ataku: własne pliki ataku zgłoszone do analytics i policzone."""
+        from analytic_pipline.models import PcapFile
+        from . import views
+
+        shared = views.traffic_generator
+        previous_folder = shared.pcap_folder
+        with tempfile.TemporaryDirectory() as folder:
+            # Zmiana katalogu zamyka plik pozostały po innych testach
+            shared.set_pcap_folder(folder)
+            try:
+                shared.add_packets_to_buffer(shared.generate_flow()[0])
+                attack_generator = views._attack_generator
+
+                def rotate_shared_during_attack(attack_type, on_file):
+                    # Plik współdzielonego generatora (np. podglądu SSE) zamykany w trakcie ataku
+                    shared.flush_buffer()
+                    return attack_generator(attack_type, on_file)
+
+                with mock.patch.object(views.analytics_notifier, 'notify') as notify, \
+                        mock.patch.object(views, '_attack_generator', rotate_shared_during_attack):
+                    data = self.client.get(reverse('traffic_generator:generate_attack'),
+                                           {'type': 'dos', 'count': 120}).json()
+            finally:
+                shared.set_pcap_folder(previous_folder)
+            self.assertEqual(data['pcap_files_saved'], 3)
+            shared_file, *attack_files = [call.args[0] for call in notify.call_args_list]
+            self.assertTrue(shared_file['filename'].startswith('traffic_'))
+            self.assertEqual([info['packet_count'] for info in attack_files], [50, 50, 20])
+            self.assertTrue(all(info['filename'].startswith('attack_dos_') for info in attack_files))
+            self.assertEqual(sorted(os.listdir(folder)),
+                             sorted(info['filename'] for info in [shared_file, *attack_files]))
+            self.assertEqual(PcapFile.objects.filter(status=PcapFile.Status.NEW).count(), 4)
+
+
+class InProcessAnalysisTests(TestCase):
+    """Testy analizy pakietów w procesie (bez plików .pcap)."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.gen = TrafficGenerator(simulated_time=True, start_time=START_TIME, seed=5,
+                                    background_writer=False)
+        self.gen.set_pcap_folder(self.tmp.name)
+        self.gen.set_analysis_mode(True, save_to_pcap=False)
+
+    def test_flows_scored_without_touching_disk(self):
+        """Test że przepływy są oceniane modelem, a na dysk nic nie trafia."""
+        results = list(self.gen.generate_normal_traffic(count=10, interval=0))
+        self.gen.stop()
+
+        for features, saved_file in results:
+            self.assertIsNone(saved_file)
+            # Przepływy ICMP są pomijane przez ekstraktor cech (jak w CICFlowMeter)
+            if features['protocol'] == 'ICMP':
+                self.assertIsNone(features['prediction'])
+                continue
+            self.assertEqual(features['prediction']['flows'], 1)
+            self.assertEqual(len(features['prediction']['confidence_scores']), 1)
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_attack_packets_scored(self):
+        """Test oceny pakietów generatorów ataków."""
+        for features, _ in self.gen.generate_attack_traffic(count=3, interval=0):
+            self.assertEqual(features['prediction']['flows'], 1)
+        for features, _ in self.gen.generate_dos_attack(count=3, interval=0):
+            self.assertEqual(features['prediction']['flows'], 1)
+
+    def test_pcap_as_side_output(self):
+        """Test że zapis .pcap można zostawić jako wyjście poboczne."""
+        self.gen.set_analysis_mode(True, save_to_pcap=True)
+        features, _ = next(self.gen.generate_normal_traffic(count=1, interval=0))
+        info = self.gen.stop()
+
+        self.assertIn('prediction', features)
+        self.assertEqual(info['packet_count'], features['packet_count'])
+
+
+    def test_live_mode_scores_closed_flows_in_batches(self):
+        """Test trybu live: przepływy zamknięte trafiają do oceny w mikro-partiach."""
+        from analytic_pipline.flow_features import feature_matrix
+        from analytic_pipline.micro_batch import MicroBatchScorer
+        from analytic_pipline.traffic_predictor import get_rbf_scorer
+
+        # Ocena w wątku kolejki bez zapisu do bazy (poza transakcją testu)
+        scorer = get_rbf_scorer()
+        batcher = MicroBatchScorer(lambda df: scorer.predict(feature_matrix(df)),
+                                   batch_size=8, max_delay_ms=50)
+        self.addCleanup(batcher.close)
+        self.gen.set_analysis_mode(False, live=True, idle_timeout=5, batcher=batcher)
+        expected = 0
+        for features, _ in self.gen.generate_normal_traffic(count=30, interval=1.0):
+            expected += features['protocol'] != 'ICMP'
+            self.assertIsNone(features['prediction'])
+        self.assertGreater(self.gen.get_buffer_status()['flow_table']['closed_flows']['fin'], 0)
+        self.gen.stop()
+
+        status = self.gen.get_buffer_status()
+        self.assertEqual(status['flow_table']['active_flows'], 0)
+        self.assertEqual(status['scoring']['scored_flows'], expected)
+        self.assertEqual(status['scoring']['pending_flows'], 0)
+        self.assertIsNotNone(status['scoring']['latency']['p99_ms'])
+
+class _FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class _RecordingSession:
+    """Atrapa requests.Session: zapisuje żądania, może blokować i zwracać błędy."""
+
+    def __init__(self, statuses=()):
+        self.statuses = list(statuses)
+        self.release = threading.Event()
+        self.release.set()
+        self.started = threading.Event()
+        self.payloads = []
+
+    def post(self, url, json=None, timeout=None):
+        self.started.set()
+        self.release.wait(5)
+        self.payloads.append(json)
+        status = self.statuses.pop(0) if self.statuses else 200
+        if status is None:
+            import requests
+            raise requests.ConnectionError('connection refused')
+        return _FakeResponse(status)
+
+
+class AnalyticsNotifierTests(TestCase):
+    """Testy nieblokującego powiadamiania analytics."""
+
+    def _notifier(self, session, **kwargs):
+        notifier = AnalyticsNotifier('http://analytics.test/process/', session=session,
+                                     backoff=0.001, **kwargs)
+        self.addCleanup(notifier.close, 5)
+        return notifier
+
+    def test_notify_does_not_wait_and_coalesces(self):
+        """Test że notify nie czeka na analytics, a zaległe pliki idą jednym żądaniem."""
+        session = _RecordingSession()
+        session.release.clear()
+        notifier = self._notifier(session)
+
+        notifier.notify({'filename': 'a.pcap'})
+        session.started.wait(5)
+        for name in ('b.pcap', 'c.pcap', 'd.pcap'):
+            notifier.notify({'filename': name})
+        self.assertEqual(notifier.status()['pending_files'], 3)
+
+        session.release.set()
+        self.assertTrue(notifier.drain(5))
+        self.assertEqual([p['filenames'] for p in session.payloads],
+                         [['a.pcap'], ['b.pcap', 'c.pcap', 'd.pcap']])
+        self.assertEqual(notifier.status()['sent_requests'], 2)
+
+    def test_retries_with_backoff(self):
+        """Test ponawiania po błędzie połączenia i odpowiedzi 5xx."""
+        session = _RecordingSession(statuses=[None, 503, 200])
+        notifier = self._notifier(session, max_retries=3)
+
+        notifier.notify({'filename': 'a.pcap'})
+        self.assertTrue(notifier.drain(5))
+
+        status = notifier.status()
+        self.assertEqual(len(session.payloads), 3)
+        self.assertEqual(status['retries'], 2)
+        self.assertEqual(status['sent_files'], 1)
+
+    def test_gives_up_after_max_retries(self):
+        """Test rezygnacji po wyczerpaniu ponowień."""
+        session = _RecordingSession(statuses=[500, 500])
+        notifier = self._notifier(session, max_retries=1)
+
+        notifier.notify({'filename': 'a.pcap'})
+        self.assertTrue(notifier.drain(5))
+        self.assertEqual(notifier.status()['failed_files'], 1)
+
+    def test_bounded_queue_drops_oldest(self):
+        """Test odrzucania najstarszych plików przy pełnej kolejce."""
+        session = _RecordingSession()
+        session.release.clear()
+        notifier = self._notifier(session, max_pending=2)
+
+        notifier.notify({'filename': 'a.pcap'})
+        session.started.wait(5)
+        for name in ('b.pcap', 'c.pcap', 'd.pcap'):
+            notifier.notify({'filename': name})
+
+        session.release.set()
+        self.assertTrue(notifier.drain(5))
+        self.assertEqual(notifier.status()['dropped_files'], 1)
+        self.assertEqual(session.payloads[-1]['filenames'], ['c.pcap', 'd.pcap'])
+
+
+class _ScriptedTraffic:
+    """Zastępuje TrafficGenerator: count przepływów {'flow': i} (None - bez końca)."""
+
+    def __init__(self, count=None):
+        self.count = count
+        self.calls = 0
+        self.closed = threading.Event()
+
+    def generate_normal_traffic(self, count=None, interval=1.0):
+        self.calls += 1
+        try:
+            for i in itertools.count() if self.count is None else range(self.count):
+                yield {'flow': i}, None
+                if self.count is None:
+                    time.sleep(0.001)
+        finally:
+            self.closed.set()
+
+
+def _parse_events(chunks):
+    events = []
+    for chunk in chunks:
+        if isinstance(chunk, bytes):
+            chunk = chunk.decode()
+        if chunk.startswith(':'):
+            continue
+        fields = dict(line.split(': ', 1) for line in chunk.strip().splitlines())
+        events.append((fields.get('event', 'message'), json.loads(fields['data'])))
+    return events
+
+
+class TrafficStreamTests(TestCase):
+    """Testy podglądu ruchu dla wielu widzów (live_stream.TrafficStream)."""
+
+    def test_one_producer_for_all_viewers(self):
+        """Test jednego producenta: każdy widz dostaje te same przepływy."""
+        traffic = _ScriptedTraffic(count=5)
+        stream = TrafficStream(traffic, max_pending=10)
+        viewers = [stream.broadcaster.subscribe() for _ in range(50)]
+        stream.ensure_running()
+        self.assertTrue(traffic.closed.wait(5))
+
+        expected = [('message', {'flow': i}) for i in range(5)] + [('stopped', {'flows': 5})]
+        for viewer in viewers:
+            self.assertEqual(_parse_events(viewer.get(0)), expected)
+        self.assertEqual(traffic.calls, 1)
+        self.assertEqual(stream.status()['published'], 6)
+
+    def test_slow_viewer_drops_oldest(self):
+        """Test że wolny widz traci najstarsze przepływy zamiast blokować producenta."""
+        traffic = _ScriptedTraffic(count=10)
+        stream = TrafficStream(traffic, max_pending=3)
+        viewer = stream.broadcaster.subscribe()
+        stream.ensure_running()
+        self.assertTrue(traffic.closed.wait(5))
+
+        self.assertEqual(_parse_events(viewer.get(0)), [
+            ('dropped', {'count': 8}), ('message', {'flow': 8}), ('message', {'flow': 9}),
+            ('stopped', {'flows': 10})])
+
+    def test_producer_stops_without_viewers(self):
+        """Test zatrzymania producenta po odejściu ostatniego widza i ponownego startu."""
+        traffic = _ScriptedTraffic()
+        stream = TrafficStream(traffic)
+        events = stream.events(heartbeat=1)
+        self.assertEqual(_parse_events([next(events)]), [('message', {'flow': 0})])
+        events.close()
+        self.assertTrue(traffic.closed.wait(5))
+        for _ in range(100):
+            if not stream.running:
+                break
+            time.sleep(0.01)
+        self.assertFalse(stream.running)
+
+        events = stream.events(heartbeat=1)
+        next(events)
+        events.close()
+        self.assertEqual(traffic.calls, 2)
+
+    def test_stream_view_wsgi_and_asgi(self):
+        """Test widoku SSE pod WSGI (generator) i ASGI (korutyna)."""
+        from asgiref.sync import async_to_sync
+        from django.test import AsyncClient
+        from . import views
+
+        stream = TrafficStream(_ScriptedTraffic(), max_pending=10)
+        with mock.patch.object(views, 'traffic_stream', stream):
+            response = self.client.get(reverse('traffic_generator:stream_packets'))
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+            self.assertFalse(response.is_async)
+            self.assertEqual(_parse_events([next(iter(response.streaming_content))]),
+                             [('message', {'flow': 0})])
+            response.close()
+
+            async def first_event():
+                response = await AsyncClient().get(reverse('traffic_generator:stream_packets'))
+                chunks = aiter(response.streaming_content)
+                chunk = await anext(chunks)
+                await chunks.aclose()
+                return response.is_async, chunk
+
+            is_async, chunk = async_to_sync(first_event)()
+        self.assertTrue(is_async)
+        [(kind, data)] = _parse_events([chunk])
+        self.assertEqual(kind, 'message')
+        self.assertIn('flow', data)
+
+
+class AttackBurstTests(TestCase):
+    """Testy masowego generowania ataków (attack_burst.AttackBurst)."""
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def _read(self, paths):
+        from analytic_pipline.pcap_reader import read_pcap_packets
+        return [read_pcap_packets(path) for path in paths]
+
+    def test_syn_flood_to_pcap(self):
+        """Test SYN flood: pakiety w plikach z rotacją, podsumowanie bez listy pakietów."""
+        import numpy as np
+
+        files = []
+        summary = AttackBurst('syn_flood', 2500, self.folder, seed=3, packets_per_file=1000,
+                              on_file=files.append).run()
+        self.assertEqual(summary['packets_generated'], 2500)
+        self.assertEqual(len(summary['pcap_files']), 3)
+        self.assertEqual([info['packet_count'] for info in files], [1000, 1000, 500])
+
+        table = np.concatenate(self._read(summary['pcap_files']))
+        self.assertEqual(len(table), 2500)
+        self.assertTrue((table['flags'] == 0x02).all())
+        self.assertEqual(len(np.unique(table['dst_ip'])), 1)
+        self.assertGreater(len(np.unique(table['src_ip'])), 2400)
+        self.assertEqual(int(table['length'].sum()), summary['bytes_generated'])
+        # Bez pps znaczniki rosną w obrębie porcji, a nie jeden czas na całą porcję
+        self.assertTrue((np.diff(table['ts']) >= 0).all())
+        self.assertGreater(len(np.unique(table['ts'])), len(files))
+
+    def test_dos_details_and_seed(self):
+        """Test szczegółów pakietów DoS i powtarzalności dla tego samego seeda."""
+        burst = AttackBurst('dos', 50, self.folder, seed=5)
+        details = list(burst.iter_details())
+        self.assertEqual(len(details), 50)
+        self.assertEqual({d['source_ip'] for d in details}, {details[0]['source_ip']})
+        self.assertEqual(details[0]['dest_port'], 80)
+        self.assertEqual(details[0]['packet_size'], 14 + 20 + 20 + 1400)
+        self.assertEqual(burst.summary()['packets_generated'], 50)
+
+        again = AttackBurst('dos', 50, tempfile.mkdtemp(), seed=5)
+        self.assertEqual([d['source_port'] for d in again.iter_details()],
+                         [d['source_port'] for d in details])
+
+    def test_pacing_hits_target_rate(self):
+        """Test tempa: zadane pakiety/s według zegara monotonicznego i znaczniki co 1/pps."""
+        import numpy as np
+
+        summary = AttackBurst('syn_flood', 400, self.folder, pps=2000, seed=1).run()
+        self.assertGreaterEqual(summary['elapsed_seconds'], 0.19)
+        self.assertAlmostEqual(summary['achieved_pps'], 2000, delta=200)
+
+        summary = AttackBurst('syn_flood', 1000, tempfile.mkdtemp(), pps=100, simulated=True,
+                              seed=1).run()
+        self.assertLess(summary['elapsed_seconds'], 5)
+        [table] = self._read(summary['pcap_files'])
+        self.assertTrue(np.allclose(np.diff(table['ts']), 0.01, atol=1e-5))
+
+    def test_invalid_parameters(self):
+        """Test odrzucenia nieznanego typu, zerowej liczby i simulated bez pps."""
+        for kwargs in ({'attack_type': 'smurf', 'count': 1}, {'attack_type': 'dos', 'count': 0},
+                       {'attack_type': 'dos', 'count': 1, 'simulated': True}):
+            with self.assertRaises(ValueError):
+                AttackBurst(folder=self.folder, **kwargs)
+
+    def test_bulk_endpoint_summary_and_ndjson(self):
+        """Test endpointu: podsumowanie JSON, strumień NDJSON i rejestracja plików."""
+        from django.test import override_settings
+        from analytic_pipline.models import PcapFile
+        from . import views
+
+        url = reverse('traffic_generator:generate_attack_bulk')
+        with override_settings(PCAP_FOLDER=self.folder), \
+                mock.patch.object(views.analytics_notifier, 'notify') as notify:
+            data = self.client.get(url, {'type': 'syn_flood', 'count': 3000, 'seed': 1}).json()
+            self.assertEqual(data['status'], 'success')
+            self.assertEqual(data['packets_generated'], 3000)
+            self.assertNotIn('packets', data)
+
+            response = self.client.get(url, {'type': 'dos', 'count': 1500, 'format': 'ndjson'})
+            self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+            lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1501)
+        self.assertEqual(json.loads(lines[0])['attack_type'], 'DoS / HTTP Flood')
+        self.assertEqual(json.loads(lines[-1])['summary']['packets_generated'], 1500)
+        self.assertEqual(notify.call_count, 2)
+        self.assertEqual(PcapFile.objects.filter(status=PcapFile.Status.NEW).count(), 2)
+
+        for params in ({'type': 'smurf'}, {'count': 'x'}, {'format': 'xml'},
+                       {'count': views.MAX_BULK_ATTACK_PACKETS + 1}):
+            self.assertEqual(self.client.get(url, params).status_code, 400, params)
+
+
+class RateSchedulerTests(TestCase):
+    """Testy generowania ruchu z zadaną intensywnością (scheduler.RateScheduler)."""
+
+    def _scheduler(self, rate, simulated=True, **kwargs):
+        gen = TrafficGenerator(simulated_time=True, seed=kwargs.pop('seed', 1), background_writer=False)
+        gen.set_save_to_pcap(False)
+        clock = VirtualClock(0) if simulated else None
+        return RateScheduler(gen, rate, clock=clock, start_time=START_TIME, **kwargs)
+
+    def test_token_bucket(self):
+        """Test kubełka: dług spłacany w tempie rate, nadwyżka ponad capacity liczona jako lost."""
+        bucket = TokenBucket(10, capacity=2, now=0)
+        bucket.consume(1)
+        self.assertAlmostEqual(bucket.delay(), 0.1)
+        bucket.refill(0.1)
+        self.assertEqual(bucket.delay(), 0)
+        bucket.set_rate(100, 1.1)
+        self.assertEqual(bucket.tokens, 2)
+        self.assertAlmostEqual(bucket.lost, 8)
+
+    def test_simulated_rate_is_exact(self):
+        """Test zegara wirtualnego: liczba przepływów i znaczniki czasu zgodne z tempem."""
+        scheduler = self._scheduler(200)
+        starts = [float(packets[0].time) for packets, _ in scheduler.iter_flows(duration=2)]
+        report = scheduler.report()
+        self.assertEqual(report['flows'], 400)
+        self.assertEqual(report['accuracy'], 1.0)
+        self.assertEqual(report['target_rate'], 200)
+        self.assertEqual(starts[0], START_TIME)
+        self.assertAlmostEqual(starts[200], START_TIME + 1, places=6)
+
+        again = self._scheduler(200)
+        self.assertEqual([f['source_ip'] for _, f in again.iter_flows(duration=2)],
+                         [f['source_ip'] for _, f in self._scheduler(200).iter_flows(duration=2)])
+
+    def test_mix_and_mbps(self):
+        """Test mixu usług i tempa w Mbit/s liczonego z rozmiaru przepływów."""
+        report = self._scheduler(2, unit='mbps', mix=parse_mix('http=60,dns=30,icmp=10')).run(duration=5)
+        self.assertAlmostEqual(report['achieved_mbps'], 2, delta=0.02)
+        shares = {key: count / report['flows'] for key, count in report['by_service'].items()}
+        self.assertEqual(set(shares), {'TCP/80', 'UDP/53', 'ICMP/*'})
+        self.assertAlmostEqual(shares['TCP/80'], 0.6, delta=0.05)
+        self.assertAlmostEqual(shares['ICMP/*'], 0.1, delta=0.03)
+
+    def test_profiles(self):
+        """Test profili: kształt mnożnika, parsowanie i tempo w paczkach."""
+        diurnal = parse_profile('diurnal:period=100,low=0.25')
+        self.assertIsInstance(diurnal, DiurnalProfile)
+        self.assertAlmostEqual(diurnal(0), 0.25)
+        self.assertAlmostEqual(diurnal(50), 1.0)
+        burst = BurstProfile(every=2, duration=0.5, factor=4)
+        self.assertEqual([burst(t) for t in (0, 0.4, 0.6, 2.1)], [4, 4, 1, 4])
+
+        report = self._scheduler(100, profile=burst).run(duration=4)
+        self.assertEqual(report['target_rate'], 175)
+        self.assertAlmostEqual(report['accuracy'], 1.0, delta=0.01)
+
+        for spec in ('sine', 'diurnal:low=2', 'burst:every=x', 'burst:size=3'):
+            with self.assertRaises(ValueError, msg=spec):
+                parse_profile(spec)
+        for spec in ('http=1,telnet=1', 'http=-1', ''):
+            with self.assertRaises(ValueError, msg=spec):
+                parse_mix(spec)
+
+    def test_wall_clock_accuracy(self):
+        """Test zegara monotonicznego: osiągnięte tempo w granicach 2% celu."""
+        report = self._scheduler(150, simulated=False).run(duration=1)
+        self.assertAlmostEqual(report['elapsed_seconds'], 1, delta=0.05)
+        self.assertAlmostEqual(report['accuracy'], 1.0, delta=0.02)
+        self.assertEqual(report['lost'], 0)
+
+    def test_command_writes_to_pcap_folder(self):
+        """Test komendy run_traffic_schedule: pliki bez --output trafiają do PCAP_FOLDER."""
+        from io import StringIO
+        from django.core.management import call_command
+        from django.test import override_settings
 
-# Create your tests here.
+        folder = tempfile.mkdtemp()
+        with override_settings(PCAP_FOLDER=folder):
+            call_command('run_traffic_schedule', '--rate', '100', '--max-flows', '20', '--simulated',
+                         '--start-time', str(START_TIME), '--seed', '1', '--no-register',
+                         stdout=StringIO())
+        self.assertTrue(any(name.endswith('.pcap') for name in os.listdir(folder)))
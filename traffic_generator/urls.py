@@ -12,6 +12,7 @@ urlpatterns = [
     path('api/start/', views.start_generator, name='start_generator'),
     path('api/stop/', views.stop_generator, name='stop_generator'),
     path('api/attack/', views.generate_attack, name='generate_attack'),
+    path('api/attack/bulk/', views.generate_attack_bulk, name='generate_attack_bulk'),
     path('api/analytics/', views.analytics_status, name='analytics_status'),
     path('analytics/', include('analytic_pipline.urls')),
 ]
@@ -1,30 +1,54 @@
 import json
+import os
+from django.core.handlers.asgi import ASGIRequest
 from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
-import requests
-from .generator import traffic_generator
+from django.conf import settings
+from .attack_burst import AttackBurst
+from .generator import TrafficGenerator, traffic_generator
+from .live_stream import TrafficStream
+from .notifier import AnalyticsNotifier
 
 # URL do analytic_pipeline API (do konfiguracji)
 ANALYTICS_API_URL = "http://localhost:8000/analytics/process/"
+analytics_notifier = AnalyticsNotifier(ANALYTICS_API_URL)
+
+# 'in_process' - generator sam ocenia pakiety, pliki .pcap są tylko wyjściem pobocznym
+# 'live' - pakiety trafiają do tablicy przepływów, oceniane są przepływy zamknięte
+_analysis_mode = getattr(settings, 'TRAFFIC_ANALYSIS_MODE', 'pcap')
+traffic_generator.set_analysis_mode(
+    _analysis_mode == 'in_process',
+    live=_analysis_mode == 'live',
+    idle_timeout=getattr(settings, 'ANALYTICS_FLOW_IDLE_TIMEOUT', None),
+)
+
+def register_pcap_file(pcap_info):
+    """
+    Dodaje zamknięty plik do katalogu analytic_pipline (PcapFile) i zgłasza go
+    do analizy. Wołane dla każdego pliku, także zamkniętego przez zapis w tle.
+    """
+    from analytic_pipline.pcap_catalog import register_pcap
+    register_pcap(pcap_info, analyzed=traffic_generator.analyze_in_process)
+    notify_analytics(pcap_info)
+
+
+if os.path.abspath(settings.PCAP_FOLDER) != os.path.abspath(traffic_generator.pcap_folder):
+    traffic_generator.set_pcap_folder(settings.PCAP_FOLDER)
+traffic_generator.set_file_callback(register_pcap_file)
 
 def notify_analytics(pcap_info):
     """
-    Wysyła informacje o nowym pliku pcap do analytic_pipeline przez API.
-    Na razie tylko loguje - do pełnej implementacji po stronie analytics.
+    Zgłasza nowy plik pcap do analytic_pipeline przez API.
+    Nie blokuje - plik trafia do kolejki AnalyticsNotifier, który wysyła
+    paczki nazw plików w tle.
     """
-    if not pcap_info:
+    if not pcap_info or traffic_generator.analyze_in_process:
         return
     
     print(f"[PCAP] Wysyłam do analyics: {pcap_info.get('filename')} ({pcap_info.get('packet_count')} packets)")
-    
-    # TODO: Odkomentuj gdy analytic_pipeline będzie miał endpoint API
-    try:
-        response = requests.post(ANALYTICS_API_URL, json=pcap_info, timeout=5)
-        print(f"[PCAP] Analytics retsponse: {response.status_code}")
-    except Exception as e:
-        print(f"[PCAP] Error sending to analytics: {e}")
+    analytics_notifier.notify(pcap_info)
 
 
 def generator(request):
@@ -32,22 +56,22 @@ def generator(request):
     return render(request, 'generator.html')
 
 
+# Jeden producent przepływów dla wszystkich widzów podglądu
+traffic_stream = TrafficStream(traffic_generator)
+
+
 @require_http_methods(["GET"])
 def stream_packets(request):
     """
     Stream pakietów używając Server-Sent Events.
     Automatycznie zapisuje do pcap i przesyła do analytic_pipeline.
+    Wszyscy widzowie dostają przepływy od jednego producenta (live_stream.TrafficStream).
     """
-    def event_stream():
-        for features, saved_file in traffic_generator.generate_normal_traffic(count=None, interval=0.5):
-            response_data = features.copy()
-            if saved_file:
-                response_data['pcap_saved'] = saved_file
-                notify_analytics(saved_file)
-            data = json.dumps(response_data)
-            yield f"data: {data}\n\n"
-    
-    response = StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+    if isinstance(request, ASGIRequest):
+        events = traffic_stream.aevents()
+    else:
+        events = traffic_stream.events()
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
     response['Cache-Control'] = 'no-cache'
     response['X-Accel-Buffering'] = 'no'
     return response
@@ -67,12 +91,9 @@ def start_generator(request):
 @csrf_exempt
 @require_http_methods(["POST"])
 def stop_generator(request):
-    """Zatrzymuje generator i zapisuje pozostałe pakiety."""
+    """Zatrzymuje generator i zapisuje pozostałe pakiety (plik zgłasza register_pcap_file)."""
     saved_file = traffic_generator.stop()
     
-    if saved_file:
-        notify_analytics(saved_file)
-    
     return JsonResponse({
         'status': 'stopped',
         'message': 'Generator zatrzymany.',
@@ -80,24 +101,48 @@ def stop_generator(request):
     })
 
 
+def _attack_generator(attack_type, on_file):
+    """
+    Osobny generator (i własne pliki .pcap) dla jednego żądania ataku, z tym
+    samym katalogiem, rotacją i trybem analizy co traffic_generator. Pliki
+    zamknięte przez atak trafiają do on_file - producent podglądu (SSE), który
+    rotuje pliki współdzielonego generatora, nie zaburza ich liczby.
+    """
+    generator = TrafficGenerator(engine=traffic_generator.engine, background_writer=False)
+    generator.set_pcap_folder(traffic_generator.pcap_folder)
+    generator.packets_per_file = traffic_generator.packets_per_file
+    generator.set_file_prefix(f'attack_{attack_type}')
+    generator.set_analysis_mode(
+        _analysis_mode == 'in_process',
+        live=_analysis_mode == 'live',
+        idle_timeout=getattr(settings, 'ANALYTICS_FLOW_IDLE_TIMEOUT', None),
+    )
+    generator.set_file_callback(on_file)
+    return generator
+
+
 @require_http_methods(["GET"])
 def generate_attack(request):
-    """Generuje symulację ataku."""
+    """Generuje symulację ataku (z cechami każdego pakietu - duże ataki: generate_attack_bulk)."""
     count = int(request.GET.get('count', 10))
     attack_type = request.GET.get('type', 'syn_flood')
     packets = []
     saved_files = []
-    
+
+    def attack_file_closed(pcap_info):
+        saved_files.append(pcap_info)
+        register_pcap_file(pcap_info)
+
+    generator = _attack_generator(attack_type, attack_file_closed)
     if attack_type == 'dos':
-        generator_func = traffic_generator.generate_dos_attack(count=count, interval=0.01)
+        generator_func = generator.generate_dos_attack(count=count, interval=0.01)
     else:
-        generator_func = traffic_generator.generate_attack_traffic(count=count, interval=0.1)
+        generator_func = generator.generate_attack_traffic(count=count, interval=0.1)
     
-    for features, saved_file in generator_func:
+    for features, _ in generator_func:
         packets.append(features)
-        if saved_file:
-            saved_files.append(saved_file)
-            notify_analytics(saved_file)
+    # Ostatni, niepełny plik ataku też trafia do analizy
+    generator.stop()
     
     return JsonResponse({
         'status': 'success',
@@ -108,10 +153,62 @@ def generate_attack(request):
     })
 
 
+# Górny limit pakietów jednego ataku masowego
+MAX_BULK_ATTACK_PACKETS = 10_000_000
+
+
+def _register_attack_file(pcap_info):
+    """Plik ataku masowego nie był oceniany w procesie - zawsze trafia do analytics."""
+    from analytic_pipline.pcap_catalog import register_pcap
+    register_pcap(pcap_info, analyzed=False)
+    analytics_notifier.notify(pcap_info)
+
+
+@require_http_methods(["GET"])
+def generate_attack_bulk(request):
+    """
+    Masowy atak (attack_burst.AttackBurst) zapisywany prosto do .pcap.
+    Parametry: type (syn_flood/dos), count, pps (brak - bez ograniczenia), simulated,
+    seed, format (json - samo podsumowanie, ndjson - wiersz na pakiet i podsumowanie).
+    """
+    try:
+        count = int(request.GET.get('count', 10000))
+        if count > MAX_BULK_ATTACK_PACKETS:
+            raise ValueError(f"Maksymalnie {MAX_BULK_ATTACK_PACKETS} pakietów")
+        pps = float(request.GET['pps']) if request.GET.get('pps') else None
+        seed = int(request.GET['seed']) if request.GET.get('seed') else None
+        output = request.GET.get('format', 'json')
+        if output not in ('json', 'ndjson'):
+            raise ValueError(f"Nieznany format: {output}")
+        burst = AttackBurst(request.GET.get('type', 'syn_flood'), count, settings.PCAP_FOLDER,
+                            pps=pps, simulated=request.GET.get('simulated') in ('1', 'true'),
+                            seed=seed, on_file=_register_attack_file)
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'error': str(e)}, status=400)
+
+    if output == 'json':
+        return JsonResponse({'status': 'success', **burst.run()})
+
+    def ndjson_stream():
+        lines = []
+        for details in burst.iter_details():
+            lines.append(json.dumps(details))
+            if len(lines) >= 1000:
+                yield '\n'.join(lines) + '\n'
+                lines = []
+        lines.append(json.dumps({'summary': burst.summary()}))
+        yield '\n'.join(lines) + '\n'
+
+    return StreamingHttpResponse(ndjson_stream(), content_type='application/x-ndjson')
+
+
 @require_http_methods(["GET"])
 def analytics_status(request):
-    """Zwraca status wysyłania do analytics (placeholder)."""
+    """Zwraca status kolejki powiadomień analytics i oceny w mikro-partiach (tryb live)."""
     return JsonResponse({
         'status': 'ok',
-        'message': 'Analytics integration via API - check analytics app for status'
+        'analyze_in_process': traffic_generator.analyze_in_process,
+        'notifier': analytics_notifier.status(),
+        'stream': traffic_stream.status(),
+        'scoring': traffic_generator.flow_batcher.status() if traffic_generator.flow_batcher else None,
     })